@@ -1,45 +1,61 @@
 """
 Simple Background Scraper for Car Scouting
 
-This module runs a background task every 5 minutes to scrape new car listings
-from MerrJep.com and check for matches against user criteria.
+This module runs a background task to scrape new car listings from Ayvens
+Carmarket and check for matches against user criteria. The interval and depth
+of each cycle are planned from recent listing churn (see
+app.scraper.adaptive_scheduler).
 """
 
 import asyncio
+import json
 import logging
 import time
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from app.core.tracing import traced
 from app.models.base import SessionLocal
-from app.models.automotive import VehicleListing
+from app.scraper.adaptive_scheduler import (
+    AdaptiveScrapeScheduler, ScrapePlan, MODE_FIXED, MODE_DEEP_SWEEP
+)
 from app.scraper.ayvens_scraper import AyvensCarmarketScraper
+from app.scraper.config import scraper_settings
+from app.scraper.known_listings import KnownListingIndex
+from app.scraper.parse_pool import start_parse_pool
+from app.scraper.scheduler import SCRAPE_JOB_ID
 from app.services.automotive_service import AutomotiveService
+from app.services.job_scheduler import JobScheduler, get_job_scheduler
+from app.services.detail_enrichment import DetailEnricher
+from app.services.ingest_pipeline import IngestPipeline
 from app.services.matching_service import VehicleMatchingService
 
 logger = logging.getLogger(__name__)
 
 
 class BackgroundScraper:
-    """Simple background scraper that runs every 5 minutes"""
+    """Background scraper with a churn-driven scraping interval"""
     
     def __init__(self):
         self.ayvens_scraper = AyvensCarmarketScraper()
+        self.adaptive_scheduler = AdaptiveScrapeScheduler()
         self.running = False
         self.last_run = None
+        self.next_plan: Optional[ScrapePlan] = None
         
     async def start(self):
         """Start the background scraping loop"""
         self.running = True
-        logger.info("Starting background scraper - will run every 5 minutes")
+        logger.info("Starting background scraper - interval adapts to listing churn")
         
         while self.running:
             try:
-                await self.run_scraping_cycle()
+                plan = await self.run_scraping_cycle()
+                interval = plan.interval_seconds if plan else 300
                 
-                # Wait 5 minutes (300 seconds)
-                logger.info("Waiting 5 minutes until next scraping cycle...")
-                await asyncio.sleep(300)
+                logger.info(f"Waiting {interval} seconds until next scraping cycle...")
+                await asyncio.sleep(interval)
                 
             except Exception as e:
                 logger.error(f"Error in background scraper: {e}")
@@ -51,88 +67,108 @@ class BackgroundScraper:
         self.running = False
         logger.info("Background scraper stopped")
     
-    async def run_scraping_cycle(self):
-        """Run a single scraping cycle"""
+    @traced("scrape.plan")
+    def plan_next_cycle(self, db) -> ScrapePlan:
+        """Plan interval and depth of the next cycle from recent listing churn"""
+        self.next_plan = self.adaptive_scheduler.plan(db, self.ayvens_scraper.source_name)
+        return self.next_plan
+    
+    def run_scheduled_cycle(self, scheduler: Optional[JobScheduler] = None):
+        """Job scheduler entry point: run a cycle, then move the job to the planned interval
+
+        The parse workers are started by the first cycle, so only the
+        worker that actually scrapes (the scheduler leader) runs them.
+        """
+        start_parse_pool()
+        plan = asyncio.run(self.run_scraping_cycle())
+        if plan and plan.mode != MODE_FIXED:
+            (scheduler or get_job_scheduler()).reschedule(SCRAPE_JOB_ID, plan.interval_seconds)
+    
+    @traced("scrape.cycle", root=True)
+    async def run_scraping_cycle(self, plan: Optional[ScrapePlan] = None) -> Optional[ScrapePlan]:
+        """Run a single scraping cycle, returns the plan for the next one"""
         start_time = datetime.utcnow()
         logger.info(f"Starting scraping cycle at {start_time}")
         
         db = SessionLocal()
         try:
-            # Scrape vehicles from Ayvens Carmarket (exclusive source)
-            logger.info("Scraping vehicles from Ayvens Carmarket...")
-            vehicles = self.ayvens_scraper.scrape_all_listings(max_vehicles=10)
-            
-            if not vehicles:
-                logger.warning("No vehicles found in this cycle - check authentication and website availability")
-                return
+            plan = plan or self.plan_next_cycle(db)
             
-            # Process and save vehicles
-            automotive_service = AutomotiveService(db)
-            matching_service = VehicleMatchingService(db)
-            new_count = 0
-            updated_count = 0
-            notifications_sent = 0
+            # Recently seen listings, loaded once per cycle for the incremental crawl
+            known = None
+            if scraper_settings.ENABLE_INCREMENTAL_CRAWL:
+                known = KnownListingIndex.load(db, self.ayvens_scraper.source_name)
             
-            for vehicle_data in vehicles:
-                try:
-                    # Filter data to only include valid model fields
-                    valid_fields = {
-                        'external_id', 'listing_url', 'make', 'model', 'year', 'price', 'currency',
-                        'mileage', 'fuel_type', 'transmission', 'condition', 'city', 'country',
-                        'source_website', 'source_country', 'scraped_at', 'is_active',
-                        'confidence_score', 'data_quality_score', 'accident_history',
-                        'service_history', 'dealer_name', 'description', 'primary_image_url'
-                    }
-
-                    filtered_data = {k: v for k, v in vehicle_data.items() if k in valid_fields}
-
-                    # Check if vehicle already exists
-                    existing = db.query(VehicleListing).filter(
-                        VehicleListing.external_id == filtered_data.get('external_id')
-                    ).first()
-
-                    if existing:
-                        # Update existing vehicle
-                        for key, value in filtered_data.items():
-                            if hasattr(existing, key) and value is not None:
-                                setattr(existing, key, value)
-                        updated_count += 1
-                    else:
-                        # Create new vehicle listing
-                        vehicle = VehicleListing(**filtered_data)
-                        db.add(vehicle)
-                        db.flush()  # Get the vehicle ID
-                        new_count += 1
-
-                        # Process notifications for new vehicle
-                        try:
-                            notifications_created = matching_service.process_new_vehicle_matches(vehicle)
-                            notifications_sent += notifications_created
-                        except Exception as e:
-                            logger.error(f"Error processing notifications for vehicle {vehicle.external_id}: {e}")
-
-                except Exception as e:
-                    logger.error(f"Error processing vehicle: {e}")
-                    continue
+            # Scrape vehicles from Ayvens Carmarket (exclusive source), storing
+            # and matching each micro-batch while later pages are fetched
+            logger.info(f"Scraping vehicles from Ayvens Carmarket ({plan.mode} cycle)...")
+            pages = self.ayvens_scraper.iter_pages(
+                max_vehicles=plan.max_vehicles,
+                max_pages=plan.max_pages,
+                known=known,
+                # Deep sweeps refetch and re-parse every page to refresh last-seen times
+                stop_when_known=plan.mode != MODE_DEEP_SWEEP,
+                conditional=plan.mode != MODE_DEEP_SWEEP
+            ) or []
+            # Detail pages of new and changed listings are fetched alongside the crawl
+            enricher = None
+            if scraper_settings.ENABLE_DETAIL_ENRICHMENT:
+                enricher = DetailEnricher(self.ayvens_scraper.fetch_vehicle_details, SessionLocal,
+                                          matching_service_factory=VehicleMatchingService).start()
+            # Page validators are saved once the page's listings are committed
+            pipeline = IngestPipeline(SessionLocal, matching_service_factory=VehicleMatchingService,
+                                      enricher=enricher, on_page_committed=self.ayvens_scraper.confirm_page)
+            try:
+                pipeline_stats = await pipeline.run_async(pages)
+            finally:
+                if enricher:
+                    await asyncio.to_thread(enricher.close)
+            stats = pipeline_stats.ingest
             
-            # Commit changes
-            db.commit()
+            if not stats.found:
+                logger.warning("No vehicles found in this cycle - check authentication and website availability")
             
             end_time = datetime.utcnow()
             duration = (end_time - start_time).total_seconds()
             
+            # Session history drives the churn measurement of later plans
+            run_stats = self.ayvens_scraper.last_run_stats or {}
+            AutomotiveService(db).create_scraping_session({
+                'session_id': str(uuid.uuid4()),
+                'source_website': self.ayvens_scraper.source_name,
+                'source_country': self.ayvens_scraper.source_country,
+                'session_type': plan.mode,
+                'total_pages_scraped': run_stats.get('pages_scraped', 0),
+                'total_vehicles_found': stats.found,
+                'total_vehicles_new': stats.new,
+                'total_vehicles_updated': stats.updated,
+                'total_vehicles_skipped': stats.skipped,
+                'total_errors': stats.errors,
+                'page_stats': json.dumps({str(p): page for p, page in sorted(stats.page_stats.items())}),
+                **self.ayvens_scraper.fetch_stats.session_fields(),
+                'started_at': start_time,
+                'completed_at': end_time,
+                'duration_seconds': int(duration),
+                'status': 'completed' if run_stats.get('pages_scraped') else 'failed'
+            })
+            
             logger.info(f"Scraping cycle completed in {duration:.2f}s: "
-                       f"{new_count} new, {updated_count} updated vehicles, "
-                       f"{notifications_sent} notifications sent")
+                       f"{stats.new} new, {stats.updated} updated, {stats.skipped} unchanged vehicles, "
+                       f"{stats.notifications} notifications sent, first batch stored after "
+                       f"{pipeline_stats.first_commit_seconds}s"
+                       f"{f', {enricher.stats.enriched} enriched from detail pages' if enricher else ''}")
             
             self.last_run = end_time
             
             # Check for user matches (if user criteria system exists)
-            await self.check_user_matches(new_count)
+            await self.check_user_matches(stats.new)
+            
+            return self.plan_next_cycle(db)
             
         except Exception as e:
             logger.error(f"Error in scraping cycle: {e}")
             db.rollback()
+            return plan
         finally:
             db.close()
     
@@ -170,11 +206,14 @@ def stop_background_scraper():
 
 def get_scraper_status() -> Dict[str, Any]:
     """Get current status of the background scraper"""
+    plan = background_scraper.next_plan
+    interval = plan.interval_seconds if plan else 300
     return {
         "running": background_scraper.running,
         "last_run": background_scraper.last_run.isoformat() if background_scraper.last_run else None,
-        "next_run": (background_scraper.last_run + timedelta(minutes=5)).isoformat() 
-                   if background_scraper.last_run else None
+        "next_run": (background_scraper.last_run + timedelta(seconds=interval)).isoformat() 
+                   if background_scraper.last_run else None,
+        "plan": plan.to_dict() if plan else None
     }
 
 
@@ -9,18 +9,34 @@ This module provides structured logging configuration including:
 - Performance monitoring
 - Error tracking and alerting
 - Security event logging
+
+Records are not formatted or written on the calling thread (the event loop
+for request logging): a QueueHandler puts them on a bounded queue and a
+QueueListener thread runs the filters, formatters and file handlers. When
+the queue is full new records are dropped and counted instead of blocking
+the caller (see get_logging_stats() and log_records_dropped_total).
+
+Nothing is configured on import: the application calls setup_logging() on
+startup and shutdown_logging() on shutdown.
 """
 
 import os
 import sys
+import atexit
+import queue
 import logging
 import logging.handlers
 import json
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.metrics import REGISTRY, counter
+
+LOG_RECORDS_DROPPED = counter("log_records_dropped_total", "Log records dropped because the log queue was full",
+                              ["level"])
 
 
 class JSONFormatter(logging.Formatter):
@@ -102,12 +118,48 @@ class PerformanceFilter(logging.Filter):
         return True
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped: Dict[str, int] = defaultdict(int)
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped[record.levelname] += 1
+            LOG_RECORDS_DROPPED.labels(record.levelname).inc()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": dict(self.dropped),
+        }
+
+
+def start_queued_logging(logger: logging.Logger, handlers: List[logging.Handler],
+                         queue_size: int) -> logging.handlers.QueueListener:
+    """Route `logger` through a bounded queue to `handlers` on a listener thread"""
+    queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size))
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    return listener
+
+
 class LoggingConfig:
     """Centralized logging configuration"""
     
     def __init__(self):
         self.log_dir = Path("logs")
-        self.log_dir.mkdir(exist_ok=True)
+        if settings.LOG_TO_FILE:
+            self.log_dir.mkdir(exist_ok=True)
         
         # Log levels
         self.log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
@@ -116,17 +168,23 @@ class LoggingConfig:
         self.max_bytes = 10 * 1024 * 1024  # 10MB
         self.backup_count = 5
         
+        # Writer thread behind the bounded queue (None when logging synchronously)
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        
         # Initialize logging
         self.setup_logging()
     
     def setup_logging(self):
         """Setup comprehensive logging configuration"""
         # Clear existing handlers
+        self.shutdown()
         logging.getLogger().handlers.clear()
         
         # Root logger configuration
         root_logger = logging.getLogger()
         root_logger.setLevel(self.log_level)
+        handlers = []
         
         # Add context filter to all loggers
         context_filter = ContextFilter()
@@ -138,7 +196,7 @@ class LoggingConfig:
         console_handler.addFilter(context_filter)
         console_handler.addFilter(security_filter)
         console_handler.addFilter(performance_filter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handlers
         if settings.LOG_TO_FILE:
@@ -147,24 +205,34 @@ class LoggingConfig:
             app_handler.addFilter(context_filter)
             app_handler.addFilter(security_filter)
             app_handler.addFilter(performance_filter)
-            root_logger.addHandler(app_handler)
+            handlers.append(app_handler)
             
             # Error log
             error_handler = self._create_file_handler('error.log', logging.ERROR)
             error_handler.addFilter(context_filter)
-            root_logger.addHandler(error_handler)
+            handlers.append(error_handler)
             
             # Security log
             security_handler = self._create_security_handler()
             security_handler.addFilter(context_filter)
             security_handler.addFilter(security_filter)
-            root_logger.addHandler(security_handler)
+            handlers.append(security_handler)
             
             # Performance log
             performance_handler = self._create_performance_handler()
             performance_handler.addFilter(context_filter)
             performance_handler.addFilter(performance_filter)
-            root_logger.addHandler(performance_handler)
+            handlers.append(performance_handler)
+        
+        # Filters, formatting and file writes run on the listener thread
+        if settings.LOG_QUEUE_SIZE > 0:
+            self.listener = start_queued_logging(root_logger, handlers, settings.LOG_QUEUE_SIZE)
+            self.queue_handler = root_logger.handlers[-1]
+            REGISTRY.add_collector("logging_queue", self._queue_metrics)
+            atexit.register(self.shutdown)
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
         
         # Configure specific loggers
         self._configure_specific_loggers()
@@ -174,9 +242,26 @@ class LoggingConfig:
         logger.info(
             f"Logging configured - Level: {logging.getLevelName(self.log_level)}, "
             f"File logging: {settings.LOG_TO_FILE}, "
-            f"JSON format: {settings.LOG_JSON_FORMAT}"
+            f"JSON format: {settings.LOG_JSON_FORMAT}, "
+            f"Queue: {settings.LOG_QUEUE_SIZE or 'off'}"
         )
     
+    def shutdown(self):
+        """Stop the listener thread after it wrote the queued records"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        if self.queue_handler is None:
+            return {"queued": 0, "capacity": 0, "enqueued": 0, "dropped": {}}
+        return self.queue_handler.get_stats()
+    
+    def _queue_metrics(self):
+        stats = self.get_stats()
+        return [("log_queue_depth", "gauge", "Log records waiting for the writer thread",
+                 [({}, stats["queued"])])]
+    
     def _create_console_handler(self) -> logging.StreamHandler:
         """Create console handler"""
         handler = logging.StreamHandler(sys.stdout)
@@ -307,6 +392,24 @@ def setup_logging():
     return logging_config
 
 
+def shutdown_logging():
+    """Write the queued records, stop the listener thread and detach the queue"""
+    global logging_config
+    if logging_config is None:
+        return
+    logging_config.shutdown()
+    if logging_config.queue_handler is not None:
+        logging.getLogger().removeHandler(logging_config.queue_handler)
+    logging_config = None
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Queue depth, capacity and enqueued/dropped record counts"""
+    if logging_config is None:
+        return {"queued": 0, "capacity": 0, "enqueued": 0, "dropped": {}}
+    return logging_config.get_stats()
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get logger with proper configuration"""
     if logging_config is None:
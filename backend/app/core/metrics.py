@@ -0,0 +1,311 @@
+"""
+Metrics
+
+In-process counters, gauges and histograms rendered in the Prometheus
+text exposition format (served on `/metrics`). Updating a metric is a dict
+lookup and an addition under a lock, cheap enough for every request, page
+fetch and delivery. Values that are cheaper to read on demand than to
+track (queue depth, pool usage, process memory) come from collectors that
+run when the metrics are rendered.
+
+    from app.core.metrics import histogram
+
+    FETCH_SECONDS = histogram("scraper_fetch_seconds", "Page fetch time", ["host"])
+    with FETCH_SECONDS.labels("carmarket.ayvens.com").time():
+        ...
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds, from a fast in-memory query to a slow page fetch
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (labels, value) pairs of one metric, as returned by collectors
+Sample = Tuple[Dict[str, str], float]
+
+
+class _Timer:
+    def __init__(self, child: "_HistogramChild"):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class _CounterChild:
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float]):
+        self._lock = lock
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Metric:
+    """A named metric with one child per combination of label values"""
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(self.name, dict(zip(self.labelnames, key)), child.value)
+                for key, child in list(self._children.items())]
+
+    def reset(self):
+        with self._lock:
+            self._children.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild(self._lock)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples = []
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            with self._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+# Collector: () -> [(name, type, documentation, [(labels, value), ...]), ...]
+Collector = Callable[[], Iterable[Tuple[str, str, str, Sequence[Sample]]]]
+
+
+class MetricsRegistry:
+    """All metrics of the process plus on-demand collectors"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Collector] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Register a metric, or return the one already registered under its name"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def add_collector(self, name: str, collector: Collector):
+        self._collectors[name] = collector
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        lines: List[str] = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            samples = metric.samples()
+            if samples:
+                _render(lines, metric.name, metric.type, metric.documentation,
+                        [(name, labels, value) for name, labels, value in samples])
+        for collector_name, collector in list(self._collectors.items()):
+            try:
+                families = list(collector())
+            except Exception as e:
+                families = [("metrics_collector_errors", "gauge", "Collectors that failed during this scrape",
+                             [({"collector": collector_name, "error": type(e).__name__}, 1)])]
+            for name, metric_type, documentation, samples in families:
+                _render(lines, name, metric_type, documentation,
+                        [(name, labels, value) for labels, value in samples])
+        return "\n".join(lines) + "\n"
+
+
+def _render(lines: List[str], name: str, metric_type: str, documentation: str,
+            samples: Sequence[Tuple[str, Dict[str, str], float]]):
+    lines.append(f"# HELP {name} {documentation}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for sample_name, labels, value in samples:
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+            lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+        else:
+            lines.append(f"{sample_name} {_format_value(value)}")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+_PAGE_SIZE = resource.getpagesize()
+_cpu_sample = (time.monotonic(), time.process_time())
+_cpu_lock = threading.Lock()
+
+
+def process_stats() -> Dict[str, Any]:
+    """Memory and CPU of this process (CPU percent since the previous call)"""
+    global _cpu_sample
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        rss = peak_rss
+    cpu_seconds = usage.ru_utime + usage.ru_stime
+
+    now, process_time = time.monotonic(), time.process_time()
+    with _cpu_lock:
+        last_wall, last_cpu = _cpu_sample
+        _cpu_sample = (now, process_time)
+    elapsed = now - last_wall
+    cpu_percent = round(100.0 * (process_time - last_cpu) / elapsed, 1) if elapsed > 0 else 0.0
+
+    try:
+        open_fds = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        open_fds = None
+    return {
+        "rss_bytes": rss,
+        "peak_rss_bytes": peak_rss,
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_percent": cpu_percent,
+        "threads": threading.active_count(),
+        "open_fds": open_fds,
+        "load_average": list(os.getloadavg()) if hasattr(os, "getloadavg") else None,
+    }
+
+
+def _process_collector():
+    stats = process_stats()
+    families = [
+        ("process_resident_memory_bytes", "gauge", "Resident memory size in bytes", [({}, stats["rss_bytes"])]),
+        ("process_cpu_seconds_total", "counter", "User and system CPU time in seconds",
+         [({}, stats["cpu_seconds"])]),
+        ("process_threads", "gauge", "Python threads", [({}, stats["threads"])]),
+    ]
+    if stats["open_fds"] is not None:
+        families.append(("process_open_fds", "gauge", "Open file descriptors", [({}, stats["open_fds"])]))
+    return families
+
+
+REGISTRY.add_collector("process", _process_collector)
@@ -0,0 +1,217 @@
+"""
+On-Demand Profiling
+
+An admin arms the profiler for one target (see the `/maintenance/profile`
+endpoints): the next HTTP request (optionally under a path prefix) or the
+next root span of that name, e.g. "scrape.cycle". That single run is
+profiled and the report saved under PROFILE_OUTPUT_DIR; everything else
+only pays for an `armed` check.
+
+With pyinstrument installed, its statistical profiler writes HTML and text
+reports (it follows the thread, and the async task, it was started on).
+Without it a stack sampler reads the stacks of all threads every few
+milliseconds via sys._current_frames(), which also covers the pipeline
+threads of a scrape cycle, and writes collapsed stacks (for flamegraph.pl
+or speedscope) plus a text summary.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TARGET = "request"
+# The next request, scrape cycle or listing match run (root span names)
+PROFILE_TARGETS = (REQUEST_TARGET, "scrape.cycle", "match.listing")
+
+
+@dataclass
+class ProfileRequest:
+    """A one-shot profile of the next run of `target`"""
+    target: str
+    path_prefix: Optional[str] = None  # requests only
+    armed_at: float = 0.0
+    expires_at: float = 0.0
+
+
+class StackSampler:
+    """Samples the stacks of all threads from a background thread"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit: int = 30) -> str:
+        """Functions by samples on top of the stack and anywhere on it"""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f} ms", "", "self  total  function"]
+        lines += [f"{count:5d} {total[frame]:6d}  {frame}" for frame, count in own.most_common(limit)]
+        return "\n".join(lines) + "\n"
+
+
+class ActiveProfile:
+    """A running profile; stop() writes the report"""
+
+    def __init__(self, owner: "OnDemandProfiler", request: ProfileRequest, label: str):
+        self.owner = owner
+        self.request = request
+        self.label = label
+        self.started = time.perf_counter()
+        if PYINSTRUMENT_AVAILABLE:
+            self._profiler = PyinstrumentProfiler(async_mode="enabled")
+            self._profiler.start()
+        else:
+            self._profiler = StackSampler()
+            self._profiler.start()
+
+    def stop(self) -> Dict[str, Any]:
+        self._profiler.stop()
+        seconds = round(time.perf_counter() - self.started, 3)
+        return self.owner._save(self, seconds)
+
+
+class OnDemandProfiler:
+    """Profiles single runs armed by an admin"""
+
+    def __init__(self, output_dir: str, max_reports: int = 20, ttl_seconds: float = 3600):
+        self.output_dir = output_dir
+        self.ttl_seconds = ttl_seconds
+        self.pending: Optional[ProfileRequest] = None
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self._lock = threading.Lock()
+
+    @property
+    def armed(self) -> bool:
+        return self.pending is not None
+
+    def arm(self, target: str, path_prefix: Optional[str] = None) -> ProfileRequest:
+        now = time.time()
+        self.pending = ProfileRequest(target, path_prefix, now, now + self.ttl_seconds)
+        logger.info(f"Profiler armed for the next {target}{f' under {path_prefix}' if path_prefix else ''}")
+        return self.pending
+
+    def disarm(self):
+        self.pending = None
+
+    def take(self, target: str, path: Optional[str] = None) -> Optional[ProfileRequest]:
+        """Claim the pending request if it is for this run (at most one caller wins)"""
+        with self._lock:
+            request = self.pending
+            if request is None:
+                return None
+            if request.expires_at < time.time():
+                self.pending = None
+                return None
+            if request.target != target:
+                return None
+            if request.path_prefix and not (path or "").startswith(request.path_prefix):
+                return None
+            self.pending = None
+            return request
+
+    def start(self, target: str, path: Optional[str] = None) -> Optional[ActiveProfile]:
+        """Start profiling this run if the profiler is armed for it"""
+        request = self.take(target, path)
+        if request is None:
+            return None
+        return ActiveProfile(self, request, path or target)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "armed": asdict(self.pending) if self.pending else None,
+            "profiler": "pyinstrument" if PYINSTRUMENT_AVAILABLE else "stack-sampler",
+            "reports": list(self.reports),
+        }
+
+    def report_path(self, name: str) -> Optional[Path]:
+        """Path of a saved report file, only for reports listed in `reports`"""
+        for report in self.reports:
+            for path in report["files"]:
+                if os.path.basename(path) == name:
+                    return Path(path)
+        return None
+
+    def _save(self, profile: ActiveProfile, seconds: float) -> Dict[str, Any]:
+        directory = Path(self.output_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9.]+", "_", profile.label).strip("_")[:60] or "profile"
+        base = directory / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{slug}"
+        files = []
+        engine = profile._profiler
+        try:
+            if isinstance(engine, StackSampler):
+                files.append(_write(Path(f"{base}.folded"), engine.collapsed()))
+                files.append(_write(Path(f"{base}.txt"), engine.summary()))
+            else:
+                files.append(_write(Path(f"{base}.html"), engine.output_html()))
+                files.append(_write(Path(f"{base}.txt"), engine.output_text(unicode=True)))
+        except OSError as e:
+            logger.error(f"Could not write profile of {profile.label}: {e}")
+        report = {"target": profile.request.target, "label": profile.label, "seconds": seconds,
+                  "finished_at": datetime.utcnow().isoformat(), "files": files}
+        self.reports.append(report)
+        logger.info(f"Profiled {profile.label} ({seconds}s): {files}")
+        return report
+
+
+def _write(path: Path, content: str) -> str:
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+profiler = OnDemandProfiler(settings.PROFILE_OUTPUT_DIR)
@@ -0,0 +1,225 @@
+"""
+Tracing
+
+Lightweight spans around the stages of a scrape cycle, an API request or a
+matching run (auth, fetch, parse, image download, dedup, DB write, match,
+notify), to see which stage made it slow.
+
+    from app.core.tracing import span, traced
+
+    with span("scrape.cycle", root=True, mode=plan.mode):
+        ...
+
+    @traced("scrape.fetch")
+    def _make_request(self, url): ...
+
+A trace starts only at a `root=True` span (a cycle or a request) and only
+when TRACING_ENABLED is set and the trace is sampled (TRACE_SAMPLE_RATE).
+Other spans are children of the current span (a context variable, so they
+follow asyncio tasks, asyncio.to_thread and copied contexts) and are no-ops
+outside a trace. A finished trace is written to TRACE_EXPORT_FILE as one
+line of OTLP/JSON (an ExportTraceServiceRequest), which the OpenTelemetry
+Collector file receiver and most trace viewers read.
+
+Root spans are also where the on-demand profiler (app.core.profiling)
+hooks in.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "auto-scouter-backend"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage of a trace"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns",
+                 "error", "_trace")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self._trace: List["Span"] = parent._trace if parent else []
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": otlp_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span outside a trace"""
+    name = None
+
+    def set(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+class OTLPFileExporter:
+    """Appends each finished trace to a file as one OTLP/JSON line"""
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self.exported = 0
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        if not spans:
+            return
+        request = {"resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line)
+            self.exported += len(spans)
+
+
+class Tracer:
+    """Creates spans and exports finished traces"""
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, exporter=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, root: bool = False, **attributes):
+        parent = _current_span.get()
+        profile = profiler.start(name) if root and parent is None and profiler.armed else None
+        if parent is None and not (root and self.enabled and random.random() < self.sample_rate):
+            try:
+                yield NOOP_SPAN
+            finally:
+                if profile is not None:
+                    profile.stop()
+            return
+
+        current = Span(name, parent, attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end_ns = time.time_ns()
+            if profile is not None:
+                profile.stop()
+            self._finish(current)
+
+    def _finish(self, finished: Span):
+        with self._lock:
+            finished._trace.append(finished)
+            if not finished.is_root:
+                return
+            spans, finished._trace[:] = list(finished._trace), []
+        if self.exporter is not None:
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                logger.warning(f"Could not export trace {finished.trace_id}: {e}")
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    exporter=OTLPFileExporter(settings.TRACE_EXPORT_FILE) if settings.TRACE_EXPORT_FILE else None,
+)
+
+
+def span(name: str, root: bool = False, **attributes):
+    """Time a stage (a new trace if `root` and sampled, else a child of the current span)"""
+    return tracer.span(name, root=root, **attributes)
+
+
+def current_span():
+    """The active span, or a no-op span outside a trace"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: Optional[str] = None, root: bool = False) -> Callable:
+    """Decorator running a function (sync or async) in a span"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, root=root):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, root=root):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
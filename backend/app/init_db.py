@@ -0,0 +1,27 @@
+"""
+Database Initialization
+
+Connects (falling back to SQLite if allowed), then creates missing tables
+and time-series partitions. The API always connects on startup and does the
+schema work too unless DB_INIT_ON_STARTUP is off; deployments that turn it
+off (to keep schema work out of every cold start) run it once per release
+instead:
+
+    python -m app.init_db
+"""
+
+import logging
+
+from app.models.base import init_database
+from app.services.partitioning import ensure_partitions
+
+
+def init_db(create_tables: bool = True):
+    init_database(create_tables=create_tables)
+    if create_tables:
+        ensure_partitions()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
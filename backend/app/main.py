@@ -5,23 +5,46 @@ Simplified and optimized for production deployment
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import logging
 
 from app.routers import auth, automotive, alerts, notifications, cloud_notifications
 from app.core.config import settings
-from app.models.base import engine, Base
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.metrics import CONTENT_TYPE
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.scraper.config import scraper_settings
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up logging and connect to the database (and create tables) on startup, not on import"""
+    # Records are written by the queue listener thread
+    setup_logging()
+    if not settings.DB_INIT_ON_STARTUP:
+        logger.info("Table creation skipped (DB_INIT_ON_STARTUP=false)")
+    try:
+        from app.init_db import init_db
+        await asyncio.to_thread(init_db, settings.DB_INIT_ON_STARTUP)
+    except Exception as e:
+        logger.error(f"❌ Database initialization failed: {e}")
+    yield
+    shutdown_logging()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Vehicle Scout API",
     description="Car scouting and alert system with automated scraping",
     version="1.0.0",
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -34,13 +57,10 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
-
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Database tables created/verified")
-except Exception as e:
-    logger.error(f"❌ Database initialization failed: {e}")
+# Added last runs first: request logs are written inside the request's trace
+app.add_middleware(LoggingMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers - simplified for single-user mode
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
@@ -83,6 +103,14 @@ async def health_check():
             }
         )
 
+# Prometheus metrics endpoint
+if scraper_settings.ENABLE_METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Metrics in the Prometheus text format"""
+        from app.services.system_metrics import render_metrics
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -5,23 +5,29 @@ Designed for 24/7 cloud deployment with automated scraping
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 import os
 import asyncio
 
 # Cloud configuration
 from app.core.cloud_config import (
     get_cloud_settings,
-    setup_logging,
     validate_cloud_environment,
     get_cors_origins
 )
-
-# Initialize cloud settings and logging first
+from app.core.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.metrics import CONTENT_TYPE
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.scraper.config import scraper_settings
+
+# Initialize cloud settings first (logging is set up by the lifespan)
 cloud_settings = get_cloud_settings()
-setup_logging()
 logger = logging.getLogger(__name__)
 
 # Core imports with error handling
@@ -55,22 +61,13 @@ except Exception as e:
 
 # Import database and background scraper
 try:
-    from app.models.base import engine, Base
+    from app.models.base import Base
     logger.info("✅ Database models imported successfully")
 except Exception as e:
     logger.error(f"❌ Failed to import database models: {e}")
     logger.error(traceback.format_exc())
-    engine = None
     Base = None
 
-try:
-    from app.background_scraper import BackgroundScraper
-    logger.info("✅ Background scraper imported successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to import background scraper: {e}")
-    logger.error(traceback.format_exc())
-    BackgroundScraper = None
-
 # Cloud settings already initialized above
 
 # Global scraper instance for cloud deployment
@@ -81,6 +78,8 @@ async def lifespan(app: FastAPI):
     """Application lifespan management for cloud deployment"""
     global background_scraper
     
+    # Records are written by the queue listener thread
+    setup_logging()
     logger.info("🚀 Starting Vehicle Scout Cloud Application")
     logger.info(f"Environment: {cloud_settings.environment}")
     logger.info(f"Database: {'PostgreSQL (cloud)' if cloud_settings.is_cloud_deployed else 'SQLite (local)'}")
@@ -88,28 +87,40 @@ async def lifespan(app: FastAPI):
     # Validate cloud environment
     validate_cloud_environment()
     
-    # Create database tables
-    if Base and engine:
+    # Connect (with the SQLite fallback) and create database tables, or
+    # leave the tables to the release step: python -m app.init_db
+    if Base:
+        if not settings.DB_INIT_ON_STARTUP:
+            logger.info("Table creation skipped (DB_INIT_ON_STARTUP=false)")
         try:
-            Base.metadata.create_all(bind=engine)
-            logger.info("✅ Database tables created/verified")
+            from app.init_db import init_db
+            await asyncio.to_thread(init_db, settings.DB_INIT_ON_STARTUP)
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {e}")
             # Don't raise - continue without database for debugging
     else:
-        logger.warning("⚠️ Database setup skipped - Base or engine not available")
+        logger.warning("⚠️ Database setup skipped - models not available")
     
-    # Start background scraper for cloud deployment
-    if cloud_settings.is_production and BackgroundScraper:
+    # Start background jobs for cloud deployment. The persistent scheduler
+    # elects one leader, so each job runs once per cluster, not per worker.
+    # The scraper (BeautifulSoup, lxml, image pipeline) is only imported here.
+    if cloud_settings.is_production:
         try:
+            from app.background_scraper import BackgroundScraper
+            from app.services.background_tasks import get_task_manager
+            
             background_scraper = BackgroundScraper()
-            # Start scraper in background task
-            asyncio.create_task(start_cloud_scraper())
-            logger.info("✅ Background scraper started for cloud deployment")
+            task_manager = get_task_manager()
+            task_manager.add_scraping_job(
+                background_scraper.run_scheduled_cycle,
+                cloud_settings.scraping_interval_minutes
+            )
+            task_manager.start()
+            logger.info("✅ Background jobs scheduled for cloud deployment")
         except Exception as e:
-            logger.error(f"❌ Failed to start background scraper: {e}")
+            logger.error(f"❌ Failed to start background jobs: {e}")
     else:
-        logger.warning("⚠️ Background scraper skipped - not available or not production")
+        logger.warning("⚠️ Background scraper skipped - not production")
     
     logger.info("🎯 Application startup completed")
     
@@ -118,30 +129,14 @@ async def lifespan(app: FastAPI):
     # Cleanup
     logger.info("🛑 Shutting down application")
     if background_scraper:
+        from app.scraper.parse_pool import stop_parse_pool
+        from app.services.background_tasks import stop_background_tasks
+        
+        stop_background_tasks()
         background_scraper.stop()
-        logger.info("✅ Background scraper stopped")
-
-async def start_cloud_scraper():
-    """Start the background scraper for continuous cloud operation"""
-    global background_scraper
-    
-    if not background_scraper:
-        return
-    
-    logger.info("🔄 Starting continuous cloud scraping...")
-    
-    while True:
-        try:
-            await background_scraper.run_scraping_cycle()
-            logger.info(f"✅ Scraping cycle completed, sleeping for {cloud_settings.scraping_interval_minutes} minutes")
-            
-            # Sleep for configured interval (default 5 minutes)
-            await asyncio.sleep(cloud_settings.scraping_interval_minutes * 60)
-            
-        except Exception as e:
-            logger.error(f"❌ Scraping cycle failed: {e}")
-            # Wait 1 minute before retrying on error
-            await asyncio.sleep(60)
+        stop_parse_pool()
+        logger.info("✅ Background jobs stopped")
+    shutdown_logging()
 
 # Create FastAPI application with cloud configuration
 app = FastAPI(
@@ -161,6 +156,9 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(LoggingMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Health check endpoint for cloud platforms
 @app.get("/health")
@@ -179,7 +177,7 @@ async def health_check():
             db.close()
         
         # Check scraper status
-        scraper_status = "running" if background_scraper and background_scraper.running else "stopped"
+        scraper_status = "scheduled" if background_scraper else "stopped"
         
         return {
             "status": "healthy",
@@ -225,21 +223,29 @@ async def scraper_status():
     if not background_scraper:
         return {"status": "not_initialized"}
     
+    from app.scraper.scheduler import scraper_scheduler
+    
+    scheduler_status = scraper_scheduler.get_job_status()
     return {
-        "running": background_scraper.running,
-        "last_run": background_scraper.last_run.isoformat() if background_scraper.last_run else None,
-        "interval_minutes": cloud_settings.scraping_interval_minutes
+        "running": scheduler_status["running"],
+        "last_run": scheduler_status["last_run"],
+        "next_run": scheduler_status["next_run"],
+        "leader": scheduler_status["leader"],
+        "interval_minutes": cloud_settings.scraping_interval_minutes,
+        "plan": background_scraper.next_plan.to_dict() if background_scraper.next_plan else None
     }
 
 @app.post("/cloud/scraper/trigger")
 async def trigger_scraping():
-    """Manually trigger a scraping cycle (for testing)"""
+    """Queue a scraping cycle on the scheduler leader"""
     if not background_scraper:
         raise HTTPException(status_code=503, detail="Background scraper not initialized")
     
     try:
-        await background_scraper.run_scraping_cycle()
-        return {"message": "Scraping cycle triggered successfully"}
+        from app.scraper.scheduler import scraper_scheduler
+        
+        run_id = scraper_scheduler.trigger_manual_scrape()
+        return {"message": "Scraping cycle triggered successfully", "run_id": run_id}
     except Exception as e:
         logger.error(f"Manual scraping trigger failed: {e}")
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
@@ -592,6 +598,14 @@ async def test_alert_matching(alert_id: int):
             "status": "failed"
         }
 
+# Prometheus metrics endpoint
+if scraper_settings.ENABLE_METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Metrics in the Prometheus text format"""
+        from app.services.system_metrics import render_metrics
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 # Root endpoint
 @app.get("/")
 async def root():
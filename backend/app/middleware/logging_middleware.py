@@ -7,27 +7,82 @@ This module provides comprehensive request/response logging middleware including
 - Error tracking
 - Security event logging
 - User activity tracking
+
+Most requests are fast and successful, so the per-request work is kept
+small: only a sample of them is logged (LOG_REQUEST_SAMPLE_RATE), while
+failed (4xx/5xx), slow (LOG_SLOW_REQUEST_SECONDS) requests and security
+events are always logged. JSON request bodies are not read up front; the
+chunks the endpoint receives are kept (up to LOG_BODY_MAX_BYTES) and only
+decoded for failed or slow requests. Records go through the queued logging
+pipeline of app.core.logging_config, so no file is written on the event loop.
+
+Written as plain ASGI middleware (like MetricsMiddleware): it wraps
+`receive` and `send` to see the body and the status code, without the extra
+task, memory stream and response buffering of BaseHTTPMiddleware, so
+streaming responses pass through unchanged and endpoints can read the body
+as usual.
 """
 
 import time
+import random
 import logging
 import json
-from typing import Dict, Any, Optional
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import StreamingResponse
+import hashlib
+from typing import Callable, Dict, Any, List, Optional
+from fastapi import Request
 
-from app.core.logging_config import get_logger, log_request, log_security_event, log_performance_event
+from app.core.config import settings
+from app.core.logging_config import log_request, log_security_event, log_performance_event
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for comprehensive request/response logging"""
+class BodyCapture:
+    """Receive wrapper keeping the request body chunks the app reads, up to a limit"""
+    
+    def __init__(self, receive, max_bytes: int):
+        self.receive = receive
+        self.max_bytes = max_bytes
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.truncated = False
     
-    def __init__(self, app, log_requests: bool = True, log_responses: bool = False):
-        super().__init__(app)
+    async def __call__(self):
+        message = await self.receive()
+        if message["type"] == "http.request" and not self.truncated:
+            chunk = message.get("body", b"")
+            if self.size + len(chunk) > self.max_bytes:
+                self.truncated = True
+                self.chunks.clear()
+            elif chunk:
+                self.chunks.append(chunk)
+                self.size += len(chunk)
+        return message
+    
+    def value(self) -> Any:
+        """The captured body, parsed as JSON if possible (None if empty or too large)"""
+        if self.truncated or not self.chunks:
+            return None
+        body = b"".join(self.chunks).decode("utf-8", errors="replace")
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            return body
+
+
+class LoggingMiddleware:
+    """ASGI middleware for comprehensive request/response logging"""
+    
+    def __init__(self, app, log_requests: bool = True, log_responses: bool = False,
+                 sample_rate: Optional[float] = None, slow_seconds: Optional[float] = None,
+                 body_max_bytes: Optional[int] = None, logger: Optional[logging.Logger] = None,
+                 random_func: Callable[[], float] = random.random):
+        self.app = app
         self.log_requests = log_requests
         self.log_responses = log_responses
-        self.logger = get_logger(__name__)
+        self.sample_rate = settings.LOG_REQUEST_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.slow_seconds = settings.LOG_SLOW_REQUEST_SECONDS if slow_seconds is None else slow_seconds
+        self.body_max_bytes = settings.LOG_BODY_MAX_BYTES if body_max_bytes is None else body_max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self._random = random_func
         
         # Paths to exclude from logging
         self.exclude_paths = {
@@ -46,57 +101,43 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             'x-auth-token'
         }
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope, receive, send):
         """Process request with comprehensive logging"""
         
         # Skip logging for excluded paths
-        if self._should_skip_logging(request):
-            return await call_next(request)
+        if scope["type"] != "http" or self._should_skip_logging(scope):
+            await self.app(scope, receive, send)
+            return
         
         # Start timing
-        start_time = time.time()
+        start_time = time.perf_counter()
+        request = Request(scope)
+        
+        # Successful fast requests are only logged if sampled
+        sampled = self.sample_rate >= 1.0 or self._random() < self.sample_rate
         
-        # Extract request information
-        request_info = await self._extract_request_info(request)
+        # Keep the body chunks the endpoint reads, decoded only if needed
+        body = self._capture_body(request, receive)
         
         # Log incoming request
-        if self.log_requests:
-            self._log_incoming_request(request_info)
+        if self.log_requests and sampled:
+            self._log_incoming_request(self._extract_request_info(request))
+        
+        status_code = None
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            
-            # Calculate response time
-            response_time = time.time() - start_time
-            
-            # Extract response information
-            response_info = self._extract_response_info(response, response_time)
-            
-            # Log outgoing response
-            self._log_outgoing_response(request_info, response_info)
-            
-            # Log performance if slow
-            if response_time > 1.0:  # Log if response takes more than 1 second
-                log_performance_event(
-                    self.logger,
-                    f"{request_info['method']} {request_info['path']}",
-                    response_time,
-                    {
-                        'status_code': response_info['status_code'],
-                        'user_id': request_info.get('user_id'),
-                        'ip_address': request_info.get('ip_address')
-                    }
-                )
-            
-            # Log security events
-            self._check_security_events(request_info, response_info)
-            
-            return response
-            
+            await self.app(scope, body or receive, send_with_status)
         except Exception as e:
             # Calculate response time for errors
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
+            request_info = self._extract_request_info(request, body)
             
             # Log error
             self.logger.error(
@@ -108,6 +149,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     'response_time': response_time,
                     'user_id': request_info.get('user_id'),
                     'ip_address': request_info.get('ip_address'),
+                    'body': request_info.get('body'),
                     'error': str(e)
                 },
                 exc_info=True
@@ -115,67 +157,71 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             
             # Re-raise the exception
             raise
-    
-    def _should_skip_logging(self, request: Request) -> bool:
-        """Check if logging should be skipped for this request"""
-        return request.url.path in self.exclude_paths
-    
-    async def _extract_request_info(self, request: Request) -> Dict[str, Any]:
-        """Extract comprehensive request information"""
-        # Get client IP
-        client_ip = self._get_client_ip(request)
-        
-        # Get user ID if authenticated
-        user_id = self._get_user_id(request)
         
-        # Get request headers (masked)
-        headers = self._mask_sensitive_headers(dict(request.headers))
+        # Response time includes sending the (possibly streamed) body
+        response_time = time.perf_counter() - start_time
+        self._log_response(request, body, status_code or 500, response_time, sampled)
+    
+    def _log_response(self, request: Request, body: Optional[BodyCapture], status_code: int,
+                      response_time: float, sampled: bool):
+        """Log a finished request if sampled, failed or slow, and check it for security events"""
+        response_info = self._extract_response_info(status_code, response_time)
+        failed = status_code >= 400
+        slow = response_time > self.slow_seconds
+        request_info = self._extract_request_info(request, body if failed or slow else None)
         
-        # Get query parameters
-        query_params = dict(request.query_params)
+        # Log outgoing response
+        if sampled or failed or slow:
+            self._log_outgoing_response(request_info, response_info)
         
-        # Get request body for POST/PUT requests (be careful with large bodies)
-        body = None
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            try:
-                # Only log body for certain content types and if not too large
-                content_type = request.headers.get('content-type', '')
-                if 'application/json' in content_type:
-                    # Clone the request to read body without consuming it
-                    body_bytes = await request.body()
-                    if len(body_bytes) < 10000:  # Only log if less than 10KB
-                        body = body_bytes.decode('utf-8')
-                        # Try to parse as JSON for better logging
-                        try:
-                            body = json.loads(body)
-                        except json.JSONDecodeError:
-                            pass
-            except Exception as e:
-                self.logger.debug(f"Could not read request body: {str(e)}")
+        # Log performance if slow
+        if slow:
+            log_performance_event(
+                self.logger,
+                f"{request_info['method']} {request_info['path']}",
+                response_time,
+                {
+                    'status_code': status_code,
+                    'user_id': request_info.get('user_id'),
+                    'ip_address': request_info.get('ip_address'),
+                    'body': request_info.get('body')
+                }
+            )
         
+        # Log security events
+        self._check_security_events(request_info, response_info)
+    
+    def _should_skip_logging(self, scope) -> bool:
+        """Check if logging should be skipped for this request"""
+        return scope["path"] in self.exclude_paths
+    
+    def _capture_body(self, request: Request, receive) -> Optional[BodyCapture]:
+        """Tee the JSON body of POST/PUT/PATCH requests as the endpoint reads it"""
+        if request.method not in ('POST', 'PUT', 'PATCH'):
+            return None
+        if 'application/json' not in request.headers.get('content-type', ''):
+            return None
+        return BodyCapture(receive, self.body_max_bytes)
+    
+    def _extract_request_info(self, request: Request, body: Optional[BodyCapture] = None) -> Dict[str, Any]:
+        """Extract request information (the body only when a capture is given)"""
+        headers = request.headers
         return {
             'method': request.method,
-            'path': request.url.path,
-            'full_url': str(request.url),
-            'ip_address': client_ip,
-            'user_id': user_id,
-            'headers': headers,
-            'query_params': query_params,
-            'body': body,
-            'user_agent': request.headers.get('user-agent'),
-            'referer': request.headers.get('referer')
+            'path': request.scope['path'],
+            'ip_address': self._get_client_ip(request),
+            'user_id': self._get_user_id(request),
+            'query_params': request.query_params,
+            'body': body.value() if body is not None else None,
+            'user_agent': headers.get('user-agent'),
+            'referer': headers.get('referer')
         }
     
-    def _extract_response_info(self, response: Response, response_time: float) -> Dict[str, Any]:
+    def _extract_response_info(self, status_code: int, response_time: float) -> Dict[str, Any]:
         """Extract response information"""
-        # Get response headers (masked)
-        headers = self._mask_sensitive_headers(dict(response.headers))
-        
         return {
-            'status_code': response.status_code,
-            'response_time': response_time,
-            'headers': headers,
-            'content_type': response.headers.get('content-type')
+            'status_code': status_code,
+            'response_time': response_time
         }
     
     def _get_client_ip(self, request: Request) -> str:
@@ -200,7 +246,6 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         if auth_header and auth_header.startswith('Bearer '):
             # In a real implementation, you'd decode the JWT here
             # For now, we'll create a hash of the token
-            import hashlib
             token = auth_header[7:]  # Remove 'Bearer '
             return hashlib.md5(token.encode()).hexdigest()[:16]
         return None
@@ -226,7 +271,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 'ip_address': request_info['ip_address'],
                 'user_id': request_info.get('user_id'),
                 'user_agent': request_info.get('user_agent'),
-                'query_params': request_info.get('query_params')
+                'query_params': dict(request_info['query_params'])
             }
         )
     
@@ -303,8 +348,11 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         ]
         
         # Check query parameters and body
-        all_params = str(request_info.get('query_params', '')) + str(request_info.get('body', ''))
-        all_params_lower = all_params.lower()
+        query = request_info['query_params']
+        body = request_info.get('body')
+        if not query and body is None:
+            return
+        all_params_lower = (str(dict(query)) + (str(body) if body is not None else '')).lower()
         
         # Check for SQL injection
         for pattern in suspicious_sql_patterns:
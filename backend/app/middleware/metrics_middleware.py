@@ -0,0 +1,48 @@
+"""
+Metrics Middleware
+
+Records the latency and status of every HTTP request per route template
+(`/api/v1/automotive/vehicles/{vehicle_id}`, not the raw path, so label
+cardinality stays bounded). Written as plain ASGI middleware: it only
+wraps `send` to catch the status code, without buffering the response.
+"""
+
+import time
+
+from app.core.metrics import counter, histogram
+
+REQUEST_SECONDS = histogram("http_request_duration_seconds", "HTTP request latency by route",
+                            ["method", "route"])
+REQUESTS = counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing requests per route"""
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, route, status).inc()
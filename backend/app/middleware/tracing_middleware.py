@@ -0,0 +1,35 @@
+"""
+Tracing Middleware
+
+Opens the root span of each HTTP request (named after the route template
+once routing is done) and profiles the request when an admin armed the
+profiler for the next request (app.core.profiling). Plain ASGI middleware;
+with tracing off and the profiler not armed it only passes the call on.
+"""
+
+from app.core.profiling import REQUEST_TARGET, profiler
+from app.core.tracing import span, tracer
+
+
+class TracingMiddleware:
+    """ASGI middleware tracing and profiling single requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (tracer.enabled or profiler.armed):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start(REQUEST_TARGET, scope["path"]) if profiler.armed else None
+        try:
+            with span("http.request", root=True, **{"http.method": scope["method"],
+                                                   "http.target": scope["path"]}) as request_span:
+                await self.app(scope, receive, send)
+                route = getattr(scope.get("route"), "path_format", None)
+                if route:
+                    request_span.set("http.route", route)
+        finally:
+            if profile is not None:
+                profile.stop()
@@ -1,15 +1,20 @@
 # Database models
 # Import all models to ensure proper SQLAlchemy relationship resolution
 
-from .base import Base, get_db, engine, SessionLocal
+from .base import Base, get_db, get_engine, SessionLocal
 from .scout import User, Scout, Team, Match, ScoutReport, Alert
 from .automotive import (
-    VehicleListing, VehicleImage, PriceHistory,
-    ScrapingLog, ScrapingSession, DataQualityMetric, MultiSourceSession
+    VehicleListing, VehicleImage, PriceHistory, DailyPriceRollup, WeeklyPriceRollup, MarketValueCell,
+    ScrapingLog, ScrapingSession, DataQualityMetric, MultiSourceSession,
+    HttpCacheEntry
 )
 from .notifications import (
     Notification, NotificationTemplate,
-    NotificationQueue, AlertMatchLog
+    NotificationQueue, AlertMatchLog, DeviceToken
+)
+from .scheduler import ScheduledJob, JobRun, SchedulerLock
+from .archive import (
+    ArchivedVehicleListing, ArchivedVehicleImage, ArchivedPriceHistory, ArchivedScrapingLog
 )
 from .comparison import (
     VehicleComparison, VehicleComparisonItem, ComparisonTemplate,
@@ -17,12 +22,15 @@ from .comparison import (
 )
 
 __all__ = [
-    'Base', 'get_db', 'engine', 'SessionLocal',
+    'Base', 'get_db', 'get_engine', 'SessionLocal',
     'User', 'Scout', 'Team', 'Match', 'ScoutReport', 'Alert',
-    'VehicleListing', 'VehicleImage', 'PriceHistory',
+    'VehicleListing', 'VehicleImage', 'PriceHistory', 'DailyPriceRollup', 'WeeklyPriceRollup', 'MarketValueCell',
     'ScrapingLog', 'ScrapingSession', 'DataQualityMetric', 'MultiSourceSession',
+    'HttpCacheEntry',
     'Notification', 'NotificationTemplate',
-    'NotificationQueue', 'AlertMatchLog',
+    'NotificationQueue', 'AlertMatchLog', 'DeviceToken',
     'VehicleComparison', 'VehicleComparisonItem', 'ComparisonTemplate',
-    'ComparisonShare', 'ComparisonView'
+    'ComparisonShare', 'ComparisonView',
+    'ScheduledJob', 'JobRun', 'SchedulerLock',
+    'ArchivedVehicleListing', 'ArchivedVehicleImage', 'ArchivedPriceHistory', 'ArchivedScrapingLog'
 ]
@@ -0,0 +1,72 @@
+"""
+Cold Storage Archive Models
+
+This module contains SQLAlchemy models for the cold storage tier: inactive
+listings, their images and price history, and old scraping logs moved out
+of the hot tables by app.services.cold_storage. Each archived row keeps its
+original id, the columns it is looked up by, and the full original row as
+JSON.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Index
+from app.models.base import Base
+
+
+class ArchiveMixin:
+    """Original id, archive time and the full original row"""
+    id = Column(Integer, primary_key=True, autoincrement=False)  # id in the hot table
+    archived_at = Column(DateTime, nullable=False, index=True)  # naive UTC
+    data = Column(Text, nullable=False)  # JSON of the original row
+
+    # Hot table columns copied next to `data` (for lookups and retention)
+    key_columns = ()
+
+
+class ArchivedVehicleListing(ArchiveMixin, Base):
+    """Inactive vehicle listing in cold storage"""
+    __tablename__ = "archived_vehicle_listings"
+
+    external_id = Column(String(100), index=True)
+    listing_url = Column(String(500), index=True)
+    make = Column(String(50))
+    model = Column(String(100))
+    price = Column(Float)
+    source_website = Column(String(100))
+    scraped_at = Column(DateTime(timezone=True), index=True)
+
+    key_columns = ('external_id', 'listing_url', 'make', 'model', 'price', 'source_website', 'scraped_at')
+
+
+class ArchivedVehicleImage(ArchiveMixin, Base):
+    """Image of an archived listing"""
+    __tablename__ = "archived_vehicle_images"
+
+    vehicle_id = Column(Integer, nullable=False, index=True)
+
+    key_columns = ('vehicle_id',)
+
+
+class ArchivedPriceHistory(ArchiveMixin, Base):
+    """Price history point of an archived listing"""
+    __tablename__ = "archived_price_history"
+
+    vehicle_id = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), index=True)
+
+    key_columns = ('vehicle_id', 'recorded_at')
+
+    __table_args__ = (
+        Index('idx_archived_price_vehicle', 'vehicle_id', 'recorded_at'),
+    )
+
+
+class ArchivedScrapingLog(ArchiveMixin, Base):
+    """Old scraping log entry in cold storage"""
+    __tablename__ = "archived_scraping_logs"
+
+    session_id = Column(String(36), index=True)
+    vehicle_id = Column(Integer, nullable=True, index=True)
+    status = Column(String(20))
+    started_at = Column(DateTime(timezone=True), index=True)
+
+    key_columns = ('session_id', 'vehicle_id', 'status', 'started_at')
@@ -5,7 +5,7 @@ This module contains SQLAlchemy models for storing automotive data
 scraped from various dealership websites.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Boolean, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
@@ -85,6 +85,10 @@ class VehicleListing(Base):
     duplicate_of = Column(Integer, ForeignKey("vehicle_listings.id"), nullable=True)  # Reference to master record
     is_duplicate = Column(Boolean, default=False, index=True)
     confidence_score = Column(Float, default=1.0)  # Confidence in data accuracy
+
+    # Market value (set at ingest from the comparables index, see app.services.market_value)
+    market_position = Column(String(20), nullable=True)  # above_market, below_market, at_market
+    market_zscore = Column(Float, nullable=True)  # Robust z-score of price among comparables
     
     # Relationships
     images = relationship("VehicleImage", back_populates="vehicle", cascade="all, delete-orphan")
@@ -106,6 +110,9 @@ class VehicleListing(Base):
         Index('idx_duplicates', 'is_duplicate', 'duplicate_of'),
         Index('idx_data_quality', 'data_quality_score', 'confidence_score'),
         Index('idx_external_source', 'external_id', 'source_website'),
+        Index('idx_market_value', 'market_position', 'market_zscore'),
+        # Archived rows keep their ids (cold storage): SQLite must not reuse them
+        {'sqlite_autoincrement': True},
     )
 
 
@@ -130,6 +137,8 @@ class VehicleImage(Base):
     # Relationships
     vehicle = relationship("VehicleListing", back_populates="images")
 
+    __table_args__ = {'sqlite_autoincrement': True}
+
 
 class PriceHistory(Base):
     """Price change tracking model"""
@@ -169,6 +178,72 @@ class PriceHistory(Base):
         Index('idx_vehicle_price_history', 'vehicle_id', 'recorded_at'),
         Index('idx_price_changes', 'price_change', 'recorded_at'),
         Index('idx_active_prices', 'is_active', 'recorded_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class PriceRollupMixin:
+    """Price statistics of one make/model/year bucket over one period
+
+    Maintained incrementally from price history points on ingest (see
+    app.services.price_rollups), so price charts never scan price_history.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(Date, nullable=False)
+    make = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    year = Column(Integer, nullable=False, default=0)  # 0 when unknown (NULL would defeat the unique key)
+
+    observations = Column(Integer, default=0)
+    price_min = Column(Float)
+    price_max = Column(Float)
+    price_sum = Column(Float, default=0.0)
+    price_bins = Column(Text)  # JSON {bin: count} of log-spaced price bins (mergeable, approximate medians)
+    days_on_market_sum = Column(Integer, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DailyPriceRollup(PriceRollupMixin, Base):
+    """Daily price statistics per make/model/year"""
+    __tablename__ = "price_rollups_daily"
+
+    __table_args__ = (
+        UniqueConstraint('period_start', 'make', 'model', 'year', name='uq_price_rollup_daily_bucket'),
+        Index('idx_price_rollup_daily_series', 'make', 'model', 'period_start'),
+    )
+
+
+class WeeklyPriceRollup(PriceRollupMixin, Base):
+    """Weekly (Monday to Sunday) price statistics per make/model/year"""
+    __tablename__ = "price_rollups_weekly"
+
+    __table_args__ = (
+        UniqueConstraint('period_start', 'make', 'model', 'year', name='uq_price_rollup_weekly_bucket'),
+        Index('idx_price_rollup_weekly_series', 'make', 'model', 'period_start'),
+    )
+
+
+class MarketValueCell(Base):
+    """Robust price statistics of comparable listings (one comparables index cell)"""
+    __tablename__ = "market_value_cells"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Cell key: normalized make/model, year (0 = any) and mileage band (-1 = any)
+    make_key = Column(String(50), nullable=False)
+    model_key = Column(String(100), nullable=False)
+    year = Column(Integer, nullable=False, default=0)
+    mileage_band = Column(Integer, nullable=False, default=-1)
+
+    # Statistics
+    listings = Column(Integer, nullable=False)
+    median_price = Column(Float, nullable=False)
+    spread = Column(Float, nullable=False)  # 1.4826 * median absolute deviation
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('make_key', 'model_key', 'year', 'mileage_band', name='uq_market_value_cell'),
     )
 
 
@@ -209,9 +284,29 @@ class ScrapingLog(Base):
     __table_args__ = (
         Index('idx_session_status', 'session_id', 'status'),
         Index('idx_scraping_time', 'started_at', 'status'),
+        {'sqlite_autoincrement': True},
     )
 
 
+class HttpCacheEntry(Base):
+    """Validators and body hash of the last response per URL (conditional requests)"""
+    __tablename__ = "http_cache_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(1000), nullable=False, unique=True, index=True)
+
+    etag = Column(String(200))
+    last_modified = Column(String(100))  # HTTP date as sent by the server
+    content_hash = Column(String(64))    # sha256 of the response body
+    content_length = Column(Integer)
+
+    fetched_at = Column(DateTime(timezone=True))       # Last time the body changed
+    last_checked_at = Column(DateTime(timezone=True))  # Last request of any outcome
+    check_count = Column(Integer, default=0)
+    not_modified_count = Column(Integer, default=0)
+    unchanged_count = Column(Integer, default=0)
+
+
 class ScrapingSession(Base):
     """Scraping session summary model"""
     __tablename__ = "scraping_sessions"
@@ -225,6 +320,7 @@ class ScrapingSession(Base):
     scraper_version = Column(String(20))
     user_agent = Column(String(500))
     session_type = Column(String(20), default="single")  # single, multi_source, scheduled
+    multi_source_session_id = Column(String(36), index=True)  # MultiSourceSession.session_id
     
     # Session statistics
     total_pages_scraped = Column(Integer, default=0)
@@ -234,10 +330,14 @@ class ScrapingSession(Base):
     total_vehicles_skipped = Column(Integer, default=0)
     total_duplicates_found = Column(Integer, default=0)
     total_errors = Column(Integer, default=0)
+    page_stats = Column(Text)  # JSON: {"<page>": {"found": n, "new": n}}
     
     # Performance metrics
     average_response_time = Column(Float)
     total_data_transferred = Column(Integer)  # in bytes
+    total_requests = Column(Integer, default=0)
+    total_not_modified = Column(Integer, default=0)  # 304 responses to conditional requests
+    total_unchanged = Column(Integer, default=0)     # 200 responses with an unchanged body hash
     
     # Session timing
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -6,31 +6,35 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+SQLITE_URL = "sqlite:///./auto_scouter.db"
+
+
+def _create_sqlite_engine():
+    return create_engine(
+        SQLITE_URL,
+        echo=False,
+        connect_args={"check_same_thread": False}  # SQLite specific
+    )
+
+
 def create_database_engine():
-    """Create database engine with fallback to SQLite"""
+    """Create database engine with fallback to SQLite
+
+    Does not connect: importing the models must not wait for the database.
+    An unreachable server is detected (and the fallback applied) by
+    init_database() at startup; a missing driver falls back right away.
+    """
     try:
-        # Try PostgreSQL first
-        engine = create_engine(
+        return create_engine(
             settings.DATABASE_URL,
             echo=False,  # Set to True for SQL debugging
         )
-        # Test connection
-        engine.connect()
-        logger.info("✅ Connected to PostgreSQL database")
-        return engine
-    except Exception as e:
-        logger.warning(f"⚠️  PostgreSQL connection failed: {e}")
-        if getattr(settings, 'SQLITE_FALLBACK', True):
-            logger.info("🔄 Falling back to SQLite database")
-            sqlite_url = "sqlite:///./auto_scouter.db"
-            engine = create_engine(
-                sqlite_url,
-                echo=False,
-                connect_args={"check_same_thread": False}  # SQLite specific
-            )
-            return engine
-        else:
-            raise e
+    except ImportError as e:
+        if not getattr(settings, 'SQLITE_FALLBACK', True):
+            raise
+        logger.warning(f"⚠️  Database driver not available: {e}")
+        logger.info("🔄 Falling back to SQLite database")
+        return _create_sqlite_engine()
 
 engine = create_database_engine()
 
@@ -39,6 +43,34 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def get_engine():
+    """The current engine (init_database() may have switched to SQLite)"""
+    return engine
+
+
+def init_database(create_tables: bool = True):
+    """Connect, falling back to SQLite if allowed, and create missing tables"""
+    global engine
+    try:
+        with engine.connect():
+            pass
+        logger.info(f"✅ Connected to {engine.dialect.name} database")
+    except Exception as e:
+        if engine.dialect.name == "sqlite" or not getattr(settings, 'SQLITE_FALLBACK', True):
+            raise
+        logger.warning(f"⚠️  {engine.dialect.name} connection failed: {e}")
+        logger.info("🔄 Falling back to SQLite database")
+        engine.dispose()
+        engine = _create_sqlite_engine()
+        SessionLocal.configure(bind=engine)
+
+    if create_tables:
+        # Register every model on Base before creating tables
+        import app.models  # noqa: F401
+        Base.metadata.create_all(bind=engine)
+        logger.info("✅ Database tables created/verified")
+
+
 def get_db():
     db = SessionLocal()
     try:
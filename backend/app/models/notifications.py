@@ -109,6 +109,34 @@ class NotificationPreferences(Base):
     )
 
 
+class DeviceToken(Base):
+    """Registered push notification device token"""
+    __tablename__ = "device_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    token = Column(String(512), nullable=False, unique=True)
+    platform = Column(String(20), default="android")  # android, ios, web
+    app_version = Column(String(50), nullable=True)
+    is_active = Column(Boolean, default=True)
+
+    # Delivery tracking
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    failure_count = Column(Integer, default=0)
+    last_failure_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    user = relationship("User")
+
+    # Push fan-out looks up active tokens for many users at once
+    __table_args__ = (
+        Index('idx_device_token_user_active', 'user_id', 'is_active'),
+    )
+
+
 class NotificationTemplate(Base):
     """Notification templates for different types of notifications"""
     __tablename__ = "notification_templates"
@@ -0,0 +1,76 @@
+"""
+Job Scheduler Models
+
+This module contains SQLAlchemy models for the persistent, cluster-wide
+job scheduler: job definitions, run history and leader locks.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Index
+from app.models.base import Base
+
+
+class ScheduledJob(Base):
+    """Periodic job definition and its next-run state"""
+    __tablename__ = "scheduled_jobs"
+
+    # All timestamps are naive UTC (datetime.utcnow) so comparisons work on
+    # SQLite and PostgreSQL alike
+    id = Column(String(100), primary_key=True)
+    name = Column(String(200), nullable=False)
+    interval_seconds = Column(Integer, nullable=False)
+    is_paused = Column(Boolean, default=False)
+
+    # Scheduling state
+    next_run_at = Column(DateTime, nullable=False, index=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_status = Column(String(20), nullable=True)  # completed, failed
+    last_duration_seconds = Column(Float, nullable=True)
+
+    # Run lock (a job never runs twice at the same time across the cluster)
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+
+    # Statistics
+    run_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)
+    misfire_count = Column(Integer, default=0)
+    avg_duration_seconds = Column(Float, nullable=True)
+    max_duration_seconds = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class JobRun(Base):
+    """History of job executions"""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(100), nullable=False)
+    trigger = Column(String(20), default="scheduled")  # scheduled, manual
+    worker_id = Column(String(100), nullable=True)
+
+    scheduled_for = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+
+    status = Column(String(20), default="running")  # queued, running, completed, failed
+    misfired = Column(Boolean, default=False)  # started later than the grace time allows
+    delay_seconds = Column(Float, nullable=True)  # start time minus scheduled time
+    error_message = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('idx_job_run_job_started', 'job_id', 'started_at'),
+        Index('idx_job_run_status', 'status'),
+    )
+
+
+class SchedulerLock(Base):
+    """Lease-based lock used for scheduler leader election"""
+    __tablename__ = "scheduler_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    acquired_at = Column(DateTime, nullable=True)
@@ -5,19 +5,24 @@ This module provides REST API endpoints for accessing scraped automotive data.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc, func
 from typing import List, Optional, Dict, Any
+from datetime import date, datetime, timedelta
 import math
 import logging
 
+from app.core.profiling import PROFILE_TARGETS, profiler
 from app.models.base import get_db
 from app.services.automotive_service import AutomotiveService
 from app.schemas.automotive import (
     VehicleListing, VehicleListingCreate, VehicleListingUpdate,
     VehicleSearchFilters, VehicleSearchResponse, VehicleAnalytics,
-    ScrapingSession, ScrapingLog
+    ScrapingSession, ScrapingLog, PriceHistory, PriceSeriesResponse
 )
+from app.services.cold_storage import ColdStorageService
+from app.services.price_rollups import PriceRollupService
 # Scraper imports removed for simplified single-user deployment
 
 logger = logging.getLogger(__name__)
@@ -82,6 +87,10 @@ def search_vehicles(
     fuel_type: Optional[str] = Query(None, description="Fuel type (gasoline, diesel, electric, hybrid)"),
     transmission: Optional[str] = Query(None, description="Transmission type (manual, automatic)"),
     city: Optional[str] = Query(None, description="City location"),
+    market_position: Optional[str] = Query(None, pattern="^(below_market|at_market|above_market)$",
+                                           description="Price relative to comparable listings"),
+    sort_by: str = Query("newest", pattern="^(newest|market_value)$",
+                         description="newest, or market_value (furthest below market first)"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     db: Session = Depends(get_db)
@@ -104,12 +113,13 @@ def search_vehicles(
             fuel_type=fuel_type,
             transmission=transmission,
             city=city,
+            market_position=market_position,
             is_active=True
         )
         
         # Search vehicles
         automotive_service = AutomotiveService(db)
-        vehicles, total_count = automotive_service.search_vehicles(filters, page, page_size)
+        vehicles, total_count = automotive_service.search_vehicles(filters, page, page_size, sort_by)
         
         # Calculate pagination info
         total_pages = math.ceil(total_count / page_size)
@@ -135,6 +145,9 @@ def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     """Get detailed information about a specific vehicle"""
     automotive_service = AutomotiveService(db)
     vehicle = automotive_service.get_vehicle_by_id(vehicle_id)
+    if not vehicle:
+        # Inactive listings move to cold storage after a while
+        vehicle = ColdStorageService(db).get_vehicle(vehicle_id)
     
     if not vehicle:
         raise HTTPException(
@@ -145,6 +158,35 @@ def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     return vehicle
 
 
+@router.get("/vehicles/{vehicle_id}/price-history", response_model=List[PriceHistory])
+def get_vehicle_price_history(
+    vehicle_id: int,
+    start: Optional[datetime] = Query(None, description="Only prices recorded at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only prices recorded before this time"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of price points"),
+    db: Session = Depends(get_db)
+):
+    """Price points of a vehicle, oldest first"""
+    from app.models.automotive import PriceHistory as PriceHistoryModel, VehicleListing as VehicleListingModel
+
+    if not db.query(VehicleListingModel.id).filter(VehicleListingModel.id == vehicle_id).first():
+        cold_storage = ColdStorageService(db)
+        if cold_storage.is_archived(vehicle_id):
+            return cold_storage.get_price_history(vehicle_id, start, end, limit)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found"
+        )
+
+    # Served by idx_vehicle_price_history (vehicle_id, recorded_at)
+    query = db.query(PriceHistoryModel).filter(PriceHistoryModel.vehicle_id == vehicle_id)
+    if start:
+        query = query.filter(PriceHistoryModel.recorded_at >= start)
+    if end:
+        query = query.filter(PriceHistoryModel.recorded_at < end)
+    return query.order_by(PriceHistoryModel.recorded_at, PriceHistoryModel.id).limit(limit).all()
+
+
 @router.get("/new-cars", response_model=List[Dict[str, Any]])
 def get_new_cars(
     limit: int = Query(20, ge=1, le=100, description="Number of results to return"),
@@ -293,6 +335,25 @@ def get_analytics(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/analytics/prices", response_model=PriceSeriesResponse)
+def get_price_analytics(
+    make: str = Query(..., description="Vehicle make"),
+    model: Optional[str] = Query(None, description="Vehicle model (all models of the make if omitted)"),
+    year: Optional[int] = Query(None, description="Model year"),
+    interval: str = Query("week", pattern="^(day|week)$", description="Rollup period: day or week"),
+    start: Optional[date] = Query(None, description="First day (default: 90 days or 2 years back)"),
+    end: Optional[date] = Query(None, description="Last day"),
+    db: Session = Depends(get_db)
+):
+    """Price statistics per day or week from the price rollups"""
+    if start is None:
+        start = date.today() - timedelta(days=90 if interval == "day" else 730)
+
+    series = PriceRollupService(db).series(make, model=model, year=year, period=interval,
+                                           start=start, end=end)
+    return {"make": make, "model": model, "year": year, "interval": interval, "series": series}
+
+
 @router.get("/makes", response_model=List[Dict[str, Any]])
 def get_available_makes(db: Session = Depends(get_db)):
     """Get list of available vehicle makes with counts"""
@@ -358,6 +419,10 @@ def get_available_models(
 def get_scraper_status():
     """Get current status of the scraper system"""
     try:
+        from app.scraper.scheduler import scraper_scheduler
+        from app.scraper.compliance import compliance_manager
+        from app.scraper.monitoring import scraper_monitor
+        
         scheduler_status = scraper_scheduler.get_job_status()
         compliance_status = compliance_manager.get_compliance_status()
         
@@ -378,6 +443,8 @@ def get_scraper_status():
 def trigger_manual_scrape(background_tasks: BackgroundTasks):
     """Trigger a manual scraping run"""
     try:
+        from app.scraper.scheduler import scraper_scheduler
+        
         job_id = scraper_scheduler.trigger_manual_scrape()
         return {
             "message": "Manual scraping job triggered successfully",
@@ -414,16 +481,19 @@ def trigger_multi_source_scrape(
     max_vehicles_per_source: int = Query(50, ge=1, le=200, description="Maximum vehicles per source"),
     background_tasks: BackgroundTasks = None
 ):
-    """Trigger multi-source scraping from all enabled sources"""
+    """Start multi-source scraping from all enabled sources in the background"""
     try:
-        # Start the multi-source scraping task
+        from app.tasks.scraping_tasks import scrape_all_sources_task
+
+        # Returns immediately; progress is recorded in the multi-source session
         task = scrape_all_sources_task.delay(max_vehicles_per_source=max_vehicles_per_source)
 
         return {
             "message": "Multi-source scraping started successfully",
             "task_id": task.id,
             "max_vehicles_per_source": max_vehicles_per_source,
-            "status": "started"
+            "status": "started",
+            "progress_url": f"/api/v1/automotive/multi-source-sessions/{task.id}"
         }
 
     except Exception as e:
@@ -437,6 +507,8 @@ def trigger_multi_source_scrape(
 def get_scraper_sources():
     """Get status of all scraping sources"""
     try:
+        from app.scraper.multi_source_scraper import multi_source_scraper
+
         return multi_source_scraper.get_source_status()
 
     except Exception as e:
@@ -450,6 +522,8 @@ def get_scraper_sources():
 def enable_scraper_source(source: str):
     """Enable a specific scraping source"""
     try:
+        from app.scraper.multi_source_scraper import multi_source_scraper
+
         success = multi_source_scraper.enable_source(source)
         if success:
             return {
@@ -474,6 +548,8 @@ def enable_scraper_source(source: str):
 def disable_scraper_source(source: str):
     """Disable a specific scraping source"""
     try:
+        from app.scraper.multi_source_scraper import multi_source_scraper
+
         success = multi_source_scraper.disable_source(source)
         if success:
             return {
@@ -501,15 +577,17 @@ def scrape_single_source(
 ):
     """Scrape from a single specific source"""
     try:
+        from app.scraper.multi_source_scraper import multi_source_scraper
+
         result = multi_source_scraper.scrape_source(source, max_vehicles)
 
         return {
             "message": f"Scraping from '{source}' completed",
             "source": source,
             "success": result.success,
-            "vehicles_count": result.vehicles_count,
+            "vehicles_count": result.vehicles_scraped,
             "duration_seconds": result.duration_seconds,
-            "error": result.error_message
+            "error": "; ".join(result.errors) or None
         }
 
     except Exception as e:
@@ -553,7 +631,7 @@ def get_multi_source_sessions(
                     "total_errors": session.total_errors,
                     "started_at": session.started_at.isoformat() if session.started_at else None,
                     "completed_at": session.completed_at.isoformat() if session.completed_at else None,
-                    "duration_seconds": session.duration_seconds
+                    "duration_seconds": session.total_duration_seconds
                 }
                 for session in sessions
             ],
@@ -609,8 +687,12 @@ def get_multi_source_session_details(session_id: str, db: Session = Depends(get_
                 "total_errors": multi_session.total_errors,
                 "started_at": multi_session.started_at.isoformat() if multi_session.started_at else None,
                 "completed_at": multi_session.completed_at.isoformat() if multi_session.completed_at else None,
-                "duration_seconds": multi_session.duration_seconds,
-                "performance_metrics": multi_session.performance_metrics
+                "duration_seconds": multi_session.total_duration_seconds,
+                "performance_metrics": {
+                    "average_source_duration": multi_session.average_source_duration,
+                    "fastest_source_duration": multi_session.fastest_source_duration,
+                    "slowest_source_duration": multi_session.slowest_source_duration
+                }
             },
             "individual_sessions": [
                 {
@@ -746,6 +828,60 @@ def run_data_cleanup(
         )
 
 
+@router.post("/maintenance/cold-storage", response_model=Dict[str, Any])
+def run_cold_storage_move(
+    listing_days: Optional[int] = Query(None, ge=1, le=365, description="Move listings inactive this many days"),
+    log_days: Optional[int] = Query(None, ge=1, le=365, description="Move scraping logs older than this many days"),
+    db: Session = Depends(get_db)
+):
+    """Move inactive listings and old scraping logs to cold storage"""
+    try:
+        cold_storage = ColdStorageService(db)
+        results = cold_storage.move(listing_days, log_days)
+        
+        return {
+            "message": "Cold storage move completed successfully",
+            "moves": [result.to_dict() for result in results],
+            "tables": cold_storage.get_stats()
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error moving data to cold storage: {str(e)}"
+        )
+
+
+@router.post("/maintenance/profile", response_model=Dict[str, Any])
+def arm_profiler(
+    target: str = Query("request", description=f"What to profile next: {', '.join(PROFILE_TARGETS)}"),
+    path: Optional[str] = Query(None, description="Only profile a request under this path")
+):
+    """Profile the next request, scrape cycle or listing match run"""
+    if target not in PROFILE_TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown profile target {target!r}, expected one of {', '.join(PROFILE_TARGETS)}"
+        )
+    profiler.arm(target, path)
+    return {"message": f"Profiler armed for the next {target}", **profiler.status()}
+
+
+@router.get("/maintenance/profile", response_model=Dict[str, Any])
+def get_profiler_status():
+    """Armed profile request and the latest profile reports"""
+    return profiler.status()
+
+
+@router.get("/maintenance/profile/{report_name}")
+def get_profile_report(report_name: str):
+    """Download a profile report file"""
+    path = profiler.report_path(report_name)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile report not found")
+    return FileResponse(path)
+
+
 @router.get("/maintenance/quality", response_model=Dict[str, Any])
 def get_data_quality_report(db: Session = Depends(get_db)):
     """Get detailed data quality report"""
@@ -11,9 +11,10 @@ from pydantic import BaseModel
 
 from app.models.base import get_db
 from app.models.scout import User
-from app.models.notifications import Notification
+from app.models.notifications import Notification, NotificationPreferences
 from app.core.auth import get_current_active_user
 from app.services.firebase_service import get_firebase_service, get_fallback_service
+from app.services.device_token_service import DeviceTokenService
 
 router = APIRouter(prefix="/api/v1/push", tags=["push-notifications"])
 
@@ -54,29 +55,23 @@ def register_device_token(
                 detail="Invalid device token format"
             )
         
-        # Store device token in user preferences
-        # Note: In a real implementation, you'd store this in a separate DeviceToken table
-        # For now, we'll store it in the user's notification preferences
-        
-        from app.models.notifications import NotificationPreferences
+        DeviceTokenService(db).register_token(
+            user_id=current_user.id,
+            token=token_data.device_token,
+            platform=token_data.platform,
+            app_version=token_data.app_version
+        )
         
-        # Get or create notification preferences
+        # Registering a device opts the user into push notifications
         prefs = db.query(NotificationPreferences).filter(
             NotificationPreferences.user_id == current_user.id
         ).first()
         
         if not prefs:
-            prefs = NotificationPreferences(
-                user_id=current_user.id,
-                push_notifications=True,
-                email_notifications=True
-            )
+            prefs = NotificationPreferences(user_id=current_user.id)
             db.add(prefs)
         
-        # Store device token (in a real app, use a proper DeviceToken table)
-        prefs.push_notifications = True
-        prefs.updated_at = datetime.utcnow()
-        
+        prefs.push_enabled = True
         db.commit()
         
         return DeviceTokenResponse(
@@ -92,6 +87,20 @@ def register_device_token(
             detail=f"Failed to register device token: {str(e)}"
         )
 
+@router.post("/unregister-device", response_model=DeviceTokenResponse)
+def unregister_device_token(
+    token_data: DeviceTokenRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Unregister a device token (e.g. on logout)"""
+    removed = DeviceTokenService(db).unregister_token(current_user.id, token_data.device_token)
+    
+    return DeviceTokenResponse(
+        success=removed,
+        message="Device token unregistered" if removed else "Device token not found"
+    )
+
 @router.post("/test-notification", response_model=DeviceTokenResponse)
 def send_test_notification(
     test_data: TestNotificationRequest,
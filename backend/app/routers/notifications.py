@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 from typing import List, Optional
+from dataclasses import replace
 from datetime import datetime, timedelta
 import math
 
@@ -22,6 +23,7 @@ from app.schemas.notifications import (
     NotificationPreferencesResponse, NotificationPreferencesUpdate,
     NotificationStats, UserNotificationStats, NotificationUpdate
 )
+from app.services.retention import NOTIFICATION_POLICY, RetentionEngine
 from app.core.auth import get_current_active_user
 
 router = APIRouter()
@@ -327,14 +329,12 @@ def cleanup_old_notifications(
 ):
     """Clean up old notifications for the current user"""
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_old)
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=days_old)
         
-        deleted_count = db.query(Notification).filter(
-            Notification.user_id == current_user.id,
-            Notification.created_at < cutoff_date
-        ).delete()
-        
-        db.commit()
+        # Chunked delete, queue entries first
+        policy = replace(NOTIFICATION_POLICY, days=days_old, where=(Notification.user_id == current_user.id,))
+        deleted_count = RetentionEngine(db).purge(policy, now=now).rows
         
         return {
             "message": f"Deleted {deleted_count} notifications older than {days_old} days",
@@ -231,6 +231,10 @@ class VehicleListing(VehicleListingBase):
     scraped_at: datetime
     last_updated: Optional[datetime] = None
     is_active: bool = True
+
+    # Market value
+    market_position: Optional[str] = None  # above_market, below_market, at_market
+    market_zscore: Optional[float] = None
     
     # Relationships
     images: List[VehicleImage] = []
@@ -263,6 +267,7 @@ class VehicleSearchFilters(BaseModel):
     condition: Optional[ConditionType] = None
     city: Optional[str] = None
     region: Optional[str] = None
+    market_position: Optional[str] = None
     is_active: bool = True
 
 
@@ -394,3 +399,21 @@ class PriceAnalytics(BaseModel):
     price_trend: str
     sample_size: int
     last_updated: datetime
+
+
+class PricePeriodStats(BaseModel):
+    period_start: str  # ISO date; Monday for weekly periods
+    count: int
+    min: float
+    median: float
+    max: float
+    mean: float
+    mean_days_on_market: float
+
+
+class PriceSeriesResponse(BaseModel):
+    make: str
+    model: Optional[str] = None
+    year: Optional[int] = None
+    interval: str  # day, week
+    series: List[PricePeriodStats]
@@ -0,0 +1,258 @@
+"""
+Adaptive Scrape Scheduling Module
+
+Chooses the interval and depth of the next scraping cycle from the observed
+listing churn of a source. The new-listing rate is measured from recent
+ScrapingSession rows: while churn is high the scraper polls page 1 often,
+when it is low it polls less often, and off-peak it runs periodic deep
+sweeps. Each plan reports the expected freshness of newly published
+listings against the request budget it spends.
+"""
+
+import json
+import logging
+import math
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.automotive import ScrapingSession
+from .config import scraper_settings, ScraperSettings
+
+logger = logging.getLogger(__name__)
+
+# Session types recorded for each planning mode
+MODE_FIXED = "fixed"
+MODE_REALTIME = "realtime"
+MODE_PEAK = "peak"
+MODE_OFF_PEAK = "off_peak"
+MODE_DEEP_SWEEP = "deep_sweep"
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Drop tzinfo after converting to UTC (SQLite returns naive values, PostgreSQL aware ones)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return (value - value.utcoffset()).replace(tzinfo=None)
+
+
+@dataclass
+class ChurnStats:
+    """New-listing activity of a source measured over recent sessions"""
+    source: str
+    sessions: int
+    window_hours: float
+    new_per_hour: Optional[float]  # None until two sessions span a time range
+    listings_per_page: float
+    page1_new_ratio: Optional[float]  # Share of page-1 listings that were new
+    deepest_new_page: int
+    last_deep_sweep_at: Optional[datetime]
+
+
+@dataclass
+class ScrapePlan:
+    """Interval, depth and expected freshness of the next scraping cycle"""
+    source: str
+    mode: str
+    interval_seconds: int
+    max_pages: int
+    max_vehicles: int
+    is_peak: bool
+
+    # Freshness against request budget
+    expected_new_per_cycle: Optional[float]
+    expected_coverage: Optional[float]  # Share of new listings within the scraped depth
+    expected_lag_seconds: float         # Mean delay between publication and detection
+    max_lag_seconds: float
+    requests_per_hour: float            # Listing page requests spent by this plan
+    request_budget_per_hour: int
+    budget_utilization: float
+
+    churn: Optional[ChurnStats] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        if self.churn and self.churn.last_deep_sweep_at:
+            data["churn"]["last_deep_sweep_at"] = self.churn.last_deep_sweep_at.isoformat()
+        return data
+
+
+class AdaptiveScrapeScheduler:
+    """Plans scraping cycles from the listing churn of each source"""
+
+    def __init__(self,
+                 settings: ScraperSettings = scraper_settings,
+                 default_interval_seconds: int = 300,
+                 default_max_pages: int = 10,
+                 default_max_vehicles: int = 10):
+        self.settings = settings
+        # Used when adaptive scheduling is disabled
+        self.default_interval_seconds = default_interval_seconds
+        self.default_max_pages = default_max_pages
+        self.default_max_vehicles = default_max_vehicles
+
+    def is_peak(self, now: datetime) -> bool:
+        """Peak hours are interpreted in server time"""
+        return self.settings.PEAK_HOURS_START <= now.hour < self.settings.PEAK_HOURS_END
+
+    def measure_churn(self, db: Session, source: str, now: Optional[datetime] = None) -> ChurnStats:
+        """Measure the new-listing rate of a source from its recent sessions"""
+        now = now or datetime.utcnow()
+        window_hours = self.settings.ADAPTIVE_WINDOW_HOURS
+
+        sessions = db.query(ScrapingSession).filter(
+            ScrapingSession.source_website == source,
+            ScrapingSession.status == "completed",
+            ScrapingSession.started_at >= now - timedelta(hours=window_hours)
+        ).order_by(ScrapingSession.started_at.asc()).all()
+
+        last_deep_sweep = db.query(ScrapingSession.started_at).filter(
+            ScrapingSession.source_website == source,
+            ScrapingSession.session_type == MODE_DEEP_SWEEP,
+            ScrapingSession.status == "completed"
+        ).order_by(ScrapingSession.started_at.desc()).first()
+
+        # The first session's new listings accumulated before the window
+        # started, so only later sessions count towards the rate
+        new_per_hour = None
+        if len(sessions) >= 2:
+            span_hours = (_naive_utc(sessions[-1].started_at) -
+                          _naive_utc(sessions[0].started_at)).total_seconds() / 3600
+            if span_hours > 0:
+                new_listings = sum(s.total_vehicles_new or 0 for s in sessions[1:])
+                new_per_hour = new_listings / span_hours
+
+        page1_found: List[int] = []
+        page1_ratios: List[float] = []
+        deepest_new_page = 0
+        for index, session in enumerate(sessions):
+            pages = self._page_stats(session)
+            first_page = pages.get(1)
+            if first_page and first_page.get("found"):
+                page1_found.append(first_page["found"])
+                if index > 0:
+                    page1_ratios.append(first_page.get("new", 0) / first_page["found"])
+            if index > 0:
+                for page, stats in pages.items():
+                    if stats.get("new"):
+                        deepest_new_page = max(deepest_new_page, page)
+
+        return ChurnStats(
+            source=source,
+            sessions=len(sessions),
+            window_hours=window_hours,
+            new_per_hour=new_per_hour,
+            listings_per_page=(sum(page1_found) / len(page1_found)
+                               if page1_found else float(self.settings.LISTINGS_PER_PAGE)),
+            page1_new_ratio=sum(page1_ratios) / len(page1_ratios) if page1_ratios else None,
+            deepest_new_page=deepest_new_page,
+            last_deep_sweep_at=_naive_utc(last_deep_sweep[0]) if last_deep_sweep else None
+        )
+
+    @staticmethod
+    def _page_stats(session: ScrapingSession) -> Dict[int, Dict[str, int]]:
+        if not session.page_stats:
+            return {}
+        try:
+            return {int(page): stats for page, stats in json.loads(session.page_stats).items()}
+        except (ValueError, TypeError, AttributeError):
+            return {}
+
+    def plan(self, db: Session, source: str, now: Optional[datetime] = None) -> ScrapePlan:
+        """Plan the next scraping cycle of a source"""
+        now = now or datetime.utcnow()
+        settings = self.settings
+        peak = self.is_peak(now)
+
+        if not settings.ENABLE_ADAPTIVE_SCHEDULING:
+            return self._build_plan(source, MODE_FIXED, self.default_interval_seconds,
+                                    self.default_max_pages, self.default_max_vehicles, peak,
+                                    churn=None)
+
+        churn = self.measure_churn(db, source, now)
+        per_page = max(1.0, churn.listings_per_page)
+
+        min_interval = settings.REALTIME_MONITORING_INTERVAL_MINUTES * 60
+        max_interval = (settings.PEAK_HOURS_SCRAPING_INTERVAL_MINUTES * 60 if peak
+                        else settings.OFF_PEAK_SCRAPING_INTERVAL_HOURS * 3600)
+
+        # Poll when new listings would fill the target share of page 1, so
+        # a shallow poll still sees everything published since the last one
+        if churn.new_per_hour:
+            target_new = per_page * settings.ADAPTIVE_TARGET_PAGE_FILL
+            interval = target_new / churn.new_per_hour * 3600
+        else:
+            interval = max_interval
+        interval = min(max(interval, min_interval), max_interval)
+
+        if not peak and self._deep_sweep_due(churn, now):
+            mode = MODE_DEEP_SWEEP
+            max_vehicles = settings.COMPREHENSIVE_MAX_VEHICLES
+            max_pages = settings.MAX_PAGES_TO_SCRAPE
+        else:
+            if interval <= min_interval:
+                mode, vehicle_cap = MODE_REALTIME, settings.REALTIME_MAX_VEHICLES
+            elif peak:
+                mode, vehicle_cap = MODE_PEAK, settings.PEAK_HOURS_MAX_VEHICLES
+            else:
+                mode, vehicle_cap = MODE_OFF_PEAK, settings.OFF_PEAK_MAX_VEHICLES
+
+            if churn.new_per_hour is None:
+                depth = max(1, churn.deepest_new_page)
+            else:
+                depth = max(1, math.ceil(churn.new_per_hour * interval / 3600 / per_page))
+            # A page 1 that was almost all new means listings spilled onto page 2
+            if churn.page1_new_ratio is not None and churn.page1_new_ratio >= 0.9:
+                depth += 1
+
+            max_vehicles = min(vehicle_cap, int(depth * per_page))
+            max_pages = min(settings.MAX_PAGES_TO_SCRAPE, max(1, math.ceil(max_vehicles / per_page)))
+
+        # Never plan more listing page requests than the hourly budget allows
+        budget = settings.REQUESTS_PER_HOUR
+        if budget and max_pages * 3600 / interval > budget:
+            interval = max_pages * 3600 / budget
+
+        return self._build_plan(source, mode, int(interval), max_pages, max_vehicles, peak, churn)
+
+    def _deep_sweep_due(self, churn: ChurnStats, now: datetime) -> bool:
+        if churn.last_deep_sweep_at is None:
+            return True
+        sweep_interval = timedelta(hours=self.settings.COMPREHENSIVE_SCRAPING_INTERVAL_HOURS)
+        return now - churn.last_deep_sweep_at >= sweep_interval
+
+    def _build_plan(self, source: str, mode: str, interval: int, max_pages: int,
+                    max_vehicles: int, peak: bool, churn: Optional[ChurnStats]) -> ScrapePlan:
+        expected_new = None
+        coverage = None
+        if churn and churn.new_per_hour is not None:
+            expected_new = churn.new_per_hour * interval / 3600
+            coverage = min(1.0, max_vehicles / expected_new) if expected_new > 0 else 1.0
+
+        requests_per_hour = max_pages * 3600 / interval if interval else 0.0
+        budget = self.settings.REQUESTS_PER_HOUR
+
+        plan = ScrapePlan(
+            source=source,
+            mode=mode,
+            interval_seconds=interval,
+            max_pages=max_pages,
+            max_vehicles=max_vehicles,
+            is_peak=peak,
+            expected_new_per_cycle=round(expected_new, 2) if expected_new is not None else None,
+            expected_coverage=round(coverage, 3) if coverage is not None else None,
+            expected_lag_seconds=interval / 2,
+            max_lag_seconds=float(interval),
+            requests_per_hour=round(requests_per_hour, 2),
+            request_budget_per_hour=budget,
+            budget_utilization=round(requests_per_hour / budget, 3) if budget else 0.0,
+            churn=churn
+        )
+
+        logger.info(f"Scrape plan for {source}: {mode}, every {interval}s, "
+                    f"{max_pages} pages / {max_vehicles} vehicles, "
+                    f"expected lag {plan.expected_lag_seconds:.0f}s, "
+                    f"{plan.requests_per_hour:.1f}/{budget} requests per hour")
+        return plan
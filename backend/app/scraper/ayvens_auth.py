@@ -13,6 +13,10 @@ from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 
+from .config import scraper_settings
+from .session_store import serialize_cookies, restore_cookies
+from .transport import create_session
+
 # Hardcoded credentials for single-user application
 AYVENS_USERNAME = "Pndoj"
 AYVENS_PASSWORD = "Asdfgh,.&78"
@@ -27,17 +31,16 @@ class AyvensAuthenticator:
         self.base_url = "https://carmarket.ayvens.com"
         self.login_url = f"{self.base_url}/en-fr/"  # Main page where login modal is triggered
         self.auth_endpoint = f"{self.base_url}/api/auth/login"  # Likely AJAX endpoint
-        self.session = requests.Session()
         self.is_authenticated = False
         self.auth_expires_at = None
         self.last_auth_check = None
+        self.tokens: Dict[str, str] = {}
         
-        # Setup session headers
-        self.session.headers.update({
+        # Session on the shared transport (keep-alive pools, timeouts, encodings)
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
@@ -73,6 +76,7 @@ class AyvensAuthenticator:
             if not session_result["success"]:
                 auth_result.update(session_result)
                 return auth_result
+            self.tokens = session_result["tokens"]
 
             # Step 2: Attempt AJAX login
             login_result = self._submit_ajax_login(username, password)
@@ -193,6 +197,8 @@ class AyvensAuthenticator:
                 'X-Requested-With': 'XMLHttpRequest',
                 'Referer': self.login_url
             }
+            if self.tokens.get('csrf_token'):
+                ajax_headers['X-CSRF-Token'] = self.tokens['csrf_token']
 
             # Try each endpoint
             for endpoint in ajax_endpoints:
@@ -442,9 +448,10 @@ class AyvensAuthenticator:
             self.is_authenticated = False
             return False
         
-        # Check session validity every 30 minutes
-        if (self.last_auth_check and 
-            datetime.utcnow() - self.last_auth_check > timedelta(minutes=30)):
+        # Probe restored sessions, then every SESSION_PROBE_INTERVAL_MINUTES
+        probe_interval = timedelta(minutes=scraper_settings.SESSION_PROBE_INTERVAL_MINUTES)
+        if (not self.last_auth_check or
+            datetime.utcnow() - self.last_auth_check > probe_interval):
             return self._verify_session()
         
         return True
@@ -453,8 +460,10 @@ class AyvensAuthenticator:
         """Verify session is still active by making a test request"""
         try:
             # Try to access a protected page
+            # Only the final URL matters, the body is never downloaded
             test_url = f"{self.base_url}/lots"
-            response = self.session.get(test_url, timeout=15)
+            response = self.session.get(test_url, timeout=15, stream=True)
+            response.close()
             
             self.last_auth_check = datetime.utcnow()
             
@@ -483,9 +492,39 @@ class AyvensAuthenticator:
         self.is_authenticated = False
         self.auth_expires_at = None
         self.last_auth_check = None
+        self.tokens = {}
         
         logger.info("Logged out and cleared session")
     
+    def export_state(self) -> Dict[str, Any]:
+        """Serializable login state (cookies, CSRF tokens, expiry)"""
+        return {
+            "cookies": serialize_cookies(self.session.cookies),
+            "tokens": dict(self.tokens),
+            "expires_at": self.auth_expires_at.isoformat() if self.auth_expires_at else None,
+        }
+    
+    def restore_state(self, state: Dict[str, Any]) -> bool:
+        """
+        Restore login state saved by export_state
+        
+        The restored session is unverified: the next is_session_valid() call
+        probes it before it is used.
+        """
+        expires_at = state.get("expires_at")
+        if not expires_at or datetime.utcnow() >= datetime.fromisoformat(expires_at):
+            return False
+        
+        self.session.cookies.clear()
+        if not restore_cookies(self.session.cookies, state.get("cookies", [])):
+            return False
+        
+        self.tokens = dict(state.get("tokens") or {})
+        self.auth_expires_at = datetime.fromisoformat(expires_at)
+        self.is_authenticated = True
+        self.last_auth_check = None
+        return True
+    
     def get_authenticated_session(self) -> Optional[requests.Session]:
         """Get authenticated session for making requests"""
         if self.is_session_valid():
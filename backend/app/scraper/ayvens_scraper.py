@@ -11,16 +11,24 @@ import time
 import random
 import os
 import uuid
-from typing import List, Dict, Optional, Any
+from typing import Callable, Iterator, List, Dict, Optional, Any, Tuple
 from datetime import datetime
 import logging
 from urllib.parse import urljoin, urlparse
 import re
 from pathlib import Path
 
+from app.core.tracing import span, traced
+
 from .base import BaseScraper
+from .http_cache import FetchStats, is_unchanged
 from .config import scraper_settings
-from .image_downloader import ImageDownloader, ImageUrlExtractor
+from .image_downloader import ImageDownloader
+from .known_listings import KnownListingIndex
+from .rate_limiter import RateLimiter
+from .page_parser import ParsedListing, extract_listing, extract_year
+from .parse_pool import get_parse_pool
+from .parsing import parse_make_model, parse_mileage, parse_price
 from .session_manager import get_session_manager, require_auth, AuthenticatedRequest
 
 logger = logging.getLogger(__name__)
@@ -46,24 +54,45 @@ class AyvensCarmarketScraper(BaseScraper):
 
         # Image downloader setup
         self.image_downloader = ImageDownloader("ayvens")
+
+        # Result pages are parsed in worker processes once the pool is started
+        self.parse_pool = get_parse_pool()
+
+        # Page/request counts of the last scrape_all_listings run
+        self.last_run_stats: Dict[str, int] = {}
+
+        # Result page URLs whose validators wait for confirm_page()
+        self._unconfirmed_pages: Dict[int, str] = {}
         
 
     
-    def _make_request(self, url: str, retries: int = 3) -> Optional[requests.Response]:
-        """Make authenticated HTTP request with retry logic and rate limiting"""
+    @traced("scrape.fetch")
+    def _make_request(self, url: str, retries: int = 3,
+                      conditional: bool = False) -> Optional[requests.Response]:
+        """Make authenticated HTTP request with retry logic and rate limiting
+
+        With `conditional`, validators of the last fetch are sent and
+        response.fetch_outcome tells whether the content changed.
+        """
         for attempt in range(retries):
             try:
                 # Random delay to avoid detection
                 delay = random.uniform(self.min_delay, self.max_delay)
                 time.sleep(delay)
 
+                self.rate_limiter.acquire_sync(RateLimiter.key_for(url))
                 logger.info(f"Fetching URL: {url} (attempt {attempt + 1})")
 
                 # Use authenticated session
                 with AuthenticatedRequest(self.session_manager) as session:
-                    response = session.get(url, timeout=30)
+                    headers = self.http_cache.conditional_headers(url) if conditional else None
+                    response = session.get(url, timeout=30, headers=headers)
                     response.raise_for_status()
 
+                    if conditional:
+                        response.fetch_outcome = self.http_cache.record(url, response, self.fetch_stats,
+                                                                        defer=True)
+
                     logger.info(f"Successfully fetched: {url} - Status: {response.status_code}")
                     return response
 
@@ -87,179 +116,55 @@ class AyvensCarmarketScraper(BaseScraper):
         """Extract price from text"""
         if not price_text:
             return None
-            
-        # Remove currency symbols and spaces
-        price_clean = re.sub(r'[^\d,.]', '', price_text)
-        
-        # Handle different number formats
-        if ',' in price_clean and '.' in price_clean:
-            # Format: 1,234.56
-            price_clean = price_clean.replace(',', '')
-        elif ',' in price_clean:
-            # Format: 1,234 or 1234,56
-            if len(price_clean.split(',')[1]) <= 2:
-                price_clean = price_clean.replace(',', '.')
-            else:
-                price_clean = price_clean.replace(',', '')
-        
-        try:
-            return float(price_clean)
-        except ValueError:
+
+        price = parse_price(price_text)
+        if price is None:
             logger.warning(f"Could not parse price: {price_text}")
-            return None
+        return price
     
     def _extract_mileage(self, mileage_text: str) -> Optional[int]:
-        """Extract mileage from text"""
-        if not mileage_text:
-            return None
-            
-        # Extract numbers from mileage text
-        numbers = re.findall(r'[\d,]+', mileage_text)
-        if numbers:
-            # Remove commas and convert to int
-            mileage_str = numbers[0].replace(',', '')
-            try:
-                return int(mileage_str)
-            except ValueError:
-                pass
-        
-        return None
+        """Extract mileage from text ("84,500", "84.500" or "84 500")"""
+        return parse_mileage(mileage_text)
     
     def _extract_year(self, text: str) -> Optional[int]:
         """Extract year from text"""
-        if not text:
-            return None
-            
-        # Look for 4-digit years
-        years = re.findall(r'\b(19|20)\d{2}\b', text)
-        if years:
-            try:
-                year = int(years[0])
-                # Validate reasonable year range
-                if 1990 <= year <= datetime.now().year + 1:
-                    return year
-            except ValueError:
-                pass
-        
-        return None
+        return extract_year(text)
     
+    @traced("scrape.image_download")
     def download_image(self, image_url: str, vehicle_id: str) -> Optional[str]:
         """Download vehicle image and return local path"""
         return self.image_downloader.download_image(image_url, vehicle_id)
     
-    def _parse_listing(self, listing_element, base_url: str) -> Optional[Dict[str, Any]]:
+    def _parse_listing(self, listing_element, base_url: str,
+                       known: Optional[KnownListingIndex] = None) -> Optional[Dict[str, Any]]:
         """Parse individual vehicle listing"""
-        try:
-            # Extract basic information using comprehensive selectors
-            title_selectors = [
-                # Ayvens-specific
-                '.lot-title', '.vehicle-title', '.car-title', '.listing-title',
-                # Generic title selectors
-                'h1', 'h2', 'h3', 'h4', '.title', '.name', '.model',
-                '[class*="title"]', '[class*="name"]', '[class*="model"]',
-                # Fallback - any text that looks like a car name
-                '[data-title]', '[title]'
-            ]
+        parsed = extract_listing(listing_element, base_url)
+        return self._build_vehicle(parsed, base_url, known) if parsed else None
 
-            price_selectors = [
-                # Ayvens-specific
-                '.lot-price', '.auction-price', '.sale-price',
-                # Generic price selectors
-                '.price', '.cost', '.amount', '.value', '.bid',
-                '[class*="price"]', '[class*="cost"]', '[class*="amount"]',
-                '[class*="bid"]', '[class*="value"]',
-                # Data attributes
-                '[data-price]', '[data-amount]'
-            ]
+    def _build_vehicle(self, parsed: ParsedListing, base_url: str,
+                       known: Optional[KnownListingIndex] = None) -> Optional[Dict[str, Any]]:
+        """Vehicle dict of a parsed listing card
 
-            image_selectors = [
-                # All img tags in the listing
-                'img',
-                # Specific image containers
-                '.vehicle-image img', '.car-image img', '.lot-image img',
-                '.listing-image img', '.photo img', '.picture img',
-                '[class*="image"] img', '[class*="photo"] img'
-            ]
+        Listings found unchanged in `known` are flagged with 'unchanged' and
+        their images are not downloaded again.
+        """
+        try:
+            external_id, listing_url, title, make, model, year, price, image_url, image_urls = parsed
 
-            link_selectors = [
-                # Links to vehicle details
-                'a[href*="lot"]', 'a[href*="vehicle"]', 'a[href*="car"]',
-                'a[href*="auction"]', 'a[href*="tender"]',
-                # Generic links
-                'a', '.link', '[href]'
-            ]
-            
-            # Extract title with fallback strategies
-            title = None
-            for selector in title_selectors:
-                elements = listing_element.select(selector)
-                for element in elements:
-                    text = self.extract_text(element)
-                    if text and len(text.strip()) > 3:  # Must have meaningful content
-                        title = text.strip()
-                        break
-                if title:
-                    break
+            known_listing = known is not None and known.is_known(external_id, listing_url)
+            unchanged = known_listing and known.is_unchanged(listing_url, price)
 
-            # Fallback: extract any text that looks like a vehicle name
-            if not title:
-                all_text = listing_element.get_text(separator=' ', strip=True)
-                # Look for patterns like "BMW 320d" or "Mercedes C220"
-                car_pattern = re.search(r'(BMW|Mercedes|Audi|Volkswagen|Ford|Peugeot|Renault|Volvo|Toyota|Honda|Nissan|Hyundai|Kia|Mazda|Mitsubishi|Subaru|Skoda|Seat|Citroen|Alfa Romeo|Fiat|Opel|Porsche|Jaguar|Land Rover|Mini|Smart|Dacia)\s+[A-Za-z0-9\s-]+', all_text, re.I)
-                if car_pattern:
-                    title = car_pattern.group(0).strip()
-
-            if not title or len(title.strip()) < 3:
-                logger.debug("No valid title found, skipping listing")
-                return None
-            
-            # Extract price
-            price = None
-            for selector in price_selectors:
-                element = listing_element.select_one(selector)
-                if element:
-                    price_text = self.extract_text(element)
-                    price = self._extract_price(price_text)
-                    if price:
-                        break
-            
-            # Extract image URLs (primary and additional)
-            image_urls = ImageUrlExtractor.extract_from_element(listing_element, base_url)
-            image_url = image_urls[0] if image_urls else None
-
-            # Also try CSS background images
-            bg_images = ImageUrlExtractor.extract_from_css_background(listing_element)
-            if bg_images and not image_url:
-                image_url = urljoin(base_url, bg_images[0])
-            
-            # Extract listing URL
-            listing_url = None
-            for selector in link_selectors:
-                element = listing_element.select_one(selector)
-                if element:
-                    href = element.get('href')
-                    if href:
-                        listing_url = urljoin(base_url, href)
-                        break
-            
-            # Parse make and model from title
-            make, model = self._parse_make_model(title)
-            
-            # Extract year from title
-            year = self._extract_year(title)
-            
-            # Generate external ID
-            external_id = f"ayvens_{uuid.uuid4().hex[:12]}"
-            
-            # Download primary image if enabled
-            local_image_path = self.download_image(image_url, external_id) if image_url else None
-
-            # Download additional images if available
+            local_image_path = None
             additional_image_paths = []
-            if len(image_urls) > 1:
-                additional_image_paths = self.image_downloader.download_multiple_images(
-                    image_urls[1:], external_id, max_images=4
-                )
+            if not unchanged:
+                # Download primary image if enabled
+                local_image_path = self.download_image(image_url, external_id) if image_url else None
+
+                # Download additional images if available
+                if len(image_urls) > 1:
+                    additional_image_paths = self.image_downloader.download_multiple_images(
+                        image_urls[1:], external_id, max_images=4
+                    )
             
             vehicle_data = {
                 'external_id': external_id,
@@ -279,51 +184,44 @@ class AyvensCarmarketScraper(BaseScraper):
                 'source_country': self.source_country,
                 'scraped_at': datetime.utcnow(),
                 'is_active': True,
-                'primary_image_url': local_image_path or image_url,
+                # Unchanged listings keep their stored (downloaded) image
+                'primary_image_url': None if unchanged else (local_image_path or image_url),
                 'additional_images': additional_image_paths,
                 'confidence_score': 0.7,  # Medium confidence for parsed data
                 'data_quality_score': self._calculate_data_quality(make, model, year, price, None),
                 'title': title,
-                'description': title  # Use title as description for now
+                'description': title,  # Use title as description for now
+                'known': known_listing,
+                'unchanged': unchanged,
+                # Detail page for enrichment (None when the card has no link)
+                'detail_url': listing_url
             }
             
             return vehicle_data
             
         except Exception as e:
-            logger.error(f"Error parsing listing: {e}")
+            logger.error(f"Error building listing {parsed.external_id}: {e}")
             return None
     
+    def _normalize_fuel_type(self, text: str) -> Optional[str]:
+        """Fuel type as stored on listings (diesel, gasoline, electric, hybrid, lpg, cng)"""
+        text = text.lower()
+        # Hybrid first: "hybrid diesel" is a hybrid
+        for fuel_type, keywords in (
+            ('hybrid', ['hybrid', 'hybride']),
+            ('electric', ['electric', 'électrique', 'electrique']),
+            ('diesel', ['diesel', 'gazole']),
+            ('gasoline', ['gasoline', 'petrol', 'essence', 'benzin']),
+            ('lpg', ['lpg', 'gpl']),
+            ('cng', ['cng', 'gnv']),
+        ):
+            if any(keyword in text for keyword in keywords):
+                return fuel_type
+        return None
+
     def _parse_make_model(self, title: str) -> tuple:
         """Parse make and model from title"""
-        # Common car makes
-        makes = [
-            'BMW', 'Mercedes', 'Mercedes-Benz', 'Audi', 'Volkswagen', 'VW',
-            'Ford', 'Opel', 'Peugeot', 'Renault', 'Fiat', 'Toyota', 'Honda',
-            'Nissan', 'Hyundai', 'Kia', 'Mazda', 'Mitsubishi', 'Subaru',
-            'Volvo', 'Skoda', 'Seat', 'Citroen', 'Alfa Romeo', 'Lancia',
-            'Porsche', 'Jaguar', 'Land Rover', 'Mini', 'Smart', 'Dacia'
-        ]
-        
-        title_upper = title.upper()
-        
-        for make in makes:
-            if make.upper() in title_upper:
-                # Extract model (everything after make)
-                make_index = title_upper.find(make.upper())
-                model_part = title[make_index + len(make):].strip()
-                
-                # Clean up model name
-                model = re.split(r'[\d]{4}|,|\(|\[', model_part)[0].strip()
-                model = re.sub(r'^[-\s]+', '', model)  # Remove leading dashes/spaces
-                
-                return make, model if model else 'Unknown'
-        
-        # If no make found, try to extract from beginning
-        words = title.split()
-        if words:
-            return words[0], ' '.join(words[1:3]) if len(words) > 1 else 'Unknown'
-        
-        return 'Unknown', 'Unknown'
+        return parse_make_model(title)
     
     def _calculate_data_quality(self, make: str, model: str, year: Optional[int], 
                               price: Optional[float], mileage: Optional[int]) -> float:
@@ -345,106 +243,156 @@ class AyvensCarmarketScraper(BaseScraper):
         return score
 
     @require_auth
-    def scrape_all_listings(self, max_vehicles: int = 50) -> List[Dict[str, Any]]:
-        """Scrape vehicle listings from Ayvens Carmarket"""
-        logger.info(f"Starting Ayvens scraping session {self.session_id} (max: {max_vehicles} vehicles)")
-
+    def scrape_all_listings(self, max_vehicles: int = 50, max_pages: int = 10,
+                            known: Optional[KnownListingIndex] = None,
+                            stop_when_known: bool = True,
+                            conditional: bool = True,
+                            on_page: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None
+                            ) -> List[Dict[str, Any]]:
+        """Scrape vehicle listings from Ayvens Carmarket
+
+        Collects the pages of _iter_pages (see there for the options).
+        `on_page(page, vehicles)` is called with the vehicles of each result
+        page as soon as it is parsed, so they can be stored while the crawl
+        continues; the page is confirmed (see confirm_page) once it returns.
+        """
         vehicles = []
+        for page, page_vehicles in self._iter_pages(max_vehicles, max_pages, known,
+                                                    stop_when_known, conditional):
+            vehicles.extend(page_vehicles)
+            if on_page:
+                try:
+                    on_page(page, page_vehicles)
+                except Exception as e:
+                    logger.error(f"Error handling vehicles of page {page}: {e}")
+                else:
+                    self.confirm_page(page)
+        return vehicles
+
+    def confirm_page(self, page: int) -> bool:
+        """Mark the listings of a result page of the last crawl as stored
+
+        Only then are the page validators saved, so a later fetch of an
+        identical page is skipped; a page whose listings never made it into
+        the database is parsed again on the next crawl.
+        """
+        url = self._unconfirmed_pages.pop(page, None)
+        return url is not None and self.http_cache.confirm(url)
+
+    @require_auth
+    def iter_pages(self, max_vehicles: int = 50, max_pages: int = 10,
+                   known: Optional[KnownListingIndex] = None,
+                   stop_when_known: bool = True,
+                   conditional: bool = True) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Authenticate, then stream (page, vehicles) as result pages are parsed"""
+        return self._iter_pages(max_vehicles, max_pages, known, stop_when_known, conditional)
+
+    def _iter_pages(self, max_vehicles: int, max_pages: int,
+                    known: Optional[KnownListingIndex],
+                    stop_when_known: bool,
+                    conditional: bool) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Crawl result pages, yielding (page, vehicles) for each parsed page
+
+        Each vehicle dict carries the result page it was found on in
+        'scrape_page'; page and request counts of the run are kept in
+        self.last_run_stats.
+
+        With a `known` listing index the crawl is incremental: pagination
+        stops at the first page whose listings are mostly known (unless
+        `stop_when_known` is False, e.g. for deep sweeps) and unchanged
+        listings are not downloaded again.
+
+        With `conditional`, result pages are fetched with conditional
+        requests and pages that did not change since the last fetch are not
+        parsed; per-run fetch statistics are kept in self.fetch_stats. The
+        validators of a new or changed page are saved by confirm_page(page)
+        once the consumer stored all of its listings.
+
+        Pages are fetched lazily: nothing is requested until the consumer
+        asks for the next page.
+        """
+        logger.info(f"Starting Ayvens scraping session {self.session_id} "
+                    f"(max: {max_vehicles} vehicles, {max_pages} pages"
+                    f"{', incremental' if known is not None else ''})")
+
+        vehicle_count = 0
         page = 1
-        max_pages = 10  # Limit to prevent infinite loops
+        self.last_run_stats = {"pages_scraped": 0, "page_requests": 0,
+                               "known_listings": 0, "unchanged_listings": 0,
+                               "unchanged_pages": 0, "stopped_early": False}
+        self.fetch_stats = FetchStats()
+        self._unconfirmed_pages = {}
 
         try:
-            while len(vehicles) < max_vehicles and page <= max_pages:
+            while vehicle_count < max_vehicles and page <= max_pages:
                 logger.info(f"Scraping page {page}")
 
                 # Construct search URL with pagination
                 search_url = f"{self.search_url}?page={page}"
 
-                response = self._make_request(search_url)
+                response = self._make_request(search_url, conditional=conditional)
+                self.last_run_stats["page_requests"] += 1
                 if not response:
                     logger.error(f"Failed to fetch page {page}")
                     break
+                self.last_run_stats["pages_scraped"] = page
+
+                # Page identical to the last fetch: its listings are stored already
+                if is_unchanged(getattr(response, 'fetch_outcome', None)):
+                    self.last_run_stats["unchanged_pages"] += 1
+                    if known is not None and stop_when_known:
+                        logger.info(f"Page {page} unchanged since last fetch, stopping incremental crawl")
+                        self.last_run_stats["stopped_early"] = True
+                        break
+                    logger.info(f"Page {page} unchanged since last fetch, skipping parse")
+                    page += 1
+                    continue
 
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                # Find listing containers using Ayvens-specific and generic selectors
-                listing_selectors = [
-                    # Ayvens-specific selectors (based on common patterns)
-                    '.lot-card', '.lot-item', '.vehicle-lot', '.auction-lot',
-                    '.car-lot', '.listing-card', '.vehicle-card', '.car-item',
-                    '.auction-item', '.tender-item', '.sale-item',
-                    # Generic selectors for vehicle listings
-                    '[class*="lot"]', '[class*="vehicle"]', '[class*="car"]',
-                    '[class*="listing"]', '[class*="auction"]', '[class*="tender"]',
-                    # Broad selectors as fallback
-                    '.card', '.item', '.product', '.result',
-                    # Container-based selectors
-                    '.results .item', '.listings .card', '.vehicles .lot',
-                    # Grid/list item selectors
-                    '.grid-item', '.list-item', '.row .col'
-                ]
-
-                listings = []
-                for selector in listing_selectors:
-                    try:
-                        found_listings = soup.select(selector)
-                        # Filter out empty or very small elements
-                        valid_listings = [listing for listing in found_listings
-                                        if listing.get_text(strip=True) and len(listing.get_text(strip=True)) > 20]
-
-                        if valid_listings:
-                            listings = valid_listings
-                            logger.info(f"Found {len(listings)} valid listings using selector: {selector}")
-                            break
-                    except Exception as e:
-                        logger.debug(f"Error with selector {selector}: {e}")
-                        continue
-
+                # CPU-bound: runs in a parse worker when the pool is started
+                with span("scrape.parse", page=page):
+                    listings = self.parse_pool.parse_page(response.content, self.base_url)
                 if not listings:
-                    # Debug: Log page content to understand structure
-                    logger.warning(f"No vehicle listings found on page {page}")
-
-                    # Check if page has any content at all
-                    page_text = soup.get_text(strip=True)
-                    logger.debug(f"Page text length: {len(page_text)}")
-
-                    if len(page_text) < 100:
-                        logger.warning("Page appears to be mostly empty - might be JavaScript-heavy")
-
-                    # Look for any elements that might contain vehicle data
-                    potential_elements = soup.find_all(['div', 'article', 'section'],
-                                                     string=re.compile(r'(€|EUR|\$|USD|km|miles|[0-9]{4})', re.I))
-                    if potential_elements:
-                        logger.info(f"Found {len(potential_elements)} elements with potential vehicle data")
-                        # Try to extract from these elements
-                        for elem in potential_elements[:5]:  # Check first 5
-                            parent = elem.parent
-                            if parent and len(parent.get_text(strip=True)) > 50:
-                                listings.append(parent)
-
-                        if listings:
-                            logger.info(f"Extracted {len(listings)} listings from potential elements")
-
-                    if not listings:
-                        logger.warning(f"No vehicle listings found on page {page}, stopping")
-                        break
+                    logger.warning(f"No vehicle listings found on page {page}, stopping")
+                    break
 
                 # Parse each listing
-                page_vehicles = 0
-                for listing in listings:
-                    if len(vehicles) >= max_vehicles:
-                        break
-
-                    vehicle_data = self._parse_listing(listing, self.base_url)
+                page_vehicles = []
+                page_known = 0
+                for parsed in listings[:max_vehicles - vehicle_count]:
+                    vehicle_data = self._build_vehicle(parsed, self.base_url, known)
                     if vehicle_data:
-                        vehicles.append(vehicle_data)
-                        page_vehicles += 1
+                        vehicle_data['scrape_page'] = page
+                        page_vehicles.append(vehicle_data)
+                        if vehicle_data['known']:
+                            page_known += 1
+                        if vehicle_data['unchanged']:
+                            self.last_run_stats["unchanged_listings"] += 1
                         logger.debug(f"Parsed vehicle: {vehicle_data['make']} {vehicle_data['model']}")
 
-                logger.info(f"Page {page}: Found {page_vehicles} vehicles")
+                # A page cut short by max_vehicles is not fully stored: keep it changed
+                if conditional:
+                    if len(page_vehicles) == len(listings):
+                        self._unconfirmed_pages[page] = search_url
+                    else:
+                        self.http_cache.discard(search_url)
+
+                self.last_run_stats["known_listings"] += page_known
+                logger.info(f"Page {page}: Found {len(page_vehicles)} vehicles ({page_known} known)")
+
+                if page_vehicles:
+                    vehicle_count += len(page_vehicles)
+                    yield page, page_vehicles
+
+                # Listings are newest first: a mostly known page means the
+                # following pages hold nothing new
+                if (known is not None and stop_when_known and page_vehicles and
+                        page_known / len(page_vehicles) >= scraper_settings.INCREMENTAL_KNOWN_PAGE_RATIO):
+                    logger.info(f"Page {page} is mostly known, stopping incremental crawl")
+                    self.last_run_stats["stopped_early"] = True
+                    break
 
                 # If no vehicles found on this page, stop
-                if page_vehicles == 0:
+                if not page_vehicles:
                     logger.info("No vehicles found on this page, stopping pagination")
                     break
 
@@ -453,18 +401,25 @@ class AyvensCarmarketScraper(BaseScraper):
         except Exception as e:
             logger.error(f"Error during scraping: {e}")
 
-        logger.info(f"Ayvens scraping completed. Total vehicles: {len(vehicles)}")
-        return vehicles
+        logger.info(f"Ayvens scraping completed. Total vehicles: {vehicle_count}")
 
     @require_auth
     def scrape_vehicle_details(self, listing_url: str) -> Optional[Dict[str, Any]]:
         """Scrape detailed information from individual vehicle page"""
-        try:
-            response = self._make_request(listing_url)
-            if not response:
-                return None
+        return self.fetch_vehicle_details(listing_url)
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+    @traced("scrape.detail")
+    def fetch_vehicle_details(self, listing_url: str) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a detail page (the caller holds an authenticated session)"""
+        response = self._make_request(listing_url)
+        if not response:
+            return None
+        return self.parse_vehicle_details(response.content, listing_url)
+
+    def parse_vehicle_details(self, content, listing_url: str) -> Optional[Dict[str, Any]]:
+        """Mileage, fuel type, transmission, city and images from a detail page"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
 
             # Extract additional details from vehicle detail page
             details = {}
@@ -472,7 +427,7 @@ class AyvensCarmarketScraper(BaseScraper):
             # Look for mileage
             mileage_selectors = [
                 '[class*="mileage"]', '[class*="km"]', '[class*="miles"]',
-                'td:contains("Mileage")', 'td:contains("Kilomètres")',
+                'td:-soup-contains("Mileage")', 'td:-soup-contains("Kilomètres")',
                 '.spec-mileage', '.vehicle-mileage'
             ]
 
@@ -488,22 +443,22 @@ class AyvensCarmarketScraper(BaseScraper):
             # Look for fuel type
             fuel_selectors = [
                 '[class*="fuel"]', '[class*="engine"]',
-                'td:contains("Fuel")', 'td:contains("Carburant")',
+                'td:-soup-contains("Fuel")', 'td:-soup-contains("Carburant")',
                 '.spec-fuel', '.vehicle-fuel'
             ]
 
             for selector in fuel_selectors:
                 element = soup.select_one(selector)
                 if element:
-                    fuel_text = self.extract_text(element).lower()
-                    if any(fuel in fuel_text for fuel in ['diesel', 'gasoline', 'petrol', 'electric', 'hybrid']):
-                        details['fuel_type'] = fuel_text
+                    fuel_type = self._normalize_fuel_type(self.extract_text(element))
+                    if fuel_type:
+                        details['fuel_type'] = fuel_type
                         break
 
             # Look for transmission
             transmission_selectors = [
                 '[class*="transmission"]', '[class*="gearbox"]',
-                'td:contains("Transmission")', 'td:contains("Boîte")',
+                'td:-soup-contains("Transmission")', 'td:-soup-contains("Boîte")',
                 '.spec-transmission', '.vehicle-transmission'
             ]
 
@@ -517,6 +472,21 @@ class AyvensCarmarketScraper(BaseScraper):
                         details['transmission'] = 'manual'
                     break
 
+            # Look for location
+            location_selectors = [
+                '[class*="location"]', '[class*="city"]',
+                'td:-soup-contains("Location")', 'td:-soup-contains("Ville")',
+                '.spec-location', '.vehicle-location'
+            ]
+
+            for selector in location_selectors:
+                element = soup.select_one(selector)
+                if element:
+                    city = re.sub(r'^(location|ville|city)\s*:?\s*', '', self.extract_text(element), flags=re.I)
+                    if city and len(city) <= 100:
+                        details['city'] = city
+                        break
+
             # Look for additional images
             image_selectors = [
                 '.gallery img', '.vehicle-images img', '.car-images img',
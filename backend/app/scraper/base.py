@@ -12,6 +12,7 @@ from typing import Optional, Dict, List, Any
 from urllib.parse import urljoin, urlparse
 # Removed fake_useragent dependency - using static user agents
 from bs4 import BeautifulSoup
+from urllib3.util.request import ACCEPT_ENCODING
 # Selenium imports removed - not needed for basic scraping
 # from selenium import webdriver
 # from selenium.webdriver.chrome.options import Options
@@ -21,6 +22,10 @@ from bs4 import BeautifulSoup
 # from selenium.common.exceptions import TimeoutException, WebDriverException
 
 from app.scraper.config import scraper_settings, DEFAULT_HEADERS
+from app.scraper.http_cache import ConditionalFetchCache, FetchStats
+from app.scraper.parsing import parse_grouped_price, parse_number, parse_price
+from app.scraper.rate_limiter import RateLimiter, get_rate_limiter
+from app.scraper.transport import create_session
 
 # Use standard logging instead of structlog
 import logging
@@ -28,74 +33,43 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class RateLimiter:
-    """Rate limiting utility to control request frequency"""
-    
-    def __init__(self, requests_per_minute: int = 30, requests_per_hour: int = 1000):
-        self.requests_per_minute = requests_per_minute
-        self.requests_per_hour = requests_per_hour
-        self.minute_requests = []
-        self.hour_requests = []
-    
-    def wait_if_needed(self):
-        """Wait if rate limits would be exceeded"""
-        current_time = time.time()
-        
-        # Clean old requests
-        self.minute_requests = [t for t in self.minute_requests if current_time - t < 60]
-        self.hour_requests = [t for t in self.hour_requests if current_time - t < 3600]
-        
-        # Check minute limit
-        if len(self.minute_requests) >= self.requests_per_minute:
-            sleep_time = 60 - (current_time - self.minute_requests[0])
-            if sleep_time > 0:
-                logger.info(f"Rate limit reached, sleeping for {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
-        
-        # Check hour limit
-        if len(self.hour_requests) >= self.requests_per_hour:
-            sleep_time = 3600 - (current_time - self.hour_requests[0])
-            if sleep_time > 0:
-                logger.info(f"Hourly rate limit reached, sleeping for {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
-        
-        # Record this request
-        self.minute_requests.append(current_time)
-        self.hour_requests.append(current_time)
-
-
 class BaseScraper:
     """Base scraper class with common functionality"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.rate_limiter = RateLimiter(
-            scraper_settings.REQUESTS_PER_MINUTE,
-            scraper_settings.REQUESTS_PER_HOUR
-        )
+        self.session = create_session()
+        # Per-domain limits shared with every other scraper in the process
+        self.rate_limiter = get_rate_limiter()
+        # Validators of previously fetched pages and per-run fetch statistics
+        self.http_cache = ConditionalFetchCache()
+        self.fetch_stats = FetchStats()
         # Use static user agent instead of fake_useragent
         self.setup_session()
     
     def setup_session(self):
         """Configure the requests session"""
         self.session.headers.update(DEFAULT_HEADERS)
-        self.session.timeout = scraper_settings.REQUEST_TIMEOUT
+        # Timeouts come from the shared transport; keep the encodings it can decode
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
         
         # Set a random user agent
         self.session.headers['User-Agent'] = random.choice(scraper_settings.USER_AGENTS)
     
-    def get_page(self, url: str, **kwargs) -> Optional[requests.Response]:
+    def get_page(self, url: str, conditional: bool = False, **kwargs) -> Optional[requests.Response]:
         """
         Fetch a web page with rate limiting and error handling
         
         Args:
             url: URL to fetch
+            conditional: Send If-None-Match/If-Modified-Since from the last
+                fetch of this URL; response.fetch_outcome then tells whether
+                the content changed (see app.scraper.http_cache)
             **kwargs: Additional arguments for requests.get()
         
         Returns:
             Response object or None if failed
         """
-        self.rate_limiter.wait_if_needed()
+        self.rate_limiter.acquire_sync(RateLimiter.key_for(url))
         
         # Add politeness delay
         if scraper_settings.ENABLE_POLITENESS_DELAY:
@@ -106,9 +80,15 @@ class BaseScraper:
             try:
                 logger.info(f"Fetching URL: {url} (attempt {attempt + 1})")
                 
+                if conditional:
+                    kwargs['headers'] = {**kwargs.get('headers', {}), **self.http_cache.conditional_headers(url)}
+                
                 response = self.session.get(url, **kwargs)
                 response.raise_for_status()
                 
+                if conditional:
+                    response.fetch_outcome = self.http_cache.record(url, response, self.fetch_stats)
+                
                 logger.info(f"Successfully fetched {url} - Status: {response.status_code}")
                 return response
                 
@@ -139,35 +119,23 @@ class BaseScraper:
             return element.get(attribute, default)
         return default
     
-    def clean_price(self, price_text: str) -> Optional[float]:
-        """Extract numeric price from text"""
+    def clean_price(self, price_text: str, locale: Optional[str] = None) -> Optional[float]:
+        """Extract numeric price from text, reading separators per `locale` if given"""
         if not price_text:
             return None
-        
-        # Remove currency symbols and spaces
-        import re
-        price_clean = re.sub(r'[€$£,\s]', '', price_text)
-        price_clean = price_clean.replace('.', '')  # Remove thousands separator
-        
-        try:
-            return float(price_clean)
-        except ValueError:
+
+        if locale:
+            price = parse_price(price_text, locale)
+        else:
+            # '.' and ',' are both thousands separators
+            price = parse_grouped_price(price_text)
+        if price is None:
             logger.warning(f"Could not parse price: {price_text}")
-            return None
+        return price
     
     def clean_number(self, text: str) -> Optional[int]:
         """Extract integer from text"""
-        if not text:
-            return None
-        
-        import re
-        numbers = re.findall(r'\d+', text.replace('.', '').replace(',', ''))
-        if numbers:
-            try:
-                return int(numbers[0])
-            except ValueError:
-                pass
-        return None
+        return parse_number(text)
     
     def normalize_fuel_type(self, fuel_text: str) -> Optional[str]:
         """Normalize fuel type to standard values"""
@@ -5,18 +5,21 @@ Manages ethical guidelines and compliance for web scraping
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import time
 
+from .rate_limiter import RateLimiter, get_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class ComplianceManager:
     """Manages scraping compliance and ethical guidelines"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
         self.rate_limits = {}
         self.blocked_domains = set()
-        self.last_request_times = {}
+        # Per-domain request state is shared with the scrapers
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         
     def get_compliance_status(self) -> Dict[str, Any]:
         """Get current compliance status"""
@@ -27,6 +30,7 @@ class ComplianceManager:
             "user_agent_rotation": True,
             "blocked_domains": list(self.blocked_domains),
             "active_rate_limits": len(self.rate_limits),
+            "rate_limiter": self.rate_limiter.get_stats(),
             "last_check": datetime.utcnow().isoformat()
         }
     
@@ -73,9 +77,12 @@ class ComplianceManager:
         """Check if we can make a request to domain based on rate limiting"""
         if domain in self.blocked_domains:
             return False
+        
+        if self.rate_limiter.delay_for(domain) > 0:
+            return False
             
         now = time.time()
-        last_request = self.last_request_times.get(domain, 0)
+        last_request = self.rate_limiter.last_acquired(domain) or 0
         
         if now - last_request < min_delay:
             return False
@@ -83,8 +90,8 @@ class ComplianceManager:
         return True
     
     def record_request(self, domain: str):
-        """Record that we made a request to domain"""
-        self.last_request_times[domain] = time.time()
+        """Record that we made a request to domain (takes a rate limit slot)"""
+        self.rate_limiter.reserve(domain)
         
     def block_domain(self, domain: str, reason: str = "compliance violation"):
         """Block a domain from scraping"""
@@ -99,7 +106,7 @@ class ComplianceManager:
     def get_rate_limit_status(self, domain: str) -> Dict[str, Any]:
         """Get rate limiting status for a specific domain"""
         now = time.time()
-        last_request = self.last_request_times.get(domain, 0)
+        last_request = self.rate_limiter.last_acquired(domain) or 0
         time_since_last = now - last_request
         
         return {
@@ -108,6 +115,7 @@ class ComplianceManager:
             "last_request": datetime.fromtimestamp(last_request).isoformat() if last_request else None,
             "time_since_last_request": time_since_last,
             "can_request_now": self.check_rate_limit(domain),
+            "seconds_until_allowed": self.rate_limiter.delay_for(domain),
             "min_delay": 2.0
         }
     
@@ -22,6 +22,12 @@ class ScraperSettings(BaseSettings):
     MAX_RETRIES: int = 3        # Maximum retry attempts
     CONCURRENT_REQUESTS: int = 1 # Maximum concurrent requests
     
+    # Shared HTTP Transport Configuration
+    HTTP_POOL_CONNECTIONS: int = 20   # Host pools kept alive
+    HTTP_POOL_MAXSIZE: int = 10       # Keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    DNS_CACHE_TTL_SECONDS: int = 300  # 0 disables the DNS cache
+    
     # User Agent Configuration
     USER_AGENTS: List[str] = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -58,6 +64,9 @@ class ScraperSettings(BaseSettings):
 
     # Performance Optimization
     ENABLE_ADAPTIVE_SCHEDULING: bool = True  # Adjust intervals based on activity
+    ADAPTIVE_WINDOW_HOURS: int = 24          # Session history used to measure churn
+    ADAPTIVE_TARGET_PAGE_FILL: float = 0.5   # Poll when new listings would fill this share of page 1
+    LISTINGS_PER_PAGE: int = 20              # Assumed page size until sessions report it
     ENABLE_LOAD_BALANCING: bool = True       # Balance load across sources
     ENABLE_SMART_RETRY: bool = True          # Smart retry logic for failed scraping
 
@@ -67,6 +76,11 @@ class ScraperSettings(BaseSettings):
     ENABLE_MOBILE_DE: bool = False
     ENABLE_GRUPPOAUTOUNO: bool = False
 
+    # Incremental Crawl Configuration
+    ENABLE_INCREMENTAL_CRAWL: bool = True
+    INCREMENTAL_KNOWN_PAGE_RATIO: float = 0.8  # Stop paginating once this share of a page is known
+    INCREMENTAL_LOOKBACK_DAYS: int = 7         # Listings seen within this window count as known
+
     # Data Processing Configuration
     MAX_PAGES_TO_SCRAPE: int = 50
     ENABLE_IMAGE_DOWNLOAD: bool = True
@@ -95,6 +109,27 @@ class ScraperSettings(BaseSettings):
     # Rate Limiting Configuration
     REQUESTS_PER_MINUTE: int = 30
     REQUESTS_PER_HOUR: int = 1000
+    RATE_LIMIT_REDIS_URL: str = ""  # Share per-domain limits across workers, e.g. redis://host:6379/0
+    
+    # Ingest Pipeline Configuration
+    PIPELINE_QUEUE_SIZE: int = 200  # vehicles buffered between stages before fetching pauses
+    PIPELINE_BATCH_SIZE: int = 20
+    PIPELINE_MAX_BATCH_SECONDS: float = 1.0  # commit a partial batch after this long
+    
+    # Detail Page Enrichment Configuration
+    ENABLE_DETAIL_ENRICHMENT: bool = True
+    ENRICHMENT_WORKERS: int = 2  # detail fetches share the per-domain rate limit
+    ENRICHMENT_QUEUE_SIZE: int = 500  # listings beyond this wait for their next change
+    ENRICHMENT_BATCH_SIZE: int = 10
+    
+    # Result Page Parse Pool Configuration
+    ENABLE_PARSE_POOL: bool = True
+    PARSE_WORKERS: int = 0  # 0: one worker process per CPU
+    PARSE_POOL_START_METHOD: str = ""  # forkserver where available, else spawn
+    
+    # Authenticated Session Configuration
+    SESSION_STORE_REDIS_URL: str = ""  # Share login cookies across workers; file store when empty
+    SESSION_PROBE_INTERVAL_MINUTES: int = 30
     
     # Compliance Configuration
     RESPECT_ROBOTS_TXT: bool = True
@@ -0,0 +1,214 @@
+"""
+Conditional HTTP Cache Module
+
+Persists the ETag, Last-Modified and body hash of the last response per URL
+(HttpCacheEntry) so scrapers can send conditional requests and skip parsing
+when a page comes back 304 Not Modified or with an unchanged body. Fetch
+statistics (requests, bytes, hit rates) are collected per scraping run.
+
+Validators of a new or changed page can be held back (`record(defer=True)`)
+until its listings are stored (`confirm`): a page is only reported as
+unchanged once its content made it into the database.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from app.models.base import SessionLocal
+from app.models.automotive import HttpCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Fetch outcomes
+OUTCOME_NEW = "new"                    # URL fetched for the first time
+OUTCOME_CHANGED = "changed"            # Body differs from the last fetch
+OUTCOME_UNCHANGED = "unchanged"        # 200 with the same body hash
+OUTCOME_NOT_MODIFIED = "not_modified"  # 304 to a conditional request
+
+
+@dataclass
+class FetchStats:
+    """Request counts, bytes and conditional-request hit rates of a run"""
+    request_count: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    bytes_transferred: int = 0
+    bytes_saved: int = 0  # Body bytes not downloaded thanks to 304 responses
+    total_response_time: float = 0.0
+
+    def record(self, outcome: str, response: requests.Response, saved_bytes: int = 0):
+        self.request_count += 1
+        self.bytes_transferred += len(response.content or b"")
+        if outcome == OUTCOME_NOT_MODIFIED:
+            self.not_modified += 1
+            self.bytes_saved += saved_bytes
+        elif outcome == OUTCOME_UNCHANGED:
+            self.unchanged += 1
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None:
+            self.total_response_time += elapsed.total_seconds()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of requests whose content had not changed"""
+        return (self.not_modified + self.unchanged) / self.request_count if self.request_count else 0.0
+
+    @property
+    def average_response_time(self) -> Optional[float]:
+        return self.total_response_time / self.request_count if self.request_count else None
+
+    def session_fields(self) -> Dict[str, Any]:
+        """Values for the matching ScrapingSession columns"""
+        return {
+            "total_requests": self.request_count,
+            "total_not_modified": self.not_modified,
+            "total_unchanged": self.unchanged,
+            "total_data_transferred": self.bytes_transferred,
+            "average_response_time": self.average_response_time,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = round(self.hit_rate, 3)
+        return data
+
+
+class ConditionalFetchCache:
+    """Per-URL validators and body hashes, persisted in the database"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._entries: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached entry of a URL, read from the database once per process"""
+        with self._lock:
+            if url in self._entries:
+                return self._entries[url]
+
+        entry = None
+        db = self.session_factory()
+        try:
+            row = db.query(HttpCacheEntry).filter(HttpCacheEntry.url == url).first()
+            if row:
+                entry = {
+                    "etag": row.etag,
+                    "last_modified": row.last_modified,
+                    "content_hash": row.content_hash,
+                    "content_length": row.content_length,
+                }
+        except Exception as e:
+            logger.warning(f"Could not read HTTP cache entry for {url}: {e}")
+        finally:
+            db.close()
+
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a URL"""
+        entry = self._entry(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, response: requests.Response,
+               stats: Optional[FetchStats] = None, defer: bool = False) -> str:
+        """Store the response validators and return the fetch outcome
+
+        With `defer`, validators of a new or changed body are only stored
+        by confirm(url), once the content has been processed.
+        """
+        entry = self._entry(url)
+
+        if response.status_code == 304:
+            outcome = OUTCOME_NOT_MODIFIED
+            content_hash = entry["content_hash"] if entry else None
+        else:
+            content_hash = hashlib.sha256(response.content or b"").hexdigest()
+            if entry is None:
+                outcome = OUTCOME_NEW
+            elif entry["content_hash"] == content_hash:
+                outcome = OUTCOME_UNCHANGED
+            else:
+                outcome = OUTCOME_CHANGED
+
+        if stats is not None:
+            saved = (entry.get("content_length") or 0) if entry else 0
+            stats.record(outcome, response, saved_bytes=saved)
+
+        # A 304 may carry refreshed validators; keep the old ones otherwise
+        updated = {
+            "etag": response.headers.get("ETag") or (entry["etag"] if entry else None),
+            "last_modified": response.headers.get("Last-Modified") or (entry["last_modified"] if entry else None),
+            "content_hash": content_hash,
+            "content_length": (entry["content_length"] if entry else None)
+            if outcome == OUTCOME_NOT_MODIFIED else len(response.content or b""),
+        }
+        if defer and outcome in (OUTCOME_NEW, OUTCOME_CHANGED):
+            with self._lock:
+                self._pending[url] = (updated, outcome)
+            return outcome
+
+        with self._lock:
+            self._entries[url] = updated
+        self._persist(url, updated, outcome)
+        return outcome
+
+    def confirm(self, url: str) -> bool:
+        """Store the deferred validators of a URL whose content was processed"""
+        with self._lock:
+            pending = self._pending.pop(url, None)
+            if pending is None:
+                return False
+            self._entries[url] = pending[0]
+        self._persist(url, *pending)
+        return True
+
+    def discard(self, url: str):
+        """Forget deferred validators: the next fetch sees the page as changed"""
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def _persist(self, url: str, values: Dict[str, Any], outcome: str):
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            row = db.query(HttpCacheEntry).filter(HttpCacheEntry.url == url).first()
+            if row is None:
+                row = HttpCacheEntry(url=url, check_count=0, not_modified_count=0, unchanged_count=0)
+                db.add(row)
+            for key, value in values.items():
+                setattr(row, key, value)
+            row.last_checked_at = now
+            row.check_count = (row.check_count or 0) + 1
+            if outcome == OUTCOME_NOT_MODIFIED:
+                row.not_modified_count = (row.not_modified_count or 0) + 1
+            elif outcome == OUTCOME_UNCHANGED:
+                row.unchanged_count = (row.unchanged_count or 0) + 1
+            else:
+                row.fetched_at = now
+            db.commit()
+        except Exception as e:
+            # Losing an entry only costs a full fetch next time
+            logger.warning(f"Could not store HTTP cache entry for {url}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def is_unchanged(outcome: Optional[str]) -> bool:
+    return outcome in (OUTCOME_NOT_MODIFIED, OUTCOME_UNCHANGED)
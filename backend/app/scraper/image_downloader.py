@@ -11,12 +11,14 @@ import hashlib
 import requests
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 import logging
 from PIL import Image
 import io
 
 from .config import scraper_settings
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .transport import create_session
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +30,7 @@ class ImageDownloader:
         self.source_name = source_name
         self.base_dir = Path(scraper_settings.IMAGE_STORAGE_PATH)
         self.source_dir = self.base_dir / source_name
-        self.session = requests.Session()
+        self.session = create_session()
         
         # Setup directories
         self.setup_directories()
@@ -83,6 +85,7 @@ class ImageDownloader:
                 return str(file_path)
             
             # Download image
+            get_rate_limiter().acquire_sync(RateLimiter.key_for(image_url))
             response = self.session.get(image_url, timeout=30, stream=True)
             response.raise_for_status()
             
@@ -234,65 +237,3 @@ class ImageDownloader:
                 'storage_path': str(self.source_dir),
                 'error': str(e)
             }
-
-
-class ImageUrlExtractor:
-    """Utility class for extracting image URLs from HTML elements"""
-    
-    @staticmethod
-    def extract_from_element(element, base_url: str = "") -> List[str]:
-        """
-        Extract image URLs from a BeautifulSoup element
-        
-        Args:
-            element: BeautifulSoup element
-            base_url: Base URL for resolving relative URLs
-            
-        Returns:
-            List of image URLs
-        """
-        image_urls = []
-        
-        # Find all img tags
-        img_tags = element.find_all('img')
-        
-        for img in img_tags:
-            # Try different attributes
-            for attr in ['src', 'data-src', 'data-original', 'data-lazy']:
-                url = img.get(attr)
-                if url:
-                    # Resolve relative URLs
-                    if base_url and not url.startswith(('http://', 'https://')):
-                        url = urljoin(base_url, url)
-                    
-                    # Filter out placeholder/loading images
-                    if not ImageUrlExtractor._is_placeholder_image(url):
-                        image_urls.append(url)
-                    break
-        
-        return list(set(image_urls))  # Remove duplicates
-    
-    @staticmethod
-    def _is_placeholder_image(url: str) -> bool:
-        """Check if URL is a placeholder or loading image"""
-        placeholder_indicators = [
-            'placeholder', 'loading', 'spinner', 'blank',
-            'data:image', '1x1', 'pixel', 'transparent'
-        ]
-        
-        url_lower = url.lower()
-        return any(indicator in url_lower for indicator in placeholder_indicators)
-    
-    @staticmethod
-    def extract_from_css_background(element) -> List[str]:
-        """Extract image URLs from CSS background-image properties"""
-        image_urls = []
-        
-        # Check style attribute
-        style = element.get('style', '')
-        if 'background-image' in style:
-            import re
-            urls = re.findall(r'url\(["\']?([^"\']+)["\']?\)', style)
-            image_urls.extend(urls)
-        
-        return image_urls
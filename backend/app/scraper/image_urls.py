@@ -0,0 +1,72 @@
+"""
+Image URL Extraction
+
+Finds listing image URLs in parsed HTML. Kept apart from the image
+downloader (Pillow, HTTP sessions) because result page parse workers use it
+(see app.scraper.page_parser).
+"""
+
+import re
+from typing import List
+from urllib.parse import urljoin
+
+
+class ImageUrlExtractor:
+    """Utility class for extracting image URLs from HTML elements"""
+    
+    @staticmethod
+    def extract_from_element(element, base_url: str = "") -> List[str]:
+        """
+        Extract image URLs from a BeautifulSoup element
+        
+        Args:
+            element: BeautifulSoup element
+            base_url: Base URL for resolving relative URLs
+            
+        Returns:
+            List of image URLs
+        """
+        image_urls = []
+        
+        # Find all img tags
+        img_tags = element.find_all('img')
+        
+        for img in img_tags:
+            # Try different attributes
+            for attr in ['src', 'data-src', 'data-original', 'data-lazy']:
+                url = img.get(attr)
+                if url:
+                    # Resolve relative URLs
+                    if base_url and not url.startswith(('http://', 'https://')):
+                        url = urljoin(base_url, url)
+                    
+                    # Filter out placeholder/loading images
+                    if not ImageUrlExtractor._is_placeholder_image(url):
+                        image_urls.append(url)
+                    break
+        
+        return list(set(image_urls))  # Remove duplicates
+    
+    @staticmethod
+    def _is_placeholder_image(url: str) -> bool:
+        """Check if URL is a placeholder or loading image"""
+        placeholder_indicators = [
+            'placeholder', 'loading', 'spinner', 'blank',
+            'data:image', '1x1', 'pixel', 'transparent'
+        ]
+        
+        url_lower = url.lower()
+        return any(indicator in url_lower for indicator in placeholder_indicators)
+    
+    @staticmethod
+    def extract_from_css_background(element) -> List[str]:
+        """Extract image URLs from CSS background-image properties"""
+        image_urls = []
+        
+        # Check style attribute
+        style = element.get('style', '')
+        if 'background-image' in style:
+            urls = re.findall(r'url\(["\']?([^"\']+)["\']?\)', style)
+            image_urls.extend(urls)
+        
+        return image_urls
@@ -0,0 +1,78 @@
+"""
+Known Listing Index Module
+
+Holds the external ids, URLs and last prices of recently seen listings of a
+source. The index is loaded once per scraping cycle and lets incremental
+crawls stop paginating once result pages contain mostly known listings, and
+skip image downloads and detail fetches for listings that did not change.
+
+Listings in cold storage are inactive and older than the lookback, so they
+are never in the index: when one reappears it is scraped in full and the
+ingestor restores the archived row (app.services.listing_ingest).
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.automotive import VehicleListing
+from .config import scraper_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _price_key(price) -> Optional[float]:
+    return round(float(price), 2) if price is not None else None
+
+
+class KnownListingIndex:
+    """In-memory set of recently seen listings of one source"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.external_ids: Set[str] = set()
+        self.prices_by_url: Dict[str, Optional[float]] = {}
+
+    @classmethod
+    def load(cls, db: Session, source: str, lookback_days: Optional[int] = None) -> "KnownListingIndex":
+        """Load active listings of `source` seen within `lookback_days` in one query"""
+        lookback_days = lookback_days or scraper_settings.INCREMENTAL_LOOKBACK_DAYS
+        cutoff = datetime.utcnow() - timedelta(days=lookback_days)
+
+        index = cls(source)
+        rows = db.query(
+            VehicleListing.external_id,
+            VehicleListing.listing_url,
+            VehicleListing.price
+        ).filter(
+            VehicleListing.source_website == source,
+            VehicleListing.is_active == True,
+            VehicleListing.scraped_at >= cutoff
+        ).yield_per(1000)
+
+        for external_id, listing_url, price in rows:
+            index.add(external_id, listing_url, price)
+
+        logger.info(f"Loaded {len(index)} known listings for {source}")
+        return index
+
+    def add(self, external_id: Optional[str], listing_url: Optional[str], price=None):
+        if external_id:
+            self.external_ids.add(external_id)
+        if listing_url:
+            self.prices_by_url[listing_url] = _price_key(price)
+
+    def __len__(self) -> int:
+        return max(len(self.prices_by_url), len(self.external_ids))
+
+    def is_known(self, external_id: Optional[str] = None, listing_url: Optional[str] = None) -> bool:
+        return ((external_id is not None and external_id in self.external_ids) or
+                (listing_url is not None and listing_url in self.prices_by_url))
+
+    def is_unchanged(self, listing_url: Optional[str], price) -> bool:
+        """Known listing whose price has not changed since it was stored"""
+        if listing_url is None or listing_url not in self.prices_by_url:
+            return False
+        return self.prices_by_url[listing_url] == _price_key(price)
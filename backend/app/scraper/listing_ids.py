@@ -0,0 +1,98 @@
+"""
+Listing ID Derivation Module
+
+Derives stable external ids for scraped listings so repeated scrapes of the
+same car map to the same row. The lot id is taken from data attributes of
+the listing element or from the listing URL; listings without one fall back
+to a hash of the canonical listing URL and fields that do not change between
+scrapes.
+"""
+
+import hashlib
+import re
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Lot ids in listing URLs: /lots/12345, /lots/details/12345, ?lotId=12345. The
+# id must be the whole path segment or parameter value, so /lot/2020-bmw-320d
+# (a slug starting with the year) has no lot id.
+LOT_ID_URL_PATTERNS = [
+    re.compile(r'/lots?/(?:[a-z-]+/)*(\d+)(?=[/?#]|$)', re.I),
+    re.compile(r'[?&](?:lot_?id|lot|id)=(\d+)(?=[&#]|$)', re.I),
+]
+
+# Query parameters that do not identify the listing
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|gclid|fbclid|ref|source)$', re.I)
+
+LOT_ID_ATTRIBUTES = (
+    'data-lot-id', 'data-lotid', 'data-lot', 'data-listing-id', 'data-vehicle-id', 'data-id'
+)
+LOT_ID_SELECTOR = ', '.join(f'[{attribute}]' for attribute in LOT_ID_ATTRIBUTES)
+
+_ID_VALUE = re.compile(r'^[\w-]{1,64}$')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def lot_id_from_url(url: Optional[str]) -> Optional[str]:
+    """Extract the lot id from a listing URL"""
+    if not url:
+        return None
+    for pattern in LOT_ID_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def lot_id_from_element(element) -> Optional[str]:
+    """Extract the lot id from data attributes of a listing element or its children"""
+    if element is None:
+        return None
+    candidates = [element]
+    child = element.select_one(LOT_ID_SELECTOR)
+    if child is not None:
+        candidates.append(child)
+
+    for candidate in candidates:
+        for attribute in LOT_ID_ATTRIBUTES:
+            value = candidate.get(attribute)
+            if value and _ID_VALUE.match(value.strip()):
+                return value.strip()
+    return None
+
+
+def canonical_listing_url(url: Optional[str]) -> Optional[str]:
+    """Listing URL without fragment, tracking parameters or trailing slash"""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(key)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/') or '/', query, ''))
+
+
+def stable_fields_hash(fields: Iterable) -> str:
+    """Hash of normalized field values (case and whitespace insensitive)"""
+    normalized = '|'.join(
+        _WHITESPACE.sub(' ', str(value)).strip().lower() if value is not None else ''
+        for value in fields
+    )
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def derive_external_id(prefix: str,
+                       listing_url: Optional[str] = None,
+                       element=None,
+                       stable_fields: Iterable = ()) -> str:
+    """
+    Stable external id of a listing
+
+    Prefers the lot id from data attributes, then from the URL, and falls
+    back to a hash of the canonical listing URL and `stable_fields` (e.g.
+    title and year). Without the URL, different cars with the same title
+    would share an id.
+    """
+    lot_id = lot_id_from_element(element) or lot_id_from_url(listing_url)
+    if lot_id:
+        return f"{prefix}_{lot_id}"
+    return f"{prefix}_h{stable_fields_hash((canonical_listing_url(listing_url), *stable_fields))}"
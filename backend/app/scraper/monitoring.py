@@ -9,6 +9,11 @@ from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.core.metrics import process_stats
+
+from .parse_pool import get_parse_pool
+from .transport import get_transport
+
 logger = logging.getLogger(__name__)
 
 class ScraperMonitor:
@@ -20,13 +25,25 @@ class ScraperMonitor:
     def get_system_health(self) -> Dict[str, Any]:
         """Get basic system health information"""
         uptime = datetime.utcnow() - self.start_time
+        process = process_stats()
         
         return {
             "status": "healthy",
             "uptime_seconds": int(uptime.total_seconds()),
             "timestamp": datetime.utcnow().isoformat(),
-            "memory_usage": "N/A",  # Could implement actual memory monitoring
-            "cpu_usage": "N/A"      # Could implement actual CPU monitoring
+            "memory_usage": {
+                "rss_mb": round(process["rss_bytes"] / 2**20, 1),
+                "peak_rss_mb": round(process["peak_rss_bytes"] / 2**20, 1),
+            },
+            "cpu_usage": {
+                "percent": process["cpu_percent"],  # since the previous health check
+                "cpu_seconds": process["cpu_seconds"],
+                "load_average": process["load_average"],
+            },
+            "threads": process["threads"],
+            "open_fds": process["open_fds"],
+            "http_transport": get_transport().get_stats(),
+            "parse_pool": get_parse_pool().get_stats()
         }
     
     def get_data_overview(self, db: Session) -> Dict[str, Any]:
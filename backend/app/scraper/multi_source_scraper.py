@@ -1,13 +1,22 @@
 """
 Multi-Source Scraper Module
 Manages scraping from multiple vehicle listing sources
+
+Sources come from the registry in app.scraper.sources and are scraped
+concurrently, one worker thread per source. Vehicles are handed to the
+caller page by page as they arrive.
 """
 
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from .sources import SourcePlugin, get_registered_sources
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -23,22 +32,29 @@ class ScrapingResult:
         if self.errors is None:
             self.errors = []
 
+# on_page(source, page, vehicles) / on_result(result)
+PageCallback = Callable[[str, int, List[Dict[str, Any]]], None]
+ResultCallback = Callable[[ScrapingResult], None]
+
+
 class MultiSourceScraper:
     """Manages scraping from multiple vehicle sources"""
     
-    def __init__(self):
+    def __init__(self, plugins: Optional[Dict[str, SourcePlugin]] = None):
+        self.plugins = plugins if plugins is not None else get_registered_sources()
         self.sources = {
-            "ayvens": {
-                "name": "Ayvens Carmarket",
-                "enabled": True,
-                "url": "https://carmarket.ayvens.com",
-                "country": "EU",
-                "status": "active",
+            source_id: {
+                "name": plugin.name,
+                "enabled": plugin.enabled,
+                "url": plugin.url,
+                "country": plugin.country,
+                "status": "active" if plugin.enabled else "disabled",
                 "last_scrape": None,
                 "total_scraped": 0
-            },
-
+            }
+            for source_id, plugin in self.plugins.items()
         }
+        self._stats_lock = threading.Lock()
 
     def get_sources(self) -> Dict[str, Dict[str, Any]]:
         """Get all available sources"""
@@ -71,7 +87,8 @@ class MultiSourceScraper:
             return True
         return False
     
-    def scrape_source(self, source: str, max_vehicles: int = 50) -> ScrapingResult:
+    def scrape_source(self, source: str, max_vehicles: int = 50,
+                      on_page: Optional[PageCallback] = None) -> ScrapingResult:
         """Scrape from a specific source"""
         if source not in self.sources:
             return ScrapingResult(
@@ -87,28 +104,24 @@ class MultiSourceScraper:
                 source=source
             )
         
-        start_time = datetime.utcnow()
+        start_time = time.monotonic()
         
         try:
             logger.info(f"Starting scraping from {source} (max: {max_vehicles})")
 
-            # Call the appropriate scraper based on source
-            vehicles_found = 0
-
-            if source == "ayvens":
-                from app.scraper.ayvens_scraper import AyvensCarmarketScraper
-                scraper = AyvensCarmarketScraper()
-                vehicles = scraper.scrape_all_listings(max_vehicles)
-                vehicles_found = len(vehicles)
-            else:
-                logger.error(f"Unknown or unsupported source: {source}")
-                vehicles_found = 0
+            scraper = self.plugins[source].scraper_factory()
+            page_callback = None
+            if on_page:
+                page_callback = lambda page, vehicles: on_page(source, page, vehicles)
+            vehicles = scraper.scrape_all_listings(max_vehicles=max_vehicles, on_page=page_callback) or []
+            vehicles_found = len(vehicles)
 
             # Update source statistics
-            self.sources[source]["last_scrape"] = datetime.utcnow().isoformat()
-            self.sources[source]["total_scraped"] += vehicles_found
+            with self._stats_lock:
+                self.sources[source]["last_scrape"] = datetime.utcnow().isoformat()
+                self.sources[source]["total_scraped"] += vehicles_found
 
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            duration = time.monotonic() - start_time
 
             logger.info(f"Scraping from {source} completed: {vehicles_found} vehicles")
 
@@ -120,7 +133,7 @@ class MultiSourceScraper:
             )
             
         except Exception as e:
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            duration = time.monotonic() - start_time
             logger.error(f"Scraping from {source} failed: {e}")
             
             return ScrapingResult(
@@ -130,19 +143,44 @@ class MultiSourceScraper:
                 source=source
             )
     
-    def scrape_all_enabled(self, max_vehicles_per_source: int = 50) -> Dict[str, ScrapingResult]:
-        """Scrape from all enabled sources"""
+    def scrape_all_enabled(self, max_vehicles_per_source: int = 50,
+                           on_page: Optional[PageCallback] = None,
+                           on_result: Optional[ResultCallback] = None) -> Dict[str, ScrapingResult]:
+        """
+        Scrape all enabled sources concurrently
+        
+        Args:
+            max_vehicles_per_source: Vehicle limit of each source
+            on_page: Called from the source's worker thread with each page of vehicles
+            on_result: Called with each source's result as soon as it finishes
+        """
         results = {}
+        enabled = [source_id for source_id, info in self.sources.items() if info["enabled"]]
         
-        for source_id, source_info in self.sources.items():
-            if source_info["enabled"]:
-                results[source_id] = self.scrape_source(source_id, max_vehicles_per_source)
-            else:
+        for source_id in self.sources:
+            if source_id not in enabled:
                 results[source_id] = ScrapingResult(
                     success=False,
                     errors=["Source is disabled"],
                     source=source_id
                 )
+        
+        if not enabled:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=len(enabled), thread_name_prefix="source") as executor:
+            futures = {
+                executor.submit(self.scrape_source, source_id, max_vehicles_per_source, on_page): source_id
+                for source_id in enabled
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if on_result:
+                    try:
+                        on_result(result)
+                    except Exception as e:
+                        logger.error(f"Error handling result of {result.source}: {e}")
                 
         return results
     
@@ -0,0 +1,227 @@
+"""
+Ayvens Result Page Parser
+
+The CPU-bound half of a crawl: raw result page bytes in, compact
+ParsedListing tuples out. Nothing here touches scraper state, the network or
+the database, so pages can be parsed in worker processes (see
+app.scraper.parse_pool) without pickling BeautifulSoup trees back. Known
+listing checks and image downloads stay with the scraper.
+
+Keep this module's imports light: every parse worker imports it.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from .image_urls import ImageUrlExtractor
+from .listing_ids import derive_external_id
+from .parsing import TITLE_FALLBACK_PATTERN, parse_make_model, parse_price
+
+logger = logging.getLogger(__name__)
+
+# Listing containers: Ayvens-specific selectors first, then generic ones
+LISTING_SELECTORS = (
+    # Ayvens-specific selectors (based on common patterns)
+    '.lot-card', '.lot-item', '.vehicle-lot', '.auction-lot',
+    '.car-lot', '.listing-card', '.vehicle-card', '.car-item',
+    '.auction-item', '.tender-item', '.sale-item',
+    # Generic selectors for vehicle listings
+    '[class*="lot"]', '[class*="vehicle"]', '[class*="car"]',
+    '[class*="listing"]', '[class*="auction"]', '[class*="tender"]',
+    # Broad selectors as fallback
+    '.card', '.item', '.product', '.result',
+    # Container-based selectors
+    '.results .item', '.listings .card', '.vehicles .lot',
+    # Grid/list item selectors
+    '.grid-item', '.list-item', '.row .col'
+)
+
+TITLE_SELECTORS = (
+    # Ayvens-specific
+    '.lot-title', '.vehicle-title', '.car-title', '.listing-title',
+    # Generic title selectors
+    'h1', 'h2', 'h3', 'h4', '.title', '.name', '.model',
+    '[class*="title"]', '[class*="name"]', '[class*="model"]',
+    # Fallback - any text that looks like a car name
+    '[data-title]', '[title]'
+)
+
+PRICE_SELECTORS = (
+    # Ayvens-specific
+    '.lot-price', '.auction-price', '.sale-price',
+    # Generic price selectors
+    '.price', '.cost', '.amount', '.value', '.bid',
+    '[class*="price"]', '[class*="cost"]', '[class*="amount"]',
+    '[class*="bid"]', '[class*="value"]',
+    # Data attributes
+    '[data-price]', '[data-amount]'
+)
+
+LINK_SELECTORS = (
+    # Links to vehicle details
+    'a[href*="lot"]', 'a[href*="vehicle"]', 'a[href*="car"]',
+    'a[href*="auction"]', 'a[href*="tender"]',
+    # Generic links
+    'a', '.link', '[href]'
+)
+
+_VEHICLE_DATA_TEXT = re.compile(r'(€|EUR|\$|USD|km|miles|[0-9]{4})', re.I)
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+class ParsedListing(NamedTuple):
+    """Fields of one listing card, cheap to send between processes"""
+    external_id: str
+    listing_url: Optional[str]
+    title: str
+    make: str
+    model: str
+    year: Optional[int]
+    price: Optional[float]
+    image_url: Optional[str]
+    image_urls: Tuple[str, ...]
+
+
+def parse_results_page(content: bytes, base_url: str) -> List[ParsedListing]:
+    """Listings of a result page, in page order"""
+    soup = BeautifulSoup(content, 'html.parser')
+    listings = []
+    for element in select_listings(soup):
+        parsed = extract_listing(element, base_url)
+        if parsed:
+            listings.append(parsed)
+    return listings
+
+
+def select_listings(soup) -> list:
+    """Listing container elements of a result page"""
+    for selector in LISTING_SELECTORS:
+        try:
+            found_listings = soup.select(selector)
+            # Filter out empty or very small elements
+            valid_listings = [listing for listing in found_listings
+                              if listing.get_text(strip=True) and len(listing.get_text(strip=True)) > 20]
+            if valid_listings:
+                logger.info(f"Found {len(valid_listings)} valid listings using selector: {selector}")
+                return valid_listings
+        except Exception as e:
+            logger.debug(f"Error with selector {selector}: {e}")
+
+    logger.warning("No vehicle listings found on page")
+
+    # Check if page has any content at all
+    page_text = soup.get_text(strip=True)
+    logger.debug(f"Page text length: {len(page_text)}")
+    if len(page_text) < 100:
+        logger.warning("Page appears to be mostly empty - might be JavaScript-heavy")
+
+    # Look for any elements that might contain vehicle data
+    listings = []
+    potential_elements = soup.find_all(['div', 'article', 'section'], string=_VEHICLE_DATA_TEXT)
+    if potential_elements:
+        logger.info(f"Found {len(potential_elements)} elements with potential vehicle data")
+        for elem in potential_elements[:5]:  # Check first 5
+            parent = elem.parent
+            if parent and len(parent.get_text(strip=True)) > 50:
+                listings.append(parent)
+        if listings:
+            logger.info(f"Extracted {len(listings)} listings from potential elements")
+    return listings
+
+
+def extract_listing(listing_element, base_url: str) -> Optional[ParsedListing]:
+    """Fields of one listing card; None without a usable title"""
+    try:
+        # Extract title with fallback strategies
+        title = None
+        for selector in TITLE_SELECTORS:
+            for element in listing_element.select(selector):
+                text = element.get_text(strip=True)
+                if text and len(text.strip()) > 3:  # Must have meaningful content
+                    title = text.strip()
+                    break
+            if title:
+                break
+
+        # Fallback: extract any text that looks like a vehicle name
+        if not title:
+            all_text = listing_element.get_text(separator=' ', strip=True)
+            # Look for patterns like "BMW 320d" or "Mercedes C220"
+            car_pattern = TITLE_FALLBACK_PATTERN.search(all_text)
+            if car_pattern:
+                title = car_pattern.group(0).strip()
+
+        if not title or len(title.strip()) < 3:
+            logger.debug("No valid title found, skipping listing")
+            return None
+
+        # Extract price
+        price = None
+        for selector in PRICE_SELECTORS:
+            element = listing_element.select_one(selector)
+            if element:
+                price_text = element.get_text(strip=True)
+                price = parse_price(price_text)
+                if price is None and price_text:
+                    logger.warning(f"Could not parse price: {price_text}")
+                if price:
+                    break
+
+        # Extract image URLs (primary and additional)
+        image_urls = ImageUrlExtractor.extract_from_element(listing_element, base_url)
+        image_url = image_urls[0] if image_urls else None
+
+        # Also try CSS background images
+        bg_images = ImageUrlExtractor.extract_from_css_background(listing_element)
+        if bg_images and not image_url:
+            image_url = urljoin(base_url, bg_images[0])
+
+        # Extract listing URL
+        listing_url = None
+        for selector in LINK_SELECTORS:
+            element = listing_element.select_one(selector)
+            if element:
+                href = element.get('href')
+                if href:
+                    listing_url = urljoin(base_url, href)
+                    break
+
+        make, model = parse_make_model(title)
+        year = extract_year(title)
+
+        # Stable external ID: lot id from data attributes or URL, else a
+        # hash of fields that do not change between scrapes
+        external_id = derive_external_id(
+            'ayvens', listing_url, listing_element, stable_fields=(title, year)
+        )
+
+        return ParsedListing(external_id, listing_url, title, make, model, year, price,
+                             image_url, tuple(image_urls))
+
+    except Exception as e:
+        logger.error(f"Error parsing listing: {e}")
+        return None
+
+
+def extract_year(text: str) -> Optional[int]:
+    """Extract year from text"""
+    if not text:
+        return None
+
+    # Look for 4-digit years
+    years = _YEAR.findall(text)
+    if years:
+        try:
+            year = int(years[0])
+            # Validate reasonable year range
+            if 1990 <= year <= datetime.now().year + 1:
+                return year
+        except ValueError:
+            pass
+
+    return None
@@ -0,0 +1,179 @@
+"""
+Parse Worker Pool
+
+Result page parsing is CPU-bound and holds the GIL, so a process parsing
+pages in threads uses about one core. ParsePool sends raw page bytes to a
+ProcessPoolExecutor and gets ParsedListing tuples back, leaving fetch
+threads and the event loop free while several crawls (e.g. concurrent
+multi-source scrapes) parse on all cores.
+
+Workers are started and warmed (bs4 and the parser imported, a sample page
+parsed) by start(), called before the first scheduled scrape cycle (see
+BackgroundScraper.run_scheduled_cycle), so API workers that never scrape
+never start them. Until then, or when the pool is disabled or broken, pages
+are parsed inline.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.core.metrics import histogram
+
+from .config import scraper_settings
+from .page_parser import ParsedListing, parse_results_page
+
+logger = logging.getLogger(__name__)
+
+PARSE_SECONDS = histogram("scraper_parse_seconds", "Result page parse time (including the worker round trip)",
+                          ["mode"])
+
+_WARMUP_PAGE = (b'<html><body><div class="lot-card"><h3>BMW 320d Touring</h3>'
+                b'<span class="lot-price">\xe2\x82\xac 20.000</span><a href="/lots/1">Lot 1</a>'
+                b'</div></body></html>')
+
+
+def _init_worker(log_level: int):
+    """Log from workers at the parent's level"""
+    logging.basicConfig(level=log_level)
+
+
+def _warm_worker() -> int:
+    """Import and exercise the parser in a worker; returns its pid"""
+    parse_results_page(_WARMUP_PAGE, "https://warmup.invalid")
+    return os.getpid()
+
+
+class ParsePool:
+    """Process pool parsing result pages into ParsedListing tuples"""
+
+    def __init__(self, workers: Optional[int] = None, start_method: Optional[str] = None):
+        self.workers = workers or scraper_settings.PARSE_WORKERS or os.cpu_count() or 1
+        self.start_method = start_method or scraper_settings.PARSE_POOL_START_METHOD or (
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.worker_pids: List[int] = []
+        self.warmup_seconds: Optional[float] = None
+        self.pages_in_pool = 0
+        self.pages_inline = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> "ParsePool":
+        """Start all workers and wait until each has parsed a sample page"""
+        with self._lock:
+            if self._executor is not None:
+                return self
+            started = time.monotonic()
+            executor = ProcessPoolExecutor(max_workers=self.workers,
+                                           mp_context=multiprocessing.get_context(self.start_method),
+                                           initializer=_init_worker,
+                                           initargs=(logging.getLogger().getEffectiveLevel(),))
+            # Submitting one task per worker before any finishes spawns them all
+            futures = [executor.submit(_warm_worker) for _ in range(self.workers)]
+            self.worker_pids = sorted({future.result() for future in futures})
+            self.warmup_seconds = round(time.monotonic() - started, 3)
+            self._executor = executor
+        logger.info(f"Parse pool started: {self.workers} {self.start_method} workers "
+                    f"warm after {self.warmup_seconds}s")
+        return self
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Parse pool stopped")
+
+    def parse_page(self, content: bytes, base_url: str) -> List[ParsedListing]:
+        """Parse one result page, in a worker if the pool is running"""
+        executor = self._executor
+        started = time.perf_counter()
+        if executor is not None:
+            try:
+                listings = executor.submit(parse_results_page, content, base_url).result()
+                self.pages_in_pool += 1
+                PARSE_SECONDS.labels("pool").observe(time.perf_counter() - started)
+                return listings
+            except BrokenProcessPool as e:
+                self._broken(e)
+                started = time.perf_counter()
+        self.pages_inline += 1
+        listings = parse_results_page(content, base_url)
+        PARSE_SECONDS.labels("inline").observe(time.perf_counter() - started)
+        return listings
+
+    def parse_pages(self, contents: Iterable[bytes], base_url: str,
+                    chunksize: int = 4) -> Iterator[List[ParsedListing]]:
+        """Parse many pages (e.g. a saved corpus), results in input order"""
+        executor = self._executor
+        if executor is None:
+            for content in contents:
+                self.pages_inline += 1
+                yield parse_results_page(content, base_url)
+            return
+
+        contents = list(contents)
+        base_urls = [base_url] * len(contents)
+        for listings in executor.map(parse_results_page, contents, base_urls, chunksize=chunksize):
+            self.pages_in_pool += 1
+            yield listings
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "start_method": self.start_method,
+            "warmup_seconds": self.warmup_seconds,
+            "pages_in_pool": self.pages_in_pool,
+            "pages_inline": self.pages_inline,
+            "failures": self.failures,
+        }
+
+    def _broken(self, error: Exception):
+        """A worker died: stop using the pool, parse inline until it is started again"""
+        self.failures += 1
+        logger.error(f"Parse pool broken, parsing inline: {error}")
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """Process-wide parse pool (not started until start() is called)"""
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ParsePool()
+    return _parse_pool
+
+
+def start_parse_pool() -> Optional[ParsePool]:
+    """Start and warm the shared pool if enabled; a no-op once it is running"""
+    if not scraper_settings.ENABLE_PARSE_POOL:
+        return None
+    try:
+        return get_parse_pool().start()
+    except Exception as e:
+        logger.error(f"Could not start parse pool, parsing inline: {e}")
+        return None
+
+
+def stop_parse_pool():
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
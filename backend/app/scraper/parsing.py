@@ -0,0 +1,140 @@
+"""
+Listing Field Extraction
+
+Precompiled parsers for the fields scrapers pull out of listing text:
+prices, numbers, mileage and make/model from titles. Patterns are compiled
+once at import; make/model parsing is memoized because the same titles come
+back on every crawl.
+
+Prices are read in one of two ways. Without a locale the separators are
+guessed from the text (the historic Ayvens behaviour: "1,234.56", "1234,56").
+With a locale the separators are known, so Italian/German "12.500" is read
+as twelve thousand five hundred instead of 12.5.
+
+Run benchmarks/bench_parsing.py after changing these.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Decimal separator per locale; the other of ',' and '.' groups thousands
+DECIMAL_SEPARATORS = {
+    'it': ',', 'de': ',', 'fr': ',', 'es': ',', 'nl': ',', 'pt': ',', 'be': ',',
+    'en': '.', 'gb': '.', 'us': '.',
+}
+
+# Common car makes, in matching priority order
+MAKES = (
+    'BMW', 'Mercedes', 'Mercedes-Benz', 'Audi', 'Volkswagen', 'VW',
+    'Ford', 'Opel', 'Peugeot', 'Renault', 'Fiat', 'Toyota', 'Honda',
+    'Nissan', 'Hyundai', 'Kia', 'Mazda', 'Mitsubishi', 'Subaru',
+    'Volvo', 'Skoda', 'Seat', 'Citroen', 'Alfa Romeo', 'Lancia',
+    'Porsche', 'Jaguar', 'Land Rover', 'Mini', 'Smart', 'Dacia'
+)
+
+# Makes recognised in free listing text when a listing has no title element
+TITLE_FALLBACK_PATTERN = re.compile(
+    r'(BMW|Mercedes|Audi|Volkswagen|Ford|Peugeot|Renault|Volvo|Toyota|Honda|Nissan|Hyundai|Kia|'
+    r'Mazda|Mitsubishi|Subaru|Skoda|Seat|Citroen|Alfa Romeo|Fiat|Opel|Porsche|Jaguar|Land Rover|'
+    r'Mini|Smart|Dacia)\s+[A-Za-z0-9\s-]+',
+    re.I
+)
+
+TITLE_CACHE_SIZE = 8192
+
+_PRICE_JUNK = re.compile(r'[^\d,.]')
+_GROUPED_PRICE_JUNK = re.compile(r'[€$£,.\s]')
+_DIGITS = re.compile(r'\d+')
+_NON_DIGITS = re.compile(r'\D')
+_GROUPED_INT = re.compile(r'\d{1,3}(?:[ \u00a0\u202f.,]\d{3})+|\d+')
+_MODEL_END = re.compile(r'\d{4}|,|\(|\[')
+_LEADING_DASHES = re.compile(r'^[-\s]+')
+
+_MAKES_UPPER = tuple((make, make.upper()) for make in MAKES)
+
+
+def parse_price(text: Optional[str], locale: Optional[str] = None) -> Optional[float]:
+    """Price from text such as "€ 12.500" or "12,500.00"; None if unparseable"""
+    if not text:
+        return None
+
+    price = _PRICE_JUNK.sub('', text)
+    decimal = DECIMAL_SEPARATORS.get(locale.lower()) if locale else None
+
+    if decimal is not None:
+        thousands = '.' if decimal == ',' else ','
+        price = price.replace(thousands, '').replace(decimal, '.')
+    elif ',' in price and '.' in price:
+        # Format: 1,234.56
+        price = price.replace(',', '')
+    elif ',' in price:
+        # Format: 1,234 or 1234,56
+        if len(price.split(',')[1]) <= 2:
+            price = price.replace(',', '.')
+        else:
+            price = price.replace(',', '')
+
+    try:
+        return float(price)
+    except ValueError:
+        return None
+
+
+def parse_grouped_price(text: Optional[str]) -> Optional[float]:
+    """Price with every '.' and ',' read as a thousands separator"""
+    if not text:
+        return None
+    try:
+        return float(_GROUPED_PRICE_JUNK.sub('', text))
+    except ValueError:
+        return None
+
+
+def parse_number(text: Optional[str]) -> Optional[int]:
+    """First integer in text, ignoring '.' and ',' separators ("1.598 cc" -> 1598)"""
+    if not text:
+        return None
+    match = _DIGITS.search(text.replace('.', '').replace(',', ''))
+    return int(match.group()) if match else None
+
+
+def parse_mileage(text: Optional[str]) -> Optional[int]:
+    """First number in text, with ' ', '.' or ',' thousands groups ("84 500 km")"""
+    if not text:
+        return None
+    match = _GROUPED_INT.search(text)
+    return int(_NON_DIGITS.sub('', match.group())) if match else None
+
+
+def find_make(title: str) -> Optional[Tuple[str, int]]:
+    """
+    Highest priority make in a title and its position in title.upper()
+
+    Matches are substrings, as makes often touch model names ("BMW320d").
+    A make earlier in MAKES wins over one appearing earlier in the title.
+    """
+    # Plain substring tests beat a compiled alternation of all makes here:
+    # the regex has to report every match to find the highest priority one
+    title_upper = title.upper()
+    for make, make_upper in _MAKES_UPPER:
+        if make_upper in title_upper:
+            return make, title_upper.find(make_upper)
+    return None
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def parse_make_model(title: str) -> Tuple[str, str]:
+    """Make and model from a listing title ("BMW 320d Touring 2019" -> ("BMW", "320d Touring"))"""
+    found = find_make(title)
+    if found:
+        make, start = found
+        model_part = title[start + len(make):].strip()
+        model = _LEADING_DASHES.sub('', _MODEL_END.split(model_part, 1)[0].strip())
+        return make, model if model else 'Unknown'
+
+    # If no make found, take the first words
+    words = title.split()
+    if words:
+        return words[0], ' '.join(words[1:3]) if len(words) > 1 else 'Unknown'
+    return 'Unknown', 'Unknown'
@@ -0,0 +1,226 @@
+"""
+Rate Limiter Module
+
+Per-domain request rate limiting shared by all scrapers, the image
+downloader and the compliance manager. Limits are enforced with GCRA
+(generic cell rate algorithm): each (domain, limit) pair keeps a single
+"theoretical arrival time", so acquiring a slot is O(1) regardless of the
+window size. Slots are reserved rather than rejected, callers sleep until
+their slot (time.sleep in acquire_sync, asyncio.sleep in acquire).
+
+State lives in process memory by default; with SCRAPER_RATE_LIMIT_REDIS_URL
+set (and the redis package installed) it is kept in Redis so limits hold
+across worker processes.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from .config import scraper_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY = "default"
+
+
+@dataclass(frozen=True)
+class Rate:
+    """At most `count` requests per `period` seconds (bursts up to `count`)"""
+    count: int
+    period: float
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.count
+
+    @property
+    def burst_tolerance(self) -> float:
+        return self.period - self.emission_interval
+
+
+class MemoryBackend:
+    """GCRA state in process memory"""
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rates: Sequence[Rate], now: float, take: bool = True) -> float:
+        """Seconds until the next request for `key` conforms, reserving the slot if `take`"""
+        with self._lock:
+            tats = [max(self._tats.get(f"{key}:{i}", now), now) for i in range(len(rates))]
+            wait = max([0.0] + [tat - rate.burst_tolerance - now for tat, rate in zip(tats, rates)])
+            if take:
+                send_at = now + wait
+                for i, (tat, rate) in enumerate(zip(tats, rates)):
+                    self._tats[f"{key}:{i}"] = max(tat, send_at) + rate.emission_interval
+            return wait
+
+
+# Same algorithm as MemoryBackend.reserve, atomic in Redis.
+# KEYS: one TAT key per rate; ARGV: now, take, then emission interval and
+# burst tolerance of each rate
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local take = tonumber(ARGV[2])
+local wait = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then tat = now end
+    tats[i] = tat
+    local w = tat - tonumber(ARGV[2 * i + 2]) - now
+    if w > wait then wait = w end
+end
+if take == 1 then
+    local send_at = now + wait
+    for i, key in ipairs(KEYS) do
+        local tat = tats[i]
+        if tat < send_at then tat = send_at end
+        local new_tat = tat + tonumber(ARGV[2 * i + 1])
+        redis.call('SET', key, tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+    end
+end
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """GCRA state in Redis, shared by all worker processes"""
+
+    def __init__(self, client, prefix: str = "scraper:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_GCRA_SCRIPT)
+
+    def reserve(self, key: str, rates: Sequence[Rate], now: float, take: bool = True) -> float:
+        keys = [f"{self.prefix}{key}:{i}" for i in range(len(rates))]
+        args: List[float] = [now, 1 if take else 0]
+        for rate in rates:
+            args.extend([rate.emission_interval, rate.burst_tolerance])
+        return float(self._script(keys=keys, args=args))
+
+
+class RateLimiter:
+    """Per-domain GCRA rate limiter with sync and asyncio acquisition"""
+
+    def __init__(self,
+                 requests_per_minute: int = 30,
+                 requests_per_hour: int = 1000,
+                 backend=None,
+                 clock: Callable[[], float] = time.time):
+        self.rates = [rate for rate in (Rate(requests_per_minute, 60), Rate(requests_per_hour, 3600))
+                      if rate.count > 0]
+        self.backend = backend or MemoryBackend()
+        self.clock = clock
+        self._fallback = MemoryBackend()
+        self._last_acquired: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # Local statistics
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait_seconds = 0.0
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Rate limit key (domain) of a URL"""
+        return urlparse(url).netloc or url
+
+    def _reserve(self, key: str, take: bool) -> float:
+        now = self.clock()
+        try:
+            wait = self.backend.reserve(key, self.rates, now, take)
+        except Exception as e:
+            # Shared backend unavailable: keep limiting within this process
+            logger.warning(f"Rate limit backend failed, using local limits: {e}")
+            wait = self._fallback.reserve(key, self.rates, now, take)
+
+        if take:
+            with self._lock:
+                self._last_acquired[key] = now + wait
+                self.acquired += 1
+                if wait > 0:
+                    self.delayed += 1
+                    self.total_wait_seconds += wait
+        return wait
+
+    def delay_for(self, key: str = DEFAULT_KEY) -> float:
+        """Seconds until a request for `key` would be allowed (reserves nothing)"""
+        return self._reserve(key, take=False)
+
+    def reserve(self, key: str = DEFAULT_KEY) -> float:
+        """Reserve the next slot for `key`, returns the seconds to wait for it"""
+        return self._reserve(key, take=True)
+
+    def acquire_sync(self, key: str = DEFAULT_KEY) -> float:
+        """Block the calling thread until a request for `key` is allowed"""
+        wait = self.reserve(key)
+        if wait > 0:
+            logger.info(f"Rate limit reached for {key}, sleeping for {wait:.2f} seconds")
+            time.sleep(wait)
+        return wait
+
+    async def acquire(self, key: str = DEFAULT_KEY) -> float:
+        """Wait without blocking the event loop until a request for `key` is allowed"""
+        wait = self.reserve(key)
+        if wait > 0:
+            logger.info(f"Rate limit reached for {key}, waiting {wait:.2f} seconds")
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait_if_needed(self, key: str = DEFAULT_KEY):
+        """Wait if rate limits would be exceeded"""
+        self.acquire_sync(key)
+
+    def last_acquired(self, key: str) -> Optional[float]:
+        """Time of the last slot reserved for `key` by this process"""
+        return self._last_acquired.get(key)
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "backend": type(self.backend).__name__,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+        }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def _create_backend():
+    url = scraper_settings.RATE_LIMIT_REDIS_URL
+    if not url:
+        return MemoryBackend()
+    if not REDIS_AVAILABLE:
+        logger.warning("redis package not installed - rate limits are per process")
+        return MemoryBackend()
+    logger.info("Sharing scraper rate limits through Redis")
+    return RedisBackend(redis.Redis.from_url(url))
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter shared by scrapers, image downloads and compliance checks"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    scraper_settings.REQUESTS_PER_MINUTE,
+                    scraper_settings.REQUESTS_PER_HOUR,
+                    backend=_create_backend()
+                )
+    return _rate_limiter
@@ -1,76 +1,57 @@
 """
 Scraper Scheduler Module
 Handles scheduling and management of scraping jobs
+
+Scraping runs are executed by the persistent job scheduler
+(app.services.job_scheduler); this module exposes the scraping job's
+status and manual triggers to the API.
 """
 
 import logging
-from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
-import uuid
+
+from app.services.job_scheduler import JobScheduler, get_job_scheduler
 
 logger = logging.getLogger(__name__)
 
+SCRAPE_JOB_ID = "scrape"
+
+
 class ScraperScheduler:
     """Manages scraping job scheduling and execution"""
-    
-    def __init__(self):
-        self.jobs = {}
-        self.running = False
-        self.last_run = None
-        
+
+    def __init__(self, scheduler: Optional[JobScheduler] = None):
+        self.scheduler = scheduler or get_job_scheduler()
+
     def get_job_status(self) -> Dict[str, Any]:
         """Get current status of scheduled jobs"""
+        status = self.scheduler.get_status()
+        scrape_job = next((job for job in status["jobs"] if job["id"] == SCRAPE_JOB_ID), None)
+
         return {
-            "running": self.running,
-            "last_run": self.last_run.isoformat() if self.last_run else None,
-            "active_jobs": len(self.jobs),
-            "jobs": list(self.jobs.keys())
+            "running": bool(scrape_job and scrape_job["running"]),
+            "last_run": scrape_job["last_run_at"] if scrape_job else None,
+            "next_run": scrape_job["next_run_at"] if scrape_job else None,
+            "active_jobs": len([job for job in status["jobs"] if job["running"]]),
+            "leader": status["leader"],
+            "worker_id": status["worker_id"],
+            "jobs": status["jobs"],
+            "recent_runs": self.scheduler.get_run_history(SCRAPE_JOB_ID, limit=10)
         }
-    
+
     def trigger_manual_scrape(self) -> str:
-        """Trigger a manual scraping job"""
-        job_id = str(uuid.uuid4())
-        self.jobs[job_id] = {
-            "id": job_id,
-            "type": "manual",
-            "status": "queued",
-            "created_at": datetime.utcnow(),
-            "started_at": None,
-            "completed_at": None
-        }
-        
-        logger.info(f"Manual scraping job {job_id} queued")
-        return job_id
-    
-    def start_job(self, job_id: str):
-        """Mark a job as started"""
-        if job_id in self.jobs:
-            self.jobs[job_id]["status"] = "running"
-            self.jobs[job_id]["started_at"] = datetime.utcnow()
-            self.running = True
-            
-    def complete_job(self, job_id: str, success: bool = True):
-        """Mark a job as completed"""
-        if job_id in self.jobs:
-            self.jobs[job_id]["status"] = "completed" if success else "failed"
-            self.jobs[job_id]["completed_at"] = datetime.utcnow()
-            self.last_run = datetime.utcnow()
-            self.running = False
-            
+        """Trigger a manual scraping job, returns the run id"""
+        run_id = self.scheduler.trigger(SCRAPE_JOB_ID)
+        if run_id is None:
+            raise ValueError("Scraping job is not scheduled on any worker")
+
+        logger.info(f"Manual scraping run {run_id} queued")
+        return str(run_id)
+
     def cleanup_old_jobs(self, hours: int = 24):
-        """Remove old completed jobs"""
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        to_remove = []
-        
-        for job_id, job in self.jobs.items():
-            if (job.get("completed_at") and 
-                job["completed_at"] < cutoff):
-                to_remove.append(job_id)
-                
-        for job_id in to_remove:
-            del self.jobs[job_id]
-            
-        logger.info(f"Cleaned up {len(to_remove)} old jobs")
+        """Remove old completed job runs"""
+        deleted = self.scheduler.cleanup_history(days=max(1, hours // 24))
+        logger.info(f"Cleaned up {deleted} old jobs")
 
 # Global scheduler instance
 scraper_scheduler = ScraperScheduler()
@@ -2,18 +2,24 @@
 Session Management for Authenticated Scraping
 
 Handles session persistence, recovery, and error handling for carmarket.ayvens.com
+
+The cookie jar and CSRF tokens of a successful login are kept in a session
+store shared by all workers. A new process restores them, confirms them with
+one cheap probe and only logs in again when the stored session has really
+expired; logins are serialized through the store lock.
 """
 
 import json
 import logging
 import time
+from contextlib import contextmanager
 from typing import Optional, Dict, Any, Callable
 from datetime import datetime, timedelta
-from pathlib import Path
 from functools import wraps
 
-from app.core.config import settings
+from app.core.tracing import traced
 from app.scraper.ayvens_auth import AyvensAuthenticator
+from app.scraper.session_store import create_session_store
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +27,15 @@ logger = logging.getLogger(__name__)
 class SessionManager:
     """Manages authenticated sessions with automatic recovery"""
     
-    def __init__(self):
-        self.authenticator = AyvensAuthenticator()
-        self.session_file = Path(settings.DATA_DIR) / "sessions" / "ayvens_session.json"
-        self.session_file.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self, store=None, authenticator: Optional[AyvensAuthenticator] = None):
+        self.authenticator = authenticator or AyvensAuthenticator()
+        self.store = store or create_session_store("ayvens")
         
         # Session state
         self.session_data = {}
+        self._stale_authenticated_at = None  # stored login known to be rejected
+        self.restored_count = 0
+        self.login_count = 0
         self.retry_count = 0
         self.max_retries = 3
         self.retry_delay = 5  # seconds
@@ -35,38 +43,56 @@ class SessionManager:
         # Load existing session if available
         self._load_session()
     
-    def _load_session(self):
-        """Load session data from file"""
+    def _load_session(self) -> bool:
+        """Restore the stored session into the authenticator, if it is newer than ours"""
         try:
-            if self.session_file.exists():
-                with open(self.session_file, 'r') as f:
-                    self.session_data = json.load(f)
-                
-                # Check if session is still valid
-                expires_at = self.session_data.get('expires_at')
-                if expires_at:
-                    expires_dt = datetime.fromisoformat(expires_at)
-                    if datetime.utcnow() < expires_dt:
-                        logger.info("Loaded existing session data")
-                        return
-                
-                # Session expired, clear it
-                self.session_data = {}
-                logger.info("Previous session expired, cleared session data")
-                
+            data = self.store.load()
         except Exception as e:
             logger.warning(f"Failed to load session data: {e}")
-            self.session_data = {}
+            return False
+        
+        if not data or data.get("authenticated_at") in (None, self._stale_authenticated_at,
+                                                         self.session_data.get("authenticated_at")):
+            return False
+        
+        if self.authenticator.restore_state(data):
+            self.session_data = data
+            self.restored_count += 1
+            logger.info("Loaded existing session data")
+            return True
+        
+        logger.info("Stored session expired, ignoring it")
+        return False
     
     def _save_session(self):
-        """Save session data to file"""
+        """Save session data to the shared store"""
         try:
-            with open(self.session_file, 'w') as f:
-                json.dump(self.session_data, f, indent=2)
+            self.store.save(self.session_data)
             logger.debug("Session data saved")
         except Exception as e:
             logger.error(f"Failed to save session data: {e}")
     
+    @contextmanager
+    def _login_lock(self):
+        """Store lock around login; logs in unlocked if the store is unavailable"""
+        try:
+            lock = self.store.lock()
+            lock.__enter__()
+        except Exception as e:
+            logger.warning(f"Session store lock unavailable: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            lock.__exit__(None, None, None)
+    
+    def _mark_stale(self):
+        """Remember that the current stored login was rejected"""
+        if self.session_data.get("authenticated_at"):
+            self._stale_authenticated_at = self.session_data["authenticated_at"]
+    
+    @traced("scrape.auth")
     def ensure_authenticated(self) -> Dict[str, Any]:
         """
         Ensure we have a valid authenticated session
@@ -89,20 +115,32 @@ class SessionManager:
                 result["authenticated"] = True
                 result["message"] = "Session is valid"
                 return result
+            self._mark_stale()
             
-            # Need to authenticate
-            logger.info("Session invalid, attempting authentication...")
-            auth_result = self.authenticator.authenticate()
+            with self._login_lock():
+                # Another worker may have logged in while we waited for the lock
+                if self._load_session() and self.authenticator.is_session_valid():
+                    result["success"] = True
+                    result["authenticated"] = True
+                    result["message"] = "Restored shared session"
+                    self.retry_count = 0
+                    return result
+                self._mark_stale()
+                
+                # Need to authenticate
+                logger.info("Session invalid, attempting authentication...")
+                auth_result = self.authenticator.authenticate()
+                
+                if auth_result["success"]:
+                    self.login_count += 1
+                    self.session_data = {
+                        **self.authenticator.export_state(),
+                        "authenticated_at": datetime.utcnow().isoformat(),
+                        "last_used": datetime.utcnow().isoformat()
+                    }
+                    self._save_session()
             
             if auth_result["success"]:
-                # Update session data
-                self.session_data = {
-                    "authenticated_at": datetime.utcnow().isoformat(),
-                    "expires_at": auth_result.get("session_expires_at"),
-                    "last_used": datetime.utcnow().isoformat()
-                }
-                self._save_session()
-                
                 result["success"] = True
                 result["authenticated"] = True
                 result["message"] = "Authentication successful"
@@ -143,6 +181,7 @@ class SessionManager:
         logger.warning(f"Authentication error detected, attempting recovery (attempt {self.retry_count}/{self.max_retries})")
         
         # Clear current session
+        self._mark_stale()
         self.authenticator.logout()
         self.session_data = {}
         
@@ -216,7 +255,10 @@ class SessionManager:
             "session_manager": {
                 "retry_count": self.retry_count,
                 "max_retries": self.max_retries,
-                "session_file_exists": self.session_file.exists(),
+                "store": type(self.store).__name__,
+                "session_stored": self._store_exists(),
+                "restored_count": self.restored_count,
+                "login_count": self.login_count,
                 "session_data": {
                     "has_data": bool(self.session_data),
                     "authenticated_at": self.session_data.get("authenticated_at"),
@@ -227,14 +269,18 @@ class SessionManager:
             "authenticator": auth_status
         }
     
+    def _store_exists(self) -> bool:
+        try:
+            return self.store.exists()
+        except Exception:
+            return False
+    
     def clear_session(self):
         """Clear all session data and logout"""
         try:
             self.authenticator.logout()
             self.session_data = {}
-            
-            if self.session_file.exists():
-                self.session_file.unlink()
+            self.store.clear()
             
             self.retry_count = 0
             logger.info("Session cleared successfully")
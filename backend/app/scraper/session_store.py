@@ -0,0 +1,163 @@
+"""
+Session Store Module
+
+Persists authenticated scraper sessions (cookie jar, CSRF tokens and expiry)
+so new processes and scraper instances reuse an existing login instead of
+authenticating again. Sessions are stored in a JSON file readable only by
+the owner, or in Redis when SCRAPER_SESSION_REDIS_URL is set. Both stores
+provide a cross-process lock around login, so concurrent workers with an
+expired session log in once and the others pick up the stored result.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from http.cookiejar import Cookie
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from app.core.config import settings
+from .config import scraper_settings
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_cookies(jar) -> List[Dict[str, Any]]:
+    """Cookie jar to a JSON-serializable list"""
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            "expires": cookie.expires,
+            "rest": dict(cookie._rest),
+        }
+        for cookie in jar
+    ]
+
+
+def restore_cookies(jar, cookies: List[Dict[str, Any]]) -> int:
+    """Add serialized cookies to a jar, skipping expired ones"""
+    now = time.time()
+    restored = 0
+    for data in cookies:
+        expires = data.get("expires")
+        if expires is not None and expires <= now:
+            continue
+        domain = data.get("domain", "")
+        path = data.get("path", "/")
+        jar.set_cookie(Cookie(
+            version=0, name=data["name"], value=data["value"],
+            port=None, port_specified=False,
+            domain=domain, domain_specified=bool(domain), domain_initial_dot=domain.startswith("."),
+            path=path, path_specified=bool(path),
+            secure=bool(data.get("secure")), expires=expires, discard=expires is None,
+            comment=None, comment_url=None, rest=data.get("rest") or {}
+        ))
+        restored += 1
+    return restored
+
+
+class FileSessionStore:
+    """Session state in a JSON file, login serialized with an flock"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read session store {self.path}: {e}")
+            return None
+
+    def save(self, data: Dict[str, Any]):
+        # Write to a private temp file and rename, so readers never see a partial session
+        tmp_path = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock held while logging in"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class RedisSessionStore:
+    """Session state in Redis, shared by workers on different hosts"""
+
+    def __init__(self, client, key: str = "scraper:session:ayvens", lock_timeout: int = 120):
+        self.client = client
+        self.key = key
+        self.lock_timeout = lock_timeout
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.key)
+        return json.loads(raw) if raw else None
+
+    def save(self, data: Dict[str, Any]):
+        self.client.set(self.key, json.dumps(data))
+
+    def clear(self):
+        self.client.delete(self.key)
+
+    def exists(self) -> bool:
+        return bool(self.client.exists(self.key))
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock held while logging in (expires if the holder dies)"""
+        with self.client.lock(f"{self.key}:lock", timeout=self.lock_timeout,
+                              blocking_timeout=self.lock_timeout):
+            yield
+
+
+def create_session_store(name: str = "ayvens"):
+    """Session store for a source, Redis when configured and available"""
+    url = scraper_settings.SESSION_STORE_REDIS_URL
+    if url:
+        if REDIS_AVAILABLE:
+            return RedisSessionStore(redis.Redis.from_url(url), key=f"scraper:session:{name}")
+        logger.warning("redis package not installed - storing scraper sessions on disk")
+    return FileSessionStore(Path(settings.DATA_DIR) / "sessions" / f"{name}_session.json")
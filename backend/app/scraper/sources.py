@@ -0,0 +1,51 @@
+"""
+Scraping Source Registry
+
+Vehicle listing sources available to the multi-source scraper. A source is
+registered with a factory for its scraper; scrapers implement
+scrape_all_listings(max_vehicles=..., on_page=...) like
+AyvensCarmarketScraper. Each scraper fetches through the shared per-domain
+rate limiter, so sources run concurrently under their own limits.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class SourcePlugin:
+    """A registered listing source"""
+    source_id: str
+    name: str
+    url: str
+    country: str
+    scraper_factory: Callable[[], Any]
+    enabled: bool = True
+
+
+_registry: Dict[str, SourcePlugin] = {}
+
+
+def register_source(plugin: SourcePlugin) -> SourcePlugin:
+    """Add (or replace) a source"""
+    _registry[plugin.source_id] = plugin
+    return plugin
+
+
+def get_registered_sources() -> Dict[str, SourcePlugin]:
+    """All registered sources by id"""
+    return dict(_registry)
+
+
+def _ayvens_scraper():
+    from .ayvens_scraper import AyvensCarmarketScraper
+    return AyvensCarmarketScraper()
+
+
+register_source(SourcePlugin(
+    source_id="ayvens",
+    name="Ayvens Carmarket",
+    url="https://carmarket.ayvens.com",
+    country="EU",
+    scraper_factory=_ayvens_scraper
+))
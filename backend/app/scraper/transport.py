@@ -0,0 +1,247 @@
+"""
+HTTP Transport Module
+
+One shared HTTP transport for all scrapers, the Ayvens authenticator and the
+image downloaders. Sessions created here keep their own headers and cookies
+but share a single connection-pooling adapter, so keep-alive connections and
+TLS sessions are reused across scraper instances. The transport also sets
+default timeouts, negotiates only the content encodings urllib3 can decode
+(brotli when installed) and caches DNS lookups of its own connections (the
+process-wide resolver is left alone).
+
+HTTP/2 is not available: requests/urllib3 only speak HTTP/1.1, and all
+scraper code works with requests responses.
+"""
+
+import logging
+import socket
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.request import ACCEPT_ENCODING
+
+from app.core.metrics import counter, histogram
+
+from .config import scraper_settings
+
+logger = logging.getLogger(__name__)
+
+FETCH_SECONDS = histogram("scraper_fetch_seconds", "HTTP fetch time (headers received)", ["host"])
+FETCHES = counter("scraper_fetches_total", "HTTP fetches by host and status", ["host", "status"])
+
+
+class DNSCache:
+    """TTL cache of getaddrinfo results, used by the transport's connections"""
+
+    def __init__(self, ttl_seconds: float, resolver: Optional[Callable[..., Any]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[tuple, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._resolver = resolver or socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+
+        # Failures are not cached
+        result = self._resolver(host, port, family, type, proto, flags)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl_seconds, result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class CachedDNSConnectionMixin:
+    """Connects to the addresses of a DNSCache instead of resolving per connection
+
+    TLS server name and certificate checks still use the host name.
+    """
+
+    def __init__(self, *args, dns_cache: Optional[DNSCache] = None, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        if self.dns_cache is None:
+            return super()._new_conn()
+        try:
+            addresses = self.dns_cache.getaddrinfo(self._dns_host, self.port, allowed_gai_family(),
+                                                   socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        # Try each address in turn, like socket.create_connection
+        host = self._dns_host
+        error = None
+        try:
+            for *_, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+        finally:
+            self._dns_host = host
+        raise error
+
+
+class CachedDNSHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default (connect, read) timeout
+
+    With a `dns_cache`, its connections resolve host names through it.
+    """
+
+    def __init__(self, timeout: Tuple[float, float], dns_cache: Optional[DNSCache] = None, **kwargs):
+        self.default_timeout = timeout
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.dns_cache is not None:
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": partial(CachedDNSHTTPConnectionPool, dns_cache=self.dns_cache),
+                "https": partial(CachedDNSHTTPSConnectionPool, dns_cache=self.dns_cache),
+            }
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        host = urlsplit(request.url).hostname or "unknown"
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            FETCHES.labels(host, "error").inc()
+            raise
+        finally:
+            FETCH_SECONDS.labels(host).observe(time.perf_counter() - started)
+        FETCHES.labels(host, response.status_code).inc()
+        return response
+
+
+class HttpTransport:
+    """Shared connection pools and session factory"""
+
+    def __init__(self,
+                 pool_connections: int = 20,
+                 pool_maxsize: int = 10,
+                 connect_timeout: float = 10.0,
+                 read_timeout: float = 30.0,
+                 dns_cache_ttl: float = 300.0):
+        self.dns_cache = DNSCache(dns_cache_ttl) if dns_cache_ttl > 0 else None
+        self.adapter = PooledHTTPAdapter(
+            timeout=(connect_timeout, read_timeout),
+            dns_cache=self.dns_cache,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+        self.sessions_created = 0
+
+    def create_session(self, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+        """New session (own headers and cookies) on the shared connection pools"""
+        session = requests.Session()
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        if headers:
+            session.headers.update(headers)
+        # Never advertise encodings urllib3 cannot decode
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        session.headers["Connection"] = "keep-alive"
+        self.sessions_created += 1
+        return session
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection reuse counters of the live host pools"""
+        pools = self.adapter.poolmanager.pools
+        hosts = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+
+        opened = sum(h["connections_opened"] for h in hosts.values())
+        handshakes = sum(h["connections_opened"] for name, h in hosts.items() if name.startswith("https"))
+        requests_sent = sum(h["requests"] for h in hosts.values())
+        return {
+            "sessions_created": self.sessions_created,
+            "host_pools": len(hosts),
+            "connections_opened": opened,
+            "tls_handshakes": handshakes,
+            "requests": requests_sent,
+            "reused_connections": max(0, requests_sent - opened),
+            "reuse_ratio": round(1 - opened / requests_sent, 3) if requests_sent else 0.0,
+            "dns_cache": self.dns_cache.get_stats() if self.dns_cache else None,
+            "hosts": hosts,
+        }
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Process-wide HTTP transport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport(
+                    pool_connections=scraper_settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=scraper_settings.HTTP_POOL_MAXSIZE,
+                    connect_timeout=scraper_settings.HTTP_CONNECT_TIMEOUT,
+                    read_timeout=scraper_settings.REQUEST_TIMEOUT,
+                    dns_cache_ttl=scraper_settings.DNS_CACHE_TTL_SECONDS
+                )
+    return _transport
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """New requests session on the shared transport"""
+    return get_transport().create_session(headers)
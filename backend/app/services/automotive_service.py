@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, func, text
 from sqlalchemy.exc import IntegrityError
 
+from app.core.tracing import traced
 from app.models.automotive import (
     VehicleListing, VehicleImage, PriceHistory, 
     ScrapingLog, ScrapingSession, DataQualityMetric
@@ -20,6 +21,9 @@ from app.schemas.automotive import (
     VehicleListingCreate, VehicleListingUpdate, VehicleImageCreate,
     VehicleSearchFilters, ScrapingLogCreate, ScrapingSessionCreate
 )
+from app.services.market_value import get_market_index
+from app.services.price_rollups import PriceRollupService
+from app.services.retention import RetentionEngine, data_policies
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +35,7 @@ class AutomotiveService:
     def __init__(self, db: Session):
         self.db = db
     
+    @traced("db.write")
     def create_vehicle_listing(self, vehicle_data: Dict[str, Any]) -> Optional[VehicleListing]:
         """
         Create a new vehicle listing with deduplication
@@ -53,6 +58,7 @@ class AutomotiveService:
             
             # Create vehicle listing
             vehicle = VehicleListing(**vehicle_data)
+            get_market_index(self.db).apply(vehicle)
             self.db.add(vehicle)
             self.db.flush()  # Get the ID without committing
             
@@ -61,14 +67,8 @@ class AutomotiveService:
                 image = VehicleImage(vehicle_id=vehicle.id, **image_data)
                 self.db.add(image)
             
-            # Create initial price history entry
-            if vehicle.price:
-                price_history = PriceHistory(
-                    vehicle_id=vehicle.id,
-                    price=vehicle.price,
-                    currency=vehicle.currency
-                )
-                self.db.add(price_history)
+            # Create initial price history entry (and its rollups)
+            PriceRollupService(self.db).record_prices([(vehicle, None)])
             
             self.db.commit()
             logger.info(f"Created new vehicle listing: {vehicle.make} {vehicle.model} (ID: {vehicle.id})")
@@ -113,6 +113,7 @@ class AutomotiveService:
                     setattr(vehicle, field, value)
             
             vehicle.last_updated = datetime.utcnow()
+            get_market_index(self.db).apply(vehicle)
             
             # Update images if provided
             if images_data:
@@ -126,17 +127,7 @@ class AutomotiveService:
             
             # Track price change
             if new_price and new_price != old_price:
-                price_change = new_price - old_price if old_price else 0
-                change_percentage = (price_change / old_price * 100) if old_price else 0
-                
-                price_history = PriceHistory(
-                    vehicle_id=vehicle_id,
-                    price=new_price,
-                    currency=update_data.get('currency', 'EUR'),
-                    price_change=price_change,
-                    change_percentage=change_percentage
-                )
-                self.db.add(price_history)
+                PriceRollupService(self.db).record_prices([(vehicle, old_price)])
                 
                 logger.info(f"Price change tracked for vehicle {vehicle_id}: {old_price} -> {new_price}")
             
@@ -149,6 +140,7 @@ class AutomotiveService:
             logger.error(f"Error updating vehicle listing {vehicle_id}: {e}")
             return None
     
+    @traced("ingest.dedup")
     def find_duplicate_listing(self, vehicle_data: Dict[str, Any]) -> Optional[VehicleListing]:
         """
         Find potential duplicate listings based on various criteria
@@ -204,7 +196,8 @@ class AutomotiveService:
         
         return None
     
-    def search_vehicles(self, filters: VehicleSearchFilters, page: int = 1, page_size: int = 20) -> Tuple[List[VehicleListing], int]:
+    def search_vehicles(self, filters: VehicleSearchFilters, page: int = 1, page_size: int = 20,
+                        sort_by: str = "newest") -> Tuple[List[VehicleListing], int]:
         """
         Search vehicles with filters and pagination
         
@@ -212,6 +205,7 @@ class AutomotiveService:
             filters: Search filters
             page: Page number (1-based)
             page_size: Number of results per page
+            sort_by: "newest" or "market_value" (furthest below market first)
         
         Returns:
             Tuple of (vehicles list, total count)
@@ -258,13 +252,20 @@ class AutomotiveService:
         if filters.region:
             query = query.filter(VehicleListing.region.ilike(f"%{filters.region}%"))
         
+        if filters.market_position:
+            query = query.filter(VehicleListing.market_position == filters.market_position)
+        
         query = query.filter(VehicleListing.is_active == filters.is_active)
         
         # Get total count
         total_count = query.count()
         
         # Apply pagination and ordering
-        vehicles = query.order_by(desc(VehicleListing.scraped_at))\
+        if sort_by == "market_value":
+            order = (VehicleListing.market_zscore.is_(None), VehicleListing.market_zscore, VehicleListing.id)
+        else:
+            order = (desc(VehicleListing.scraped_at),)
+        vehicles = query.order_by(*order)\
                        .offset((page - 1) * page_size)\
                        .limit(page_size)\
                        .all()
@@ -287,14 +288,12 @@ class AutomotiveService:
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
         
-        updated_count = self.db.query(VehicleListing).filter(
-            and_(
-                VehicleListing.last_updated < cutoff_date,
-                VehicleListing.is_active == True
-            )
-        ).update({'is_active': False})
+        result = RetentionEngine(self.db).update('deactivate_listings', VehicleListing, [
+            VehicleListing.last_updated < cutoff_date,
+            VehicleListing.is_active == True
+        ], {'is_active': False})
+        updated_count = result.rows
         
-        self.db.commit()
         logger.info(f"Deactivated {updated_count} old listings")
         return updated_count
     
@@ -380,7 +379,7 @@ class AutomotiveService:
             logger.error(f"Error calculating data quality metrics: {e}")
             return {}
     
-    def cleanup_old_data(self, retention_days: int = 365) -> Dict[str, int]:
+    def cleanup_old_data(self, retention_days: int = 365) -> Dict[str, Any]:
         """
         Clean up old data based on retention policy
         
@@ -390,32 +389,16 @@ class AutomotiveService:
         Returns:
             Dictionary with cleanup statistics
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-        
-        # Delete old scraping logs
-        old_logs_deleted = self.db.query(ScrapingLog).filter(
-            ScrapingLog.started_at < cutoff_date
-        ).delete()
-        
-        # Delete old price history (keep recent ones)
-        old_price_history_deleted = self.db.query(PriceHistory).filter(
-            PriceHistory.recorded_at < cutoff_date
-        ).delete()
-        
-        # Delete inactive old vehicle listings
-        old_vehicles_deleted = self.db.query(VehicleListing).filter(
-            and_(
-                VehicleListing.scraped_at < cutoff_date,
-                VehicleListing.is_active == False
-            )
-        ).delete()
-        
-        self.db.commit()
+        # Chunked deletes, listing children (images, price history) first
+        results = {
+            result.name: result for result in RetentionEngine(self.db).run(data_policies(retention_days))
+        }
         
         cleanup_stats = {
-            'old_logs_deleted': old_logs_deleted,
-            'old_price_history_deleted': old_price_history_deleted,
-            'old_vehicles_deleted': old_vehicles_deleted
+            'old_logs_deleted': results['scraping_logs'].rows,
+            'old_price_history_deleted': results['price_history'].rows,
+            'old_vehicles_deleted': results['vehicle_listings'].rows,
+            'retention': [result.to_dict() for result in results.values()]
         }
         
         logger.info(f"Cleanup completed: {cleanup_stats}")
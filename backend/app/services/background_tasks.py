@@ -8,40 +8,31 @@ import logging
 import atexit
 from datetime import datetime, timedelta
 from typing import Optional
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy.orm import sessionmaker
 
-from app.models.base import engine
-from app.services.alert_matcher import AlertMatchingEngine
+from app.models.base import SessionLocal
 from app.services.notification_delivery import NotificationDeliveryService
+from app.services.device_token_service import DeviceTokenService
+from app.services.firebase_service import get_firebase_service
+from app.services.job_scheduler import get_job_scheduler
+from app.services.retention import MATCH_LOG_POLICY, NOTIFICATION_POLICY, RetentionEngine
 from app.models.notifications import AlertMatchLog
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
 
 class BackgroundTaskManager:
-    """Manager for background tasks and scheduling"""
+    """Manager for background tasks and scheduling
+
+    Jobs are registered with the persistent job scheduler, so on a
+    multi-worker deployment each job runs once per cluster rather than once
+    per worker process.
+    """
     
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = get_job_scheduler()
         self.is_running = False
         
-        # Configure scheduler
-        self.scheduler.configure(
-            timezone='UTC',
-            job_defaults={
-                'coalesce': True,
-                'max_instances': 1,
-                'misfire_grace_time': 300  # 5 minutes
-            }
-        )
-        
         # Register shutdown handler
         atexit.register(self.shutdown)
     
@@ -56,6 +47,10 @@ class BackgroundTaskManager:
             self._add_alert_matching_job()
             self._add_notification_processing_job()
             self._add_cleanup_jobs()
+            self._add_market_value_job()
+            self._add_partition_job()
+            if settings.COLD_STORAGE_ENABLED:
+                self._add_cold_storage_job()
             
             # Start scheduler
             self.scheduler.start()
@@ -74,15 +69,26 @@ class BackgroundTaskManager:
             self.is_running = False
             logger.info("Background task manager shut down")
     
+    def add_scraping_job(self, run_cycle, interval_minutes: int):
+        """Add the periodic scraping job (run_cycle is a zero-argument callable)"""
+        self.scheduler.add_job(
+            job_id='scrape',
+            func=run_cycle,
+            interval_seconds=interval_minutes * 60,
+            name='Vehicle Scraping Job',
+            run_immediately=True
+        )
+        
+        logger.info(f"Added scraping job (every {interval_minutes} minutes)")
+    
     def _add_alert_matching_job(self):
         """Add periodic alert matching job"""
         # Run alert matching every 20 minutes
         self.scheduler.add_job(
+            job_id='alert_matching',
             func=self._run_alert_matching,
-            trigger=IntervalTrigger(minutes=20),
-            id='alert_matching',
-            name='Alert Matching Job',
-            replace_existing=True
+            interval_seconds=20 * 60,
+            name='Alert Matching Job'
         )
         
         logger.info("Added alert matching job (every 20 minutes)")
@@ -91,37 +97,70 @@ class BackgroundTaskManager:
         """Add periodic notification processing job"""
         # Process notification queue every 2 minutes
         self.scheduler.add_job(
+            job_id='notification_processing',
             func=self._process_notification_queue,
-            trigger=IntervalTrigger(minutes=2),
-            id='notification_processing',
-            name='Notification Processing Job',
-            replace_existing=True
+            interval_seconds=2 * 60,
+            name='Notification Processing Job'
         )
         
         logger.info("Added notification processing job (every 2 minutes)")
     
     def _add_cleanup_jobs(self):
         """Add periodic cleanup jobs"""
-        # Clean up old notifications daily at 2 AM
+        # Clean up old notifications daily
         self.scheduler.add_job(
+            job_id='notification_cleanup',
             func=self._cleanup_old_notifications,
-            trigger=CronTrigger(hour=2, minute=0),
-            id='notification_cleanup',
-            name='Notification Cleanup Job',
-            replace_existing=True
+            interval_seconds=24 * 3600,
+            name='Notification Cleanup Job'
         )
         
-        # Clean up old match logs weekly on Sunday at 3 AM
+        # Clean up old match logs and job run history weekly
         self.scheduler.add_job(
+            job_id='match_log_cleanup',
             func=self._cleanup_old_match_logs,
-            trigger=CronTrigger(day_of_week=6, hour=3, minute=0),
-            id='match_log_cleanup',
-            name='Match Log Cleanup Job',
-            replace_existing=True
+            interval_seconds=7 * 24 * 3600,
+            name='Match Log Cleanup Job'
         )
         
         logger.info("Added cleanup jobs (daily and weekly)")
     
+    def _add_market_value_job(self):
+        """Add periodic market value recomputation job"""
+        # Recompute the comparables index every 6 hours
+        self.scheduler.add_job(
+            job_id='market_value',
+            func=self._recompute_market_values,
+            interval_seconds=6 * 3600,
+            name='Market Value Job'
+        )
+        
+        logger.info("Added market value job (every 6 hours)")
+    
+    def _add_partition_job(self):
+        """Add periodic partition maintenance job"""
+        # Create the monthly partitions ahead of time daily (no-op unless partitioned on PostgreSQL)
+        self.scheduler.add_job(
+            job_id='partition_maintenance',
+            func=self._ensure_partitions,
+            interval_seconds=24 * 3600,
+            name='Partition Maintenance Job'
+        )
+        
+        logger.info("Added partition maintenance job (daily)")
+    
+    def _add_cold_storage_job(self):
+        """Add periodic cold storage job"""
+        # Move inactive listings and old logs out of the hot tables daily
+        self.scheduler.add_job(
+            job_id='cold_storage',
+            func=self._move_to_cold_storage,
+            interval_seconds=24 * 3600,
+            name='Cold Storage Job'
+        )
+        
+        logger.info("Added cold storage job (daily)")
+    
     def _run_alert_matching(self):
         """Run alert matching process"""
         db = SessionLocal()
@@ -133,6 +172,7 @@ class BackgroundTaskManager:
             check_since = last_run - timedelta(minutes=5) if last_run else None
             
             # Run alert matching
+            from app.services.alert_matcher import AlertMatchingEngine
             matcher = AlertMatchingEngine(db)
             match_log = matcher.run_alert_matching(
                 check_since=check_since,
@@ -153,7 +193,8 @@ class BackgroundTaskManager:
         try:
             logger.debug("Processing notification queue")
             
-            delivery_service = NotificationDeliveryService(db)
+            push_engine = get_firebase_service().get_push_engine(DeviceTokenService(db))
+            delivery_service = NotificationDeliveryService(db, push_engine=push_engine)
             stats = delivery_service.process_notification_queue(max_notifications=50)
             
             if stats["processed"] > 0:
@@ -172,17 +213,12 @@ class BackgroundTaskManager:
         try:
             logger.info("Starting notification cleanup")
             
-            # Delete notifications older than 90 days
-            cutoff_date = datetime.utcnow() - timedelta(days=90)
-            
-            from app.models.notifications import Notification
-            deleted_count = db.query(Notification).filter(
-                Notification.created_at < cutoff_date
-            ).delete()
+            # Delete notifications older than 90 days (queue entries first), in chunks
+            result = RetentionEngine(db).purge(NOTIFICATION_POLICY)
+            deleted_count = result.rows
             
-            db.commit()
-            
-            logger.info(f"Cleaned up {deleted_count} old notifications")
+            logger.info(f"Cleaned up {deleted_count} old notifications "
+                       f"({result.rows_per_second} rows/s)")
             
         except Exception as e:
             logger.error(f"Error in notification cleanup: {str(e)}")
@@ -195,22 +231,56 @@ class BackgroundTaskManager:
         try:
             logger.info("Starting match log cleanup")
             
-            # Delete match logs older than 30 days
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
-            
-            deleted_count = db.query(AlertMatchLog).filter(
-                AlertMatchLog.started_at < cutoff_date
-            ).delete()
+            # Delete match logs older than 30 days, in chunks
+            result = RetentionEngine(db).purge(MATCH_LOG_POLICY)
+            deleted_count = result.rows
             
-            db.commit()
+            logger.info(f"Cleaned up {deleted_count} old match logs "
+                       f"({result.rows_per_second} rows/s)")
             
-            logger.info(f"Cleaned up {deleted_count} old match logs")
+            deleted_runs = self.scheduler.cleanup_history(days=30)
+            logger.info(f"Cleaned up {deleted_runs} old job runs")
             
         except Exception as e:
             logger.error(f"Error in match log cleanup: {str(e)}")
         finally:
             db.close()
     
+    def _recompute_market_values(self):
+        """Recompute the comparables index and listing market positions"""
+        db = SessionLocal()
+        try:
+            from app.services.market_value import MarketValueService
+            MarketValueService(db).recompute()
+            
+        except Exception as e:
+            logger.error(f"Error recomputing market values: {str(e)}")
+        finally:
+            db.close()
+    
+    def _ensure_partitions(self):
+        """Create the upcoming monthly partitions of the time-series tables"""
+        try:
+            from app.services.partitioning import ensure_partitions
+            ensure_partitions()
+            
+        except Exception as e:
+            logger.error(f"Error creating partitions: {str(e)}")
+    
+    def _move_to_cold_storage(self):
+        """Move inactive listings and old scraping logs to the archive tables"""
+        db = SessionLocal()
+        try:
+            from app.services.cold_storage import ColdStorageService
+            for result in ColdStorageService(db).move():
+                logger.info(f"Moved {result.rows} rows to cold storage ({result.name}, "
+                           f"{result.rows_per_second} rows/s)")
+            
+        except Exception as e:
+            logger.error(f"Error moving data to cold storage: {str(e)}")
+        finally:
+            db.close()
+    
     def _get_last_successful_alert_run(self, db) -> Optional[datetime]:
         """Get the timestamp of the last successful alert matching run"""
         last_log = db.query(AlertMatchLog).filter(
@@ -221,55 +291,33 @@ class BackgroundTaskManager:
     
     def trigger_alert_matching(self) -> str:
         """Manually trigger alert matching job"""
-        try:
-            job = self.scheduler.get_job('alert_matching')
-            if job:
-                job.modify(next_run_time=datetime.utcnow())
-                return "Alert matching job triggered successfully"
-            else:
-                return "Alert matching job not found"
-        except Exception as e:
-            logger.error(f"Error triggering alert matching: {str(e)}")
-            return f"Error triggering alert matching: {str(e)}"
+        return self._trigger('alert_matching', "Alert matching")
     
     def trigger_notification_processing(self) -> str:
         """Manually trigger notification processing job"""
+        return self._trigger('notification_processing', "Notification processing")
+    
+    def _trigger(self, job_id: str, label: str) -> str:
         try:
-            job = self.scheduler.get_job('notification_processing')
-            if job:
-                job.modify(next_run_time=datetime.utcnow())
-                return "Notification processing job triggered successfully"
+            run_id = self.scheduler.trigger(job_id)
+            if run_id is not None:
+                return f"{label} job triggered successfully"
             else:
-                return "Notification processing job not found"
+                return f"{label} job not found"
         except Exception as e:
-            logger.error(f"Error triggering notification processing: {str(e)}")
-            return f"Error triggering notification processing: {str(e)}"
+            logger.error(f"Error triggering {job_id}: {str(e)}")
+            return f"Error triggering {job_id}: {str(e)}"
     
     def get_job_status(self) -> dict:
         """Get status of all scheduled jobs"""
-        jobs = []
-        
-        for job in self.scheduler.get_jobs():
-            jobs.append({
-                "id": job.id,
-                "name": job.name,
-                "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None,
-                "trigger": str(job.trigger),
-                "pending": job.pending
-            })
-        
-        return {
-            "scheduler_running": self.scheduler.running,
-            "jobs": jobs,
-            "total_jobs": len(jobs)
-        }
+        return self.scheduler.get_status()
     
     def pause_job(self, job_id: str) -> bool:
         """Pause a specific job"""
         try:
-            self.scheduler.pause_job(job_id)
+            paused = self.scheduler.pause_job(job_id)
             logger.info(f"Paused job: {job_id}")
-            return True
+            return paused
         except Exception as e:
             logger.error(f"Error pausing job {job_id}: {str(e)}")
             return False
@@ -277,9 +325,9 @@ class BackgroundTaskManager:
     def resume_job(self, job_id: str) -> bool:
         """Resume a specific job"""
         try:
-            self.scheduler.resume_job(job_id)
+            resumed = self.scheduler.resume_job(job_id)
             logger.info(f"Resumed job: {job_id}")
-            return True
+            return resumed
         except Exception as e:
             logger.error(f"Error resuming job {job_id}: {str(e)}")
             return False
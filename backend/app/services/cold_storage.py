@@ -0,0 +1,214 @@
+"""
+Cold Storage
+
+Keeps the hot tables small: listings inactive for COLD_STORAGE_LISTING_DAYS
+(with their images and price history) and scraping logs older than
+COLD_STORAGE_LOG_DAYS are moved to the archive tables in app.models.archive.
+Moves reuse the chunked retention engine: each chunk is copied to the
+archive and deleted from the hot table in one transaction.
+
+Reads fall back to the archive, so `/vehicles/{id}` and its price history
+keep working for archived listings. They are rebuilt as detached model
+instances (never added to the session). When an archived listing shows up
+in a scrape again, the ingestor moves it back to the hot tables with its
+original id, images and price history (`unarchive`).
+
+Run a move by hand with:
+
+    python -m app.services.cold_storage
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import JSON, Date, DateTime, Table, exists, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import (
+    ArchivedPriceHistory, ArchivedScrapingLog, ArchivedVehicleImage, ArchivedVehicleListing
+)
+from app.models.automotive import PriceHistory, ScrapingLog, VehicleImage, VehicleListing
+from app.models.comparison import VehicleComparisonItem
+from app.models.notifications import Notification
+from app.services.retention import (
+    Child, RetentionEngine, RetentionPolicy, RetentionResult, json_default, plain_value
+)
+
+logger = logging.getLogger(__name__)
+
+# Hot table -> archive model
+ARCHIVE_MODELS = {
+    VehicleListing.__tablename__: ArchivedVehicleListing,
+    VehicleImage.__tablename__: ArchivedVehicleImage,
+    PriceHistory.__tablename__: ArchivedPriceHistory,
+    ScrapingLog.__tablename__: ArchivedScrapingLog,
+}
+
+# Images and price history move with a listing; loose references are cleared
+COLD_VEHICLE_CHILDREN = (
+    Child(VehicleImage, "vehicle_id"),
+    Child(PriceHistory, "vehicle_id"),
+    Child(ScrapingLog, "vehicle_id", nullify=True),
+    Child(Notification, "listing_id", nullify=True),
+    Child(VehicleListing, "duplicate_of", nullify=True),
+)
+
+
+def cold_policies(listing_days: int, log_days: int) -> List[RetentionPolicy]:
+    """What moves to cold storage (listings in a saved comparison stay hot)"""
+    return [
+        RetentionPolicy("cold_vehicle_listings", VehicleListing, "scraped_at", listing_days,
+                        where=(VehicleListing.is_active == False,
+                               ~exists().where(VehicleComparisonItem.vehicle_id == VehicleListing.id)),
+                        children=COLD_VEHICLE_CHILDREN),
+        RetentionPolicy("cold_scraping_logs", ScrapingLog, "started_at", log_days),
+    ]
+
+
+class TableArchive:
+    """Retention engine archive writing rows to the archive tables"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rows = 0
+        self.paths: List[str] = []
+
+    def write(self, table: Table, rows: Sequence[Dict[str, Any]]):
+        if not rows:
+            return
+        model = ARCHIVE_MODELS[table.name]
+        archived_at = datetime.utcnow()
+        # Hot tables never reuse ids (sqlite_autoincrement), so an existing
+        # copy is the same row archived again: replace it
+        self.db.query(model).filter(model.id.in_([row["id"] for row in rows])).delete(synchronize_session=False)
+        self.db.bulk_insert_mappings(model, [archive_values(model, row, archived_at) for row in rows])
+        self.rows += len(rows)
+
+    def close(self):
+        pass
+
+
+def archive_values(model, row: Dict[str, Any], archived_at: datetime) -> Dict[str, Any]:
+    """Archive row of a hot row: key columns plus the whole row as JSON"""
+    row = {key: plain_value(value) for key, value in row.items()}
+    values = {column: row.get(column) for column in model.key_columns}
+    values.update(id=row["id"], archived_at=archived_at, data=json.dumps(row, default=json_default))
+    return values
+
+
+def restore(hot_model, data: str):
+    """Detached hot model instance from an archived row's JSON"""
+    values = json.loads(data)
+    kwargs = {}
+    for column in hot_model.__table__.columns:
+        if column.name not in values:
+            continue
+        value = values[column.name]
+        if isinstance(value, str):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            elif isinstance(column.type, JSON):
+                value = json.loads(value)
+        kwargs[column.key] = value
+    return hot_model(**kwargs)
+
+
+class ColdStorageService:
+    """Moves cold rows to the archive tables and reads them back"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def move(self, listing_days: Optional[int] = None, log_days: Optional[int] = None,
+             **engine_options) -> List[RetentionResult]:
+        """Move inactive listings and old scraping logs to cold storage"""
+        policies = cold_policies(listing_days or settings.COLD_STORAGE_LISTING_DAYS,
+                                 log_days or settings.COLD_STORAGE_LOG_DAYS)
+        engine = RetentionEngine(self.db, archive_factory=lambda name: TableArchive(self.db), **engine_options)
+        return engine.run(policies)
+
+    def get_vehicle(self, vehicle_id: int) -> Optional[VehicleListing]:
+        """An archived listing with its images and price history, or None"""
+        archived = self.db.query(ArchivedVehicleListing).filter(ArchivedVehicleListing.id == vehicle_id).first()
+        if archived is None:
+            return None
+        vehicle = restore(VehicleListing, archived.data)
+        vehicle.images = [restore(VehicleImage, row.data) for row in self.db.query(ArchivedVehicleImage).filter(
+            ArchivedVehicleImage.vehicle_id == vehicle_id).order_by(ArchivedVehicleImage.id)]
+        vehicle.price_history = self.get_price_history(vehicle_id)
+        return vehicle
+
+    def get_price_history(self, vehicle_id: int, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, limit: Optional[int] = None) -> List[PriceHistory]:
+        query = self.db.query(ArchivedPriceHistory.data).filter(ArchivedPriceHistory.vehicle_id == vehicle_id)
+        if start is not None:
+            query = query.filter(ArchivedPriceHistory.recorded_at >= start)
+        if end is not None:
+            query = query.filter(ArchivedPriceHistory.recorded_at < end)
+        query = query.order_by(ArchivedPriceHistory.recorded_at, ArchivedPriceHistory.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return [restore(PriceHistory, data) for data, in query]
+
+    def find_archived(self, external_ids: Sequence[str] = (), listing_urls: Sequence[str] = ()) -> List[int]:
+        """Ids of archived listings with one of the external ids or listing URLs"""
+        if not external_ids and not listing_urls:
+            return []
+        return [vehicle_id for vehicle_id, in self.db.query(ArchivedVehicleListing.id).filter(or_(
+            ArchivedVehicleListing.external_id.in_(list(external_ids)),
+            ArchivedVehicleListing.listing_url.in_(list(listing_urls))
+        ))]
+
+    def unarchive(self, vehicle_id: int) -> Optional[VehicleListing]:
+        """
+        Move an archived listing with its images and price history back to
+        the hot tables, keeping its id. Returns the listing (added to the
+        session) or None. The caller owns the commit.
+        """
+        archived = self.db.query(ArchivedVehicleListing).filter(ArchivedVehicleListing.id == vehicle_id).first()
+        if archived is None:
+            return None
+        vehicle = restore(VehicleListing, archived.data)
+        # The row it duplicated may be gone by now
+        vehicle.duplicate_of = None
+        self.db.add(vehicle)
+        self.db.flush()
+
+        for hot_model, archive_model in ((VehicleImage, ArchivedVehicleImage), (PriceHistory, ArchivedPriceHistory)):
+            rows = self.db.query(archive_model).filter(archive_model.vehicle_id == vehicle_id)
+            self.db.add_all([restore(hot_model, row.data) for row in rows])
+            rows.delete(synchronize_session=False)
+        self.db.delete(archived)
+        self.db.flush()
+        return vehicle
+
+    def is_archived(self, vehicle_id: int) -> bool:
+        return self.db.query(exists().where(ArchivedVehicleListing.id == vehicle_id)).scalar()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Row counts per hot table and its archive"""
+        return {
+            table: {"hot": self.db.query(hot_model).count(), "archived": self.db.query(archive_model).count()}
+            for table, hot_model, archive_model in (
+                (VehicleListing.__tablename__, VehicleListing, ArchivedVehicleListing),
+                (PriceHistory.__tablename__, PriceHistory, ArchivedPriceHistory),
+                (ScrapingLog.__tablename__, ScrapingLog, ArchivedScrapingLog),
+            )
+        }
+
+
+if __name__ == "__main__":
+    from app.models.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        for result in ColdStorageService(db).move():
+            print(result.to_dict())
+    finally:
+        db.close()
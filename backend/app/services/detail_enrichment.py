@@ -0,0 +1,200 @@
+"""
+Detail Page Enrichment
+
+Result pages only carry make, model, year and price. The enricher fills in
+mileage, fuel type, transmission and city from listing detail pages while
+the results crawl continues:
+
+    submit() -> bounded queue -> fetch workers -> batch writer -> re-match
+
+Only new listings and listings whose content changed are submitted (see
+needs_enrichment). Detail fetches go through the scraper's request path and
+therefore the shared per-domain rate limiter. Enriched rows are updated in
+batches; rows where a field alerts filter on changed are matched again, so
+those alerts see them. Other rows are left to the pipeline's match stage,
+which would otherwise race the enricher on the same listing.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.models.automotive import VehicleListing
+from app.scraper.config import scraper_settings
+
+logger = logging.getLogger(__name__)
+
+ENRICHED_FIELDS = ('mileage', 'fuel_type', 'transmission', 'city')
+
+# Enriched fields VehicleMatchingService filters alerts on
+REMATCH_FIELDS = ('mileage', 'fuel_type', 'city')
+
+_STOP = object()
+
+
+def needs_enrichment(vehicle_data: Dict[str, Any]) -> bool:
+    """New or changed listings with a detail page"""
+    return bool(vehicle_data.get('detail_url')) and not vehicle_data.get('unchanged')
+
+
+@dataclass
+class EnrichmentStats:
+    """Counts of one enrichment run"""
+    queued: int = 0
+    dropped: int = 0  # queue full
+    fetched: int = 0
+    failed: int = 0
+    enriched: int = 0
+    batches: int = 0
+    notifications: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class DetailEnricher:
+    """Worker pool fetching detail pages and updating listings in batches"""
+
+    def __init__(self,
+                 fetch_details: Callable[[str], Optional[Dict[str, Any]]],
+                 session_factory,
+                 matching_service_factory: Optional[Callable[[Any], Any]] = None,
+                 workers: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 max_batch_seconds: float = 2.0):
+        self.fetch_details = fetch_details
+        self.session_factory = session_factory
+        self.matching_service_factory = matching_service_factory
+        self.workers = workers or scraper_settings.ENRICHMENT_WORKERS
+        self.batch_size = batch_size or scraper_settings.ENRICHMENT_BATCH_SIZE
+        self.max_batch_seconds = max_batch_seconds
+        self.stats = EnrichmentStats()
+        self._tasks: "queue.Queue" = queue.Queue(maxsize=queue_size or scraper_settings.ENRICHMENT_QUEUE_SIZE)
+        self._results: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "DetailEnricher":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._fetch_worker, name=f"enrich-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._writer = threading.Thread(target=self._write_worker, name="enrich-writer", daemon=True)
+        self._writer.start()
+        return self
+
+    def submit(self, external_id: str, detail_url: str) -> bool:
+        """Queue a listing without blocking the crawl; False if the queue is full"""
+        try:
+            self._tasks.put_nowait((external_id, detail_url))
+        except queue.Full:
+            with self._lock:
+                self.stats.dropped += 1
+            return False
+        with self._lock:
+            self.stats.queued += 1
+        return True
+
+    def submit_vehicles(self, vehicles: List[Dict[str, Any]]) -> int:
+        """Queue the listings of a batch that need enrichment"""
+        return sum(1 for vehicle_data in vehicles
+                   if needs_enrichment(vehicle_data)
+                   and self.submit(vehicle_data['external_id'], vehicle_data['detail_url']))
+
+    def close(self) -> EnrichmentStats:
+        """Finish queued work and stop the workers"""
+        for _ in self._threads:
+            self._tasks.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._results.put(_STOP)
+        if self._writer:
+            self._writer.join()
+        logger.info(f"Detail enrichment: {self.stats.enriched} listings enriched, "
+                    f"{self.stats.failed} failed, {self.stats.dropped} dropped")
+        return self.stats
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _fetch_worker(self):
+        while True:
+            item = self._tasks.get()
+            if item is _STOP:
+                return
+            external_id, detail_url = item
+            try:
+                details = self.fetch_details(detail_url) or {}
+            except Exception as e:
+                logger.warning(f"Error fetching details of {detail_url}: {e}")
+                details = {}
+
+            fields = {key: details[key] for key in ENRICHED_FIELDS if details.get(key) is not None}
+            with self._lock:
+                self.stats.fetched += 1
+                if not fields:
+                    self.stats.failed += 1
+            if fields:
+                self._results.put((external_id, fields))
+
+    def _write_worker(self):
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        deadline = None
+        done = False
+        while not done:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._results.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                done = True
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_batch_seconds
+
+            if batch and (done or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch, deadline = [], None
+
+    def _write_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Update a batch of listings, then re-match the rows whose alert filter fields changed"""
+        updates = dict(batch)
+        db = self.session_factory()
+        try:
+            rows = db.query(VehicleListing).filter(VehicleListing.external_id.in_(list(updates))).all()
+            rematch = []
+            for row in rows:
+                fields = updates[row.external_id]
+                if any(key in fields and getattr(row, key) != fields[key] for key in REMATCH_FIELDS):
+                    rematch.append(row)
+                for key, value in fields.items():
+                    setattr(row, key, value)
+            db.commit()
+            self.stats.batches += 1
+            self.stats.enriched += len(rows)
+
+            if self.matching_service_factory is not None:
+                matching_service = self.matching_service_factory(db)
+                for row in rematch:
+                    try:
+                        self.stats.notifications += matching_service.process_new_vehicle_matches(row)
+                    except Exception as e:
+                        logger.error(f"Error re-matching enriched vehicle {row.external_id}: {e}")
+                        db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error storing {len(batch)} enriched listings: {e}")
+        finally:
+            db.close()
@@ -0,0 +1,132 @@
+"""
+Device Token Service
+
+This module stores push notification device tokens and serves the bulk
+token lookups used by the push delivery engine.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.notifications import DeviceToken
+from app.services.push_delivery import TokenStore
+
+logger = logging.getLogger(__name__)
+
+# Tokens failing this many deliveries in a row are deactivated
+MAX_TOKEN_FAILURES = 5
+
+
+class DeviceTokenService(TokenStore):
+    """Database-backed device token registry"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def register_token(self,
+                       user_id: int,
+                       token: str,
+                       platform: str = "android",
+                       app_version: Optional[str] = None) -> DeviceToken:
+        """
+        Register a device token (upsert)
+
+        A token already known for another user is moved to the current user,
+        since FCM tokens identify an app install, not an account.
+        """
+        device_token = self.db.query(DeviceToken).filter(DeviceToken.token == token).first()
+
+        if device_token is None:
+            device_token = DeviceToken(user_id=user_id, token=token)
+            self.db.add(device_token)
+            try:
+                self.db.flush()
+            except IntegrityError:
+                # Another request registered the same token concurrently
+                self.db.rollback()
+                device_token = self.db.query(DeviceToken).filter(DeviceToken.token == token).one()
+
+        device_token.user_id = user_id
+        device_token.platform = platform
+        device_token.app_version = app_version
+        device_token.is_active = True
+        device_token.failure_count = 0
+        device_token.last_seen_at = datetime.utcnow()
+
+        self.db.commit()
+        self.db.refresh(device_token)
+        return device_token
+
+    def unregister_token(self, user_id: int, token: str) -> bool:
+        """Deactivate a token of a user"""
+        updated = self.db.query(DeviceToken).filter(
+            DeviceToken.user_id == user_id,
+            DeviceToken.token == token
+        ).update({DeviceToken.is_active: False}, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+
+    def tokens_for_users(self, user_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """Return active tokens of many users with a single query"""
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+
+        rows = self.db.query(DeviceToken.user_id, DeviceToken.token).filter(
+            DeviceToken.user_id.in_(user_ids),
+            DeviceToken.is_active == True
+        ).all()
+
+        tokens: Dict[int, List[str]] = {}
+        for user_id, token in rows:
+            tokens.setdefault(user_id, []).append(token)
+        return tokens
+
+    def remove_tokens(self, tokens: Iterable[str]) -> int:
+        """Deactivate tokens FCM reported as unregistered or invalid"""
+        tokens = list(tokens)
+        if not tokens:
+            return 0
+
+        removed = self.db.query(DeviceToken).filter(
+            DeviceToken.token.in_(tokens),
+            DeviceToken.is_active == True
+        ).update({DeviceToken.is_active: False}, synchronize_session=False)
+        self.db.commit()
+        return removed
+
+    def record_failures(self, tokens: Iterable[str]):
+        """Bump failure counters and deactivate tokens that keep failing"""
+        tokens = list(tokens)
+        if not tokens:
+            return
+
+        self.db.query(DeviceToken).filter(DeviceToken.token.in_(tokens)).update({
+            DeviceToken.failure_count: DeviceToken.failure_count + 1,
+            DeviceToken.last_failure_at: datetime.utcnow()
+        }, synchronize_session=False)
+        deactivated = self.db.query(DeviceToken).filter(
+            DeviceToken.token.in_(tokens),
+            DeviceToken.failure_count >= MAX_TOKEN_FAILURES,
+            DeviceToken.is_active == True
+        ).update({DeviceToken.is_active: False}, synchronize_session=False)
+        self.db.commit()
+
+        if deactivated:
+            logger.info(f"Deactivated {deactivated} device tokens after {MAX_TOKEN_FAILURES} failures")
+
+    def record_successes(self, tokens: Iterable[str]):
+        """Reset the failure counters of tokens that received a message"""
+        tokens = list(tokens)
+        if not tokens:
+            return
+
+        self.db.query(DeviceToken).filter(
+            DeviceToken.token.in_(tokens),
+            DeviceToken.failure_count > 0
+        ).update({DeviceToken.failure_count: 0}, synchronize_session=False)
+        self.db.commit()
@@ -5,17 +5,17 @@ Handles push notifications for mobile app
 
 import json
 import logging
+import importlib.util
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, messaging
-    FIREBASE_AVAILABLE = True
-except ImportError:
-    FIREBASE_AVAILABLE = False
+# The Admin SDK is imported when the service is first used, not at startup
+FIREBASE_AVAILABLE = importlib.util.find_spec("firebase_admin") is not None
 
 from app.core.cloud_config import get_cloud_settings
+from app.services.push_delivery import (
+    FirebaseMessagingBackend, PushDeliveryEngine, PushPayload, TokenStore, android_config, apns_config
+)
 
 logger = logging.getLogger(__name__)
 cloud_settings = get_cloud_settings()
@@ -35,6 +35,9 @@ class FirebaseNotificationService:
             return
         
         try:
+            import firebase_admin
+            from firebase_admin import credentials
+            
             # Check if Firebase is already initialized
             if firebase_admin._apps:
                 self.app = firebase_admin.get_app()
@@ -75,6 +78,8 @@ class FirebaseNotificationService:
             return False
         
         try:
+            from firebase_admin import messaging
+            
             # Create notification payload
             title = f"New {vehicle_data['make']} {vehicle_data['model']} Match!"
             body = f"Found a {vehicle_data['year']} {vehicle_data['make']} {vehicle_data['model']} for {vehicle_data['price']} EUR in {vehicle_data['city']}"
@@ -94,23 +99,8 @@ class FirebaseNotificationService:
                     'timestamp': datetime.utcnow().isoformat()
                 },
                 token=device_token,
-                android=messaging.AndroidConfig(
-                    notification=messaging.AndroidNotification(
-                        icon='ic_car',
-                        color='#FF6B35',
-                        sound='default',
-                        click_action='FLUTTER_NOTIFICATION_CLICK'
-                    ),
-                    priority='high'
-                ),
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            sound='default',
-                            badge=1
-                        )
-                    )
-                )
+                android=android_config(messaging),
+                apns=apns_config(messaging)
             )
             
             # Send message
@@ -135,45 +125,41 @@ class FirebaseNotificationService:
             return {"success": 0, "failure": len(device_tokens)}
         
         try:
-            # Create multicast message
-            message = messaging.MulticastMessage(
-                notification=messaging.Notification(
-                    title=title,
-                    body=body
-                ),
-                data=data or {},
-                tokens=device_tokens,
-                android=messaging.AndroidConfig(
-                    notification=messaging.AndroidNotification(
-                        icon='ic_car',
-                        color='#FF6B35',
-                        sound='default'
-                    ),
-                    priority='high'
-                )
+            # The engine splits the tokens into 500-token multicasts
+            engine = self.get_push_engine()
+            payload = PushPayload(
+                title=title,
+                body=body,
+                data=tuple(sorted((data or {}).items()))
             )
+            results = engine.send({payload: device_tokens})
             
-            # Send multicast
-            response = messaging.send_multicast(message)
+            success_count = sum(1 for error in results.values() if error is None)
+            failure_count = len(results) - success_count
             
-            logger.info(f"✅ Bulk notifications sent: {response.success_count} success, {response.failure_count} failures")
+            logger.info(f"✅ Bulk notifications sent: {success_count} success, {failure_count} failures")
             
             # Log failures
-            if response.failure_count > 0:
-                for idx, resp in enumerate(response.responses):
-                    if not resp.success:
-                        logger.warning(f"⚠️  Failed to send to token {idx}: {resp.exception}")
+            for (_, token), error in results.items():
+                if error is not None:
+                    logger.warning(f"⚠️  Failed to send to token {token[:12]}...: {error}")
             
             return {
-                "success": response.success_count,
-                "failure": response.failure_count,
-                "responses": response.responses
+                "success": success_count,
+                "failure": failure_count,
+                "responses": [results[(payload, token)] for token in dict.fromkeys(device_tokens)]
             }
             
         except Exception as e:
             logger.error(f"❌ Failed to send bulk notifications: {e}")
             return {"success": 0, "failure": len(device_tokens), "error": str(e)}
     
+    def get_push_engine(self, token_store: Optional[TokenStore] = None) -> Optional[PushDeliveryEngine]:
+        """Get a batched push delivery engine backed by FCM"""
+        if not self.initialized:
+            return None
+        return PushDeliveryEngine(FirebaseMessagingBackend(), token_store=token_store)
+    
     def send_test_notification(self, device_token: str) -> bool:
         """Send test notification"""
         if not self.initialized:
@@ -181,6 +167,8 @@ class FirebaseNotificationService:
             return False
         
         try:
+            from firebase_admin import messaging
+            
             message = messaging.Message(
                 notification=messaging.Notification(
                     title="Vehicle Scout Test",
@@ -222,12 +210,15 @@ class FirebaseNotificationService:
             "timestamp": datetime.utcnow().isoformat()
         }
 
-# Global Firebase service instance
-firebase_service = FirebaseNotificationService()
+# Global Firebase service instance, created on first use
+_firebase_service: Optional[FirebaseNotificationService] = None
 
 def get_firebase_service() -> FirebaseNotificationService:
-    """Get Firebase service instance"""
-    return firebase_service
+    """Get Firebase service instance (initializes Firebase on the first call)"""
+    global _firebase_service
+    if _firebase_service is None:
+        _firebase_service = FirebaseNotificationService()
+    return _firebase_service
 
 # Fallback notification service for when Firebase is not available
 class FallbackNotificationService:
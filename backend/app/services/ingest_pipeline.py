@@ -0,0 +1,269 @@
+"""
+Streaming Ingest Pipeline
+
+Stores scraped listings while the crawl is still running:
+
+    fetch/parse -> normalize/dedup/upsert -> match
+
+The fetch stage iterates a page generator (e.g.
+AyvensCarmarketScraper.iter_pages) and feeds vehicles into a bounded queue;
+when the database falls behind the queue fills up and fetching pauses. The
+upsert stage commits micro-batches of PIPELINE_BATCH_SIZE vehicles, or
+whatever arrived within PIPELINE_MAX_BATCH_SECONDS, and hands the new
+listings to the match stage through a second bounded queue, so alerts fire
+for the first page while later pages are still being fetched. With a
+DetailEnricher, new and changed listings of each committed batch are also
+queued for detail page enrichment. `on_page_committed(page)` is called once
+every vehicle of a page has been committed (e.g.
+AyvensCarmarketScraper.confirm_page); pages with a failed batch never are.
+"""
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.models.automotive import VehicleListing
+from app.scraper.config import scraper_settings
+from app.services.listing_ingest import IngestStats, ListingIngestor
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """Throughput and latency of one pipeline run"""
+    pages: int = 0
+    batches: int = 0
+    matched: int = 0
+    max_queue_depth: int = 0
+    first_commit_seconds: Optional[float] = None
+    first_match_seconds: Optional[float] = None
+    duration_seconds: float = 0.0
+    ingest: IngestStats = field(default_factory=IngestStats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "batches": self.batches,
+            "matched": self.matched,
+            "max_queue_depth": self.max_queue_depth,
+            "first_commit_seconds": self.first_commit_seconds,
+            "first_match_seconds": self.first_match_seconds,
+            "duration_seconds": round(self.duration_seconds, 3),
+            **self.ingest.to_dict(),
+        }
+
+
+class IngestPipeline:
+    """Bounded-queue scrape-to-database pipeline"""
+
+    def __init__(self,
+                 session_factory,
+                 matching_service_factory: Optional[Callable[[Any], Any]] = None,
+                 batch_size: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 max_batch_seconds: Optional[float] = None,
+                 enricher=None,
+                 on_page_committed: Optional[Callable[[int], None]] = None):
+        self.session_factory = session_factory
+        self.enricher = enricher
+        self.on_page_committed = on_page_committed
+        self.matching_service_factory = matching_service_factory
+        self.batch_size = batch_size or scraper_settings.PIPELINE_BATCH_SIZE
+        self.queue_size = queue_size or scraper_settings.PIPELINE_QUEUE_SIZE
+        self.max_batch_seconds = max_batch_seconds or scraper_settings.PIPELINE_MAX_BATCH_SECONDS
+
+    def run(self, pages: Iterable[Tuple[int, List[Dict[str, Any]]]]) -> PipelineStats:
+        """Consume (page, vehicles) pairs until exhausted, storing and matching as they arrive"""
+        stats = PipelineStats()
+        started = time.monotonic()
+        vehicle_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        match_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        failed = threading.Event()
+        # Vehicles of each page not committed yet
+        uncommitted: Dict[int, int] = {}
+        uncommitted_lock = threading.Lock()
+
+        # Stages run in copies of the caller's context, so their spans join the cycle's trace
+        stages = [
+            threading.Thread(target=contextvars.copy_context().run, name="ingest-upsert",
+                             args=(self._upsert_stage, vehicle_queue, match_queue, stats, started, failed,
+                                   uncommitted, uncommitted_lock)),
+            threading.Thread(target=contextvars.copy_context().run, name="ingest-match",
+                             args=(self._match_stage, match_queue, stats, started, failed)),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            # Fetch stage: put() blocks while the queue is full, pausing the crawl
+            for page, vehicles in pages:
+                stats.pages += 1
+                if vehicles:
+                    with uncommitted_lock:
+                        uncommitted[page] = len(vehicles)
+                for vehicle_data in vehicles:
+                    if not self._put(vehicle_queue, (page, vehicle_data), failed):
+                        break
+                stats.max_queue_depth = max(stats.max_queue_depth, vehicle_queue.qsize())
+                if failed.is_set():
+                    logger.error("Ingest pipeline stage failed, stopping the crawl")
+                    break
+        finally:
+            self._put(vehicle_queue, _DONE, failed, force=True)
+            for stage in stages:
+                stage.join()
+
+        stats.duration_seconds = time.monotonic() - started
+        logger.info(f"Ingest pipeline: {stats.ingest.found} vehicles in {stats.batches} batches, "
+                    f"{stats.ingest.new} new, first commit after {stats.first_commit_seconds}s")
+        return stats
+
+    async def run_async(self, pages: Iterable[Tuple[int, List[Dict[str, Any]]]]) -> PipelineStats:
+        """Run the pipeline without blocking the event loop"""
+        return await asyncio.to_thread(self.run, pages)
+
+    @staticmethod
+    def _put(target: "queue.Queue", item, failed: threading.Event, force: bool = False) -> bool:
+        """Put with backpressure; gives up when a stage failed (unless forced)"""
+        while True:
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if failed.is_set():
+                    if not force:
+                        return False
+                    # Make room for the end marker; the stage is draining anyway
+                    try:
+                        target.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _upsert_stage(self, vehicle_queue, match_queue, stats: PipelineStats,
+                      started: float, failed: threading.Event,
+                      uncommitted: Dict[int, int], uncommitted_lock: threading.Lock):
+        db = self.session_factory()
+        ingestor = ListingIngestor(db)
+        ingestor.stats = stats.ingest
+        batch: List[Dict[str, Any]] = []
+        batch_pages: List[int] = []
+        deadline = None
+        done = False
+
+        try:
+            while not done:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = vehicle_queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _DONE:
+                    done = True
+                elif item is not None:
+                    batch_pages.append(item[0])
+                    batch.append(item[1])
+                    if deadline is None:
+                        deadline = time.monotonic() + self.max_batch_seconds
+
+                if failed.is_set():
+                    batch, batch_pages, deadline = [], [], None
+                    continue
+                if not batch or not (done or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    continue
+
+                errors = stats.ingest.errors
+                try:
+                    created = ingestor.ingest_batch(batch)
+                    db.commit()
+                    # Vehicles that could not be applied leave their pages incomplete
+                    committed = stats.ingest.errors == errors
+                    if self.enricher is not None:
+                        self.enricher.submit_vehicles(batch)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Error committing batch of {len(batch)} vehicles: {e}")
+                    stats.ingest.errors += len(batch)
+                    created = []
+                    committed = False
+                self._pages_committed(batch_pages, committed, uncommitted, uncommitted_lock)
+
+                stats.batches += 1
+                if stats.first_commit_seconds is None:
+                    stats.first_commit_seconds = round(time.monotonic() - started, 3)
+                for vehicle in created:
+                    self._put(match_queue, vehicle.id, failed)
+                batch, batch_pages, deadline = [], [], None
+        except Exception as e:
+            logger.error(f"Ingest upsert stage failed: {e}")
+            failed.set()
+            # Keep draining until the fetch stage finishes
+            while vehicle_queue.get() is not _DONE:
+                pass
+        finally:
+            db.close()
+            self._put(match_queue, _DONE, failed, force=True)
+
+    def _pages_committed(self, pages: List[int], committed: bool,
+                         uncommitted: Dict[int, int], uncommitted_lock: threading.Lock):
+        """Count a batch against its pages, reporting pages that are now fully stored"""
+        completed = []
+        with uncommitted_lock:
+            for page in pages:
+                if page not in uncommitted:
+                    continue
+                if not committed:
+                    # A page with a failed batch is never reported
+                    del uncommitted[page]
+                    continue
+                uncommitted[page] -= 1
+                if uncommitted[page] == 0:
+                    del uncommitted[page]
+                    completed.append(page)
+        if self.on_page_committed is None:
+            return
+        for page in completed:
+            try:
+                self.on_page_committed(page)
+            except Exception as e:
+                logger.warning(f"Error confirming committed page {page}: {e}")
+
+    def _match_stage(self, match_queue, stats: PipelineStats, started: float, failed: threading.Event):
+        if self.matching_service_factory is None:
+            while match_queue.get() is not _DONE:
+                pass
+            return
+
+        db = self.session_factory()
+        matching_service = self.matching_service_factory(db)
+        try:
+            while True:
+                vehicle_id = match_queue.get()
+                if vehicle_id is _DONE:
+                    break
+                vehicle = db.query(VehicleListing).get(vehicle_id)
+                if vehicle is None:
+                    continue
+                try:
+                    stats.ingest.notifications += matching_service.process_new_vehicle_matches(vehicle)
+                except Exception as e:
+                    logger.error(f"Error processing notifications for vehicle {vehicle.external_id}: {e}")
+                    db.rollback()
+                stats.matched += 1
+                if stats.first_match_seconds is None:
+                    stats.first_match_seconds = round(time.monotonic() - started, 3)
+        except Exception as e:
+            logger.error(f"Ingest match stage failed: {e}")
+            failed.set()
+            while match_queue.get() is not _DONE:
+                pass
+        finally:
+            db.close()
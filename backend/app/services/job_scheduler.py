@@ -0,0 +1,464 @@
+"""
+Persistent Job Scheduler
+
+This module runs periodic jobs (scraping, alert matching, queue processing,
+cleanup) exactly once per cluster. Job state and run history live in the
+database, a lease-based leader lock picks the worker that schedules jobs,
+and each run is claimed with a compare-and-set on the job row so a job never
+runs twice even while leadership changes hands.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.models.base import SessionLocal
+from app.models.scheduler import ScheduledJob, JobRun, SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_NAME = "scheduler_leader"
+
+
+def default_worker_id() -> str:
+    """Identify this process within the cluster"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobScheduler:
+    """Database-backed scheduler with leader election and run history"""
+
+    def __init__(self,
+                 session_factory=SessionLocal,
+                 worker_id: Optional[str] = None,
+                 tick_seconds: float = 5.0,
+                 lease_seconds: int = 30,
+                 misfire_grace_seconds: int = 300,
+                 job_lock_seconds: int = 3600,
+                 max_workers: int = 4):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.misfire_grace_seconds = misfire_grace_seconds
+        self.job_lock_seconds = job_lock_seconds
+        self.max_workers = max_workers
+
+        self._funcs: Dict[str, Callable[[], Any]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.is_leader = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_job(self,
+                job_id: str,
+                func: Callable[[], Any],
+                interval_seconds: int,
+                name: Optional[str] = None,
+                run_immediately: bool = False):
+        """
+        Register a periodic job (the job row is shared by all workers)
+
+        `interval_seconds` only applies when the job row is created: the
+        interval of an existing job is changed with reschedule(), so a
+        restarting worker does not undo an adaptive interval.
+        """
+        self._funcs[job_id] = func
+        now = datetime.utcnow()
+
+        db = self.session_factory()
+        try:
+            job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+            if job is None:
+                db.add(ScheduledJob(
+                    id=job_id,
+                    name=name or job_id,
+                    interval_seconds=interval_seconds,
+                    next_run_at=now if run_immediately else now + timedelta(seconds=interval_seconds),
+                    created_at=now,
+                    updated_at=now
+                ))
+            elif name and job.name != name:
+                job.name = name
+                job.updated_at = now
+            db.commit()
+        except IntegrityError:
+            # Another worker registered the job at the same time
+            db.rollback()
+        finally:
+            db.close()
+
+        logger.info(f"Registered job '{job_id}'")
+
+    def start(self):
+        """Start the scheduler loop in a daemon thread"""
+        if self.running:
+            logger.warning("Job scheduler is already running")
+            return
+
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Job scheduler started (worker {self.worker_id})")
+
+    def shutdown(self, wait: bool = True):
+        """Stop scheduling, let running jobs finish and give up leadership"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_seconds * 2)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._release_leadership()
+        logger.info("Job scheduler shut down")
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Job scheduler tick failed: {e}")
+            self._stop_event.wait(self.tick_seconds)
+
+    def tick(self, now: Optional[datetime] = None) -> List[Future]:
+        """Run one scheduling pass, returns futures of the runs started"""
+        now = now or datetime.utcnow()
+        started: List[Future] = []
+
+        db = self.session_factory()
+        try:
+            self.is_leader = self._acquire_leadership(db, now)
+            if not self.is_leader:
+                return started
+
+            due_jobs = db.query(ScheduledJob).filter(
+                ScheduledJob.next_run_at <= now,
+                ScheduledJob.is_paused == False,
+                ScheduledJob.id.in_(list(self._funcs.keys()))
+            ).all()
+
+            for job in due_jobs:
+                run = self._claim(db, job, now)
+                if run is not None:
+                    started.append(self._submit(job.id, run.id))
+        finally:
+            db.close()
+
+        return started
+
+    def _acquire_leadership(self, db, now: datetime) -> bool:
+        """Acquire or renew the leader lease"""
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        updated = db.query(SchedulerLock).filter(
+            SchedulerLock.name == LEADER_LOCK_NAME,
+            or_(SchedulerLock.owner == self.worker_id, SchedulerLock.expires_at < now)
+        ).update({
+            SchedulerLock.owner: self.worker_id,
+            SchedulerLock.expires_at: expires_at
+        }, synchronize_session=False)
+        if updated:
+            db.commit()
+            if not self.is_leader:
+                logger.info(f"Worker {self.worker_id} became scheduler leader")
+            return True
+
+        if db.query(SchedulerLock).filter(SchedulerLock.name == LEADER_LOCK_NAME).first():
+            db.rollback()
+            return False
+
+        try:
+            db.add(SchedulerLock(name=LEADER_LOCK_NAME, owner=self.worker_id, expires_at=expires_at))
+            db.commit()
+            logger.info(f"Worker {self.worker_id} became scheduler leader")
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    def _release_leadership(self):
+        if not self.is_leader:
+            return
+        db = self.session_factory()
+        try:
+            db.query(SchedulerLock).filter(
+                SchedulerLock.name == LEADER_LOCK_NAME,
+                SchedulerLock.owner == self.worker_id
+            ).update({SchedulerLock.expires_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to release scheduler leadership: {e}")
+        finally:
+            self.is_leader = False
+            db.close()
+
+    def _claim(self, db, job: ScheduledJob, now: datetime) -> Optional[JobRun]:
+        """Claim a due run with compare-and-set on next_run_at and the job lock"""
+        scheduled_for = job.next_run_at
+        delay = (now - scheduled_for).total_seconds()
+
+        # Missed runs are coalesced into this one and the schedule restarts from now
+        next_run_at = scheduled_for + timedelta(seconds=job.interval_seconds)
+        if next_run_at <= now:
+            next_run_at = now + timedelta(seconds=job.interval_seconds)
+        misfired = delay > self.misfire_grace_seconds
+
+        claimed = db.query(ScheduledJob).filter(
+            ScheduledJob.id == job.id,
+            ScheduledJob.next_run_at == scheduled_for,
+            or_(ScheduledJob.locked_until == None, ScheduledJob.locked_until < now)
+        ).update({
+            ScheduledJob.next_run_at: next_run_at,
+            ScheduledJob.locked_by: self.worker_id,
+            ScheduledJob.locked_until: now + timedelta(seconds=self.job_lock_seconds),
+            ScheduledJob.misfire_count: ScheduledJob.misfire_count + (1 if misfired else 0)
+        }, synchronize_session=False)
+        if not claimed:
+            db.rollback()
+            return None
+
+        if misfired:
+            logger.warning(f"Job '{job.id}' misfired: started {delay:.0f}s after its scheduled time")
+
+        # A queued manual trigger is picked up by this run instead of a new row
+        run = db.query(JobRun).filter(
+            JobRun.job_id == job.id,
+            JobRun.status == "queued"
+        ).order_by(JobRun.id.asc()).first()
+        if run is None:
+            run = JobRun(job_id=job.id, trigger="scheduled")
+            db.add(run)
+
+        run.worker_id = self.worker_id
+        run.scheduled_for = run.scheduled_for or scheduled_for
+        run.started_at = now
+        run.status = "running"
+        run.misfired = misfired
+        run.delay_seconds = max(0.0, delay)
+        db.commit()
+        db.refresh(run)
+        return run
+
+    def _submit(self, job_id: str, run_id: int) -> Future:
+        if self._executor is None:
+            # Not started - run inline (used by tests and one-off invocations)
+            future: Future = Future()
+            try:
+                future.set_result(self._execute(job_id, run_id))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(self._execute, job_id, run_id)
+
+    def _execute(self, job_id: str, run_id: int) -> bool:
+        """Run a claimed job and persist its outcome"""
+        start_time = datetime.utcnow()
+        error_message = None
+        try:
+            logger.info(f"Running job '{job_id}' (run {run_id})")
+            self._funcs[job_id]()
+            success = True
+        except Exception as e:
+            logger.error(f"Job '{job_id}' failed: {e}")
+            error_message = str(e)
+            success = False
+
+        completed_at = datetime.utcnow()
+        duration = (completed_at - start_time).total_seconds()
+
+        db = self.session_factory()
+        try:
+            run = db.query(JobRun).filter(JobRun.id == run_id).first()
+            if run:
+                run.completed_at = completed_at
+                run.duration_seconds = duration
+                run.status = "completed" if success else "failed"
+                run.error_message = error_message
+
+            job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+            if job:
+                job.run_count = (job.run_count or 0) + 1
+                if not success:
+                    job.failure_count = (job.failure_count or 0) + 1
+                job.last_run_at = start_time
+                job.last_status = "completed" if success else "failed"
+                job.last_duration_seconds = duration
+                avg = job.avg_duration_seconds or 0.0
+                job.avg_duration_seconds = avg + (duration - avg) / job.run_count
+                job.max_duration_seconds = max(job.max_duration_seconds or 0.0, duration)
+                if job.locked_by == self.worker_id:
+                    job.locked_by = None
+                    job.locked_until = None
+                job.updated_at = completed_at
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record run of job '{job_id}': {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        logger.info(f"Job '{job_id}' {'completed' if success else 'failed'} in {duration:.2f}s")
+        return success
+
+    def trigger(self, job_id: str) -> Optional[int]:
+        """
+        Request an immediate run of a job on whichever worker is leader
+
+        Returns the id of the queued run record, or None for unknown jobs.
+        """
+        db = self.session_factory()
+        try:
+            job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+            if job is None:
+                return None
+
+            now = datetime.utcnow()
+            run = JobRun(job_id=job_id, trigger="manual", status="queued", scheduled_for=now)
+            db.add(run)
+            if job.next_run_at > now:
+                job.next_run_at = now
+            db.commit()
+            db.refresh(run)
+            logger.info(f"Job '{job_id}' triggered manually (run {run.id})")
+            return run.id
+        finally:
+            db.close()
+
+    def reschedule(self, job_id: str, interval_seconds: int,
+                   now: Optional[datetime] = None) -> bool:
+        """Change a job's interval, the next run moves to now + interval"""
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            # Queued manual runs keep the job due
+            queued = db.query(JobRun.id).filter(
+                JobRun.job_id == job_id, JobRun.status == "queued"
+            ).first()
+            next_run_at = now if queued else now + timedelta(seconds=interval_seconds)
+            updated = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).update({
+                ScheduledJob.interval_seconds: interval_seconds,
+                ScheduledJob.next_run_at: next_run_at,
+                ScheduledJob.updated_at: now
+            }, synchronize_session=False)
+            db.commit()
+            return updated > 0
+        finally:
+            db.close()
+
+    def pause_job(self, job_id: str) -> bool:
+        return self._set_paused(job_id, True)
+
+    def resume_job(self, job_id: str) -> bool:
+        return self._set_paused(job_id, False)
+
+    def _set_paused(self, job_id: str, paused: bool) -> bool:
+        db = self.session_factory()
+        try:
+            updated = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).update(
+                {ScheduledJob.is_paused: paused}, synchronize_session=False
+            )
+            db.commit()
+            return updated > 0
+        finally:
+            db.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Scheduler, leader and per-job statistics"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            lock = db.query(SchedulerLock).filter(SchedulerLock.name == LEADER_LOCK_NAME).first()
+            leader = lock.owner if lock and lock.expires_at and lock.expires_at >= now else None
+
+            jobs = []
+            for job in db.query(ScheduledJob).order_by(ScheduledJob.id).all():
+                jobs.append({
+                    "id": job.id,
+                    "name": job.name,
+                    "interval_seconds": job.interval_seconds,
+                    "paused": job.is_paused,
+                    "running": bool(job.locked_until and job.locked_until >= now),
+                    "running_on": job.locked_by,
+                    "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+                    "next_run_in_seconds": max(0.0, (job.next_run_at - now).total_seconds()) if job.next_run_at else None,
+                    "last_run_at": job.last_run_at.isoformat() if job.last_run_at else None,
+                    "last_status": job.last_status,
+                    "last_duration_seconds": job.last_duration_seconds,
+                    "avg_duration_seconds": job.avg_duration_seconds,
+                    "max_duration_seconds": job.max_duration_seconds,
+                    "run_count": job.run_count or 0,
+                    "failure_count": job.failure_count or 0,
+                    "misfire_count": job.misfire_count or 0
+                })
+
+            return {
+                "worker_id": self.worker_id,
+                "scheduler_running": self.running,
+                "is_leader": leader == self.worker_id,
+                "leader": leader,
+                "jobs": jobs,
+                "total_jobs": len(jobs)
+            }
+        finally:
+            db.close()
+
+    def get_run_history(self, job_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent job runs"""
+        db = self.session_factory()
+        try:
+            query = db.query(JobRun)
+            if job_id:
+                query = query.filter(JobRun.job_id == job_id)
+            runs = query.order_by(JobRun.id.desc()).limit(limit).all()
+            return [{
+                "id": run.id,
+                "job_id": run.job_id,
+                "trigger": run.trigger,
+                "worker_id": run.worker_id,
+                "status": run.status,
+                "misfired": run.misfired,
+                "scheduled_for": run.scheduled_for.isoformat() if run.scheduled_for else None,
+                "started_at": run.started_at.isoformat() if run.started_at else None,
+                "completed_at": run.completed_at.isoformat() if run.completed_at else None,
+                "duration_seconds": run.duration_seconds,
+                "delay_seconds": run.delay_seconds,
+                "error_message": run.error_message
+            } for run in runs]
+        finally:
+            db.close()
+
+    def cleanup_history(self, days: int = 30) -> int:
+        """Delete finished run records older than `days`"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        db = self.session_factory()
+        try:
+            deleted = db.query(JobRun).filter(
+                JobRun.completed_at < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+
+# Global scheduler instance
+job_scheduler = JobScheduler()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Get the global job scheduler instance"""
+    return job_scheduler
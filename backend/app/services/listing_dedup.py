@@ -0,0 +1,159 @@
+"""
+Listing Deduplication Migration
+
+One-time migration that re-keys scraped listings to stable external ids
+(app.scraper.listing_ids) and collapses the duplicate rows created while
+every scrape generated a random id. For each car the oldest row is kept,
+it takes over the latest scraped values, rows referencing the duplicates
+(images, price history, logs, notifications, ...) are moved to it and the
+duplicates are deleted.
+
+Only rows identified by a lot id or a real listing URL are merged. Rows
+without a link only have the title and year to go by, which different cars
+share, so they are left untouched and reported as unanchored.
+
+Run once after deploying stable ids:
+
+    python -m app.services.listing_dedup [--dry-run]
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Column, Table
+from sqlalchemy.orm import Session
+
+from app.models.base import Base, SessionLocal
+from app.models.automotive import VehicleListing
+from app.scraper.listing_ids import derive_external_id, lot_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# Sources whose listings used random ids, with their external id prefix
+RANDOM_ID_SOURCES = {
+    "carmarket.ayvens.com": ("ayvens", "https://carmarket.ayvens.com"),
+}
+
+# Columns never copied from the newest duplicate onto the kept row
+_IDENTITY_COLUMNS = {"id", "external_id", "listing_url", "duplicate_of"}
+
+
+def _referencing_columns() -> List[Tuple[Table, Column]]:
+    """All columns holding a foreign key to vehicle_listings.id"""
+    columns = []
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            for foreign_key in column.foreign_keys:
+                if foreign_key.column.table.name == VehicleListing.__tablename__:
+                    columns.append((table, column))
+    return columns
+
+
+def _is_synthetic_url(listing_url: str, base_url: str, prefix: str) -> bool:
+    """URLs made up for listings without a link contain the old random id"""
+    return not listing_url or listing_url.startswith(f"{base_url}/vehicle/{prefix}_")
+
+
+def has_stable_identity(listing: VehicleListing, prefix: str, base_url: str) -> bool:
+    """Whether the listing is identified by a lot id or a real listing URL"""
+    return bool(lot_id_from_url(listing.listing_url)) or not _is_synthetic_url(listing.listing_url, base_url, prefix)
+
+
+def stable_id_for(listing: VehicleListing, prefix: str, base_url: str) -> str:
+    """Stable id of a stored listing, derived like the scraper derives it"""
+    listing_url = None if _is_synthetic_url(listing.listing_url, base_url, prefix) else listing.listing_url
+    # The listing title is stored as the description
+    return derive_external_id(prefix, listing_url, stable_fields=(listing.description, listing.year))
+
+
+def collapse_duplicate_listings(db: Session, source: str, dry_run: bool = False) -> Dict[str, int]:
+    """Re-key the listings of `source` to stable ids and merge duplicates"""
+    prefix, base_url = RANDOM_ID_SOURCES[source]
+
+    listings = db.query(VehicleListing).filter(
+        VehicleListing.source_website == source
+    ).order_by(VehicleListing.id.asc()).all()
+
+    groups: Dict[str, List[VehicleListing]] = defaultdict(list)
+    unanchored = 0
+    for listing in listings:
+        if not has_stable_identity(listing, prefix, base_url):
+            unanchored += 1
+            continue
+        groups[stable_id_for(listing, prefix, base_url)].append(listing)
+
+    referencing = _referencing_columns()
+    copy_columns = [c.key for c in VehicleListing.__table__.columns if c.key not in _IDENTITY_COLUMNS]
+    stats = {"listings": len(listings), "groups": len(groups), "unanchored": unanchored,
+             "duplicates_removed": 0, "rekeyed": 0}
+
+    try:
+        for stable_id, members in groups.items():
+            keep = members[0]
+            duplicates = members[1:]
+
+            if duplicates:
+                newest = max(members, key=lambda m: (m.scraped_at is not None, m.scraped_at, m.id))
+                if newest is not keep:
+                    for key in copy_columns:
+                        value = getattr(newest, key)
+                        if value is not None:
+                            setattr(keep, key, value)
+
+                duplicate_ids = [d.id for d in duplicates]
+                if keep.duplicate_of in duplicate_ids:
+                    keep.duplicate_of = None
+                    db.flush()
+                for table, column in referencing:
+                    update = table.update().where(column.in_(duplicate_ids))
+                    if table is VehicleListing.__table__:
+                        # Never point the kept row at itself
+                        update = update.where(table.c.id != keep.id)
+                    db.execute(update.values({column.name: keep.id}))
+                for duplicate in duplicates:
+                    db.expunge(duplicate)
+                db.query(VehicleListing).filter(
+                    VehicleListing.id.in_(duplicate_ids)
+                ).delete(synchronize_session=False)
+                # Free the unique URL/id values of the deleted rows first
+                db.flush()
+                stats["duplicates_removed"] += len(duplicates)
+
+            if keep.external_id != stable_id:
+                keep.external_id = stable_id
+                stats["rekeyed"] += 1
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"{'Dry run: ' if dry_run else ''}collapsed {stats['listings']} {source} listings "
+                f"into {stats['groups']}, removed {stats['duplicates_removed']} duplicates, "
+                f"re-keyed {stats['rekeyed']}, left {stats['unanchored']} without a lot id or link")
+    return stats
+
+
+def run_migration(dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """Collapse duplicates of every source that used random ids"""
+    db = SessionLocal()
+    try:
+        return {source: collapse_duplicate_listings(db, source, dry_run=dry_run)
+                for source in RANDOM_ID_SOURCES}
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Collapse duplicate scraped listings")
+    parser.add_argument("--dry-run", action="store_true", help="report without changing the database")
+    args = parser.parse_args()
+
+    for source, result in run_migration(dry_run=args.dry_run).items():
+        print(f"{source}: {result}")
@@ -0,0 +1,229 @@
+"""
+Listing Ingest Service
+
+Upserts scraped vehicle dicts into vehicle_listings. Shared by the
+streaming ingest pipeline (app.services.ingest_pipeline), which feeds it
+micro-batches, and the multi-source orchestrator, which feeds it one result
+page at a time as pages arrive. Listings moved to cold storage that show up
+again are restored with their original id and price history and updated
+in place.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.tracing import span
+from app.models.automotive import VehicleListing
+from app.services.cold_storage import ColdStorageService
+from app.services.market_value import get_market_index
+from app.services.price_rollups import PriceRollupService
+
+logger = logging.getLogger(__name__)
+
+# Scraped fields stored on VehicleListing
+LISTING_FIELDS = {
+    'external_id', 'listing_url', 'make', 'model', 'year', 'price', 'currency',
+    'mileage', 'fuel_type', 'transmission', 'condition', 'city', 'country',
+    'source_website', 'source_country', 'scraped_at', 'is_active',
+    'confidence_score', 'data_quality_score', 'accident_history',
+    'service_history', 'dealer_name', 'description', 'primary_image_url'
+}
+
+
+@dataclass
+class IngestStats:
+    """Counts of one ingest run"""
+    found: int = 0
+    new: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: int = 0
+    duplicates: int = 0  # repeated within a batch
+    restored: int = 0  # moved back from cold storage
+    notifications: int = 0
+    page_stats: Dict[int, Dict[str, int]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "found": self.found,
+            "new": self.new,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "duplicates": self.duplicates,
+            "restored": self.restored,
+            "notifications": self.notifications,
+        }
+
+
+class ListingIngestor:
+    """Upsert scraped vehicles by stable external id or listing URL"""
+
+    def __init__(self, db: Session, matching_service=None):
+        self.db = db
+        self.matching_service = matching_service
+        self.stats = IngestStats()
+        self.price_rollups = PriceRollupService(db)
+        self.market_index = get_market_index(db)
+        self.cold_storage = ColdStorageService(db)
+        # (listing, previous price) of new prices since the last flush
+        self._price_changes: List[Tuple[VehicleListing, Optional[float]]] = []
+
+    def ingest(self, vehicles: Iterable[Dict[str, Any]], commit: bool = False) -> IngestStats:
+        """Add or update vehicles, optionally committing afterwards"""
+        for vehicle_data in vehicles:
+            self.ingest_one(vehicle_data)
+        if commit:
+            self.db.commit()
+        return self.stats
+
+    def ingest_one(self, vehicle_data: Dict[str, Any]) -> Optional[VehicleListing]:
+        """Upsert one vehicle, running matching if it is new"""
+        try:
+            filtered_data = normalize_listing(vehicle_data)
+
+            # Check if vehicle already exists
+            existing = self.db.query(VehicleListing).filter(or_(
+                VehicleListing.external_id == filtered_data.get('external_id'),
+                VehicleListing.listing_url == filtered_data.get('listing_url')
+            )).first()
+            if existing is None:
+                restored = self._unarchive([filtered_data])
+                existing = restored[0] if restored else None
+
+            vehicle = self._apply(vehicle_data, filtered_data, existing)
+            if existing is None:
+                self.db.flush()  # Get the vehicle ID
+            self._record_prices()
+            if existing is None:
+                self.match(vehicle)
+            return vehicle
+
+        except Exception as e:
+            logger.error(f"Error processing vehicle: {e}")
+            self.stats.errors += 1
+            return None
+
+    def ingest_batch(self, vehicles: List[Dict[str, Any]]) -> List[VehicleListing]:
+        """
+        Upsert a micro-batch with one lookup query and one flush
+
+        Vehicles repeated within the batch are collapsed (the last one wins).
+        Matching is left to the caller; returns the newly created listings.
+        Nothing is committed.
+        """
+        unique: Dict[str, Dict[str, Any]] = {}
+        for vehicle_data in vehicles:
+            key = vehicle_data.get('external_id') or vehicle_data.get('listing_url')
+            if key in unique:
+                self.stats.duplicates += 1
+            unique[key] = vehicle_data
+
+        normalized = [(vehicle_data, normalize_listing(vehicle_data)) for vehicle_data in unique.values()]
+        external_ids = [data['external_id'] for _, data in normalized if data.get('external_id')]
+        urls = [data['listing_url'] for _, data in normalized if data.get('listing_url')]
+
+        by_id: Dict[str, VehicleListing] = {}
+        by_url: Dict[str, VehicleListing] = {}
+        if external_ids or urls:
+            with span("ingest.dedup", vehicles=len(normalized)):
+                for row in self.db.query(VehicleListing).filter(or_(
+                    VehicleListing.external_id.in_(external_ids),
+                    VehicleListing.listing_url.in_(urls)
+                )):
+                    by_id[row.external_id] = row
+                    by_url[row.listing_url] = row
+
+            missing = [data for _, data in normalized
+                       if data.get('external_id') not in by_id and data.get('listing_url') not in by_url]
+            for row in self._unarchive(missing):
+                by_id[row.external_id] = row
+                by_url[row.listing_url] = row
+
+        created = []
+        for vehicle_data, filtered_data in normalized:
+            try:
+                existing = by_id.get(filtered_data.get('external_id')) or by_url.get(filtered_data.get('listing_url'))
+                vehicle = self._apply(vehicle_data, filtered_data, existing)
+                if existing is None:
+                    created.append(vehicle)
+            except Exception as e:
+                logger.error(f"Error processing vehicle: {e}")
+                self.stats.errors += 1
+
+        with span("ingest.db_write", vehicles=len(normalized), created=len(created)):
+            self.db.flush()
+            self._record_prices()
+        return created
+
+    def _unarchive(self, listings: List[Dict[str, Any]]) -> List[VehicleListing]:
+        """Move archived listings matching the scraped ones back to the hot tables"""
+        external_ids = [data['external_id'] for data in listings if data.get('external_id')]
+        urls = [data['listing_url'] for data in listings if data.get('listing_url')]
+        restored = []
+        for vehicle_id in self.cold_storage.find_archived(external_ids, urls):
+            vehicle = self.cold_storage.unarchive(vehicle_id)
+            if vehicle is not None:
+                restored.append(vehicle)
+        self.stats.restored += len(restored)
+        return restored
+
+    def match(self, vehicle: VehicleListing):
+        """Run alert matching for a new listing"""
+        if self.matching_service is None:
+            return
+        try:
+            self.stats.notifications += self.matching_service.process_new_vehicle_matches(vehicle)
+        except Exception as e:
+            logger.error(f"Error processing notifications for vehicle {vehicle.external_id}: {e}")
+
+    def _apply(self, vehicle_data: Dict[str, Any], filtered_data: Dict[str, Any],
+               existing: Optional[VehicleListing]) -> VehicleListing:
+        """Update `existing` or add a new listing, counting the outcome"""
+        stats = self.stats
+        page = stats.page_stats.setdefault(vehicle_data.get('scrape_page', 1), {"found": 0, "new": 0})
+        page["found"] += 1
+        stats.found += 1
+
+        if existing and vehicle_data.get('unchanged'):
+            # Unchanged listing: only record that it is still online
+            existing.scraped_at = filtered_data['scraped_at']
+            existing.is_active = True
+            stats.skipped += 1
+            return existing
+
+        if existing:
+            # Update existing vehicle (ids are stable, so this is an upsert)
+            previous_price = existing.price
+            for key, value in filtered_data.items():
+                if hasattr(existing, key) and value is not None:
+                    setattr(existing, key, value)
+            self.market_index.apply(existing)
+            if existing.price != previous_price:
+                self._price_changes.append((existing, previous_price))
+            stats.updated += 1
+            return existing
+
+        # Create new vehicle listing
+        vehicle = VehicleListing(**filtered_data)
+        self.market_index.apply(vehicle)
+        self.db.add(vehicle)
+        self._price_changes.append((vehicle, None))
+        stats.new += 1
+        page["new"] += 1
+        return vehicle
+
+
+    def _record_prices(self):
+        """Price history and rollups of the prices applied since the last call"""
+        changes, self._price_changes = self._price_changes, []
+        self.price_rollups.record_prices(changes)
+
+
+def normalize_listing(vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Scraped vehicle dict reduced to VehicleListing columns"""
+    return {k: v for k, v in vehicle_data.items() if k in LISTING_FIELDS}
@@ -0,0 +1,350 @@
+"""
+Market Value Estimation
+
+Listings are compared with a comparables index: cells keyed by normalized
+make/model, year and a mileage band, each holding the median price of its
+active listings and a robust spread (1.4826 * median absolute deviation).
+A listing's robust z-score against the most specific cell with enough
+comparables gives its market position (below, at or above market).
+
+The cells are recomputed by a periodic batch job (NumPy when installed,
+pure Python otherwise) that also re-scores every listing. At ingest a
+listing is scored from the in-memory index with at most three dict lookups,
+so filtering and sorting by market position is a plain indexed column read.
+
+Run a recomputation by hand with:
+
+    python -m app.services.market_value
+"""
+
+import argparse
+import logging
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.automotive import MarketValueCell, VehicleListing
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MILEAGE_BAND_KM = 25000
+MAX_MILEAGE_BAND = 12  # 300,000 km and more share a band
+ANY_YEAR = 0
+ANY_BAND = -1
+MIN_COMPARABLES = 5
+MAD_SCALE = 1.4826  # MAD to standard deviation for normal prices
+MIN_SPREAD_RATIO = 0.02  # spread floor, as a share of the median price
+Z_THRESHOLD = 1.0
+INDEX_TTL_SECONDS = 600
+KEY_CACHE_SIZE = 8192
+
+# Model names whose first word alone says nothing ("Serie 3", "Classe A")
+_MODEL_PREFIXES = {'serie', 'series', 'classe', 'class', 'klasse', 'model', 'type'}
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+CellKey = Tuple[str, str, int, int]
+
+
+class CellStats(NamedTuple):
+    listings: int
+    median: float
+    spread: float
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def normalize_make(make: Optional[str]) -> str:
+    """'Mercedes-Benz' -> 'mercedesbenz'"""
+    return _NON_ALNUM.sub('', (make or '').casefold())
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def normalize_model(model: Optional[str]) -> str:
+    """Base model: '320d Touring M Sport' -> '320d', 'Serie 3 Touring' -> 'serie3'"""
+    words = _NON_ALNUM.sub(' ', (model or '').casefold()).split()
+    if len(words) > 1 and words[0] in _MODEL_PREFIXES:
+        return words[0] + words[1]
+    return words[0] if words else ''
+
+
+def mileage_band(mileage: Optional[int]) -> Optional[int]:
+    if mileage is None or mileage < 0:
+        return None
+    return min(mileage // MILEAGE_BAND_KM, MAX_MILEAGE_BAND)
+
+
+def level_keys(make: Optional[str], model: Optional[str], year: Optional[int],
+               mileage: Optional[int]) -> Optional[Tuple[Optional[CellKey], ...]]:
+    """
+    Cell keys of a listing from most to least specific
+
+    (make, model, year, band), (make, model, year, any band) and
+    (make, model, any year, any band); None where year or mileage is
+    unknown, or None overall without make and model.
+    """
+    make_key, model_key = normalize_make(make), normalize_model(model)
+    if not make_key or not model_key:
+        return None
+    band = mileage_band(mileage)
+    return (
+        (make_key, model_key, year, band) if year and band is not None else None,
+        (make_key, model_key, year, ANY_BAND) if year else None,
+        (make_key, model_key, ANY_YEAR, ANY_BAND),
+    )
+
+
+def position_for(zscore: float) -> str:
+    if zscore <= -Z_THRESHOLD:
+        return 'below_market'
+    if zscore >= Z_THRESHOLD:
+        return 'above_market'
+    return 'at_market'
+
+
+class MarketValueIndex:
+    """In-memory comparables index used to score listings at ingest"""
+
+    def __init__(self, cells: Dict[CellKey, CellStats]):
+        self.cells = cells
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session) -> "MarketValueIndex":
+        rows = db.query(
+            MarketValueCell.make_key, MarketValueCell.model_key, MarketValueCell.year,
+            MarketValueCell.mileage_band, MarketValueCell.listings,
+            MarketValueCell.median_price, MarketValueCell.spread
+        ).all()
+        return cls({(make, model, year, band): CellStats(listings, median, spread)
+                    for make, model, year, band, listings, median, spread in rows})
+
+    def assess(self, make: Optional[str], model: Optional[str], year: Optional[int],
+               mileage: Optional[int], price: Optional[float]) -> Optional[Tuple[str, float]]:
+        """(market position, z-score) of a price, or None without enough comparables"""
+        if not price:
+            return None
+        for key in level_keys(make, model, year, mileage) or ():
+            stats = self.cells.get(key) if key is not None else None
+            if stats is not None and stats.listings >= MIN_COMPARABLES:
+                zscore = round((price - stats.median) / stats.spread, 3)
+                return position_for(zscore), zscore
+        return None
+
+    def apply(self, vehicle: VehicleListing) -> Optional[str]:
+        """Set a listing's market position and z-score; returns the position"""
+        result = self.assess(vehicle.make, vehicle.model, vehicle.year, vehicle.mileage, vehicle.price)
+        vehicle.market_position, vehicle.market_zscore = result or (None, None)
+        return vehicle.market_position
+
+
+_market_index: Optional[MarketValueIndex] = None
+_market_index_lock = threading.Lock()
+
+
+def get_market_index(db: Session) -> MarketValueIndex:
+    """Process-wide comparables index, reloaded after INDEX_TTL_SECONDS"""
+    global _market_index
+    index = _market_index
+    if index is None or time.monotonic() - index.loaded_at > INDEX_TTL_SECONDS:
+        with _market_index_lock:
+            index = _market_index
+            if index is None or time.monotonic() - index.loaded_at > INDEX_TTL_SECONDS:
+                try:
+                    index = MarketValueIndex.load(db)
+                except Exception as e:
+                    logger.error(f"Could not load market value index: {e}")
+                    index = MarketValueIndex({})
+                _market_index = index
+    return index
+
+
+def invalidate_market_index():
+    """Reload the index on next use (after a recomputation)"""
+    global _market_index
+    _market_index = None
+
+
+def cell_stats(codes: Sequence[int], prices: Sequence[float],
+               use_numpy: Optional[bool] = None) -> Dict[int, CellStats]:
+    """Listings, median and spread per cell code (codes < 0 are skipped)"""
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    if use_numpy:
+        return _cell_stats_numpy(codes, prices)
+
+    groups: Dict[int, List[float]] = defaultdict(list)
+    for code, price in zip(codes, prices):
+        if code >= 0:
+            groups[code].append(price)
+    cells = {}
+    for code, group in groups.items():
+        median = statistics.median(group)
+        mad = statistics.median([abs(price - median) for price in group])
+        cells[code] = CellStats(len(group), median, max(MAD_SCALE * mad, median * MIN_SPREAD_RATIO, 1.0))
+    return cells
+
+
+def _cell_stats_numpy(codes: Sequence[int], prices: Sequence[float]) -> Dict[int, CellStats]:
+    codes = np.asarray(codes, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    keep = codes >= 0
+    codes, prices = codes[keep], prices[keep]
+    if not len(codes):
+        return {}
+
+    # Sort by cell, then price: each cell is a contiguous sorted run
+    order = _sort_within(prices, codes)
+    codes, prices = codes[order], prices[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    medians = _run_medians(prices, starts, counts)
+
+    groups = np.repeat(np.arange(len(starts)), counts)
+    deviations = np.abs(prices - medians[groups])
+    deviations = deviations[_sort_within(deviations, groups)]
+    spreads = np.maximum(MAD_SCALE * _run_medians(deviations, starts, counts),
+                         np.maximum(medians * MIN_SPREAD_RATIO, 1.0))
+
+    return {int(code): CellStats(int(count), float(median), float(spread))
+            for code, count, median, spread in zip(codes[starts], counts, medians, spreads)}
+
+
+def _sort_within(values, keys):
+    """Order by keys, then values (faster than np.lexsort for one float key)"""
+    order = np.argsort(values)
+    return order[np.argsort(keys[order], kind='stable')]
+
+
+def _run_medians(values, starts, counts):
+    """Medians of the sorted runs values[start:start + count]"""
+    return (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+
+
+@dataclass
+class MarketValueStats:
+    """Outcome of one recomputation"""
+    listings: int = 0
+    cells: int = 0
+    assessed: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+    numpy: bool = NUMPY_AVAILABLE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "listings": self.listings,
+            "cells": self.cells,
+            "assessed": self.assessed,
+            "updated": self.updated,
+            "seconds": self.seconds,
+            "numpy": self.numpy,
+        }
+
+
+class MarketValueService:
+    """Recomputes the comparables index and re-scores all listings"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def recompute(self, batch_size: int = 10000, use_numpy: Optional[bool] = None) -> MarketValueStats:
+        """Rebuild market_value_cells from active listings and update every listing's score"""
+        started = time.monotonic()
+        stats = MarketValueStats(numpy=NUMPY_AVAILABLE if use_numpy is None else use_numpy)
+
+        key_codes: Dict[CellKey, int] = {}
+        ids: List[int] = []
+        prices: List[float] = []
+        current: List[Tuple[Optional[str], Optional[float]]] = []
+        levels: Tuple[List[int], ...] = ([], [], [])
+
+        rows = self.db.query(
+            VehicleListing.id, VehicleListing.make, VehicleListing.model, VehicleListing.year,
+            VehicleListing.mileage, VehicleListing.price,
+            VehicleListing.market_position, VehicleListing.market_zscore
+        ).filter(
+            VehicleListing.is_active == True,
+            VehicleListing.is_duplicate == False,
+            VehicleListing.price > 0
+        ).yield_per(batch_size)
+
+        for vehicle_id, make, model, year, mileage, price, position, zscore in rows:
+            keys = level_keys(make, model, year, mileage)
+            if keys is None:
+                continue
+            ids.append(vehicle_id)
+            prices.append(price)
+            current.append((position, zscore))
+            for level, key in zip(levels, keys):
+                level.append(-1 if key is None else key_codes.setdefault(key, len(key_codes)))
+        stats.listings = len(ids)
+
+        cells = {code: cell for code, cell in cell_stats(
+            levels[0] + levels[1] + levels[2], prices * 3, use_numpy=stats.numpy
+        ).items() if cell.listings >= MIN_COMPARABLES}
+        stats.cells = len(cells)
+
+        self.db.query(MarketValueCell).delete(synchronize_session=False)
+        keys_by_code = {code: key for key, code in key_codes.items()}
+        self.db.bulk_insert_mappings(MarketValueCell, [
+            {"make_key": keys_by_code[code][0], "model_key": keys_by_code[code][1],
+             "year": keys_by_code[code][2], "mileage_band": keys_by_code[code][3],
+             "listings": cell.listings, "median_price": cell.median, "spread": cell.spread}
+            for code, cell in cells.items()
+        ])
+
+        updates = []
+        for i, vehicle_id in enumerate(ids):
+            position = zscore = None
+            for level in levels:
+                cell = cells.get(level[i])
+                if cell is not None:
+                    zscore = round((prices[i] - cell.median) / cell.spread, 3)
+                    position = position_for(zscore)
+                    stats.assessed += 1
+                    break
+            if (position, zscore) != current[i]:
+                updates.append({"id": vehicle_id, "market_position": position, "market_zscore": zscore})
+            if len(updates) >= batch_size:
+                self._write(updates, stats)
+                updates = []
+        self._write(updates, stats)
+
+        self.db.commit()
+        invalidate_market_index()
+        stats.seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Market values recomputed: {stats.to_dict()}")
+        return stats
+
+    def _write(self, updates: List[Dict[str, Any]], stats: MarketValueStats):
+        if updates:
+            self.db.bulk_update_mappings(VehicleListing, updates)
+            stats.updated += len(updates)
+
+
+if __name__ == "__main__":
+    from app.models.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recompute the market value comparables index")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--no-numpy", action="store_true", help="use the pure Python statistics")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(MarketValueService(db).recompute(args.batch_size, use_numpy=False if args.no_numpy else None).to_dict())
+    finally:
+        db.close()
@@ -6,6 +6,7 @@ Implements comprehensive filtering and scoring system
 """
 
 import logging
+import time
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
@@ -13,22 +14,32 @@ from sqlalchemy import and_, or_
 
 from app.models.scout import User, Alert
 from app.models.automotive import VehicleListing
-from app.models.notifications import Notification, AlertMatchLog
+from app.models.notifications import Notification
+from app.core.metrics import histogram
+from app.core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+MATCHER_CANDIDATES = histogram("matcher_candidates_per_listing", "Active alerts scored per listing",
+                               buckets=COUNT_BUCKETS)
+MATCHER_MATCHES = histogram("matcher_matches_per_listing", "Alerts matched per listing", buckets=COUNT_BUCKETS)
+MATCHER_SECONDS = histogram("matcher_listing_seconds", "Time to match one listing against the alerts")
+
 class VehicleMatchingService:
     """Service for matching vehicles against user criteria"""
     
     def __init__(self, db: Session):
         self.db = db
     
+    @traced("match")
     def find_matches_for_vehicle(self, vehicle: VehicleListing) -> List[Tuple[Alert, float]]:
         """
         Find all alerts that match a given vehicle
         Returns list of (alert, match_score) tuples
         """
         matches = []
+        started = time.perf_counter()
         
         # Get all active alerts
         active_alerts = self.db.query(Alert).filter(Alert.is_active == True).all()
@@ -41,6 +52,9 @@ class VehicleMatchingService:
         # Sort by match score (highest first)
         matches.sort(key=lambda x: x[1], reverse=True)
         
+        MATCHER_CANDIDATES.observe(len(active_alerts))
+        MATCHER_MATCHES.observe(len(matches))
+        MATCHER_SECONDS.observe(time.perf_counter() - started)
         logger.info(f"Found {len(matches)} matching alerts for vehicle {vehicle.make} {vehicle.model}")
         return matches
     
@@ -215,16 +229,17 @@ class VehicleMatchingService:
         
         return final_score
     
+    @traced("notify")
     def create_match_notification(self, alert: Alert, vehicle: VehicleListing, match_score: float) -> Optional[Notification]:
         """Create a notification for a vehicle match"""
         try:
             # Check if we already notified about this vehicle for this alert
-            existing_log = self.db.query(AlertMatchLog).filter(
-                AlertMatchLog.alert_id == alert.id,
-                AlertMatchLog.vehicle_id == vehicle.id
+            existing = self.db.query(Notification.id).filter(
+                Notification.alert_id == alert.id,
+                Notification.listing_id == vehicle.id
             ).first()
             
-            if existing_log:
+            if existing:
                 logger.debug(f"Already notified about vehicle {vehicle.id} for alert {alert.id}")
                 return None
             
@@ -247,8 +262,9 @@ class VehicleMatchingService:
                 title=f"New {vehicle.make} {vehicle.model} Match!",
                 message=f"Found a {vehicle.year} {vehicle.make} {vehicle.model} for {vehicle.price} EUR in {vehicle.city}. Match score: {match_score:.0%}",
                 notification_type="vehicle_match",
-                priority="normal" if match_score < 0.8 else "high",
-                data={
+                priority=2 if match_score < 0.8 else 3,
+                listing_id=vehicle.id,
+                content_data={
                     "vehicle_id": vehicle.id,
                     "match_score": match_score,
                     "vehicle_url": vehicle.listing_url
@@ -257,16 +273,6 @@ class VehicleMatchingService:
             
             self.db.add(notification)
             
-            # Log the match
-            match_log = AlertMatchLog(
-                alert_id=alert.id,
-                vehicle_id=vehicle.id,
-                match_score=match_score,
-                notification_sent=True
-            )
-            
-            self.db.add(match_log)
-            
             # Update alert statistics
             alert.last_triggered = datetime.utcnow()
             alert.trigger_count += 1
@@ -281,6 +287,7 @@ class VehicleMatchingService:
             self.db.rollback()
             return None
     
+    @traced("match.listing", root=True)
     def process_new_vehicle_matches(self, vehicle: VehicleListing) -> int:
         """
         Process a new vehicle against all alerts and create notifications
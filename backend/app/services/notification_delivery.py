@@ -7,6 +7,7 @@ This module handles the delivery of notifications through various channels.
 import logging
 import smtplib
 import json
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from email.mime.text import MIMEText
@@ -21,16 +22,26 @@ from app.models.notifications import (
 )
 from app.models.scout import User
 from app.core.config import settings
+from app.core.metrics import histogram
+from app.services.push_delivery import PushDeliveryEngine
+from app.services.system_metrics import age_seconds
 
 logger = logging.getLogger(__name__)
 
+DELIVERY_SECONDS = histogram("notification_delivery_seconds", "Time to hand a notification to its channel",
+                             ["channel", "outcome"])
+DELIVERY_LATENCY = histogram("notification_delivery_latency_seconds", "Time from queueing to delivery",
+                             ["channel"], buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 4 * 3600))
+
 
 class NotificationDeliveryService:
     """Service for delivering notifications through various channels"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, push_engine: Optional[PushDeliveryEngine] = None):
         self.db = db
         self.email_config = self._get_email_config()
+        self.push_engine = push_engine
+        self._push_results: Dict[int, bool] = {}
         
     def _get_email_config(self) -> Dict[str, Any]:
         """Get email configuration from settings"""
@@ -66,6 +77,9 @@ class NotificationDeliveryService:
             NotificationQueue.created_at.asc()
         ).limit(max_notifications).all()
         
+        # Push notifications are sent up front in batched FCM requests
+        self._deliver_pending_push(pending_notifications)
+        
         for queue_item in pending_notifications:
             stats["processed"] += 1
             
@@ -95,11 +109,16 @@ class NotificationDeliveryService:
                     continue
                 
                 # Deliver the notification
+                channel = getattr(notification.notification_type, "value", notification.notification_type)
+                started = time.perf_counter()
                 success = self._deliver_notification(notification)
+                DELIVERY_SECONDS.labels(channel, "sent" if success else "failed").observe(
+                    time.perf_counter() - started)
                 
                 if success:
                     queue_item.status = "completed"
                     queue_item.processing_completed_at = datetime.utcnow()
+                    DELIVERY_LATENCY.labels(channel).observe(age_seconds(queue_item.created_at))
                     stats["sent"] += 1
                 else:
                     # Handle retry logic
@@ -123,8 +142,29 @@ class NotificationDeliveryService:
                 stats["failed"] += 1
                 self.db.commit()
         
+        self._push_results = {}
         return stats
     
+    def _deliver_pending_push(self, queue_items: List[NotificationQueue]):
+        """Deliver every sendable push notification of a queue run as one batch"""
+        self._push_results = {}
+        if not self.push_engine or not queue_items:
+            return
+        
+        notifications = self.db.query(Notification).filter(
+            Notification.id.in_([item.notification_id for item in queue_items]),
+            Notification.notification_type == NotificationType.PUSH
+        ).all()
+        sendable = [n for n in notifications if self._should_send_notification(n)]
+        if not sendable:
+            return
+        
+        try:
+            report = self.push_engine.deliver_notifications(sendable)
+            self._push_results = report.results
+        except Exception as e:
+            logger.error(f"Batched push delivery failed: {str(e)}")
+    
     def _should_send_notification(self, notification: Notification) -> bool:
         """Check if notification should be sent based on user preferences and quiet hours"""
         # Get user preferences
@@ -255,16 +295,20 @@ class NotificationDeliveryService:
             return False
     
     def _send_push_notification(self, notification: Notification) -> bool:
-        """Send push notification (placeholder for future implementation)"""
+        """Send push notification through the push delivery engine"""
         try:
-            # TODO: Implement push notification delivery
-            # This would integrate with services like Firebase Cloud Messaging,
-            # Apple Push Notification Service, etc.
+            if notification.id in self._push_results:
+                return self._push_results[notification.id]
+            
+            if self.push_engine:
+                report = self.push_engine.deliver_notifications([notification])
+                return report.results.get(notification.id, False)
             
+            # No push backend configured - mark as sent so the queue does not retry it
             notification.status = NotificationStatus.SENT
             notification.sent_at = datetime.utcnow()
             
-            logger.info(f"Push notification {notification.id} sent (placeholder)")
+            logger.info(f"Push notification {notification.id} marked as sent (no push backend configured)")
             return True
             
         except Exception as e:
@@ -0,0 +1,246 @@
+"""
+Time Partitioning (PostgreSQL)
+
+The append-only, time-ordered tables (scraping logs, price history,
+notifications and alert match logs) can be range partitioned by month on
+their timestamp column. Each month lives in its own `<table>_pYYYYMM`
+partition, with a `<table>_default` partition catching rows outside the
+created months. Queries filtering on the timestamp only scan the matching
+months, and retention drops whole expired months instead of deleting
+their rows (see RetentionEngine.purge).
+
+The ORM models are unchanged: the partitioned table keeps its name,
+columns and indexes. On PostgreSQL the primary key becomes
+(id, <timestamp column>), ids still come from the table's sequence, and
+foreign keys *referencing* a partitioned table are dropped (PostgreSQL
+requires them to include the partition key); notification_queue entries
+are removed by the notification retention policy instead.
+
+Everything here is a no-op on other databases (SQLite in development).
+Convert the existing tables once, then keep partitions created ahead with
+the daily background job (or by hand):
+
+    python -m app.services.partitioning --migrate
+    python -m app.services.partitioning --months-ahead 3
+"""
+
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from app.core.config import settings
+from app.models.automotive import PriceHistory, ScrapingLog
+from app.models.notifications import AlertMatchLog, Notification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """A table partitioned by month on `column`"""
+    model: Any
+    column: str
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+
+PARTITIONED_TABLES = (
+    PartitionSpec(ScrapingLog, "started_at"),
+    PartitionSpec(PriceHistory, "recorded_at"),
+    PartitionSpec(Notification, "created_at"),
+    PartitionSpec(AlertMatchLog, "started_at"),
+)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """Month of a `<table>_pYYYYMM` partition (None for the default partition)"""
+    match = re.fullmatch(re.escape(table) + r"_p(\d{4})(\d{2})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def expired_partitions(table: str, names: List[str], cutoff: datetime) -> List[str]:
+    """Monthly partitions whose every row is older than `cutoff`, oldest first"""
+    months = {name: partition_month(table, name) for name in names}
+    return sorted((name for name, month in months.items()
+                   if month is not None and add_months(month, 1) <= cutoff.date()), key=months.get)
+
+
+def _bound(month: date) -> str:
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+class PartitionManager:
+    """Creates, lists and drops monthly partitions through a session"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.enabled = db.get_bind().dialect.name == "postgresql"
+        self._quote = db.get_bind().dialect.identifier_preparer.quote
+        self._partitioned: Optional[Set[str]] = None
+
+    def is_partitioned(self, table: str) -> bool:
+        if not self.enabled:
+            return False
+        if self._partitioned is None:
+            self._partitioned = {row[0] for row in self.db.execute(text(
+                "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE pg_table_is_visible(c.oid)"))}
+        return table in self._partitioned
+
+    def partitions(self, table: str) -> List[str]:
+        if not self.is_partitioned(table):
+            return []
+        return [row[0] for row in self.db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid) ORDER BY c.relname"),
+            {"table": table})]
+
+    def ensure(self, months_ahead: Optional[int] = None, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """Create the missing partitions from this month to `months_ahead` months ahead"""
+        months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        first = month_start(today or datetime.utcnow().date())
+        created: Dict[str, List[str]] = {}
+        for spec in PARTITIONED_TABLES:
+            if not self.is_partitioned(spec.table):
+                continue
+            existing = set(self.partitions(spec.table))
+            for offset in range(months_ahead + 1):
+                month = add_months(first, offset)
+                if partition_name(spec.table, month) not in existing:
+                    created.setdefault(spec.table, []).append(self._create_partition(spec, month))
+            self.db.commit()
+        if created:
+            logger.info(f"Created partitions: {created}")
+        return created
+
+    def drop(self, name: str):
+        """Drop one partition (a catalog change, no per-row work)"""
+        self.db.execute(text(f"DROP TABLE {self._quote(name)}"))
+
+    def migrate(self, spec: PartitionSpec, months_ahead: Optional[int] = None) -> bool:
+        """Convert a plain table to a monthly partitioned one in a single transaction"""
+        if not self.enabled or self.is_partitioned(spec.table):
+            return False
+        months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        table = spec.model.__table__
+        name, column = self._quote(spec.table), self._quote(spec.column)
+        staging = self._quote(f"{spec.table}_partitioned")
+        for other in table.metadata.sorted_tables:
+            for fk in other.foreign_key_constraints:
+                if fk.referred_table is table:
+                    logger.warning(f"Dropping foreign key {other.name}.{fk.column_keys} -> {spec.table}")
+        try:
+            # Readers keep going, writers wait until the swap commits
+            self.db.execute(text(f"LOCK TABLE {name} IN EXCLUSIVE MODE"))
+            self.db.execute(text(f"UPDATE {name} SET {column} = now() WHERE {column} IS NULL"))
+            sequence = self.db.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                       {"table": spec.table}).scalar()
+            oldest = self.db.execute(text(f"SELECT min({column}) FROM {name}")).scalar()
+
+            self.db.execute(text(f"CREATE TABLE {staging} (LIKE {name} INCLUDING DEFAULTS) "
+                                 f"PARTITION BY RANGE ({column})"))
+            self.db.execute(text(f"ALTER TABLE {staging} ALTER COLUMN {column} SET NOT NULL"))
+            month = month_start(oldest or datetime.utcnow())
+            last = add_months(month_start(datetime.utcnow().date()), months_ahead)
+            while month <= last:
+                self._create_partition(spec, month, parent=staging)
+                month = add_months(month, 1)
+            self.db.execute(text(f"CREATE TABLE {self._quote(spec.table + '_default')} "
+                                 f"PARTITION OF {staging} DEFAULT"))
+            self.db.execute(text(f"INSERT INTO {staging} SELECT * FROM {name}"))
+
+            # Keep the id sequence alive through the drop
+            if sequence:
+                self.db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+            self.db.execute(text(f"DROP TABLE {name} CASCADE"))
+            self.db.execute(text(f"ALTER TABLE {staging} RENAME TO {name}"))
+            self.db.execute(text(f"ALTER TABLE {name} ADD PRIMARY KEY (id, {column})"))
+            for index in table.indexes:
+                self.db.execute(CreateIndex(index))
+            for fk in table.foreign_key_constraints:
+                self.db.execute(AddConstraint(fk))
+            if sequence:
+                self.db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {name}.id"))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._partitioned = None
+        logger.info(f"Partitioned {spec.table} by month on {spec.column}")
+        return True
+
+    def _create_partition(self, spec: PartitionSpec, month: date, parent: Optional[str] = None) -> str:
+        """Create a month's partition, moving its rows out of the default partition if any"""
+        name = partition_name(spec.table, month)
+        partition, column = self._quote(name), self._quote(spec.column)
+        bounds = f"FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})"
+        if parent is not None:
+            self.db.execute(text(f"CREATE TABLE {partition} PARTITION OF {parent} FOR VALUES {bounds}"))
+            return name
+        parent = self._quote(spec.table)
+        default = self._quote(f"{spec.table}_default")
+        self.db.execute(text(f"CREATE TABLE {partition} (LIKE {parent} INCLUDING DEFAULTS)"))
+        self.db.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {column} >= {_bound(month)} "
+            f"AND {column} < {_bound(add_months(month, 1))} RETURNING *) "
+            f"INSERT INTO {partition} SELECT * FROM moved"))
+        self.db.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {partition} FOR VALUES {bounds}"))
+        return name
+
+
+def ensure_partitions(months_ahead: Optional[int] = None) -> Dict[str, List[str]]:
+    """Create upcoming partitions with a fresh session (startup and the daily job)"""
+    from app.models.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return PartitionManager(db).ensure(months_ahead)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    from app.models.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Monthly partitions of the time-series tables")
+    parser.add_argument("--migrate", action="store_true", help="convert the plain tables first")
+    parser.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        manager = PartitionManager(db)
+        if not manager.enabled:
+            parser.exit(message="Partitioning needs PostgreSQL, nothing to do\n")
+        if args.migrate:
+            for partition_spec in PARTITIONED_TABLES:
+                manager.migrate(partition_spec, args.months_ahead)
+        manager.ensure(args.months_ahead)
+        for partition_spec in PARTITIONED_TABLES:
+            print(partition_spec.table, manager.partitions(partition_spec.table))
+    finally:
+        db.close()
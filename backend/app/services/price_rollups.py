@@ -0,0 +1,281 @@
+"""
+Price History Rollups
+
+Price history points (a listing's first price and every change after it)
+are folded into daily and weekly rollups per make/model/year bucket as they
+are written, so price charts read a few hundred rollup rows instead of
+scanning price_history. Each rollup counts its prices in fixed log-spaced
+bins instead of keeping them, so a rollup stays small however many listings
+it covers and buckets merge by adding counts (e.g. all models of a make).
+Medians read from the bins are within PRICE_BIN_RATIO of the exact value.
+
+Rollups of existing history can be rebuilt with:
+
+    python -m app.services.price_rollups
+"""
+
+import argparse
+import json
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.automotive import DailyPriceRollup, PriceHistory, VehicleListing, WeeklyPriceRollup
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'day': DailyPriceRollup, 'week': WeeklyPriceRollup}
+
+# Width of a price bin: bin i holds prices in [r^i, r^(i+1)), so a bin's
+# middle is within 0.5% of every price in it
+PRICE_BIN_RATIO = 1.01
+
+
+@dataclass(frozen=True)
+class PricePoint:
+    """One observed price of a listing"""
+    make: str
+    model: str
+    year: Optional[int]
+    price: float
+    recorded_at: datetime
+    days_on_market: int = 0
+
+
+def period_start(moment: datetime, period: str) -> date:
+    """First day of the day or week (Monday) containing `moment`"""
+    day = moment.date()
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def price_bin(price: float) -> int:
+    """Index of the log-spaced bin holding `price`"""
+    return math.floor(math.log(max(price, 1.0)) / math.log(PRICE_BIN_RATIO))
+
+
+def bin_price(index: int) -> float:
+    """Geometric middle of a price bin"""
+    return PRICE_BIN_RATIO ** (index + 0.5)
+
+
+def load_bins(text: Optional[str]) -> Dict[int, int]:
+    return {int(index): count for index, count in json.loads(text or '{}').items()}
+
+
+def dump_bins(bins: Dict[int, int]) -> str:
+    return json.dumps({str(index): bins[index] for index in sorted(bins)})
+
+
+def approximate_median(bins: Dict[int, int], low: float, high: float) -> Optional[float]:
+    """Median of binned prices, bin middles clamped to the observed min and max"""
+    count = sum(bins.values())
+    if not count:
+        return None
+    ranks = ((count - 1) // 2, count // 2)
+    values: List[float] = []
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        while len(values) < 2 and ranks[len(values)] < seen:
+            values.append(min(max(bin_price(index), low), high))
+        if len(values) == 2:
+            break
+    return round((values[0] + values[1]) / 2, 2)
+
+
+class PriceRollupService:
+    """Writes price history points and keeps the rollups up to date"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_prices(self, changes: Iterable[Tuple[VehicleListing, Optional[float]]],
+                      recorded_at: Optional[datetime] = None) -> List[PriceHistory]:
+        """
+        Add price history rows for (listing, previous price) pairs
+
+        A previous price of None marks a listing's first price. Listings
+        need an id (flush first). Nothing is committed.
+        """
+        changes = [(vehicle, previous) for vehicle, previous in changes if vehicle.price]
+        if not changes:
+            return []
+        recorded_at = recorded_at or datetime.utcnow()
+
+        # First price of each listing, for days on market
+        first_seen = dict(self.db.query(PriceHistory.vehicle_id, func.min(PriceHistory.recorded_at)).filter(
+            PriceHistory.vehicle_id.in_({vehicle.id for vehicle, _ in changes})
+        ).group_by(PriceHistory.vehicle_id))
+
+        rows, points = [], []
+        for vehicle, previous in changes:
+            first = first_seen.get(vehicle.id)
+            days_on_market = max(0, (recorded_at - _naive_utc(first)).days) if first else 0
+            price_change = vehicle.price - previous if previous else 0
+            row = PriceHistory(
+                vehicle_id=vehicle.id,
+                price=vehicle.price,
+                currency=vehicle.currency or 'EUR',
+                price_change=price_change,
+                change_percentage=(price_change / previous * 100) if previous else 0,
+                market_position=vehicle.market_position,
+                days_on_market=days_on_market,
+                source_website=vehicle.source_website,
+                source_url=vehicle.listing_url,
+                recorded_at=recorded_at
+            )
+            self.db.add(row)
+            rows.append(row)
+            points.append(PricePoint(vehicle.make, vehicle.model, vehicle.year, vehicle.price,
+                                     recorded_at, days_on_market))
+
+        self.add(points)
+        return rows
+
+    def add(self, points: Iterable[PricePoint]) -> int:
+        """Fold points into their daily and weekly buckets; returns buckets touched"""
+        buckets: Dict[tuple, List[PricePoint]] = defaultdict(list)
+        for point in points:
+            for period, rollup_model in PERIODS.items():
+                key = (rollup_model, period_start(_naive_utc(point.recorded_at), period),
+                       point.make, point.model, point.year or 0)
+                buckets[key].append(point)
+
+        for (rollup_model, start, make, model, year), bucket_points in buckets.items():
+            row = self._bucket(rollup_model, start, make, model, year)
+            prices = [point.price for point in bucket_points]
+            bins = load_bins(row.price_bins)
+            for price in prices:
+                index = price_bin(price)
+                bins[index] = bins.get(index, 0) + 1
+            row.price_bins = dump_bins(bins)
+            row.observations = (row.observations or 0) + len(prices)
+            row.price_min = min(prices) if row.price_min is None else min(row.price_min, *prices)
+            row.price_max = max(prices) if row.price_max is None else max(row.price_max, *prices)
+            row.price_sum = (row.price_sum or 0.0) + sum(point.price for point in bucket_points)
+            row.days_on_market_sum = (row.days_on_market_sum or 0) + sum(
+                point.days_on_market for point in bucket_points)
+        return len(buckets)
+
+    def series(self, make: str, model: Optional[str] = None, year: Optional[int] = None,
+               period: str = 'week', start: Optional[date] = None,
+               end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Price statistics per period, merging the matching buckets"""
+        rollup_model = PERIODS[period]
+        query = self.db.query(rollup_model).filter(rollup_model.make == make)
+        if model is not None:
+            query = query.filter(rollup_model.model == model)
+        if year is not None:
+            query = query.filter(rollup_model.year == year)
+        if start is not None:
+            query = query.filter(rollup_model.period_start >= period_start(
+                datetime.combine(start, datetime.min.time()), period))
+        if end is not None:
+            query = query.filter(rollup_model.period_start <= end)
+
+        merged: Dict[date, Dict[str, Any]] = {}
+        for row in query.order_by(rollup_model.period_start):
+            if not row.observations:
+                continue
+            bucket = merged.get(row.period_start)
+            if bucket is None:
+                bucket = merged[row.period_start] = {"bins": {}, "count": 0, "sum": 0.0, "days": 0,
+                                                     "min": row.price_min, "max": row.price_max}
+            for index, count in load_bins(row.price_bins).items():
+                bucket["bins"][index] = bucket["bins"].get(index, 0) + count
+            bucket["count"] += row.observations
+            bucket["sum"] += row.price_sum or 0.0
+            bucket["days"] += row.days_on_market_sum or 0
+            bucket["min"] = min(bucket["min"], row.price_min)
+            bucket["max"] = max(bucket["max"], row.price_max)
+
+        series = []
+        for start_day, bucket in merged.items():
+            count = bucket["count"]
+            series.append({
+                "period_start": start_day.isoformat(),
+                "count": count,
+                "min": bucket["min"],
+                "median": approximate_median(bucket["bins"], bucket["min"], bucket["max"]),
+                "max": bucket["max"],
+                "mean": round(bucket["sum"] / count, 2),
+                "mean_days_on_market": round(bucket["days"] / count, 1),
+            })
+        return series
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recompute all rollups from price_history; returns points folded in"""
+        for rollup_model in PERIODS.values():
+            self.db.query(rollup_model).delete(synchronize_session=False)
+
+        first_seen: Dict[int, datetime] = {}
+        points: List[PricePoint] = []
+        total = 0
+        rows = self.db.query(
+            PriceHistory.vehicle_id, PriceHistory.price, PriceHistory.recorded_at,
+            VehicleListing.make, VehicleListing.model, VehicleListing.year
+        ).join(VehicleListing, VehicleListing.id == PriceHistory.vehicle_id).order_by(
+            PriceHistory.recorded_at, PriceHistory.id
+        ).yield_per(batch_size)
+
+        for vehicle_id, price, recorded_at, make, model, year in rows:
+            if not price or recorded_at is None:
+                continue
+            recorded_at = _naive_utc(recorded_at)
+            first = first_seen.setdefault(vehicle_id, recorded_at)
+            points.append(PricePoint(make, model, year, price, recorded_at, (recorded_at - first).days))
+            if len(points) >= batch_size:
+                total += len(points)
+                self.add(points)
+                points = []
+        total += len(points)
+        self.add(points)
+        self.db.commit()
+        return total
+
+    def _bucket(self, rollup_model, start: date, make: str, model: str, year: int):
+        """Rollup row of a bucket, created if missing"""
+        query = self.db.query(rollup_model).filter(
+            rollup_model.period_start == start, rollup_model.make == make,
+            rollup_model.model == model, rollup_model.year == year
+        )
+        row = query.with_for_update().first()
+        if row is not None:
+            return row
+        try:
+            # Another ingest may create the same bucket concurrently
+            with self.db.begin_nested():
+                row = rollup_model(period_start=start, make=make, model=model, year=year,
+                                   observations=0, price_sum=0.0, days_on_market_sum=0, price_bins='{}')
+                self.db.add(row)
+        except IntegrityError:
+            row = query.with_for_update().one()
+        return row
+
+
+if __name__ == "__main__":
+    from app.models.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild price rollups from price history")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt price rollups from {PriceRollupService(db).rebuild(args.batch_size)} price points")
+    finally:
+        db.close()
@@ -0,0 +1,355 @@
+"""
+Push Delivery Engine
+
+This module batches pending push notifications into FCM multicast and
+send_each requests, runs the batches concurrently and prunes device tokens
+that FCM reports as unregistered or invalid.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.models.notifications import Notification, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+# FCM rejects multicast and send_each requests with more than 500 tokens/messages
+FCM_MAX_BATCH_SIZE = 500
+
+# Per-token errors that mean the token will never work again
+STALE_TOKEN_ERRORS = {
+    "UnregisteredError",
+    "SenderIdMismatchError",
+}
+
+# InvalidArgumentError is also raised for bad payloads (oversized body,
+# reserved data keys); only this message means the token itself is invalid
+INVALID_TOKEN_ERROR = "InvalidArgumentError"
+INVALID_TOKEN_MESSAGE = "registration token"
+
+
+@dataclass(frozen=True)
+class PushPayload:
+    """Device-independent content of a push message"""
+    title: str
+    body: str
+    data: Tuple[Tuple[str, str], ...] = ()
+    image: Optional[str] = None
+
+    @classmethod
+    def from_notification(cls, notification: Notification) -> "PushPayload":
+        """Build the payload shared by every device of a notification"""
+        content_data = notification.content_data or {}
+        data = {"type": "vehicle_match" if notification.listing_id else "notification"}
+        if notification.listing_id:
+            data["listing_id"] = str(notification.listing_id)
+        listing = content_data.get("listing") or {}
+        if listing.get("listing_url"):
+            data["listing_url"] = str(listing["listing_url"])
+
+        return cls(
+            title=notification.title,
+            body=notification.message,
+            data=tuple(sorted(data.items())),
+            image=listing.get("primary_image_url")
+        )
+
+    def data_dict(self) -> Dict[str, str]:
+        """FCM data payload (string values only)"""
+        return dict(self.data)
+
+
+@dataclass
+class PushDeliveryReport:
+    """Outcome of a push delivery run"""
+    results: Dict[int, bool] = field(default_factory=dict)
+    success_count: int = 0
+    failure_count: int = 0
+    batches: int = 0
+    pruned_tokens: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "notifications": len(self.results),
+            "notifications_sent": sum(1 for ok in self.results.values() if ok),
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            "batches": self.batches,
+            "tokens_pruned": len(self.pruned_tokens),
+            "duration_seconds": self.duration_seconds
+        }
+
+
+def is_stale_token_error(error: Optional[BaseException]) -> bool:
+    """Check whether a per-token FCM error means the token should be removed"""
+    if error is None:
+        return False
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & STALE_TOKEN_ERRORS:
+        return True
+    return INVALID_TOKEN_ERROR in names and INVALID_TOKEN_MESSAGE in str(error).lower()
+
+
+def android_config(messaging):
+    """Android delivery options shared by every push message"""
+    return messaging.AndroidConfig(
+        notification=messaging.AndroidNotification(
+            icon='ic_car',
+            color='#FF6B35',
+            sound='default',
+            click_action='FLUTTER_NOTIFICATION_CLICK'
+        ),
+        priority='high'
+    )
+
+
+def apns_config(messaging):
+    """APNS (iOS) delivery options shared by every push message"""
+    return messaging.APNSConfig(
+        payload=messaging.APNSPayload(
+            aps=messaging.Aps(
+                sound='default',
+                badge=1
+            )
+        )
+    )
+
+
+class TokenStore(ABC):
+    """Storage of device tokens used by the push delivery engine"""
+
+    @abstractmethod
+    def tokens_for_users(self, user_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """Return active device tokens keyed by user id"""
+
+    @abstractmethod
+    def remove_tokens(self, tokens: Iterable[str]) -> int:
+        """Remove tokens that FCM reported as stale, returns number removed"""
+
+    def record_failures(self, tokens: Iterable[str]):
+        """Record transient delivery failures (optional)"""
+        pass
+
+    def record_successes(self, tokens: Iterable[str]):
+        """Record deliveries, ending a token's run of failures (optional)"""
+        pass
+
+
+class FirebaseMessagingBackend:
+    """Messaging backend that talks to FCM through firebase_admin"""
+
+    def __init__(self, messaging_module=None):
+        if messaging_module is None:
+            from firebase_admin import messaging as messaging_module
+        self.messaging = messaging_module
+
+    def _notification(self, payload: PushPayload):
+        return self.messaging.Notification(
+            title=payload.title,
+            body=payload.body,
+            image=payload.image
+        )
+
+    def send_multicast(self, payload: PushPayload, tokens: List[str]) -> List[Optional[BaseException]]:
+        """Send one payload to up to 500 tokens, returns one error (or None) per token"""
+        message = self.messaging.MulticastMessage(
+            notification=self._notification(payload),
+            data=payload.data_dict(),
+            tokens=tokens,
+            android=android_config(self.messaging),
+            apns=apns_config(self.messaging)
+        )
+        # send_multicast is deprecated in firebase-admin 6.2+
+        send = getattr(self.messaging, "send_each_for_multicast", None) or self.messaging.send_multicast
+        response = send(message)
+        return [None if resp.success else resp.exception for resp in response.responses]
+
+    def send_each(self, messages: List[Tuple[PushPayload, str]]) -> List[Optional[BaseException]]:
+        """Send up to 500 distinct (payload, token) messages in one request"""
+        fcm_messages = [
+            self.messaging.Message(
+                notification=self._notification(payload),
+                data=payload.data_dict(),
+                token=token,
+                android=android_config(self.messaging),
+                apns=apns_config(self.messaging)
+            )
+            for payload, token in messages
+        ]
+        send = getattr(self.messaging, "send_each", None) or self.messaging.send_all
+        response = send(fcm_messages)
+        return [None if resp.success else resp.exception for resp in response.responses]
+
+
+class PushDeliveryEngine:
+    """Groups push notifications by payload and delivers them in FCM-sized batches"""
+
+    def __init__(self,
+                 backend,
+                 token_store: Optional[TokenStore] = None,
+                 max_workers: Optional[int] = None,
+                 batch_size: int = FCM_MAX_BATCH_SIZE):
+        self.backend = backend
+        self.token_store = token_store
+        self.max_workers = max_workers or settings.PUSH_DELIVERY_MAX_WORKERS
+        self.batch_size = min(batch_size, FCM_MAX_BATCH_SIZE)
+
+    def deliver_notifications(self, notifications: List[Notification]) -> PushDeliveryReport:
+        """
+        Deliver push notifications to every registered device of their users
+
+        Notifications are marked SENT when at least one device accepted the
+        message and FAILED otherwise. The caller owns the commit.
+        """
+        start_time = datetime.utcnow()
+        report = PushDeliveryReport()
+        if not notifications:
+            return report
+
+        user_ids = {n.user_id for n in notifications}
+        tokens_by_user = self.token_store.tokens_for_users(user_ids) if self.token_store else {}
+
+        # payload -> token -> notification ids that share it
+        groups: Dict[PushPayload, Dict[str, List[int]]] = {}
+        deliverable: List[Notification] = []
+        for notification in notifications:
+            report.results[notification.id] = False
+            tokens = tokens_by_user.get(notification.user_id, [])
+            if not tokens:
+                notification.status = NotificationStatus.FAILED
+                notification.error_message = "No registered device tokens"
+                continue
+
+            deliverable.append(notification)
+            payload = PushPayload.from_notification(notification)
+            recipients = groups.setdefault(payload, {})
+            for token in tokens:
+                recipients.setdefault(token, []).append(notification.id)
+
+        token_results = self.send(
+            {payload: list(recipients.keys()) for payload, recipients in groups.items()},
+            report
+        )
+
+        for payload, recipients in groups.items():
+            for token, notification_ids in recipients.items():
+                if (payload, token) in token_results and token_results[(payload, token)] is None:
+                    for notification_id in notification_ids:
+                        report.results[notification_id] = True
+
+        now = datetime.utcnow()
+        for notification in deliverable:
+            if report.results[notification.id]:
+                notification.status = NotificationStatus.SENT
+                notification.sent_at = now
+                notification.error_message = None
+            else:
+                notification.status = NotificationStatus.FAILED
+                notification.error_message = "Push delivery failed for all devices"
+
+        report.duration_seconds = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(f"Push delivery: {report.success_count} delivered, {report.failure_count} failed "
+                    f"in {report.batches} batches, {len(report.pruned_tokens)} tokens pruned")
+        return report
+
+    def send(self,
+             targets: Dict[PushPayload, List[str]],
+             report: Optional[PushDeliveryReport] = None) -> Dict[Tuple[PushPayload, str], Optional[BaseException]]:
+        """
+        Send payloads to their device tokens
+
+        Payloads shared by several tokens go out as multicasts of up to 500
+        tokens; single-token payloads are packed together into send_each
+        batches. Batches run concurrently and stale tokens are pruned from the
+        token store afterwards.
+        """
+        report = report if report is not None else PushDeliveryReport()
+        jobs: List[Tuple[List[Tuple[PushPayload, str]], Callable[[], List[Optional[BaseException]]]]] = []
+
+        singles: List[Tuple[PushPayload, str]] = []
+        for payload, tokens in targets.items():
+            unique_tokens = list(dict.fromkeys(tokens))
+            if len(unique_tokens) == 1:
+                singles.append((payload, unique_tokens[0]))
+                continue
+            for chunk in self._chunks(unique_tokens):
+                jobs.append((
+                    [(payload, token) for token in chunk],
+                    lambda payload=payload, chunk=chunk: self.backend.send_multicast(payload, chunk)
+                ))
+
+        for chunk in self._chunks(singles):
+            jobs.append((chunk, lambda chunk=chunk: self.backend.send_each(chunk)))
+
+        results: Dict[Tuple[PushPayload, str], Optional[BaseException]] = {}
+        batch_failed: Set[Tuple[PushPayload, str]] = set()
+        if not jobs:
+            return results
+
+        report.batches += len(jobs)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            futures = {executor.submit(send_batch): batch for batch, send_batch in jobs}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    errors = future.result()
+                except Exception as e:
+                    # Whole-batch failures (network, auth) say nothing about the tokens
+                    logger.error(f"Push batch of {len(batch)} messages failed: {e}")
+                    for key in batch:
+                        results[key] = e
+                    batch_failed.update(batch)
+                    report.failure_count += len(batch)
+                    continue
+
+                for key, error in zip(batch, errors):
+                    results[key] = error
+                    if error is None:
+                        report.success_count += 1
+                    else:
+                        report.failure_count += 1
+
+        stale_tokens: Set[str] = {
+            token for (payload, token), error in results.items() if is_stale_token_error(error)
+        }
+        if stale_tokens:
+            report.pruned_tokens = sorted(stale_tokens)
+            self._prune_tokens(report.pruned_tokens)
+
+        failed_tokens = {
+            key[1] for key, error in results.items()
+            if error is not None and key not in batch_failed and key[1] not in stale_tokens
+        }
+        delivered_tokens = {token for (payload, token), error in results.items() if error is None}
+        if self.token_store:
+            try:
+                if failed_tokens:
+                    self.token_store.record_failures(sorted(failed_tokens))
+                if delivered_tokens:
+                    self.token_store.record_successes(sorted(delivered_tokens))
+            except Exception as e:
+                logger.error(f"Failed to record push token outcomes: {e}")
+
+        return results
+
+    def _prune_tokens(self, tokens: List[str]):
+        """Remove stale tokens from storage"""
+        if not self.token_store:
+            logger.warning(f"{len(tokens)} stale push tokens reported but no token store configured")
+            return
+        try:
+            removed = self.token_store.remove_tokens(tokens)
+            logger.info(f"Pruned {removed} stale push tokens")
+        except Exception as e:
+            logger.error(f"Failed to prune stale push tokens: {e}")
+
+    def _chunks(self, items: List[Any]) -> Iterable[List[Any]]:
+        for i in range(0, len(items), self.batch_size):
+            yield items[i:i + self.batch_size]
+
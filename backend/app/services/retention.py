@@ -0,0 +1,370 @@
+"""
+Data Retention Engine
+
+Deletes (or updates) old rows in bounded chunks instead of one unbounded
+statement. Each chunk is the next `chunk_size` matching primary keys after
+the previous chunk (an index range scan), deleted in its own short
+transaction followed by a pause, so locks stay short and the WAL is written
+in small pieces other sessions can interleave with.
+
+Rows referencing a chunk are handled first, children before parents:
+dependent rows (images, price history, queue entries) are deleted, while
+loose references (scraping logs, notifications, duplicate pointers) are set
+to NULL. With an archive directory, rows are written to gzip JSONL or
+Parquet (pyarrow) files before they are deleted.
+
+On a monthly partitioned table (app.services.partitioning), a policy
+without extra filters or an archive drops the fully expired months as
+whole partitions first; only the rows of the cutoff month (and of the
+default partition) are deleted in chunks.
+
+Run the data retention policies by hand with:
+
+    python -m app.services.retention --days 365 --archive-dir /var/backups/auto-scouter
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Table, func, select
+from sqlalchemy import column as column_clause, table as table_clause
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import (
+    ArchivedPriceHistory, ArchivedScrapingLog, ArchivedVehicleImage, ArchivedVehicleListing
+)
+from app.models.automotive import PriceHistory, ScrapingLog, VehicleImage, VehicleListing
+from app.models.comparison import VehicleComparisonItem
+from app.models.notifications import AlertMatchLog, Notification, NotificationQueue
+from app.services.partitioning import PartitionManager, expired_partitions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Child:
+    """Rows of `model` whose `column` references the rows being deleted"""
+    model: Any
+    column: str
+    nullify: bool = False  # set the reference to NULL instead of deleting
+    children: Tuple["Child", ...] = ()
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Delete rows of `model` older than `days` by `timestamp_column`"""
+    name: str
+    model: Any
+    timestamp_column: str
+    days: int
+    where: Tuple[Any, ...] = ()  # extra filter expressions
+    children: Tuple[Child, ...] = ()
+
+    def criteria(self, cutoff: datetime) -> List[Any]:
+        return [getattr(self.model, self.timestamp_column) < cutoff, *self.where]
+
+
+@dataclass
+class RetentionResult:
+    """Outcome of one policy run"""
+    name: str
+    rows: int = 0
+    children: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    nullified: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    chunks: int = 0
+    partitions: List[str] = field(default_factory=list)  # dropped monthly partitions
+    archived: int = 0
+    archive_files: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        total = self.rows + sum(self.children.values())
+        return round(total / self.seconds, 1) if self.seconds else float(total)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "rows": self.rows,
+            "children": dict(self.children),
+            "nullified": dict(self.nullified),
+            "chunks": self.chunks,
+            "partitions": self.partitions,
+            "archived": self.archived,
+            "archive_files": self.archive_files,
+            "seconds": self.seconds,
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+def plain_value(value: Any) -> Any:
+    """JSON/Arrow friendly value: naive UTC datetimes, JSON columns as text"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class ArchiveWriter:
+    """Appends deleted rows to one compressed file per table"""
+
+    def __init__(self, directory: str, name: str, fmt: str = "jsonl", stamp: Optional[datetime] = None):
+        if fmt == "parquet" and not PYARROW_AVAILABLE:
+            logger.warning("pyarrow not installed, archiving as gzip JSONL")
+            fmt = "jsonl"
+        self.format = fmt
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = f"{name}-{(stamp or datetime.utcnow()):%Y%m%dT%H%M%S}"
+        self.rows = 0
+        self._writers: Dict[str, Any] = {}
+        self.paths: List[str] = []
+
+    def write(self, table: Table, rows: Sequence[Dict[str, Any]]):
+        if not rows:
+            return
+        rows = [{key: plain_value(value) for key, value in row.items()} for row in rows]
+        writer = self._writers.get(table.name)
+        if writer is None:
+            writer = self._writers[table.name] = self._open(table)
+        if self.format == "parquet":
+            writer.write_table(pa.Table.from_pylist(rows, schema=writer.schema))
+        else:
+            writer.writelines(json.dumps(row, default=json_default) + "\n" for row in rows)
+            writer.flush()  # on disk before the rows are deleted
+        self.rows += len(rows)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def _open(self, table: Table):
+        if self.format == "parquet":
+            path = self.directory / f"{self.prefix}-{table.name}.parquet"
+            writer = pq.ParquetWriter(path, _arrow_schema(table), compression="zstd")
+        else:
+            path = self.directory / f"{self.prefix}-{table.name}.jsonl.gz"
+            writer = gzip.open(path, "at", encoding="utf-8")
+        self.paths.append(str(path))
+        return writer
+
+
+def _arrow_schema(table: Table):
+    """Arrow schema of a table, so every chunk is written with the same types"""
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+class RetentionEngine:
+    """Runs retention policies in bounded, paused chunks"""
+
+    def __init__(self, db: Session, chunk_size: Optional[int] = None, pause_seconds: Optional[float] = None,
+                 archive_dir: Optional[str] = None, archive_format: Optional[str] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 archive_factory: Optional[Callable[[str], Any]] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.RETENTION_CHUNK_SIZE
+        self.pause_seconds = settings.RETENTION_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+        self.archive_dir = settings.RETENTION_ARCHIVE_DIR if archive_dir is None else archive_dir
+        self.archive_format = archive_format or settings.RETENTION_ARCHIVE_FORMAT
+        self.sleep = sleep
+        # Policy name -> archive with write(table, rows)/close()/rows/paths (default: ArchiveWriter files)
+        self.archive_factory = archive_factory
+
+    def run(self, policies: Sequence[RetentionPolicy], now: Optional[datetime] = None) -> List[RetentionResult]:
+        return [self.purge(policy, now) for policy in policies]
+
+    def purge(self, policy: RetentionPolicy, now: Optional[datetime] = None) -> RetentionResult:
+        """Delete the rows a policy selects, children first, one chunk per transaction"""
+        started = time.monotonic()
+        result = RetentionResult(policy.name)
+        cutoff = (now or datetime.utcnow()) - timedelta(days=policy.days)
+        criteria = policy.criteria(cutoff)
+        archive = self._open_archive(policy.name)
+        pk = policy.model.id
+        try:
+            if archive is None and not policy.where:
+                self._drop_partitions(policy, cutoff, result)
+            for ids in self._chunks(policy.model, criteria):
+                self._delete_children(policy.children, ids, result, archive)
+                if archive is not None:
+                    archive.write(policy.model.__table__, self._rows(policy.model.__table__, "id", ids))
+                result.rows += self.db.query(policy.model).filter(pk.in_(ids)).delete(synchronize_session=False)
+                self.db.commit()
+                result.chunks += 1
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            if archive is not None:
+                archive.close()
+                result.archived = archive.rows
+                result.archive_files = archive.paths
+            result.seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Retention {policy.name}: {result.to_dict()}")
+        return result
+
+    def update(self, name: str, model: Any, criteria: Sequence[Any], values: Dict[str, Any]) -> RetentionResult:
+        """UPDATE the rows matching `criteria` in chunks (criteria must stop matching updated rows)"""
+        started = time.monotonic()
+        result = RetentionResult(name)
+        try:
+            for ids in self._chunks(model, criteria):
+                result.rows += self.db.query(model).filter(model.id.in_(ids)).update(
+                    values, synchronize_session=False)
+                self.db.commit()
+                result.chunks += 1
+        except Exception:
+            self.db.rollback()
+            raise
+        result.seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Retention {name}: {result.to_dict()}")
+        return result
+
+    def _drop_partitions(self, policy: RetentionPolicy, cutoff: datetime, result: RetentionResult):
+        """Drop the months of a partitioned table older than the cutoff, children first"""
+        partitions = PartitionManager(self.db)
+        name = policy.model.__tablename__
+        for partition_name in expired_partitions(name, partitions.partitions(name), cutoff):
+            partition = table_clause(partition_name, column_clause("id"))
+            self._delete_children(policy.children, select(partition.c.id), result, None)
+            rows = self.db.execute(select(func.count()).select_from(partition)).scalar()
+            partitions.drop(partition_name)
+            self.db.commit()
+            result.rows += rows
+            result.partitions.append(partition_name)
+
+    def _open_archive(self, name: str):
+        if self.archive_factory is not None:
+            return self.archive_factory(name)
+        if self.archive_dir:
+            return ArchiveWriter(self.archive_dir, name, self.archive_format)
+        return None
+
+    def _chunks(self, model: Any, criteria: Sequence[Any]):
+        """Next chunk_size matching ids after the last chunk, pausing between chunks"""
+        last_id = None
+        while True:
+            query = self.db.query(model.id).filter(*criteria)
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            ids = [row[0] for row in query.order_by(model.id).limit(self.chunk_size)]
+            if not ids:
+                return
+            yield ids
+            if len(ids) < self.chunk_size:
+                return
+            last_id = ids[-1]
+            if self.pause_seconds:
+                self.sleep(self.pause_seconds)
+
+    def _delete_children(self, children: Sequence[Child], parent_ids: Any,  # ids, or a select of them
+                         result: RetentionResult, archive: Optional[ArchiveWriter]):
+        for child in children:
+            table = child.model.__table__
+            column = getattr(child.model, child.column)
+            query = self.db.query(child.model).filter(column.in_(parent_ids))
+            if child.nullify:
+                result.nullified[table.name] += query.update({child.column: None}, synchronize_session=False)
+                continue
+            if child.children:
+                child_ids = [row[0] for row in self.db.query(child.model.id).filter(column.in_(parent_ids))]
+                if child_ids:
+                    self._delete_children(child.children, child_ids, result, archive)
+            if archive is not None:
+                archive.write(table, self._rows(table, child.column, parent_ids))
+            result.children[table.name] += query.delete(synchronize_session=False)
+
+    def _rows(self, table: Table, column: str, ids: List[int]) -> List[Dict[str, Any]]:
+        return [dict(row._mapping) for row in self.db.execute(table.select().where(table.c[column].in_(ids)))]
+
+
+# Rows referencing a vehicle listing
+VEHICLE_CHILDREN = (
+    Child(VehicleImage, "vehicle_id"),
+    Child(PriceHistory, "vehicle_id"),
+    Child(VehicleComparisonItem, "vehicle_id"),
+    Child(ScrapingLog, "vehicle_id", nullify=True),
+    Child(Notification, "listing_id", nullify=True),
+    Child(VehicleListing, "duplicate_of", nullify=True),
+)
+
+NOTIFICATION_POLICY = RetentionPolicy("notifications", Notification, "created_at", 90,
+                                      children=(Child(NotificationQueue, "notification_id"),))
+MATCH_LOG_POLICY = RetentionPolicy("alert_match_logs", AlertMatchLog, "started_at", 30)
+
+
+def data_policies(retention_days: int) -> List[RetentionPolicy]:
+    """Scraping logs, price history and inactive listings older than `retention_days`, hot and archived"""
+    return [
+        RetentionPolicy("scraping_logs", ScrapingLog, "started_at", retention_days),
+        RetentionPolicy("price_history", PriceHistory, "recorded_at", retention_days),
+        RetentionPolicy("vehicle_listings", VehicleListing, "scraped_at", retention_days,
+                        where=(VehicleListing.is_active == False,), children=VEHICLE_CHILDREN),
+        RetentionPolicy("archived_scraping_logs", ArchivedScrapingLog, "started_at", retention_days),
+        RetentionPolicy("archived_price_history", ArchivedPriceHistory, "recorded_at", retention_days),
+        RetentionPolicy("archived_vehicle_listings", ArchivedVehicleListing, "scraped_at", retention_days,
+                        children=(Child(ArchivedVehicleImage, "vehicle_id"), Child(ArchivedPriceHistory, "vehicle_id"))),
+    ]
+
+
+if __name__ == "__main__":
+    from app.models.base import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Delete old data in chunks")
+    parser.add_argument("--days", type=int, default=settings.SCRAPER_DATA_RETENTION_DAYS)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--pause", type=float, help="seconds between chunks")
+    parser.add_argument("--archive-dir", help="archive deleted rows here first")
+    parser.add_argument("--format", choices=["jsonl", "parquet"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        engine = RetentionEngine(db, args.chunk_size, args.pause, args.archive_dir, args.format)
+        for policy_result in engine.run(data_policies(args.days) + [NOTIFICATION_POLICY, MATCH_LOG_POLICY]):
+            print(policy_result.to_dict())
+    finally:
+        db.close()
@@ -0,0 +1,72 @@
+"""
+System Metrics
+
+On-demand metrics read when `/metrics` is scraped: notification queue depth
+and age (one grouped query), database connection pool usage and process
+memory/CPU (app.core.metrics). Event metrics (request latency, fetch and
+parse times, matcher candidates, delivery latency) are recorded where they
+happen; this module only adds what is cheaper to read than to track.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func
+
+from app.core.metrics import REGISTRY
+from app.models.notifications import NotificationQueue
+
+
+def age_seconds(timestamp: Optional[datetime], now: Optional[datetime] = None) -> float:
+    """Seconds since a naive-UTC or aware timestamp"""
+    if timestamp is None:
+        return 0.0
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return max(0.0, ((now or datetime.utcnow()) - timestamp).total_seconds())
+
+
+def notification_queue_collector(session_factory=None):
+    """Queue entries per status and the age of the oldest queued one"""
+    if session_factory is None:
+        from app.models.base import SessionLocal as session_factory
+
+    db = session_factory()
+    try:
+        rows = db.query(NotificationQueue.status, func.count(NotificationQueue.id),
+                        func.min(NotificationQueue.created_at)).group_by(NotificationQueue.status).all()
+    finally:
+        db.close()
+    oldest = next((created for status, _, created in rows if status == "queued"), None)
+    return [
+        ("notification_queue_depth", "gauge", "Notification queue entries by status",
+         [({"status": status}, count) for status, count, _ in rows]),
+        ("notification_queue_oldest_age_seconds", "gauge", "Age of the oldest queued notification",
+         [({}, age_seconds(oldest))]),
+    ]
+
+
+def db_pool_collector(engine=None):
+    """Connections of the SQLAlchemy pool (NullPool keeps none)"""
+    if engine is None:
+        from app.models.base import get_engine
+        engine = get_engine()
+
+    pool = engine.pool
+    samples = [(name, getattr(pool, method)()) for name, method in (
+        ("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow"))
+        if hasattr(pool, method)]
+    return [
+        ("db_pool_connections", "gauge", "Database pool connections by state",
+         [({"state": name, "pool": type(pool).__name__}, value) for name, value in samples]),
+    ]
+
+
+def install_collectors():
+    REGISTRY.add_collector("notification_queue", notification_queue_collector)
+    REGISTRY.add_collector("db_pool", db_pool_collector)
+
+
+def render_metrics() -> str:
+    install_collectors()
+    return REGISTRY.render()
@@ -1,13 +1,27 @@
 """
 Scraping Tasks Module
 Background tasks for vehicle scraping operations
+
+ScrapeAllSourcesTask.delay() records a MultiSourceSession, starts the
+multi-source scrape in a background thread and returns at once; the task
+id is the session id. Each source's pages are stored as they arrive and
+progress (completed/failed sources, vehicle counts, fastest/slowest/average
+source duration) is written to the session row as sources finish.
 """
 
+import json
 import logging
+import threading
+import time
+import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from app.models.automotive import MultiSourceSession, ScrapingSession
+from app.services.listing_ingest import IngestStats, ListingIngestor
+from app.services.matching_service import VehicleMatchingService
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -19,44 +33,181 @@ class TaskResult:
     data: Dict[str, Any] = None
     started_at: datetime = None
     completed_at: datetime = None
-    
+
     def __post_init__(self):
         if self.data is None:
             self.data = {}
 
 class ScrapingTask:
-    """Simulates Celery task behavior for scraping operations"""
-    
-    def __init__(self, task_id: str):
+    """Multi-source scrape running in a background thread"""
+
+    def __init__(self, task_id: str, max_vehicles_per_source: int = 50,
+                 session_factory=None, scraper=None):
         self.id = task_id
+        self.max_vehicles_per_source = max_vehicles_per_source
+        self.session_factory = session_factory
+        self.scraper = scraper
         self.started_at = datetime.utcnow()
         self.completed_at = None
         self.result = None
-        
-    def delay(self, *args, **kwargs):
-        """Simulate Celery's delay method"""
+        self._thread: Optional[threading.Thread] = None
+        self._progress_lock = threading.Lock()
+        self._ingestors: Dict[str, ListingIngestor] = {}
+        self._stats: Dict[str, IngestStats] = {}
+        self._source_errors = 0
+        self._durations: List[float] = []
+
+    def start(self) -> "ScrapingTask":
+        """Run the scrape in a background thread"""
+        self._thread = threading.Thread(target=self.run, name=f"task-{self.id}", daemon=True)
+        self._thread.start()
         return self
-        
+
+    @property
+    def is_finished(self) -> bool:
+        return self.result is not None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the task to finish, True if it did"""
+        if self._thread:
+            self._thread.join(timeout)
+        return self.is_finished
+
     def get_result(self) -> TaskResult:
-        """Get task result"""
+        """Get task result (a running result while the scrape is in progress)"""
         if self.result:
             return self.result
-            
-        # Simulate task completion
-        from app.scraper.multi_source_scraper import multi_source_scraper
-        
-        max_vehicles_per_source = 50  # Default value
-        
+        return TaskResult(
+            id=self.id,
+            success=False,
+            message="Scraping in progress",
+            data={"status": "running"},
+            started_at=self.started_at
+        )
+
+    def _update_session(self, **fields):
+        """Write progress fields to the MultiSourceSession row"""
+        db = self.session_factory()
+        try:
+            session = db.query(MultiSourceSession).filter(
+                MultiSourceSession.session_id == self.id
+            ).first()
+            if session:
+                for field, value in fields.items():
+                    setattr(session, field, value)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating multi-source session {self.id}: {e}")
+        finally:
+            db.close()
+
+    def _ingest_page(self, source: str, page: int, vehicles: List[Dict[str, Any]]):
+        """Store one page of a source (called from that source's worker thread)
+
+        Raises if a listing of the page was not stored, so the scraper does
+        not mark the page as stored.
+        """
+        ingestor = self._ingestors.get(source)
+        if ingestor is None:
+            db = self.session_factory()
+            ingestor = self._ingestors[source] = ListingIngestor(db, VehicleMatchingService(db))
+            self._stats[source] = ingestor.stats
+        errors = ingestor.stats.errors
+        try:
+            ingestor.ingest(vehicles, commit=True)
+        except Exception:
+            ingestor.db.rollback()
+            raise
+        finally:
+            with self._progress_lock:
+                self._update_session(**self._vehicle_totals())
+        if ingestor.stats.errors != errors:
+            raise RuntimeError(f"{ingestor.stats.errors - errors} vehicles of page {page} not stored")
+
+    def _vehicle_totals(self) -> Dict[str, int]:
+        stats = list(self._stats.values())
+        return {
+            "total_vehicles_found": sum(s.found for s in stats),
+            "total_vehicles_new": sum(s.new for s in stats),
+            "total_vehicles_updated": sum(s.updated for s in stats),
+            "total_errors": sum(s.errors for s in stats) + self._source_errors,
+        }
+
+    def _source_finished(self, result, completed: List[str], failed: List[str]):
+        """Record a finished source: its ScrapingSession row and the aggregated progress"""
+        ingestor = self._ingestors.pop(result.source, None)
+        if ingestor:
+            ingestor.db.close()
+        stats = self._stats.get(result.source) or IngestStats()
+
+        db = self.session_factory()
+        try:
+            db.add(ScrapingSession(
+                session_id=str(uuid.uuid4()),
+                source_website=result.source,
+                session_type="multi_source",
+                multi_source_session_id=self.id,
+                total_vehicles_found=result.vehicles_scraped,
+                total_vehicles_new=stats.new,
+                total_vehicles_updated=stats.updated,
+                total_vehicles_skipped=stats.skipped,
+                total_errors=len(result.errors) + stats.errors,
+                duration_seconds=int(result.duration_seconds),
+                completed_at=datetime.utcnow(),
+                status="completed" if result.success else "failed",
+                error_message="; ".join(result.errors) or None
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error recording session of {result.source}: {e}")
+        finally:
+            db.close()
+
+        with self._progress_lock:
+            (completed if result.success else failed).append(result.source)
+            self._durations.append(result.duration_seconds)
+            self._source_errors += len(result.errors)
+            self._update_session(
+                sources_completed=json.dumps(completed),
+                sources_failed=json.dumps(failed),
+                completed_sources=len(completed),
+                failed_sources=len(failed),
+                average_source_duration=sum(self._durations) / len(self._durations),
+                fastest_source_duration=min(self._durations),
+                slowest_source_duration=max(self._durations),
+                **self._vehicle_totals()
+            )
+
+    def run(self):
+        """Scrape all enabled sources and record the outcome"""
+        if self.scraper is None:
+            from app.scraper.multi_source_scraper import multi_source_scraper
+            self.scraper = multi_source_scraper
+
+        start = time.monotonic()
+        completed: List[str] = []
+        failed: List[str] = []
+
         try:
-            # Run the scraping operation
-            results = multi_source_scraper.scrape_all_enabled(max_vehicles_per_source)
-            
+            results = self.scraper.scrape_all_enabled(
+                self.max_vehicles_per_source,
+                on_page=self._ingest_page,
+                on_result=lambda result: self._source_finished(result, completed, failed)
+            )
+
             # Calculate totals
             total_vehicles = sum(r.vehicles_scraped for r in results.values() if r.success)
             successful_sources = len([r for r in results.values() if r.success])
             failed_sources = len([r for r in results.values() if not r.success])
-            
+
             self.completed_at = datetime.utcnow()
+            self._update_session(
+                status="completed" if successful_sources > 0 else "failed",
+                completed_at=self.completed_at,
+                total_duration_seconds=int(time.monotonic() - start)
+            )
             self.result = TaskResult(
                 id=self.id,
                 success=successful_sources > 0,
@@ -69,6 +220,7 @@ class ScrapingTask:
                         source: {
                             "success": result.success,
                             "vehicles_scraped": result.vehicles_scraped,
+                            "duration_seconds": result.duration_seconds,
                             "errors": result.errors
                         }
                         for source, result in results.items()
@@ -77,9 +229,17 @@ class ScrapingTask:
                 started_at=self.started_at,
                 completed_at=self.completed_at
             )
-            
+            logger.info(f"Task {self.id} completed: {self.result.message}")
+
         except Exception as e:
+            logger.error(f"Task {self.id} failed: {e}")
             self.completed_at = datetime.utcnow()
+            self._update_session(
+                status="failed",
+                error_message=str(e),
+                completed_at=self.completed_at,
+                total_duration_seconds=int(time.monotonic() - start)
+            )
             self.result = TaskResult(
                 id=self.id,
                 success=False,
@@ -88,33 +248,55 @@ class ScrapingTask:
                 started_at=self.started_at,
                 completed_at=self.completed_at
             )
-            
-        return self.result
+        finally:
+            for ingestor in self._ingestors.values():
+                ingestor.db.close()
+            self._ingestors.clear()
 
 class ScrapeAllSourcesTask:
     """Task for scraping all sources"""
-    
-    def __init__(self):
-        self.task_counter = 0
-        
-    def delay(self, max_vehicles_per_source: int = 50) -> ScrapingTask:
-        """Create and start a scraping task"""
-        self.task_counter += 1
-        task_id = f"scrape_all_{self.task_counter}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-        
-        task = ScrapingTask(task_id)
-        
-        logger.info(f"Started scraping task {task_id} with max {max_vehicles_per_source} vehicles per source")
-        
-        # In a real Celery setup, this would be queued
-        # For now, we'll execute it immediately in the background
+
+    def __init__(self, session_factory=None, scraper=None):
+        self.session_factory = session_factory
+        self.scraper = scraper
+        self.tasks: Dict[str, ScrapingTask] = {}
+
+    def delay(self, max_vehicles_per_source: int = 50, trigger_type: str = "api") -> ScrapingTask:
+        """Record a multi-source session and start scraping it in the background"""
+        if self.session_factory is None:
+            from app.models.base import SessionLocal
+            self.session_factory = SessionLocal
+        scraper = self.scraper
+        if scraper is None:
+            from app.scraper.multi_source_scraper import multi_source_scraper
+            scraper = multi_source_scraper
+
+        task_id = str(uuid.uuid4())
+        sources = [source for source, info in scraper.sources.items() if info["enabled"]]
+
+        db = self.session_factory()
         try:
-            result = task.get_result()
-            logger.info(f"Task {task_id} completed: {result.message}")
-        except Exception as e:
-            logger.error(f"Task {task_id} failed: {e}")
-            
-        return task
+            db.add(MultiSourceSession(
+                session_id=task_id,
+                trigger_type=trigger_type,
+                max_vehicles_per_source=max_vehicles_per_source,
+                sources_requested=json.dumps(sources),
+                total_sources=len(sources),
+                status="running"
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+        task = ScrapingTask(task_id, max_vehicles_per_source,
+                            session_factory=self.session_factory, scraper=scraper)
+        self.tasks[task_id] = task
+
+        logger.info(f"Started scraping task {task_id} with max {max_vehicles_per_source} vehicles per source")
+        return task.start()
+
+    def get_task(self, task_id: str) -> Optional[ScrapingTask]:
+        return self.tasks.get(task_id)
 
 # Global task instance (simulates Celery task)
 scrape_all_sources_task = ScrapeAllSourcesTask()
@@ -0,0 +1 @@
+# Benchmark scripts, run from backend/ with `python -m benchmarks.<name>`
@@ -0,0 +1,167 @@
+"""
+Logging Middleware Benchmark
+
+Calls a small FastAPI app directly over ASGI (no server, no sockets) with
+concurrent clients, with and without LoggingMiddleware, and reports request
+latency (mean, p50, p99) and throughput:
+
+    python -m benchmarks.bench_logging_middleware --requests 5000 --concurrency 20
+
+The middleware runs as plain ASGI middleware ("asgi") and, for comparison,
+wrapped in Starlette's BaseHTTPMiddleware with the same logging ("basehttp",
+how it used to run). It writes JSON records to a temporary file either from
+the calling thread ("direct") or through the bounded queue and listener
+thread ("queued"), logging every request or a sample of the successful ones.
+Every tenth request is a JSON POST. Records still queued when a run ends are
+written before the next run starts and are not part of the timing.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging_config import JSONFormatter, start_queued_logging
+from app.middleware.logging_middleware import LoggingMiddleware
+
+ITEM = b'{"make": "Volkswagen", "model": "Golf", "year": 2019, "price": 14500}'
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """LoggingMiddleware's logging run through BaseHTTPMiddleware.dispatch"""
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app)
+        self.logging = LoggingMiddleware(app, **kwargs)
+
+    async def dispatch(self, request, call_next):
+        start_time = time.perf_counter()
+        sampled = self.logging.sample_rate >= 1.0 or self.logging._random() < self.logging.sample_rate
+        if sampled:
+            self.logging._log_incoming_request(self.logging._extract_request_info(request))
+        response = await call_next(request)
+        self.logging._log_response(request, None, response.status_code, time.perf_counter() - start_time, sampled)
+        return response
+
+
+def build_app(middleware=None, logger: Optional[logging.Logger] = None, sample_rate: float = 1.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id, "make": "Volkswagen"}
+
+    @app.post("/items")
+    async def create_item(item: dict):
+        return item
+
+    if middleware is not None:
+        app.add_middleware(middleware, sample_rate=sample_rate, logger=logger)
+    return app
+
+
+async def call(app, method: str, path: str, body: bytes = b"") -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def drive(app, requests: int, concurrency: int) -> tuple:
+    """(seconds, latencies) for `requests` requests from `concurrency` clients"""
+    latencies: List[float] = []
+
+    async def client(first: int):
+        for i in range(first, requests, concurrency):
+            started = time.perf_counter()
+            if i % 10 == 0:
+                status = await call(app, "POST", "/items", ITEM)
+            else:
+                status = await call(app, "GET", f"/items/{i}")
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+def make_logger(name: str, path: Path, queued: bool, queue_size: int):
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(JSONFormatter())
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    if not queued:
+        logger.addHandler(handler)
+        return logger, None
+    return logger, start_queued_logging(logger, [handler], queue_size)
+
+
+def run(requests: int, concurrency: int, sample_rates: List[float], queue_size: int,
+        directory: Path) -> List[tuple]:
+    """(label, seconds, latencies, dropped records) per configuration"""
+    results = [("no middleware", *asyncio.run(drive(build_app(), requests, concurrency)), 0)]
+    for kind, middleware in (("basehttp", BaseHTTPLoggingMiddleware), ("asgi", LoggingMiddleware)):
+        for queued in (False, True):
+            for rate in sample_rates:
+                label = f"{kind} {'queued' if queued else 'direct'} {rate:.0%}"
+                logger, listener = make_logger(label.replace(" ", "_").rstrip("%"), directory / f"{label}.log",
+                                               queued, queue_size)
+                app = build_app(middleware, logger, rate)
+                seconds, latencies = asyncio.run(drive(app, requests, concurrency))
+                dropped = 0
+                if listener is not None:
+                    dropped = sum(logger.handlers[0].dropped.values())
+                    listener.stop()
+                results.append((label, seconds, latencies, dropped))
+    return results
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LoggingMiddleware latency under load")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--sample-rates", type=float, nargs="*", default=[1.0, 0.1],
+                        help="share of successful requests logged")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(drive(build_app(), 200, 1))  # warm up routing and validation
+        results = run(args.requests, args.concurrency, args.sample_rates, args.queue_size, Path(tmp))
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients")
+    print(f"{'mode':<24}{'mean ms':>9}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'dropped':>9}")
+    for label, seconds, latencies, dropped in results:
+        print(f"{label:<24}{statistics.fmean(latencies) * 1000:>9.2f}{percentile(latencies, 0.5) * 1000:>9.2f}"
+              f"{percentile(latencies, 0.99) * 1000:>9.2f}{args.requests / seconds:>9.0f}{dropped:>9}")
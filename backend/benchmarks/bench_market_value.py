@@ -0,0 +1,83 @@
+"""
+Market Value Recomputation Benchmark
+
+Times the comparables index statistics (median and MAD per cell over all
+three cell levels) for generated listings, with the pure Python
+implementation and, when installed, NumPy:
+
+    python -m benchmarks.bench_market_value --listings 1000000
+
+Both implementations must produce the same cells; the run fails otherwise.
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from app.services import market_value
+from app.services.market_value import cell_stats, level_keys
+
+MAKES = {'BMW': ['320d Touring', '118i', 'X3 xDrive20d', 'Serie 5 520d'],
+         'Volkswagen': ['Golf GTI', 'Polo', 'Passat Variant', 'Tiguan'],
+         'Fiat': ['Panda 4x4', '500', 'Tipo SW'],
+         'Volvo': ['XC60 B4', 'V60', 'XC40 Recharge'],
+         'Mercedes-Benz': ['Classe A 180', 'C220 CDI', 'GLC 300']}
+
+
+def sample_listings(count: int, seed: int = 0) -> List[Tuple[str, str, int, int, float]]:
+    """(make, model, year, mileage, price) with prices falling by age and mileage"""
+    rng = random.Random(seed)
+    makes = list(MAKES)
+    listings = []
+    for _ in range(count):
+        make = rng.choice(makes)
+        model = rng.choice(MAKES[make])
+        year = rng.randint(2012, 2025)
+        mileage = rng.randint(0, 320000)
+        base = 45000 * 0.88 ** (2025 - year) - mileage * 0.04
+        listings.append((make, model, year, mileage, round(max(1500.0, rng.gauss(base, base * 0.12)), 0)))
+    return listings
+
+
+def encode(listings) -> Tuple[List[int], List[float]]:
+    """Cell codes of all three levels and the matching prices, as recompute() builds them"""
+    key_codes: Dict[tuple, int] = {}
+    levels: Tuple[List[int], ...] = ([], [], [])
+    prices = []
+    for make, model, year, mileage, price in listings:
+        prices.append(price)
+        for level, key in zip(levels, level_keys(make, model, year, mileage)):
+            level.append(-1 if key is None else key_codes.setdefault(key, len(key_codes)))
+    return levels[0] + levels[1] + levels[2], prices * 3
+
+
+def run(count: int, seed: int = 0) -> List[Tuple[str, float, int]]:
+    """(label, seconds, cells) for encoding and each statistics implementation"""
+    listings = sample_listings(count, seed)
+    started = time.perf_counter()
+    codes, prices = encode(listings)
+    results = [("encode keys", time.perf_counter() - started, 0)]
+
+    started = time.perf_counter()
+    expected = cell_stats(codes, prices, use_numpy=False)
+    results.append(("python", time.perf_counter() - started, len(expected)))
+
+    if market_value.NUMPY_AVAILABLE:
+        started = time.perf_counter()
+        cells = cell_stats(codes, prices, use_numpy=True)
+        results.append(("numpy", time.perf_counter() - started, len(cells)))
+        assert cells == expected, "NumPy cell statistics differ from pure Python"
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark market value cell statistics")
+    parser.add_argument("--listings", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.listings} listings, NumPy {'available' if market_value.NUMPY_AVAILABLE else 'not installed'}")
+    print(f"{'step':<14}{'seconds':>10}{'cells':>8}")
+    for label, seconds, cells in run(args.listings, args.seed):
+        print(f"{label:<14}{seconds:>10.2f}{cells:>8}")
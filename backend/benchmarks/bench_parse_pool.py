@@ -0,0 +1,97 @@
+"""
+Parse Pool Benchmark
+
+Parses a fixture corpus of saved result pages inline and with ParsePool at
+increasing worker counts, reporting pages per second and the speedup over
+inline parsing:
+
+    python -m benchmarks.bench_parse_pool --pages 1000 --corpus /tmp/ayvens-pages
+
+The corpus is generated into --corpus (a temporary directory by default)
+unless it already holds pages, so saved real pages can be benchmarked too.
+Speedup is bounded by the number of CPUs reported at the top.
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from app.scraper.page_parser import parse_results_page
+from app.scraper.parse_pool import ParsePool
+from benchmarks.bench_parsing import sample_prices, sample_titles
+
+BASE_URL = "https://carmarket.ayvens.com"
+LISTINGS_PER_PAGE = 20
+
+
+def write_corpus(directory: Path, pages: int, seed: int = 0) -> None:
+    """Save `pages` synthetic result pages shaped like Ayvens lot listings"""
+    rng = random.Random(seed)
+    titles = sample_titles(pages * LISTINGS_PER_PAGE, seed)
+    prices = sample_prices(pages * LISTINGS_PER_PAGE, seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for page in range(pages):
+        cards = []
+        for i in range(LISTINGS_PER_PAGE):
+            n = page * LISTINGS_PER_PAGE + i
+            cards.append(
+                f'<div class="lot-card" data-lot-id="{n}"><div class="lot-image"><img src="/images/{n}.jpg"></div>'
+                f'<h3 class="lot-title">{titles[n]}</h3><span class="lot-price">{prices[n]}</span>'
+                f'<ul class="specs"><li>{rng.randint(1000, 250000)} km</li><li>Diesel</li></ul>'
+                f'<a href="/lots/{n}">View lot {n}</a></div>'
+            )
+        html = (f'<html><head><title>Lots - page {page + 1}</title></head><body><nav>'
+                + ''.join(f'<a href="/lots?page={p}">{p}</a>' for p in range(1, 11))
+                + f'</nav><div class="results">{"".join(cards)}</div></body></html>')
+        (directory / f"page-{page:05d}.html").write_text(html, encoding="utf-8")
+
+
+def load_corpus(directory: Path) -> List[bytes]:
+    return [path.read_bytes() for path in sorted(directory.glob("*.html"))]
+
+
+def run(corpus: List[bytes], worker_counts: List[int]) -> List[tuple]:
+    """(label, seconds) for inline parsing and each pool size"""
+    started = time.perf_counter()
+    expected = [parse_results_page(content, BASE_URL) for content in corpus]
+    results = [("inline", time.perf_counter() - started)]
+
+    for workers in worker_counts:
+        pool = ParsePool(workers=workers).start()
+        try:
+            started = time.perf_counter()
+            parsed = list(pool.parse_pages(corpus, BASE_URL))
+            results.append((f"{workers} workers", time.perf_counter() - started))
+        finally:
+            pool.shutdown()
+        assert parsed == expected, "pool results differ from inline parsing"
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the result page parse pool")
+    parser.add_argument("--pages", type=int, default=1000, help="pages in a generated corpus")
+    parser.add_argument("--corpus", type=Path, help="directory of saved result pages")
+    parser.add_argument("--workers", type=int, nargs="*", help="pool sizes (default: 1, 2, 4, ... CPUs)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.corpus or Path(tmp)
+        if not any(directory.glob("*.html")):
+            write_corpus(directory, args.pages)
+        corpus = load_corpus(directory)
+
+        print(f"{len(corpus)} pages, {cpus} CPUs")
+        results = run(corpus, worker_counts)
+        inline_seconds = results[0][1]
+        print(f"{'mode':<12}{'seconds':>10}{'pages/s':>10}{'speedup':>10}")
+        for label, seconds in results:
+            print(f"{label:<12}{seconds:>10.2f}{len(corpus) / seconds:>10.0f}{inline_seconds / seconds:>9.2f}x")
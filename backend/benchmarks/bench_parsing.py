@@ -0,0 +1,165 @@
+"""
+Listing Field Extraction Benchmark
+
+Times app.scraper.parsing against the per-call implementations it replaced
+(kept below as legacy_* baselines) over generated titles and price strings:
+
+    python -m benchmarks.bench_parsing --count 100000
+
+Titles repeat across crawls, so make/model parsing is timed both on a cold
+cache and on a second pass over the same titles.
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List, Optional, Sequence
+
+from app.scraper import parsing
+
+LEGACY_MAKES = [
+    'BMW', 'Mercedes', 'Mercedes-Benz', 'Audi', 'Volkswagen', 'VW',
+    'Ford', 'Opel', 'Peugeot', 'Renault', 'Fiat', 'Toyota', 'Honda',
+    'Nissan', 'Hyundai', 'Kia', 'Mazda', 'Mitsubishi', 'Subaru',
+    'Volvo', 'Skoda', 'Seat', 'Citroen', 'Alfa Romeo', 'Lancia',
+    'Porsche', 'Jaguar', 'Land Rover', 'Mini', 'Smart', 'Dacia'
+]
+
+MODELS = ['320d Touring', 'C220 CDI', 'A4 Avant', 'Golf GTI', 'Focus', 'Corsa-e', '208 GT Line',
+          'Clio V', 'Panda 4x4', 'Yaris Hybrid', 'Qashqai', 'XC60 B4', 'Octavia RS', 'Cooper S',
+          'ForTwo', 'Duster', '', 'Giulia Veloce', 'Range Rover Evoque']
+TITLE_NOISE = ['', ' 2019', ' (2021)', ', 150 CV', ' [demo]', ' - Diesel', ' Automatic 2020', ' ß']
+PRICE_FORMATS = ['€ {int}', '{int} EUR', '€{grouped_dot}', '{grouped_dot},{cents}', '{grouped_comma}.{cents}',
+                 '{grouped_comma}', '{int},{cents}', '{int}.{cents}', 'EUR {grouped_space}', 'n/a', '',
+                 '{int},{cents}{cents}', 'Prix: {grouped_dot} €']
+
+
+def sample_titles(count: int, seed: int = 0, distinct: Optional[int] = None) -> List[str]:
+    """Listing titles; `distinct` limits how many different titles occur"""
+    rng = random.Random(seed)
+    makes = LEGACY_MAKES + ['Tesla', 'Cupra', 'bmw', 'MINI', 'Seat', 'Land-Rover']
+    pool_size = distinct or count
+    pool = []
+    for _ in range(pool_size):
+        prefix = rng.choice(['', '', 'Used ', 'Occasion ', '-'])
+        joiner = rng.choice([' ', ' ', '', ' - '])
+        pool.append(f"{prefix}{rng.choice(makes)}{joiner}{rng.choice(MODELS)}{rng.choice(TITLE_NOISE)}")
+    return pool if distinct is None else [rng.choice(pool) for _ in range(count)]
+
+
+def sample_prices(count: int, seed: int = 0) -> List[str]:
+    """Price strings in the formats seen on listing pages"""
+    rng = random.Random(seed)
+    prices = []
+    for _ in range(count):
+        value = rng.randint(0, 250000)
+        prices.append(rng.choice(PRICE_FORMATS).format(
+            int=value,
+            cents=f"{rng.randint(0, 99):02d}",
+            grouped_dot=f"{value:,}".replace(',', '.'),
+            grouped_comma=f"{value:,}",
+            grouped_space=f"{value:,}".replace(',', ' '),
+        ))
+    return prices
+
+
+def legacy_parse_price(price_text: str) -> Optional[float]:
+    """AyvensCarmarketScraper._extract_price before the shared parsers"""
+    if not price_text:
+        return None
+    price_clean = re.sub(r'[^\d,.]', '', price_text)
+    if ',' in price_clean and '.' in price_clean:
+        price_clean = price_clean.replace(',', '')
+    elif ',' in price_clean:
+        if len(price_clean.split(',')[1]) <= 2:
+            price_clean = price_clean.replace(',', '.')
+        else:
+            price_clean = price_clean.replace(',', '')
+    try:
+        return float(price_clean)
+    except ValueError:
+        return None
+
+
+def legacy_clean_price(price_text: str) -> Optional[float]:
+    """BaseScraper.clean_price before the shared parsers"""
+    if not price_text:
+        return None
+    price_clean = re.sub(r'[€$£,\s]', '', price_text)
+    price_clean = price_clean.replace('.', '')
+    try:
+        return float(price_clean)
+    except ValueError:
+        return None
+
+
+def legacy_clean_number(text: str) -> Optional[int]:
+    """BaseScraper.clean_number before the shared parsers"""
+    if not text:
+        return None
+    numbers = re.findall(r'\d+', text.replace('.', '').replace(',', ''))
+    if numbers:
+        try:
+            return int(numbers[0])
+        except ValueError:
+            pass
+    return None
+
+
+def legacy_parse_make_model(title: str) -> tuple:
+    """AyvensCarmarketScraper._parse_make_model before the shared parsers"""
+    title_upper = title.upper()
+    for make in LEGACY_MAKES:
+        if make.upper() in title_upper:
+            make_index = title_upper.find(make.upper())
+            model_part = title[make_index + len(make):].strip()
+            model = re.split(r'[\d]{4}|,|\(|\[', model_part)[0].strip()
+            model = re.sub(r'^[-\s]+', '', model)
+            return make, model if model else 'Unknown'
+    words = title.split()
+    if words:
+        return words[0], ' '.join(words[1:3]) if len(words) > 1 else 'Unknown'
+    return 'Unknown', 'Unknown'
+
+
+def timed(func: Callable, inputs: Sequence, setup: Optional[Callable] = None, repeat: int = 3) -> float:
+    """Best of `repeat` passes over inputs, calling setup before each"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for value in inputs:
+            func(value)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(count: int, seed: int = 0) -> List[tuple]:
+    """(name, legacy seconds, shared parser seconds) per benchmark"""
+    # Crawls see each title many times: 20 occurrences per distinct title
+    titles = sample_titles(count, seed, distinct=max(1, count // 20))
+    prices = sample_prices(count, seed)
+    make_model = parsing.parse_make_model
+    legacy_make_model = timed(legacy_parse_make_model, titles)
+
+    return [
+        ("price (auto)", timed(legacy_parse_price, prices), timed(parsing.parse_price, prices)),
+        ("price (grouped)", timed(legacy_clean_price, prices), timed(parsing.parse_grouped_price, prices)),
+        ("number", timed(legacy_clean_number, prices), timed(parsing.parse_number, prices)),
+        ("make/model (no cache)", legacy_make_model, timed(make_model.__wrapped__, titles)),
+        ("make/model (cold cache)", legacy_make_model, timed(make_model, titles, setup=make_model.cache_clear)),
+        ("make/model (warm cache)", legacy_make_model, timed(make_model, titles)),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark listing field extraction")
+    parser.add_argument("--count", type=int, default=100000, help="titles and price strings to parse")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<26}{'legacy':>10}{'shared':>10}{'speedup':>10}")
+    for name, legacy_seconds, seconds in run(args.count, args.seed):
+        print(f"{name:<26}{legacy_seconds:>9.3f}s{seconds:>9.3f}s{legacy_seconds / seconds:>9.1f}x")
@@ -0,0 +1,146 @@
+"""
+Startup Benchmark
+
+Measures time to first 200: a fresh interpreter imports the API, runs the
+lifespan startup and serves GET /health (over ASGI, no server), as a new
+autoscaled instance would before it takes traffic:
+
+    python -m benchmarks.bench_startup --runs 5 --target-ms 2500
+
+Each run starts in an empty working directory, so the SQLite fallback
+database is created from scratch (the first boot of an instance). With
+--no-db-init the tables are left to the release step (DB_INIT_ON_STARTUP
+off, see app.init_db) and created before the timed runs. With --uvicorn the
+app is served by uvicorn and polled over HTTP instead.
+
+Exits with status 1 if the median run misses --target-ms.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; prints the phases in seconds as JSON
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+module, path = sys.argv[1], sys.argv[2]
+app = __import__(module, fromlist=["app"]).app
+imported = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        status = []
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                 "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+                 "query_string": b"", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000),
+                 "server": ("bench", 80)}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(scope, receive, send)
+        return ready, status[0]
+
+ready, status = asyncio.run(first_request())
+done = time.perf_counter()
+print(json.dumps({"status": status, "import": imported - started, "startup": ready - imported,
+                  "request": done - ready}))
+"""
+
+
+def child_env(db_init: bool) -> Dict[str, str]:
+    return {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "DB_INIT_ON_STARTUP": "true" if db_init else "false",
+            "LOG_TO_FILE": "false"}
+
+
+def prepare_database(directory: str):
+    """Create the tables ahead of the runs, like the release step would"""
+    subprocess.run([sys.executable, "-m", "app.init_db"], cwd=directory, env=child_env(True),
+                   check=True, capture_output=True)
+
+
+def run_asgi(module: str, path: str, db_init: bool) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        if not db_init:
+            prepare_database(directory)
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", CHILD, module, path], cwd=directory,
+                                env=child_env(db_init), capture_output=True, text=True)
+        total = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    assert phases.pop("status") == 200, "first request did not succeed"
+    phases["total"] = total
+    return phases
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(module: str, path: str, db_init: bool, timeout: float = 60) -> Dict[str, float]:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        if not db_init:
+            prepare_database(directory)
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+            cwd=directory, env=child_env(db_init), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - started < timeout:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                        if response.status == 200:
+                            return {"total": time.perf_counter() - started}
+                except OSError:
+                    if server.poll() is not None:
+                        raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                    time.sleep(0.01)
+            raise RuntimeError(f"no 200 from {path} within {timeout}s")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API time to first 200")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=2500, help="median time to first 200 to meet")
+    parser.add_argument("--no-db-init", action="store_true", help="tables created by the release step")
+    parser.add_argument("--uvicorn", action="store_true", help="serve with uvicorn and poll over HTTP")
+    args = parser.parse_args()
+
+    run = run_uvicorn if args.uvicorn else run_asgi
+    results = [run(args.module, args.path, not args.no_db_init) for _ in range(args.runs)]
+
+    phases = list(results[0])
+    print(f"{args.module} GET {args.path}, {args.runs} runs, DB init on startup: {not args.no_db_init}")
+    print(f"{'run':<6}" + "".join(f"{phase + ' ms':>12}" for phase in phases))
+    for i, result in enumerate(results, 1):
+        print(f"{i:<6}" + "".join(f"{result[phase] * 1000:>12.0f}" for phase in phases))
+    median = statistics.median(result["total"] for result in results) * 1000
+    print(f"median time to first 200: {median:.0f} ms (target {args.target_ms:.0f} ms)")
+    sys.exit(0 if median <= args.target_ms else 1)
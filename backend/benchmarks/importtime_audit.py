@@ -0,0 +1,101 @@
+"""
+Import Time Audit
+
+Imports the API module in a fresh interpreter with `python -X importtime`
+and reports the slowest imports, so import-time regressions show up in CI:
+
+    python -m benchmarks.importtime_audit --module app.main --budget-ms 1500
+
+Exits with status 1 if the best of --runs imports takes longer than
+--budget-ms or pulls in a module that should only load on first use
+(--forbid: the scraper stack and the Firebase Admin SDK by default).
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded on first use, never by importing the API
+LAZY_MODULES = ["bs4", "lxml", "firebase_admin", "app.background_scraper", "app.scraper.ayvens_scraper"]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportEntry(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure(module: str) -> List[ImportEntry]:
+    """Import `module` in a new interpreter, one entry per imported module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(ImportEntry(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def total_us(entries: List[ImportEntry], module: str) -> int:
+    """Cumulative time of the top-level import of `module` (includes its dependencies)"""
+    return next((e.cumulative_us for e in reversed(entries) if e.module == module and e.depth == 0),
+                sum(e.self_us for e in entries))
+
+
+def by_package(entries: List[ImportEntry]) -> Dict[str, int]:
+    """Self time summed per top-level package (`app` split by subpackage)"""
+    totals: Dict[str, int] = {}
+    for entry in entries:
+        parts = entry.module.split(".")
+        key = ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+        totals[key] = totals.get(key, 0) + entry.self_us
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report and check the import time of the API")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3, help="imports to run, the fastest is reported")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, help="fail if the import takes longer")
+    parser.add_argument("--forbid", nargs="*", default=LAZY_MODULES, help="modules that must not be imported")
+    args = parser.parse_args()
+
+    entries = min((measure(args.module) for _ in range(args.runs)), key=lambda e: total_us(e, args.module))
+    total_ms = total_us(entries, args.module) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms, {len(entries)} modules (best of {args.runs})")
+    print(f"\n{'self ms':>8}{'cum ms':>9}  slowest modules")
+    for entry in sorted(entries, key=lambda e: e.self_us, reverse=True)[:args.top]:
+        print(f"{entry.self_us / 1000:>8.1f}{entry.cumulative_us / 1000:>9.1f}  {entry.module}")
+    print(f"\n{'self ms':>8}  by package")
+    for package, us in sorted(by_package(entries).items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{us / 1000:>8.1f}  {package}")
+
+    failures = []
+    imported = {entry.module for entry in entries}
+    for module in args.forbid:
+        if module in imported:
+            chain = [e.module for e in entries if e.module == module or e.module.startswith(module + ".")]
+            failures.append(f"{module} is imported at startup ({len(chain)} modules)")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
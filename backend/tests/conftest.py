@@ -9,6 +9,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
+# The app's lifespan sets up logging: keep test runs from writing ./logs
+os.environ.setdefault("LOG_TO_FILE", "false")
+
 from app.models.base import Base
 from app.main import app
 from app.models.base import get_db
@@ -0,0 +1,111 @@
+"""
+Adaptive Scrape Scheduling Tests
+
+This module contains tests for churn measurement and scrape planning.
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.automotive import ScrapingSession
+from app.scraper.adaptive_scheduler import (
+    AdaptiveScrapeScheduler, MODE_FIXED, MODE_REALTIME, MODE_PEAK, MODE_DEEP_SWEEP
+)
+from app.scraper.config import ScraperSettings
+
+SOURCE = "carmarket.ayvens.com"
+PEAK_NOON = datetime(2024, 5, 6, 12, 0)
+OFF_PEAK_NIGHT = datetime(2024, 5, 6, 3, 0)
+
+
+@pytest.fixture
+def scheduler():
+    return AdaptiveScrapeScheduler(settings=ScraperSettings())
+
+
+def add_sessions(db_session, now, new_per_session, every_minutes=30, found=20,
+                 session_type="peak"):
+    """Add completed sessions ending at `now`, one every `every_minutes`"""
+    count = len(new_per_session)
+    for index, new in enumerate(new_per_session):
+        started_at = now - timedelta(minutes=every_minutes * (count - index))
+        db_session.add(ScrapingSession(
+            session_id=f"session-{index}-{started_at.isoformat()}",
+            source_website=SOURCE,
+            session_type=session_type,
+            total_vehicles_found=found,
+            total_vehicles_new=new,
+            page_stats=json.dumps({"1": {"found": found, "new": min(new, found)}}),
+            started_at=started_at,
+            status="completed"
+        ))
+    db_session.commit()
+
+
+class TestAdaptiveScrapeScheduler:
+    """Test adaptive scrape planning"""
+
+    def test_measure_churn(self, scheduler, db_session):
+        add_sessions(db_session, PEAK_NOON, [20, 4, 4, 4], every_minutes=30)
+
+        churn = scheduler.measure_churn(db_session, SOURCE, PEAK_NOON)
+
+        assert churn.sessions == 4
+        # First session excluded: 12 new listings over 1.5 hours
+        assert churn.new_per_hour == pytest.approx(8.0)
+        assert churn.listings_per_page == pytest.approx(20.0)
+        assert churn.page1_new_ratio == pytest.approx(0.2)
+        assert churn.deepest_new_page == 1
+
+    def test_high_churn_polls_page_one_often(self, scheduler, db_session):
+        add_sessions(db_session, PEAK_NOON, [20, 20, 20, 20], every_minutes=10)
+
+        plan = scheduler.plan(db_session, SOURCE, PEAK_NOON)
+
+        assert plan.mode == MODE_REALTIME
+        assert plan.interval_seconds == 600
+        assert plan.max_vehicles == ScraperSettings().REALTIME_MAX_VEHICLES
+        assert plan.max_pages == 1
+        assert plan.expected_lag_seconds == 300
+
+    def test_low_churn_backs_off(self, scheduler, db_session):
+        add_sessions(db_session, PEAK_NOON, [1, 1, 0, 1], every_minutes=30)
+
+        plan = scheduler.plan(db_session, SOURCE, PEAK_NOON)
+
+        assert plan.mode == MODE_PEAK
+        assert plan.interval_seconds == 30 * 60
+        assert plan.max_pages == 1
+        assert plan.expected_coverage == 1.0
+
+    def test_off_peak_deep_sweep_when_due(self, scheduler, db_session):
+        add_sessions(db_session, OFF_PEAK_NIGHT, [2, 1, 1], every_minutes=60)
+
+        plan = scheduler.plan(db_session, SOURCE, OFF_PEAK_NIGHT)
+        assert plan.mode == MODE_DEEP_SWEEP
+        assert plan.max_pages == ScraperSettings().MAX_PAGES_TO_SCRAPE
+
+        # A recent deep sweep makes the next off-peak cycle shallow again
+        add_sessions(db_session, OFF_PEAK_NIGHT, [0], every_minutes=30, session_type=MODE_DEEP_SWEEP)
+        plan = scheduler.plan(db_session, SOURCE, OFF_PEAK_NIGHT)
+        assert plan.mode != MODE_DEEP_SWEEP
+
+    def test_plan_respects_request_budget(self, db_session):
+        settings = ScraperSettings(REQUESTS_PER_HOUR=3)
+        scheduler = AdaptiveScrapeScheduler(settings=settings)
+        add_sessions(db_session, PEAK_NOON, [20, 20, 20, 20], every_minutes=10)
+
+        plan = scheduler.plan(db_session, SOURCE, PEAK_NOON)
+
+        assert plan.requests_per_hour <= 3
+        assert plan.interval_seconds == 1200
+
+    def test_disabled_uses_fixed_plan(self, db_session):
+        scheduler = AdaptiveScrapeScheduler(settings=ScraperSettings(ENABLE_ADAPTIVE_SCHEDULING=False))
+
+        plan = scheduler.plan(db_session, SOURCE, PEAK_NOON)
+
+        assert plan.mode == MODE_FIXED
+        assert plan.interval_seconds == 300
+        assert plan.churn is None
@@ -0,0 +1,164 @@
+"""
+Cold Storage Tests
+
+This module contains tests for moving inactive listings and old scraping
+logs to the archive tables and for reading archived listings back through
+the vehicle endpoints.
+"""
+
+from datetime import datetime, timedelta
+
+from app.models.archive import ArchivedPriceHistory, ArchivedScrapingLog, ArchivedVehicleListing
+from app.models.automotive import PriceHistory, ScrapingLog, VehicleImage, VehicleListing
+from app.models.comparison import VehicleComparisonItem
+from app.services.cold_storage import ColdStorageService
+from app.services.listing_ingest import ListingIngestor
+from app.services.retention import RetentionEngine, data_policies
+
+NOW = datetime.utcnow()
+OLD = NOW - timedelta(days=60)
+
+
+def listing(n, scraped_at=OLD, is_active=False):
+    return VehicleListing(external_id=f"ayvens_{n}", listing_url=f"https://carmarket.ayvens.com/lots/{n}",
+                          make="BMW", model="320d", year=2020, price=20000.0 + n, mileage=50000,
+                          source_website="carmarket.ayvens.com", scraped_at=scraped_at, is_active=is_active)
+
+
+def add_cold_listing(db_session):
+    vehicle = listing(1)
+    db_session.add(vehicle)
+    db_session.flush()
+    db_session.add_all([
+        VehicleImage(vehicle_id=vehicle.id, image_url="https://example.com/1.jpg"),
+        PriceHistory(vehicle_id=vehicle.id, price=21000.0, recorded_at=OLD - timedelta(days=5)),
+        PriceHistory(vehicle_id=vehicle.id, price=20001.0, recorded_at=OLD),
+        ScrapingLog(session_id="s1", source_url="https://example.com", status="success",
+                    vehicle_id=vehicle.id, started_at=NOW),
+    ])
+    db_session.commit()
+    return vehicle.id
+
+
+def move(db_session):
+    return {r.name: r for r in ColdStorageService(db_session).move(30, 30, pause_seconds=0)}
+
+
+class TestColdStorageMove:
+    """Test moving cold rows out of the hot tables"""
+
+    def test_moves_inactive_listings_with_children(self, db_session):
+        vehicle_id = add_cold_listing(db_session)
+        db_session.add_all([listing(2, scraped_at=NOW), listing(3, is_active=True), listing(4)])
+        db_session.flush()
+        in_comparison = db_session.query(VehicleListing.id).filter(VehicleListing.external_id == "ayvens_4").scalar()
+        db_session.add(VehicleComparisonItem(comparison_id=1, vehicle_id=in_comparison))
+        db_session.commit()
+
+        results = move(db_session)
+
+        assert (results["cold_vehicle_listings"].rows, results["cold_vehicle_listings"].archived) == (1, 4)
+        assert sorted(external_id for external_id, in db_session.query(VehicleListing.external_id)) == [
+            "ayvens_2", "ayvens_3", "ayvens_4"]
+        assert db_session.query(PriceHistory).count() == 0
+        assert db_session.query(ScrapingLog.vehicle_id).scalar() is None
+        archived = db_session.query(ArchivedVehicleListing).one()
+        assert (archived.id, archived.external_id, archived.price) == (vehicle_id, "ayvens_1", 20001.0)
+        assert db_session.query(ArchivedPriceHistory.vehicle_id).distinct().all() == [(vehicle_id,)]
+
+    def test_ids_of_archived_rows_are_not_reused(self, db_session):
+        first_id = add_cold_listing(db_session)
+        move(db_session)
+
+        second_id = add_cold_listing(db_session)
+        move(db_session)
+
+        assert second_id != first_id
+        assert db_session.query(ArchivedVehicleListing).count() == 2
+        service = ColdStorageService(db_session)
+        assert [image.vehicle_id for image in service.get_vehicle(first_id).images] == [first_id]
+        assert len(service.get_price_history(second_id)) == 2
+
+    def test_moves_old_scraping_logs(self, db_session):
+        db_session.add_all([ScrapingLog(session_id=f"s{i}", source_url="https://example.com", status="success",
+                                        started_at=OLD if i else NOW) for i in range(3)])
+        db_session.commit()
+
+        assert move(db_session)["cold_scraping_logs"].rows == 2
+        assert db_session.query(ScrapingLog.session_id).all() == [("s0",)]
+        assert db_session.query(ArchivedScrapingLog).filter(ArchivedScrapingLog.started_at < NOW).count() == 2
+
+    def test_retention_purges_archive(self, db_session):
+        add_cold_listing(db_session)
+        move(db_session)
+
+        results = {r.name: r for r in RetentionEngine(db_session, pause_seconds=0).run(data_policies(30))}
+
+        assert results["archived_vehicle_listings"].rows == 1
+        assert results["archived_price_history"].rows == 2
+        assert db_session.query(ArchivedVehicleListing).count() == 0
+
+
+class TestArchiveReadPath:
+    """Test reading archived listings through the vehicle endpoints"""
+
+    def test_restored_listing(self, db_session):
+        vehicle_id = add_cold_listing(db_session)
+        move(db_session)
+
+        vehicle = ColdStorageService(db_session).get_vehicle(vehicle_id)
+
+        assert (vehicle.id, vehicle.make, vehicle.scraped_at.date()) == (vehicle_id, "BMW", OLD.date())
+        assert [image.image_url for image in vehicle.images] == ["https://example.com/1.jpg"]
+        assert [point.price for point in vehicle.price_history] == [21000.0, 20001.0]
+        assert vehicle not in db_session
+
+    def test_vehicle_endpoints_fall_back_to_archive(self, client, db_session):
+        vehicle_id = add_cold_listing(db_session)
+        move(db_session)
+
+        response = client.get(f"/api/v1/automotive/vehicles/{vehicle_id}")
+        assert response.status_code == 200
+        assert (response.json()["external_id"], response.json()["is_active"]) == ("ayvens_1", False)
+
+        history = client.get(f"/api/v1/automotive/vehicles/{vehicle_id}/price-history",
+                             params={"start": (OLD - timedelta(days=1)).isoformat()})
+        assert [point["price"] for point in history.json()] == [20001.0]
+        assert client.get("/api/v1/automotive/vehicles/999").status_code == 404
+
+
+class TestArchivedListingReappears:
+    """Test restoring archived listings that show up in a scrape again"""
+
+    def scraped(self, price):
+        return {"external_id": "ayvens_1", "listing_url": "https://carmarket.ayvens.com/lots/1",
+                "make": "BMW", "model": "320d", "year": 2020, "price": price,
+                "source_website": "carmarket.ayvens.com", "scraped_at": NOW, "is_active": True}
+
+    def test_ingest_restores_archived_listing(self, db_session):
+        vehicle_id = add_cold_listing(db_session)
+        move(db_session)
+
+        ingestor = ListingIngestor(db_session)
+        vehicle = ingestor.ingest_one(self.scraped(19500.0))
+        db_session.commit()
+
+        assert vehicle.id == vehicle_id
+        assert (ingestor.stats.new, ingestor.stats.updated, ingestor.stats.restored) == (0, 1, 1)
+        assert db_session.query(ArchivedVehicleListing).count() == 0
+        assert db_session.query(VehicleImage.vehicle_id).all() == [(vehicle_id,)]
+        prices = [price for price, in db_session.query(PriceHistory.price).filter(
+            PriceHistory.vehicle_id == vehicle_id).order_by(PriceHistory.recorded_at)]
+        assert prices == [21000.0, 20001.0, 19500.0]
+
+    def test_ingest_batch_restores_archived_listing(self, db_session):
+        vehicle_id = add_cold_listing(db_session)
+        move(db_session)
+
+        ingestor = ListingIngestor(db_session)
+        created = ingestor.ingest_batch([self.scraped(20001.0)])
+        db_session.commit()
+
+        assert created == []
+        assert db_session.query(VehicleListing.id, VehicleListing.is_active).all() == [(vehicle_id, True)]
+        assert ingestor.stats.restored == 1
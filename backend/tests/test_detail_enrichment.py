@@ -0,0 +1,147 @@
+"""
+Detail Enrichment Tests
+
+This module contains tests for detail page parsing and the enrichment
+worker pool that fills mileage, fuel type, transmission and city.
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.models.automotive import VehicleListing
+from app.scraper.ayvens_scraper import AyvensCarmarketScraper
+from app.services.detail_enrichment import DetailEnricher, needs_enrichment
+from app.services.ingest_pipeline import IngestPipeline
+
+BASE_URL = "https://carmarket.ayvens.com"
+
+DETAIL_PAGE = b"""
+<html><body>
+  <div class="spec-mileage">84 500 km</div>
+  <div class="spec-fuel">Hybride essence</div>
+  <div class="spec-transmission">Automatic</div>
+  <div class="vehicle-location">Location: Lyon</div>
+</body></html>
+"""
+
+
+def vehicle(lot_id, **extra):
+    return {
+        "external_id": f"ayvens_{lot_id}",
+        "listing_url": f"{BASE_URL}/lots/{lot_id}",
+        "detail_url": f"{BASE_URL}/lots/{lot_id}",
+        "make": "BMW",
+        "model": "320d",
+        "price": 20000.0,
+        "source_website": "carmarket.ayvens.com",
+        "scraped_at": datetime.utcnow(),
+        **extra,
+    }
+
+
+class RecordingMatcher:
+    matched = []
+
+    def __init__(self, db):
+        self.db = db
+
+    def process_new_vehicle_matches(self, vehicle):
+        RecordingMatcher.matched.append((vehicle.external_id, vehicle.mileage))
+        return 0
+
+
+class FakeDetails:
+    """Detail fetcher counting concurrent calls"""
+
+    def __init__(self):
+        self.urls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.overlap = threading.Event()
+
+    def __call__(self, url):
+        with self.lock:
+            self.urls.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            if self.active > 1:
+                self.overlap.set()
+        self.overlap.wait(timeout=0.2)
+        with self.lock:
+            self.active -= 1
+        if url.endswith("/404"):
+            return None
+        return {"mileage": 84500, "fuel_type": "hybrid", "transmission": "automatic",
+                "city": "Lyon", "additional_images": []}
+
+
+@pytest.fixture(autouse=True)
+def reset_matcher():
+    RecordingMatcher.matched = []
+
+
+class TestDetailParsing:
+    """Test detail page parsing"""
+
+    def test_parse_vehicle_details(self):
+        details = AyvensCarmarketScraper().parse_vehicle_details(DETAIL_PAGE, f"{BASE_URL}/lots/1")
+
+        assert details["mileage"] == 84500
+        assert details["fuel_type"] == "hybrid"
+        assert details["transmission"] == "automatic"
+        assert details["city"] == "Lyon"
+
+    def test_only_new_or_changed_listings_need_enrichment(self):
+        assert needs_enrichment(vehicle(1))
+        assert not needs_enrichment(vehicle(2, unchanged=True))
+        assert not needs_enrichment(vehicle(3, detail_url=None))
+
+
+class TestDetailEnricher:
+    """Test the enrichment worker pool"""
+
+    def test_enriches_in_batches_and_rematches_changed_filter_fields(self, test_db, db_session):
+        for lot_id in (1, 2, 404):
+            data = vehicle(lot_id)
+            data.pop("detail_url")
+            if lot_id == 2:
+                # Only the transmission is new, which no alert filters on
+                data.update(mileage=84500, fuel_type="hybrid", city="Lyon")
+            db_session.add(VehicleListing(**data))
+        db_session.commit()
+
+        fetcher = FakeDetails()
+        with DetailEnricher(fetcher, test_db, matching_service_factory=RecordingMatcher,
+                            workers=2, batch_size=2, max_batch_seconds=0.05) as enricher:
+            queued = enricher.submit_vehicles([vehicle(1), vehicle(2), vehicle(404), vehicle(5, unchanged=True)])
+
+        assert queued == 3
+        assert fetcher.max_active == 2
+        assert enricher.stats.enriched == 2
+        assert enricher.stats.failed == 1
+        assert RecordingMatcher.matched == [("ayvens_1", 84500)]
+
+        db_session.expire_all()
+        row = db_session.query(VehicleListing).filter(VehicleListing.external_id == "ayvens_1").one()
+        assert (row.mileage, row.fuel_type, row.transmission, row.city) == (84500, "hybrid", "automatic", "Lyon")
+        assert db_session.query(VehicleListing).filter(
+            VehicleListing.external_id == "ayvens_404").one().mileage is None
+
+    def test_full_queue_drops_instead_of_blocking(self, test_db):
+        enricher = DetailEnricher(FakeDetails(), test_db, workers=1, queue_size=1)
+
+        assert enricher.submit("ayvens_1", f"{BASE_URL}/lots/1")
+        assert not enricher.submit("ayvens_2", f"{BASE_URL}/lots/2")
+        assert enricher.stats.dropped == 1
+
+    def test_pipeline_queues_committed_listings(self, test_db, db_session):
+        with DetailEnricher(FakeDetails(), test_db, workers=1, max_batch_seconds=0.05) as enricher:
+            pipeline = IngestPipeline(test_db, batch_size=2, max_batch_seconds=0.05, enricher=enricher)
+            pipeline.run([(1, [vehicle(1), vehicle(2)]), (2, [vehicle(3, unchanged=True)])])
+
+        assert enricher.stats.queued == 2
+        db_session.expire_all()
+        assert db_session.query(VehicleListing).filter(VehicleListing.city == "Lyon").count() == 2
@@ -0,0 +1,96 @@
+"""
+Device Token Registry Tests
+
+This module contains tests for device token registration and bulk lookup.
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.scout import User
+from app.models.notifications import DeviceToken
+from app.services.device_token_service import DeviceTokenService, MAX_TOKEN_FAILURES
+
+
+class TestDeviceTokenService:
+    """Test device token registry functionality"""
+
+    @pytest.fixture
+    def users(self, db_session: Session):
+        users = [
+            User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x")
+            for i in range(3)
+        ]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    @pytest.fixture
+    def service(self, db_session: Session):
+        return DeviceTokenService(db_session)
+
+    def test_register_is_upsert(self, service: DeviceTokenService, users, db_session: Session):
+        first = service.register_token(users[0].id, "token-a", platform="android", app_version="1.0")
+        second = service.register_token(users[0].id, "token-a", platform="android", app_version="1.1")
+
+        assert first.id == second.id
+        assert second.app_version == "1.1"
+        assert db_session.query(DeviceToken).count() == 1
+
+    def test_register_moves_token_to_new_user(self, service: DeviceTokenService, users):
+        service.register_token(users[0].id, "token-a")
+        moved = service.register_token(users[1].id, "token-a")
+
+        assert moved.user_id == users[1].id
+        assert service.tokens_for_users([users[0].id, users[1].id]) == {users[1].id: ["token-a"]}
+
+    def test_tokens_for_users(self, service: DeviceTokenService, users):
+        service.register_token(users[0].id, "token-a")
+        service.register_token(users[0].id, "token-b")
+        service.register_token(users[1].id, "token-c")
+
+        tokens = service.tokens_for_users([u.id for u in users])
+
+        assert sorted(tokens[users[0].id]) == ["token-a", "token-b"]
+        assert tokens[users[1].id] == ["token-c"]
+        assert users[2].id not in tokens
+        assert service.tokens_for_users([]) == {}
+
+    def test_remove_tokens_deactivates(self, service: DeviceTokenService, users):
+        service.register_token(users[0].id, "token-a")
+        service.register_token(users[0].id, "token-b")
+
+        removed = service.remove_tokens(["token-a", "unknown"])
+
+        assert removed == 1
+        assert service.tokens_for_users([users[0].id]) == {users[0].id: ["token-b"]}
+
+        # Re-registering reactivates the token
+        service.register_token(users[0].id, "token-a")
+        assert sorted(service.tokens_for_users([users[0].id])[users[0].id]) == ["token-a", "token-b"]
+
+    def test_repeated_failures_deactivate_token(self, service: DeviceTokenService, users,
+                                               db_session: Session):
+        service.register_token(users[0].id, "token-a")
+
+        for _ in range(MAX_TOKEN_FAILURES):
+            service.record_failures(["token-a"])
+
+        token = db_session.query(DeviceToken).filter(DeviceToken.token == "token-a").one()
+        db_session.refresh(token)
+        assert token.failure_count == MAX_TOKEN_FAILURES
+        assert token.is_active is False
+
+    def test_delivery_resets_failure_count(self, service: DeviceTokenService, users,
+                                           db_session: Session):
+        service.register_token(users[0].id, "token-a")
+
+        for _ in range(MAX_TOKEN_FAILURES - 1):
+            service.record_failures(["token-a"])
+        service.record_successes(["token-a"])
+        service.record_failures(["token-a"])
+
+        token = db_session.query(DeviceToken).filter(DeviceToken.token == "token-a").one()
+        db_session.refresh(token)
+        assert token.failure_count == 1
+        assert token.is_active is True
@@ -0,0 +1,95 @@
+"""
+Conditional HTTP Cache Tests
+
+This module contains tests for per-URL validators, body hashing and fetch
+statistics used by conditional scraper requests.
+"""
+
+import pytest
+from datetime import timedelta
+
+import requests
+
+from app.models.automotive import HttpCacheEntry
+from app.scraper.http_cache import (
+    ConditionalFetchCache, FetchStats,
+    OUTCOME_NEW, OUTCOME_CHANGED, OUTCOME_UNCHANGED, OUTCOME_NOT_MODIFIED
+)
+
+URL = "https://carmarket.ayvens.com/lots?page=1"
+
+
+def make_response(status_code=200, content=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    response.elapsed = timedelta(milliseconds=100)
+    return response
+
+
+@pytest.fixture
+def cache(test_db, db_session):
+    return ConditionalFetchCache(session_factory=test_db)
+
+
+class TestConditionalFetchCache:
+    """Test conditional request bookkeeping"""
+
+    def test_outcomes_and_validators(self, cache, test_db, db_session):
+        stats = FetchStats()
+        assert cache.conditional_headers(URL) == {}
+
+        first = make_response(content=b"<html>a</html>",
+                              headers={"ETag": '"v1"', "Last-Modified": "Mon, 06 May 2024 10:00:00 GMT"})
+        assert cache.record(URL, first, stats) == OUTCOME_NEW
+        assert cache.conditional_headers(URL) == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 06 May 2024 10:00:00 GMT"
+        }
+
+        assert cache.record(URL, make_response(304), stats) == OUTCOME_NOT_MODIFIED
+        assert cache.record(URL, make_response(content=b"<html>a</html>"), stats) == OUTCOME_UNCHANGED
+        assert cache.record(URL, make_response(content=b"<html>b</html>"), stats) == OUTCOME_CHANGED
+
+        assert stats.request_count == 4
+        assert stats.not_modified == 1
+        assert stats.unchanged == 1
+        assert stats.hit_rate == 0.5
+        assert stats.bytes_saved == len(b"<html>a</html>")
+        assert stats.session_fields()["total_data_transferred"] == 3 * len(b"<html>a</html>")
+
+        row = db_session.query(HttpCacheEntry).filter(HttpCacheEntry.url == URL).one()
+        assert row.etag == '"v1"'
+        assert (row.check_count, row.not_modified_count, row.unchanged_count) == (4, 1, 1)
+
+    def test_entries_survive_restart(self, cache, test_db):
+        cache.record(URL, make_response(content=b"body", headers={"ETag": '"v2"'}))
+
+        restarted = ConditionalFetchCache(session_factory=test_db)
+
+        assert restarted.conditional_headers(URL) == {"If-None-Match": '"v2"'}
+        assert restarted.record(URL, make_response(content=b"body")) == OUTCOME_UNCHANGED
+
+    def test_deferred_validators_saved_on_confirm(self, cache, test_db, db_session):
+        assert cache.record(URL, make_response(content=b"page", headers={"ETag": '"v3"'}), defer=True) == OUTCOME_NEW
+
+        # Content not stored yet: the page must not look unchanged
+        assert cache.conditional_headers(URL) == {}
+        assert cache.record(URL, make_response(content=b"page"), defer=True) == OUTCOME_NEW
+        assert db_session.query(HttpCacheEntry).count() == 0
+
+        assert cache.confirm(URL)
+        assert not cache.confirm(URL)
+        assert cache.conditional_headers(URL) == {}
+        assert ConditionalFetchCache(session_factory=test_db).record(URL, make_response(content=b"page")) \
+            == OUTCOME_UNCHANGED
+
+    def test_discarded_page_stays_changed(self, cache):
+        cache.record(URL, make_response(content=b"old"))
+        assert cache.record(URL, make_response(content=b"new"), defer=True) == OUTCOME_CHANGED
+
+        cache.discard(URL)
+
+        assert not cache.confirm(URL)
+        assert cache.record(URL, make_response(content=b"new")) == OUTCOME_CHANGED
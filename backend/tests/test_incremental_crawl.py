@@ -0,0 +1,130 @@
+"""
+Incremental Crawl Tests
+
+This module contains tests for the known listing index and the incremental
+Ayvens crawl that stops at known listings.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from app.models.automotive import VehicleListing
+from app.scraper.ayvens_scraper import AyvensCarmarketScraper
+from app.scraper.known_listings import KnownListingIndex
+
+BASE_URL = "https://carmarket.ayvens.com"
+
+
+def results_page(lot_ids, price=20000):
+    cards = "".join(
+        f'<div class="lot-card"><h3>BMW 320d Touring 2020</h3>'
+        f'<span class="lot-price">€ {price}</span>'
+        f'<a href="/lots/{lot_id}">Lot {lot_id}</a>'
+        f'<img src="/images/{lot_id}.jpg"></div>'
+        for lot_id in lot_ids
+    )
+    return Mock(content=f"<html><body>{cards}</body></html>".encode(), fetch_outcome="changed")
+
+
+@pytest.fixture
+def scraper():
+    scraper = AyvensCarmarketScraper()
+    scraper.image_downloader = Mock()
+    scraper.image_downloader.download_image.return_value = None
+    scraper.image_downloader.download_multiple_images.return_value = []
+    return scraper
+
+
+def crawl(scraper, pages, **kwargs):
+    """Run scrape_all_listings without authentication against canned pages"""
+    requested = []
+
+    def make_request(url, **kwargs):
+        page = int(url.rsplit("=", 1)[1])
+        requested.append(page)
+        return pages.get(page)
+
+    scraper._make_request = make_request
+    vehicles = AyvensCarmarketScraper.scrape_all_listings.__wrapped__(scraper, **kwargs)
+    return vehicles, requested
+
+
+class TestKnownListingIndex:
+    """Test known listing index loading and lookups"""
+
+    def test_load_recent_active_listings(self, db_session):
+        now = datetime.utcnow()
+        db_session.add_all([
+            VehicleListing(external_id="a", listing_url=f"{BASE_URL}/lots/1", make="BMW", model="320d",
+                           price=20000, source_website="carmarket.ayvens.com", scraped_at=now),
+            VehicleListing(external_id="b", listing_url=f"{BASE_URL}/lots/2", make="BMW", model="320d",
+                           price=20000, source_website="carmarket.ayvens.com",
+                           scraped_at=now - timedelta(days=30)),
+            VehicleListing(external_id="c", listing_url=f"{BASE_URL}/lots/3", make="BMW", model="320d",
+                           price=20000, source_website="carmarket.ayvens.com", scraped_at=now,
+                           is_active=False),
+        ])
+        db_session.commit()
+
+        index = KnownListingIndex.load(db_session, "carmarket.ayvens.com", lookback_days=7)
+
+        assert len(index) == 1
+        assert index.is_known(external_id="a")
+        assert index.is_known(listing_url=f"{BASE_URL}/lots/1")
+        assert not index.is_known(listing_url=f"{BASE_URL}/lots/2")
+        assert index.is_unchanged(f"{BASE_URL}/lots/1", 20000.0)
+        assert not index.is_unchanged(f"{BASE_URL}/lots/1", 19500)
+
+
+class TestIncrementalCrawl:
+    """Test that incremental crawls stop at known listings"""
+
+    def test_stops_at_mostly_known_page(self, scraper):
+        known = KnownListingIndex("carmarket.ayvens.com")
+        for lot_id in range(1, 6):
+            known.add(None, f"{BASE_URL}/lots/{lot_id}", 20000)
+        pages = {1: results_page(range(1, 6)), 2: results_page(range(6, 11))}
+
+        vehicles, requested = crawl(scraper, pages, max_vehicles=50, max_pages=10, known=known)
+
+        assert requested == [1]
+        assert len(vehicles) == 5
+        assert all(v["unchanged"] for v in vehicles)
+        assert scraper.last_run_stats["stopped_early"] is True
+        scraper.image_downloader.download_image.assert_not_called()
+
+    def test_changed_price_downloads_again(self, scraper):
+        known = KnownListingIndex("carmarket.ayvens.com")
+        known.add(None, f"{BASE_URL}/lots/1", 21000)
+
+        vehicles, _ = crawl(scraper, {1: results_page([1])}, max_vehicles=1, known=known)
+
+        assert vehicles[0]["external_id"] == "ayvens_1"
+        assert vehicles[0]["known"] and not vehicles[0]["unchanged"]
+        scraper.image_downloader.download_image.assert_called_once()
+
+    def test_deep_sweep_keeps_paginating(self, scraper):
+        known = KnownListingIndex("carmarket.ayvens.com")
+        for lot_id in range(1, 11):
+            known.add(None, f"{BASE_URL}/lots/{lot_id}", 20000)
+        pages = {1: results_page(range(1, 6)), 2: results_page(range(6, 11))}
+
+        vehicles, requested = crawl(scraper, pages, max_vehicles=50, max_pages=3,
+                                    known=known, stop_when_known=False)
+
+        assert requested == [1, 2, 3]
+        assert len(vehicles) == 10
+        assert scraper.last_run_stats["unchanged_listings"] == 10
+
+    def test_unchanged_page_is_not_parsed(self, scraper):
+        known = KnownListingIndex("carmarket.ayvens.com")
+        page = results_page(range(1, 6))
+        page.fetch_outcome = "not_modified"
+
+        vehicles, requested = crawl(scraper, {1: page}, max_vehicles=50, max_pages=10, known=known)
+
+        assert requested == [1]
+        assert vehicles == []
+        assert scraper.last_run_stats["unchanged_pages"] == 1
+        assert scraper.last_run_stats["stopped_early"] is True
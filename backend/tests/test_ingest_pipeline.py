@@ -0,0 +1,134 @@
+"""
+Ingest Pipeline Tests
+
+This module contains tests for the streaming scrape-to-database pipeline:
+micro-batch commits while the crawl runs, in-batch dedup and matching of
+new listings.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.automotive import VehicleListing
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.listing_ingest import ListingIngestor
+
+
+def vehicle(lot_id, page=1, price=20000.0, **extra):
+    return {
+        "external_id": f"ayvens_{lot_id}",
+        "listing_url": f"https://carmarket.ayvens.com/lots/{lot_id}",
+        "make": "BMW",
+        "model": "320d",
+        "price": price,
+        "source_website": "carmarket.ayvens.com",
+        "scraped_at": datetime.utcnow(),
+        "scrape_page": page,
+        **extra,
+    }
+
+
+class RecordingMatcher:
+    matched = []
+
+    def __init__(self, db):
+        self.db = db
+
+    def process_new_vehicle_matches(self, vehicle):
+        RecordingMatcher.matched.append(vehicle.external_id)
+        return 1
+
+
+@pytest.fixture
+def pipeline(test_db, db_session):
+    RecordingMatcher.matched = []
+    return IngestPipeline(test_db, matching_service_factory=RecordingMatcher,
+                          batch_size=3, queue_size=4, max_batch_seconds=0.05)
+
+
+def count_rows(test_db):
+    db = test_db()
+    try:
+        return db.query(VehicleListing).count()
+    finally:
+        db.close()
+
+
+class TestIngestPipeline:
+    """Test streaming ingest"""
+
+    def test_first_page_is_stored_and_matched_before_the_crawl_ends(self, pipeline, test_db):
+        seen_before_page_2 = []
+
+        def pages():
+            yield 1, [vehicle(1), vehicle(2)]
+            # The crawl is still running: page 1 must reach the database and matcher
+            deadline = time.monotonic() + 5
+            while (count_rows(test_db) < 2 or len(RecordingMatcher.matched) < 2) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            seen_before_page_2.append((count_rows(test_db), len(RecordingMatcher.matched)))
+            yield 2, [vehicle(3, page=2)]
+
+        stats = pipeline.run(pages())
+
+        assert seen_before_page_2 == [(2, 2)]
+        assert stats.pages == 2
+        assert stats.batches == 2
+        assert stats.ingest.new == 3
+        assert stats.ingest.notifications == 3
+        assert stats.ingest.page_stats == {1: {"found": 2, "new": 2}, 2: {"found": 1, "new": 1}}
+        assert stats.first_commit_seconds is not None
+
+    def test_dedup_and_upsert(self, pipeline, test_db, db_session):
+        pipeline.run([(1, [vehicle(1)])])
+        RecordingMatcher.matched = []
+
+        stats = pipeline.run([(1, [vehicle(1, price=18000.0), vehicle(2), vehicle(2, price=15000.0)])])
+
+        assert stats.ingest.duplicates == 1
+        assert (stats.ingest.new, stats.ingest.updated) == (1, 1)
+        assert RecordingMatcher.matched == ["ayvens_2"]
+        prices = dict(db_session.query(VehicleListing.external_id, VehicleListing.price))
+        assert prices == {"ayvens_1": 18000.0, "ayvens_2": 15000.0}
+
+    def test_unchanged_listing_only_touched(self, pipeline, db_session):
+        pipeline.run([(1, [vehicle(1)])])
+
+        stats = pipeline.run([(1, [vehicle(1, price=1.0, unchanged=True)])])
+
+        assert stats.ingest.skipped == 1
+        assert db_session.query(VehicleListing.price).scalar() == 20000.0
+
+    def test_queue_is_bounded(self, pipeline):
+        stats = pipeline.run((page, [vehicle(f"{page}{i}", page=page) for i in range(5)])
+                             for page in range(1, 5))
+
+        assert stats.ingest.new == 20
+        assert stats.max_queue_depth <= 4
+
+    def test_page_reported_only_when_fully_committed(self, test_db, db_session, monkeypatch):
+        ingest_batch = ListingIngestor.ingest_batch
+
+        def failing_ingest_batch(self, batch):
+            if any(v.get("fail") for v in batch):
+                raise RuntimeError("database unavailable")
+            return ingest_batch(self, batch)
+
+        monkeypatch.setattr(ListingIngestor, "ingest_batch", failing_ingest_batch)
+        committed = []
+        pipeline = IngestPipeline(test_db, batch_size=3, queue_size=4, max_batch_seconds=0.05,
+                                  on_page_committed=committed.append)
+
+        def pages():
+            yield 1, [vehicle(1), vehicle(2)]
+            deadline = time.monotonic() + 5
+            while not committed and time.monotonic() < deadline:
+                time.sleep(0.01)
+            yield 2, [vehicle(3, page=2), vehicle(4, page=2, fail=True)]
+
+        stats = pipeline.run(pages())
+
+        assert committed == [1]
+        assert stats.ingest.errors == 2
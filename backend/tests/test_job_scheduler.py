@@ -0,0 +1,139 @@
+"""
+Persistent Job Scheduler Tests
+
+This module contains tests for leader election, once-per-cluster execution,
+misfire detection and run history of the job scheduler.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.scheduler import ScheduledJob, JobRun
+from app.services.job_scheduler import JobScheduler
+
+
+@pytest.fixture
+def make_scheduler(test_db, db_session):
+    """Build schedulers sharing the test database (db_session cleans up tables)"""
+    def factory(worker_id, **kwargs):
+        return JobScheduler(session_factory=test_db, worker_id=worker_id, **kwargs)
+    return factory
+
+
+def wait(futures):
+    return [future.result() for future in futures]
+
+
+class TestJobScheduler:
+    """Test persistent job scheduler functionality"""
+
+    def test_job_runs_once_per_cluster(self, make_scheduler, db_session):
+        calls = []
+        workers = [make_scheduler(f"worker-{i}") for i in range(3)]
+        for worker in workers:
+            worker.add_job("cleanup", lambda: calls.append(1), interval_seconds=60, run_immediately=True)
+
+        now = datetime.utcnow() + timedelta(seconds=1)
+        for worker in workers:
+            wait(worker.tick(now))
+
+        assert len(calls) == 1
+        assert [w.is_leader for w in workers] == [True, False, False]
+        assert db_session.query(JobRun).count() == 1
+
+    def test_leadership_moves_when_lease_expires(self, make_scheduler):
+        calls = []
+        leader = make_scheduler("worker-a", lease_seconds=30)
+        follower = make_scheduler("worker-b", lease_seconds=30)
+        for worker in (leader, follower):
+            worker.add_job("scrape", lambda: calls.append(1), interval_seconds=60, run_immediately=True)
+
+        now = datetime.utcnow() + timedelta(seconds=1)
+        wait(leader.tick(now))
+        assert follower.tick(now + timedelta(seconds=10)) == []
+
+        # Leader died: after the lease expires the follower takes over
+        wait(follower.tick(now + timedelta(seconds=120)))
+        assert follower.is_leader
+        assert len(calls) == 2
+
+    def test_run_history_and_stats(self, make_scheduler, db_session):
+        def failing():
+            raise RuntimeError("boom")
+
+        scheduler = make_scheduler("worker-a")
+        scheduler.add_job("ok", lambda: None, interval_seconds=60, run_immediately=True)
+        scheduler.add_job("broken", failing, interval_seconds=60, run_immediately=True)
+
+        wait(scheduler.tick(datetime.utcnow() + timedelta(seconds=1)))
+
+        jobs = {job["id"]: job for job in scheduler.get_status()["jobs"]}
+        assert jobs["ok"]["last_status"] == "completed"
+        assert jobs["ok"]["run_count"] == 1
+        assert jobs["ok"]["avg_duration_seconds"] is not None
+        assert jobs["ok"]["next_run_at"] is not None
+        assert jobs["broken"]["last_status"] == "failed"
+        assert jobs["broken"]["failure_count"] == 1
+
+        history = scheduler.get_run_history("broken")
+        assert history[0]["status"] == "failed"
+        assert history[0]["error_message"] == "boom"
+
+    def test_misfire_detected_and_coalesced(self, make_scheduler, db_session):
+        calls = []
+        scheduler = make_scheduler("worker-a", misfire_grace_seconds=300)
+        scheduler.add_job("matching", lambda: calls.append(1), interval_seconds=60)
+
+        # Nobody ran the job for an hour: run once, flag the misfire
+        late = datetime.utcnow() + timedelta(hours=1)
+        wait(scheduler.tick(late))
+
+        job = db_session.query(ScheduledJob).filter(ScheduledJob.id == "matching").one()
+        run = db_session.query(JobRun).filter(JobRun.job_id == "matching").one()
+        assert len(calls) == 1
+        assert job.misfire_count == 1
+        assert run.misfired is True
+        assert job.next_run_at > late
+
+    def test_manual_trigger_uses_queued_run(self, make_scheduler, db_session):
+        calls = []
+        scheduler = make_scheduler("worker-a")
+        scheduler.add_job("scrape", lambda: calls.append(1), interval_seconds=3600)
+
+        run_id = scheduler.trigger("scrape")
+        wait(scheduler.tick(datetime.utcnow() + timedelta(seconds=1)))
+
+        run = db_session.query(JobRun).filter(JobRun.id == run_id).one()
+        assert calls == [1]
+        assert run.trigger == "manual"
+        assert run.status == "completed"
+        assert scheduler.trigger("unknown") is None
+
+    def test_paused_job_does_not_run(self, make_scheduler):
+        calls = []
+        scheduler = make_scheduler("worker-a")
+        scheduler.add_job("scrape", lambda: calls.append(1), interval_seconds=60, run_immediately=True)
+        scheduler.pause_job("scrape")
+
+        assert scheduler.tick(datetime.utcnow() + timedelta(seconds=1)) == []
+        assert calls == []
+
+    def test_reschedule_changes_interval(self, make_scheduler, db_session):
+        scheduler = make_scheduler("worker-a")
+        scheduler.add_job("scrape", lambda: None, interval_seconds=300)
+
+        now = datetime.utcnow()
+        assert scheduler.reschedule("scrape", 900, now=now)
+
+        job = db_session.query(ScheduledJob).filter(ScheduledJob.id == "scrape").one()
+        assert job.interval_seconds == 900
+        assert job.next_run_at == now + timedelta(seconds=900)
+        assert scheduler.reschedule("unknown", 900) is False
+
+    def test_restart_keeps_rescheduled_interval(self, make_scheduler, db_session):
+        make_scheduler("worker-a").add_job("scrape", lambda: None, interval_seconds=300)
+        make_scheduler("worker-a").reschedule("scrape", 900)
+
+        make_scheduler("worker-b").add_job("scrape", lambda: None, interval_seconds=300)
+
+        assert db_session.query(ScheduledJob.interval_seconds).filter(ScheduledJob.id == "scrape").scalar() == 900
@@ -0,0 +1,132 @@
+"""
+Listing ID Tests
+
+This module contains tests for stable external id derivation and the
+migration that collapses duplicate listings.
+"""
+
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+
+from app.models.automotive import VehicleListing, VehicleImage, PriceHistory
+from app.scraper.listing_ids import derive_external_id, lot_id_from_url, lot_id_from_element
+from app.services.listing_dedup import collapse_duplicate_listings
+
+SOURCE = "carmarket.ayvens.com"
+BASE_URL = "https://carmarket.ayvens.com"
+
+
+class TestListingIds:
+    """Test external id derivation"""
+
+    def test_lot_id_from_url(self):
+        assert lot_id_from_url(f"{BASE_URL}/lots/12345") == "12345"
+        assert lot_id_from_url(f"{BASE_URL}/lots/details/12345?lang=en") == "12345"
+        assert lot_id_from_url(f"{BASE_URL}/lot/2020-bmw-320d") is None
+        assert lot_id_from_url(f"{BASE_URL}/search?lotId=987") == "987"
+        assert lot_id_from_url(f"{BASE_URL}/search?lotId=987abc") is None
+        assert lot_id_from_url(f"{BASE_URL}/lots?page=2") is None
+        assert lot_id_from_url(None) is None
+
+    def test_lot_id_from_data_attributes(self):
+        soup = BeautifulSoup('<div class="lot-card"><span data-lot-id="555">BMW</span></div>', "html.parser")
+        assert lot_id_from_element(soup.div) == "555"
+
+    def test_derivation_is_stable(self):
+        element = BeautifulSoup('<div data-lot-id="777"></div>', "html.parser").div
+        assert derive_external_id("ayvens", f"{BASE_URL}/lots/1", element) == "ayvens_777"
+        assert derive_external_id("ayvens", f"{BASE_URL}/lots/1") == "ayvens_1"
+
+        first = derive_external_id("ayvens", None, stable_fields=("BMW 320d  Touring", 2020))
+        second = derive_external_id("ayvens", None, stable_fields=("bmw 320d touring", 2020))
+        other = derive_external_id("ayvens", None, stable_fields=("BMW 320d Touring", 2021))
+        assert first == second != other
+        assert first.startswith("ayvens_h")
+
+    def test_same_title_different_urls_get_different_ids(self):
+        fields = ("BMW 320d Touring", None)
+        first = derive_external_id("ayvens", f"{BASE_URL}/lot/2020-bmw-320d-touring-a", stable_fields=fields)
+        second = derive_external_id("ayvens", f"{BASE_URL}/lot/2020-bmw-320d-touring-b", stable_fields=fields)
+
+        assert first != second
+        assert derive_external_id("ayvens", f"{BASE_URL}/lot/2020-bmw-320d-touring-a/?utm_source=mail#photos",
+                                  stable_fields=fields) == first
+
+
+class TestCollapseDuplicateListings:
+    """Test the one-time duplicate collapsing migration"""
+
+    def add_listing(self, db_session, external_id, listing_url, price, scraped_at, **kwargs):
+        listing = VehicleListing(external_id=external_id, listing_url=listing_url, make="BMW",
+                                 model="320d", year=2020, price=price, description="BMW 320d Touring",
+                                 source_website=SOURCE, scraped_at=scraped_at, **kwargs)
+        db_session.add(listing)
+        db_session.flush()
+        return listing
+
+    def test_duplicates_collapse_into_oldest_row(self, db_session):
+        now = datetime.utcnow()
+        first = self.add_listing(db_session, "ayvens_aaa", f"{BASE_URL}/lots/4242", 20000,
+                                 now - timedelta(days=2))
+        second = self.add_listing(db_session, "ayvens_bbb", f"{BASE_URL}/lots/details/4242", 19000,
+                                  now - timedelta(days=1))
+        other = self.add_listing(db_session, "ayvens_ccc", f"{BASE_URL}/lots/5151", 15000, now)
+        db_session.add_all([
+            VehicleImage(vehicle_id=second.id, image_url="https://img/1.jpg"),
+            PriceHistory(vehicle_id=second.id, price=19000),
+        ])
+        db_session.commit()
+        first_id, other_id = first.id, other.id
+
+        stats = collapse_duplicate_listings(db_session, SOURCE)
+
+        assert stats == {"listings": 3, "groups": 2, "unanchored": 0, "duplicates_removed": 1, "rekeyed": 2}
+        rows = {row.id: row for row in db_session.query(VehicleListing).all()}
+        assert set(rows) == {first_id, other_id}
+        assert rows[first_id].price == 19000  # latest scraped values win
+        assert rows[first_id].external_id == "ayvens_4242"
+        assert rows[other_id].external_id == "ayvens_5151"
+        assert db_session.query(VehicleImage).one().vehicle_id == first_id
+        assert db_session.query(PriceHistory).one().vehicle_id == first_id
+
+        # Running again changes nothing
+        assert collapse_duplicate_listings(db_session, SOURCE)["rekeyed"] == 0
+
+    def test_listings_without_link_are_not_merged(self, db_session):
+        now = datetime.utcnow()
+        # Listings without a link got synthetic URLs with their random id and
+        # only share the title and year
+        self.add_listing(db_session, "ayvens_aaa", f"{BASE_URL}/vehicle/ayvens_aaa", 20000, now)
+        self.add_listing(db_session, "ayvens_bbb", f"{BASE_URL}/vehicle/ayvens_bbb", 18000, now)
+        db_session.commit()
+
+        stats = collapse_duplicate_listings(db_session, SOURCE)
+
+        assert stats["unanchored"] == 2
+        assert stats["duplicates_removed"] == 0
+        assert {row.external_id for row in db_session.query(VehicleListing).all()} == {"ayvens_aaa", "ayvens_bbb"}
+
+    def test_kept_row_does_not_reference_itself(self, db_session):
+        now = datetime.utcnow()
+        first = self.add_listing(db_session, "ayvens_aaa", f"{BASE_URL}/lots/4242", 20000, now)
+        second = self.add_listing(db_session, "ayvens_bbb", f"{BASE_URL}/lots/4242?utm_source=mail", 20000, now)
+        first.duplicate_of = second.id
+        db_session.commit()
+        first_id = first.id
+
+        collapse_duplicate_listings(db_session, SOURCE)
+
+        assert db_session.query(VehicleListing).one().duplicate_of is None
+        assert db_session.query(VehicleListing).one().id == first_id
+
+    def test_dry_run_changes_nothing(self, db_session):
+        now = datetime.utcnow()
+        self.add_listing(db_session, "ayvens_aaa", f"{BASE_URL}/lots/4242", 20000, now)
+        self.add_listing(db_session, "ayvens_bbb", f"{BASE_URL}/lots/details/4242", 20000, now)
+        db_session.commit()
+
+        stats = collapse_duplicate_listings(db_session, SOURCE, dry_run=True)
+
+        assert stats["duplicates_removed"] == 1
+        assert db_session.query(VehicleListing).count() == 2
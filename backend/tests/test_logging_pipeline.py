@@ -0,0 +1,190 @@
+"""
+Logging Pipeline Tests
+
+This module contains tests for the bounded log queue, request sampling in
+LoggingMiddleware and the lazy capture of request bodies.
+"""
+
+import asyncio
+import logging
+import queue
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import logging_config
+from app.core.logging_config import BoundedQueueHandler, start_queued_logging
+from app.middleware.logging_middleware import LoggingMiddleware
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = ListHandler()
+    logger = logging.getLogger("tests.logging_pipeline")
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger, handler.records
+    logger.handlers.clear()
+
+
+def make_client(logger, sample_rate, slow_seconds=1.0):
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.post("/items")
+    async def create(item: dict):
+        if item.get("price", 0) < 0:
+            raise HTTPException(status_code=422, detail="negative price")
+        return item
+
+    @app.post("/export")
+    async def export(request: Request):
+        body = await request.body()
+        assert await request.body() == body
+
+        async def rows():
+            for i in range(3):
+                yield f"{i},{len(body)}\n"
+        return StreamingResponse(rows(), status_code=202, media_type="text/csv")
+
+    app.add_middleware(LoggingMiddleware, sample_rate=sample_rate, slow_seconds=slow_seconds,
+                       logger=logger, random_func=lambda: 0.5)
+    return TestClient(app)
+
+
+def events(records, event_type):
+    return [r for r in records if getattr(r, "event_type", None) == event_type]
+
+
+class TestQueue:
+    """Test the bounded queue in front of the log handlers"""
+
+    def test_full_queue_drops_and_counts(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+        logger = logging.getLogger("tests.logging_pipeline.full")
+        logger.handlers[:] = [handler]
+        logger.propagate = False
+
+        for i in range(3):
+            logger.warning("record %d", i)
+        logger.error("lost")
+
+        assert handler.get_stats() == {"queued": 2, "capacity": 2, "enqueued": 2,
+                                       "dropped": {"WARNING": 1, "ERROR": 1}}
+        assert handler.queue.get_nowait().getMessage() == "record 0"
+        logger.handlers.clear()
+
+    def test_listener_writes_queued_records(self):
+        target = ListHandler()
+        logger = logging.getLogger("tests.logging_pipeline.listener")
+        logger.handlers.clear()
+        logger.propagate = False
+        listener = start_queued_logging(logger, [target], queue_size=100)
+
+        logger.warning("vehicle %s", "WVW123")
+        listener.stop()
+
+        assert [r.getMessage() for r in target.records] == ["vehicle WVW123"]
+        logger.handlers.clear()
+
+
+class TestSampling:
+    """Test which requests the middleware logs"""
+
+    def test_unsampled_success_is_not_logged(self, records):
+        logger, logged = records
+        client = make_client(logger, sample_rate=0.1)
+
+        assert client.get("/ok").status_code == 200
+        assert logged == []
+
+        client = make_client(logger, sample_rate=0.9)
+        client.get("/ok")
+        assert len(events(logged, "incoming_request")) == 1
+        assert len(events(logged, "http_request")) == 1
+
+    def test_errors_and_slow_requests_are_always_logged(self, records):
+        logger, logged = records
+
+        make_client(logger, sample_rate=0.0).post("/items", json={"price": -1})
+        make_client(logger, sample_rate=0.0, slow_seconds=0.0).get("/ok")
+
+        assert [r.status_code for r in events(logged, "http_request")] == [422, 200]
+        assert len(events(logged, "performance")) == 1
+
+
+class TestBodyCapture:
+    """Test that request bodies are only kept for failed or slow requests"""
+
+    def test_body_logged_for_failed_request(self, records, monkeypatch):
+        logger, logged = records
+        bodies = []
+        monkeypatch.setattr(LoggingMiddleware, "_log_outgoing_response",
+                            lambda self, request_info, response_info: bodies.append(request_info["body"]))
+        client = make_client(logger, sample_rate=1.0)
+
+        assert client.post("/items", json={"price": 100}).json() == {"price": 100}
+        assert client.post("/items", json={"price": -1}).status_code == 422
+
+        assert bodies == [None, {"price": -1}]
+
+    def test_suspicious_body_of_failed_request(self, records):
+        logger, logged = records
+
+        make_client(logger, sample_rate=0.0).post("/items", json={"price": -1, "note": "<script>"})
+
+        assert len(events(logged, "security")) == 1
+
+    def test_streaming_response_passes_through(self, records):
+        logger, logged = records
+
+        response = make_client(logger, sample_rate=1.0).post("/export", json={"ids": [1, 2]})
+
+        assert response.status_code == 202
+        assert response.text == "0,15\n1,15\n2,15\n"
+        assert [r.status_code for r in events(logged, "http_request")] == [202]
+
+
+class TestEntrypoint:
+    """Test that the API runs requests through the logging pipeline"""
+
+    def test_pipeline_installed_by_lifespan(self, tmp_path, monkeypatch):
+        from app import init_db
+        from app.core.config import settings
+        from app.main import app
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(settings, "LOG_TO_FILE", False)
+        monkeypatch.setattr(init_db, "init_db", lambda create_tables=True: None)
+
+        def queue_handlers():
+            return [h for h in logging.getLogger().handlers if isinstance(h, BoundedQueueHandler)]
+
+        assert LoggingMiddleware in [middleware.cls for middleware in app.user_middleware]
+        assert queue_handlers() == []
+
+        async def run_lifespan():
+            async with app.router.lifespan_context(app):
+                assert len(queue_handlers()) == 1
+                assert logging_config.logging_config.listener is not None
+
+        asyncio.run(run_lifespan())
+
+        assert queue_handlers() == []
+        assert logging_config.logging_config is None
+        assert list(tmp_path.iterdir()) == []
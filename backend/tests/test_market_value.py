@@ -0,0 +1,141 @@
+"""
+Market Value Tests
+
+This module contains tests for the comparables index: cell keys, robust
+cell statistics, the batch recomputation and market positions assigned at
+ingest.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.automotive import MarketValueCell, PriceHistory, VehicleListing
+from app.services import market_value
+from app.services.listing_ingest import ListingIngestor
+from app.services.market_value import (
+    ANY_BAND, ANY_YEAR, CellStats, MarketValueIndex, MarketValueService,
+    cell_stats, invalidate_market_index, level_keys, normalize_model
+)
+from benchmarks.bench_market_value import encode, sample_listings
+
+PRICES = [19000.0, 19500.0, 20000.0, 20000.0, 20500.0, 21000.0, 60000.0]
+
+
+def listing(n, price, model="320d Touring", year=2020, mileage=60000, **extra):
+    return VehicleListing(
+        external_id=f"ayvens_{n}", listing_url=f"https://carmarket.ayvens.com/lots/{n}",
+        make="BMW", model=model, year=year, mileage=mileage, price=price,
+        source_website="carmarket.ayvens.com", **extra)
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    invalidate_market_index()
+    yield
+    invalidate_market_index()
+
+
+class TestComparablesKeys:
+    """Test cell keys of listings"""
+
+    def test_normalized_base_model(self):
+        assert normalize_model("320d Touring M Sport") == "320d"
+        assert normalize_model("Serie 3 Touring") == "serie3"
+        assert normalize_model("  ") == ""
+
+    def test_levels_from_most_specific(self):
+        assert level_keys("Mercedes-Benz", "C220 CDI", 2019, 61000) == (
+            ("mercedesbenz", "c220", 2019, 2), ("mercedesbenz", "c220", 2019, ANY_BAND),
+            ("mercedesbenz", "c220", ANY_YEAR, ANY_BAND))
+        assert level_keys("BMW", "118i", None, 1000) == (None, None, ("bmw", "118i", ANY_YEAR, ANY_BAND))
+        assert level_keys("BMW", "", 2019, 1000) is None
+
+
+class TestCellStats:
+    """Test robust per-cell statistics"""
+
+    def test_median_and_mad_ignore_outliers(self):
+        cells = cell_stats([0] * len(PRICES) + [1, -1], PRICES + [5000.0, 1.0], use_numpy=False)
+
+        assert cells[0] == CellStats(7, 20000.0, 1.4826 * 500.0)
+        assert cells[1] == CellStats(1, 5000.0, 100.0)  # spread floor: 2% of the median
+        assert -1 not in cells
+
+    def test_numpy_matches_python(self):
+        if not market_value.NUMPY_AVAILABLE:
+            pytest.skip("NumPy not installed")
+        codes, prices = encode(sample_listings(5000, seed=3))
+
+        assert cell_stats(codes, prices, use_numpy=True) == cell_stats(codes, prices, use_numpy=False)
+
+
+class TestRecompute:
+    """Test the batch recomputation and ingest-time scoring"""
+
+    def add_listings(self, db_session):
+        db_session.add_all([listing(n, price) for n, price in enumerate(PRICES)])
+        db_session.add_all([
+            listing(100, 15000.0, model="118i"),  # too few comparables
+            listing(101, 1000.0, is_active=False),
+            listing(102, 1000.0, is_duplicate=True),
+        ])
+        db_session.commit()
+
+    def test_scores_listings_against_cells(self, db_session):
+        self.add_listings(db_session)
+
+        stats = MarketValueService(db_session).recompute(batch_size=3, use_numpy=False)
+
+        assert (stats.listings, stats.cells, stats.assessed, stats.updated) == (8, 3, 7, 7)
+        cell = db_session.query(MarketValueCell).filter(MarketValueCell.mileage_band == 2).one()
+        assert (cell.make_key, cell.model_key, cell.year, cell.listings, cell.median_price) == (
+            "bmw", "320d", 2020, 7, 20000.0)
+        positions = dict(db_session.query(VehicleListing.price, VehicleListing.market_position))
+        assert positions[19000.0] == "below_market"
+        assert positions[20500.0] == "at_market"
+        assert positions[60000.0] == "above_market"
+        assert positions[15000.0] is None
+        assert MarketValueService(db_session).recompute(use_numpy=False).updated == 0
+
+    def test_ingest_scores_from_index(self, db_session):
+        self.add_listings(db_session)
+        MarketValueService(db_session).recompute(use_numpy=False)
+
+        ingestor = ListingIngestor(db_session)
+        ingestor.ingest_batch([{
+            "external_id": "ayvens_500", "listing_url": "https://carmarket.ayvens.com/lots/500",
+            "make": "BMW", "model": "320d xDrive", "year": 2020, "mileage": 55000, "price": 16500.0,
+            "source_website": "carmarket.ayvens.com", "scraped_at": datetime.utcnow(),
+        }])
+        db_session.commit()
+
+        vehicle = db_session.query(VehicleListing).filter(VehicleListing.external_id == "ayvens_500").one()
+        assert (vehicle.market_position, vehicle.market_zscore) == ("below_market", round(-3500 / 741.3, 3))
+        assert db_session.query(PriceHistory.market_position).filter(
+            PriceHistory.vehicle_id == vehicle.id).scalar() == "below_market"
+
+    def test_falls_back_to_coarser_cells(self):
+        index = MarketValueIndex({("bmw", "320d", ANY_YEAR, ANY_BAND): CellStats(9, 20000.0, 1000.0),
+                                  ("bmw", "320d", 2020, 2): CellStats(4, 30000.0, 1000.0)})
+
+        assert index.assess("BMW", "320d", 2020, 60000, 18000.0) == ("below_market", -2.0)
+        assert index.assess("BMW", "118i", 2020, 60000, 18000.0) is None
+
+
+class TestMarketSearch:
+    """Test filtering and sorting vehicles by market value"""
+
+    def test_below_market_sorted_by_zscore(self, client, db_session):
+        db_session.add_all([
+            listing(1, 17000.0, market_position="below_market", market_zscore=-2.5),
+            listing(2, 18000.0, market_position="below_market", market_zscore=-1.2),
+            listing(3, 20000.0, market_position="at_market", market_zscore=0.0),
+        ])
+        db_session.commit()
+
+        response = client.get("/api/v1/automotive/vehicles",
+                              params={"market_position": "below_market", "sort_by": "market_value"})
+
+        assert response.status_code == 200
+        assert [v["market_zscore"] for v in response.json()["vehicles"]] == [-2.5, -1.2]
@@ -0,0 +1,109 @@
+"""
+Metrics Tests
+
+This module contains tests for the in-process metrics registry, its
+Prometheus text rendering, per-route request metrics and the on-demand
+queue and process collectors.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.metrics import Counter, Histogram, MetricsRegistry, process_stats
+from app.models.notifications import Notification, NotificationQueue
+from app.scraper.monitoring import ScraperMonitor
+from app.services.system_metrics import notification_queue_collector
+
+
+class TestRegistry:
+    """Test metrics and their text rendering"""
+
+    def test_counter_and_histogram_rendering(self):
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("requests_total", "Requests", ["route"]))
+        latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+        requests.labels("/vehicles").inc()
+        requests.labels("/vehicles").inc(2)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/vehicles"} 3' in lines
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 3.65" in lines
+        assert "latency_seconds_count 4" in lines
+
+    def test_register_returns_existing_metric(self):
+        registry = MetricsRegistry()
+        first = registry.register(Counter("jobs_total", "Jobs", ["job"]))
+
+        assert registry.register(Counter("jobs_total", "Jobs", ["job"])) is first
+        with pytest.raises(ValueError):
+            registry.register(Counter("jobs_total", "Jobs", ["other"]))
+        with pytest.raises(ValueError):
+            first.labels("a", "b")
+
+    def test_failing_collector_is_reported(self):
+        registry = MetricsRegistry()
+        registry.add_collector("broken", lambda: 1 / 0)
+
+        assert 'metrics_collector_errors{collector="broken",error="ZeroDivisionError"} 1' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Test request metrics on /metrics"""
+
+    def test_request_latency_by_route_template(self, client):
+        client.get("/api/v1/automotive/vehicles/424242")
+
+        body = client.get("/metrics").text
+
+        assert 'http_requests_total{method="GET",route="/api/v1/automotive/vehicles/{vehicle_id}",status="404"}' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/automotive/vehicles/{vehicle_id}"}' in body
+        assert "process_resident_memory_bytes" in body
+        assert "/metrics" not in body
+
+    def test_cloud_entrypoint_records_requests(self):
+        from fastapi.testclient import TestClient
+        from app.main_cloud import app as cloud_app
+
+        # Without the lifespan: no database or background scraper needed
+        cloud_client = TestClient(cloud_app)
+        cloud_client.get("/")
+
+        body = cloud_client.get("/metrics").text
+
+        assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+
+
+class TestCollectors:
+    """Test the on-demand collectors"""
+
+    def test_notification_queue_depth_and_age(self, db_session, test_db):
+        notification = Notification(user_id=1, notification_type="in_app", title="t", message="m")
+        db_session.add(notification)
+        db_session.flush()
+        db_session.add_all([
+            NotificationQueue(notification_id=notification.id, created_at=datetime.utcnow() - timedelta(minutes=10)),
+            NotificationQueue(notification_id=notification.id),
+            NotificationQueue(notification_id=notification.id, status="completed"),
+        ])
+        db_session.commit()
+
+        depth, age = notification_queue_collector(test_db)
+
+        assert sorted(depth[3], key=lambda sample: sample[0]["status"]) == [
+            ({"status": "completed"}, 1), ({"status": "queued"}, 2)]
+        assert 590 < age[3][0][1] < 700
+
+    def test_system_health_reports_memory_and_cpu(self):
+        health = ScraperMonitor().get_system_health()
+
+        assert health["memory_usage"]["rss_mb"] > 0
+        assert health["cpu_usage"]["cpu_seconds"] > 0
+        assert process_stats()["rss_bytes"] > 0
@@ -0,0 +1,120 @@
+"""
+Multi-Source Scraping Tests
+
+This module contains tests for concurrent multi-source scraping and the
+background task that records its progress.
+"""
+
+import json
+import threading
+from datetime import datetime
+
+from app.models.automotive import MultiSourceSession, ScrapingSession, VehicleListing
+from app.scraper.multi_source_scraper import MultiSourceScraper
+from app.scraper.sources import SourcePlugin
+from app.tasks.scraping_tasks import ScrapeAllSourcesTask
+
+
+def vehicle(source, lot_id, page):
+    return {
+        "external_id": f"{source}_{lot_id}",
+        "listing_url": f"https://{source}.example/lots/{lot_id}",
+        "make": "BMW",
+        "model": "320d",
+        "price": 20000.0,
+        "source_website": f"{source}.example",
+        "scraped_at": datetime.utcnow(),
+        "scrape_page": page,
+    }
+
+
+class FakeScraper:
+    """Two pages of two vehicles; waits on `barrier` between pages"""
+
+    def __init__(self, source, barrier=None, fail=False):
+        self.source = source
+        self.barrier = barrier
+        self.fail = fail
+
+    def scrape_all_listings(self, max_vehicles=50, on_page=None):
+        if self.fail:
+            raise RuntimeError("site down")
+        vehicles = []
+        for page in (1, 2):
+            page_vehicles = [vehicle(self.source, f"{page}{i}", page) for i in range(2)]
+            vehicles.extend(page_vehicles)
+            if on_page:
+                on_page(page, page_vehicles)
+            if self.barrier:
+                self.barrier.wait(timeout=5)
+        return vehicles
+
+
+def plugins(**scrapers):
+    return {
+        source: SourcePlugin(source, source.title(), f"https://{source}.example", "EU", lambda s=scraper: s)
+        for source, scraper in scrapers.items()
+    }
+
+
+class TestMultiSourceScraper:
+    """Test concurrent source scraping"""
+
+    def test_sources_run_concurrently(self):
+        # Each source waits for the other after every page: only passes if both run at once
+        barrier = threading.Barrier(2)
+        scraper = MultiSourceScraper(plugins(a=FakeScraper("a", barrier), b=FakeScraper("b", barrier)))
+        pages = []
+
+        results = scraper.scrape_all_enabled(
+            4, on_page=lambda source, page, vehicles: pages.append((source, page, len(vehicles)))
+        )
+
+        assert not barrier.broken
+        assert all(result.success and result.vehicles_scraped == 4 for result in results.values())
+        assert sorted(pages) == [("a", 1, 2), ("a", 2, 2), ("b", 1, 2), ("b", 2, 2)]
+        assert scraper.sources["a"]["total_scraped"] == 4
+
+    def test_disabled_and_failing_sources(self):
+        scraper = MultiSourceScraper(plugins(a=FakeScraper("a"), b=FakeScraper("b", fail=True),
+                                             c=FakeScraper("c")))
+        scraper.disable_source("c")
+        finished = []
+
+        results = scraper.scrape_all_enabled(on_result=lambda result: finished.append(result.source))
+
+        assert results["a"].success
+        assert results["b"].errors == ["site down"]
+        assert results["c"].errors == ["Source is disabled"]
+        assert sorted(finished) == ["a", "b"]
+
+
+class TestScrapeAllSourcesTask:
+    """Test the background multi-source task"""
+
+    def test_progress_recorded_in_session(self, test_db, db_session):
+        scraper = MultiSourceScraper(plugins(a=FakeScraper("a"), b=FakeScraper("b", fail=True)))
+        task_runner = ScrapeAllSourcesTask(session_factory=test_db, scraper=scraper)
+
+        task = task_runner.delay(max_vehicles_per_source=10)
+        assert task_runner.get_task(task.id) is task
+        assert task.wait(timeout=10)
+
+        db_session.expire_all()
+        session = db_session.query(MultiSourceSession).filter(MultiSourceSession.session_id == task.id).one()
+        assert session.status == "completed"
+        assert json.loads(session.sources_requested) == ["a", "b"]
+        assert json.loads(session.sources_completed) == ["a"]
+        assert json.loads(session.sources_failed) == ["b"]
+        assert (session.completed_sources, session.failed_sources) == (1, 1)
+        assert session.total_vehicles_found == 4
+        assert session.total_vehicles_new == 4
+        assert session.fastest_source_duration <= session.average_source_duration <= session.slowest_source_duration
+        assert session.completed_at is not None
+
+        assert db_session.query(VehicleListing).count() == 4
+        source_sessions = db_session.query(ScrapingSession).filter(
+            ScrapingSession.multi_source_session_id == task.id
+        ).all()
+        assert sorted((s.source_website, s.status) for s in source_sessions) == [("a", "completed"), ("b", "failed")]
+        assert task.get_result().success
@@ -0,0 +1,110 @@
+"""
+Parse Pool Tests
+
+This module contains tests for result page parsing into compact listing
+tuples and the warm worker process pool that parses pages off the crawl
+thread.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from app.scraper.ayvens_scraper import AyvensCarmarketScraper
+from app.scraper.page_parser import ParsedListing, extract_year, parse_results_page
+from app.scraper.parse_pool import ParsePool
+
+BASE_URL = "https://carmarket.ayvens.com"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def results_html(lot_ids):
+    cards = "".join(
+        f'<div class="lot-card"><h3>Volvo XC60 B4 (2021)</h3>'
+        f'<span class="lot-price">€ 31,990</span>'
+        f'<a href="/lots/{lot_id}">Lot {lot_id}</a>'
+        f'<img src="/images/{lot_id}.jpg"></div>'
+        for lot_id in lot_ids
+    )
+    return f"<html><body>{cards}</body></html>".encode()
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(workers=2).start()
+    yield pool
+    pool.shutdown()
+
+
+class TestPageParser:
+    """Test parsing result pages into listing tuples"""
+
+    def test_listings_are_plain_tuples(self):
+        listings = parse_results_page(results_html([7, 8]), BASE_URL)
+
+        assert listings[0] == ParsedListing(
+            external_id="ayvens_7", listing_url=f"{BASE_URL}/lots/7", title="Volvo XC60 B4 (2021)",
+            make="Volvo", model="XC60 B4", year=2021, price=31990.0,
+            image_url=f"{BASE_URL}/images/7.jpg", image_urls=(f"{BASE_URL}/images/7.jpg",))
+        assert [listing.external_id for listing in listings] == ["ayvens_7", "ayvens_8"]
+        assert all(isinstance(value, (str, int, float, tuple, type(None))) for value in listings[0])
+
+    def test_year_from_title(self):
+        listing = parse_results_page(results_html([7]), BASE_URL)[0]
+
+        assert listing.year == 2021
+        assert extract_year("BMW 320d Touring 2019, 84 500 km") == 2019
+        assert extract_year("Lot 1850 - Renault Clio") is None
+
+    def test_page_without_listings(self):
+        assert parse_results_page(b"<html><body><p>Nothing here</p></body></html>", BASE_URL) == []
+
+    def test_worker_import_skips_image_pipeline(self):
+        code = ("import json, sys, app.scraper.page_parser; "
+                "print(json.dumps(sorted(m for m in ('PIL', 'app.scraper.image_downloader') if m in sys.modules)))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout.splitlines()[-1]) == []
+
+
+class TestParsePool:
+    """Test the worker process pool"""
+
+    def test_start_warms_every_worker(self, pool):
+        assert pool.running
+        assert len(pool.worker_pids) == 2
+        assert pool.warmup_seconds is not None
+
+    def test_pool_matches_inline_parsing(self, pool):
+        pages = [results_html(range(i, i + 3)) for i in range(0, 30, 3)]
+
+        assert list(pool.parse_pages(pages, BASE_URL)) == [parse_results_page(page, BASE_URL) for page in pages]
+        assert pool.parse_page(pages[0], BASE_URL) == parse_results_page(pages[0], BASE_URL)
+        assert pool.get_stats()["pages_in_pool"] >= 11
+
+    def test_parses_inline_until_started(self):
+        pool = ParsePool(workers=1)
+
+        assert pool.parse_page(results_html([1]), BASE_URL)[0].external_id == "ayvens_1"
+        assert pool.get_stats()["pages_inline"] == 1
+
+    def test_crawl_parses_in_pool(self, pool):
+        scraper = AyvensCarmarketScraper()
+        scraper.image_downloader = Mock()
+        scraper.image_downloader.download_image.return_value = None
+        scraper.image_downloader.download_multiple_images.return_value = []
+        scraper.parse_pool = pool
+        pages = {1: Mock(content=results_html([1, 2, 3]), fetch_outcome="changed")}
+        scraper._make_request = lambda url, **kwargs: pages.get(int(url.rsplit("=", 1)[1]))
+        in_pool = pool.pages_in_pool
+
+        vehicles = AyvensCarmarketScraper.scrape_all_listings.__wrapped__(scraper, max_vehicles=2)
+
+        assert [(v["external_id"], v["make"], v["price"], v["scrape_page"]) for v in vehicles] == [
+            ("ayvens_1", "Volvo", 31990.0, 1), ("ayvens_2", "Volvo", 31990.0, 1)]
+        assert pool.pages_in_pool == in_pool + 1
@@ -0,0 +1,93 @@
+"""
+Listing Field Extraction Tests
+
+This module checks the shared precompiled parsers against the per-call
+implementations they replaced, over generated titles and price strings,
+and covers locale-aware price parsing.
+"""
+
+import random
+
+import pytest
+
+from app.scraper import parsing
+from app.scraper.ayvens_scraper import AyvensCarmarketScraper
+from app.scraper.base import BaseScraper
+from benchmarks.bench_parsing import (
+    legacy_clean_number, legacy_clean_price, legacy_parse_make_model, legacy_parse_price,
+    sample_prices, sample_titles,
+)
+
+FUZZ_ALPHABET = "0123456789.,  €$£-()[]abcBMWMINIseatKia ß"
+
+
+def fuzz_strings(count, seed):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 16))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+class TestMatchesLegacyBehaviour:
+    """Property tests: same result as the replaced implementations"""
+
+    def test_price(self, seed):
+        for text in sample_prices(2000, seed) + fuzz_strings(2000, seed):
+            assert parsing.parse_price(text) == legacy_parse_price(text), text
+
+    def test_grouped_price(self, seed):
+        for text in sample_prices(2000, seed) + fuzz_strings(2000, seed):
+            assert parsing.parse_grouped_price(text) == legacy_clean_price(text), text
+
+    def test_number(self, seed):
+        for text in sample_prices(2000, seed) + fuzz_strings(2000, seed):
+            assert parsing.parse_number(text) == legacy_clean_number(text), text
+
+    def test_make_model(self, seed):
+        parsing.parse_make_model.cache_clear()
+        for title in sample_titles(2000, seed) + fuzz_strings(2000, seed):
+            assert parsing.parse_make_model(title) == legacy_parse_make_model(title), title
+
+
+class TestLocalePrices:
+    """Test prices with known separators"""
+
+    @pytest.mark.parametrize("text,locale,expected", [
+        ("€ 12.500", "it", 12500.0),
+        ("12.500,50 €", "it", 12500.5),
+        ("1.234.567", "DE", 1234567.0),
+        ("12 500,00 €", "fr", 12500.0),
+        ("£12,500.99", "en", 12500.99),
+        ("€ 12.500", None, 12.5),  # guessed: a single '.' is a decimal point
+        ("n/a", "it", None),
+    ])
+    def test_parse_price(self, text, locale, expected):
+        assert parsing.parse_price(text, locale) == expected
+
+    def test_clean_price_locale(self):
+        scraper = BaseScraper()
+
+        assert scraper.clean_price("18.500,50", locale="it") == 18500.5
+        assert scraper.clean_price("18.500,50") == 1850050.0
+
+
+class TestMakeModel:
+    """Test make/model parsing"""
+
+    def test_priority_order_wins_over_position(self):
+        assert parsing.parse_make_model("Mini Cooper by BMW") == ("BMW", "Unknown")
+        assert parsing.parse_make_model("Mercedes-Benz C220 2019") == ("Mercedes", "Benz C220")
+
+    def test_memoized(self):
+        parsing.parse_make_model.cache_clear()
+        for _ in range(3):
+            parsing.parse_make_model("Fiat Panda 4x4")
+
+        assert parsing.parse_make_model.cache_info().hits == 2
+
+    def test_scraper_uses_shared_parsers(self):
+        scraper = AyvensCarmarketScraper()
+
+        assert scraper._parse_make_model("Volvo XC60 B4 (2021)") == ("Volvo", "XC60 B4")
+        assert scraper._extract_price("€ 21,990") == 21990.0
+        assert scraper._extract_mileage("84 500 km") == 84500
+        assert parsing.TITLE_FALLBACK_PATTERN.search("Lot 12 audi A4 Avant").group(0) == "audi A4 Avant"
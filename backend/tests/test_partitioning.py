@@ -0,0 +1,76 @@
+"""
+Partitioning Tests
+
+This module contains tests for monthly partition naming and bounds, the
+no-op behaviour outside PostgreSQL and retention dropping whole expired
+partitions.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import inspect, text
+
+from app.models.notifications import Notification, NotificationQueue
+from app.services.partitioning import (
+    PartitionManager, add_months, expired_partitions, partition_month, partition_name
+)
+from app.services.retention import NOTIFICATION_POLICY, RetentionEngine
+
+
+class TestPartitionNames:
+    """Test monthly partition names and bounds"""
+
+    def test_month_arithmetic(self):
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+    def test_names_round_trip(self):
+        name = partition_name("price_history", date(2024, 3, 1))
+
+        assert name == "price_history_p202403"
+        assert partition_month("price_history", name) == date(2024, 3, 1)
+        assert partition_month("price_history", "price_history_default") is None
+
+    def test_expired_partitions(self):
+        names = ["scraping_logs_default", "scraping_logs_p202403", "scraping_logs_p202401", "scraping_logs_p202402"]
+
+        # March still holds rows newer than the cutoff
+        assert expired_partitions("scraping_logs", names, datetime(2024, 3, 15)) == [
+            "scraping_logs_p202401", "scraping_logs_p202402"]
+        assert expired_partitions("scraping_logs", names, datetime(2024, 1, 1)) == []
+
+
+class TestPartitionManager:
+    """Test partition maintenance outside PostgreSQL"""
+
+    def test_noop_on_sqlite(self, db_session):
+        manager = PartitionManager(db_session)
+
+        assert manager.enabled is False
+        assert manager.ensure(3) == {}
+        assert manager.partitions("notifications") == []
+
+
+class TestPartitionRetention:
+    """Test retention dropping expired partitions"""
+
+    def test_drops_expired_partition_with_children(self, db_session, monkeypatch):
+        notifications = [Notification(user_id=1, notification_type="in_app", title="t", message="m")
+                         for _ in range(3)]
+        db_session.add_all(notifications)
+        db_session.flush()
+        db_session.add_all([NotificationQueue(notification_id=n.id) for n in notifications])
+        # Stand-in for the January partition holding the first two notifications
+        db_session.execute(text("CREATE TABLE notifications_p202001 (id INTEGER)"))
+        db_session.execute(text("INSERT INTO notifications_p202001 VALUES (:a), (:b)"),
+                           {"a": notifications[0].id, "b": notifications[1].id})
+        db_session.commit()
+        monkeypatch.setattr(PartitionManager, "partitions",
+                            lambda self, table: ["notifications_default", "notifications_p202001"])
+
+        result = RetentionEngine(db_session, pause_seconds=0).purge(NOTIFICATION_POLICY)
+
+        assert (result.rows, result.partitions) == (2, ["notifications_p202001"])
+        assert result.children == {"notification_queue": 2}
+        assert db_session.query(NotificationQueue.notification_id).all() == [(notifications[2].id,)]
+        assert "notifications_p202001" not in inspect(db_session.get_bind()).get_table_names()
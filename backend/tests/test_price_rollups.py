@@ -0,0 +1,150 @@
+"""
+Price Rollup Tests
+
+This module contains tests for price history recording on ingest, the
+incrementally maintained daily/weekly price rollups and the price history
+and price analytics endpoints.
+"""
+
+import json
+import statistics
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.automotive import DailyPriceRollup, PriceHistory, VehicleListing, WeeklyPriceRollup
+from app.services.listing_ingest import ListingIngestor
+from app.services.price_rollups import PRICE_BIN_RATIO, PricePoint, PriceRollupService, period_start
+
+
+def vehicle(lot_id, price, model="320d", **extra):
+    return {
+        "external_id": f"ayvens_{lot_id}",
+        "listing_url": f"https://carmarket.ayvens.com/lots/{lot_id}",
+        "make": "BMW",
+        "model": model,
+        "year": 2020,
+        "price": price,
+        "source_website": "carmarket.ayvens.com",
+        "scraped_at": datetime.utcnow(),
+        **extra,
+    }
+
+
+def ingest(db_session, vehicles):
+    ingestor = ListingIngestor(db_session)
+    ingestor.ingest_batch(vehicles)
+    db_session.commit()
+    return ingestor
+
+
+class TestPriceRecording:
+    """Test price history and rollups written on ingest"""
+
+    def test_first_price_and_changes_are_recorded(self, db_session):
+        ingest(db_session, [vehicle(1, 20000.0), vehicle(2, 30000.0)])
+        ingest(db_session, [vehicle(1, 18000.0), vehicle(2, 30000.0)])
+
+        history = db_session.query(PriceHistory.price, PriceHistory.price_change).order_by(PriceHistory.id).all()
+        assert history == [(20000.0, 0.0), (30000.0, 0.0), (18000.0, -2000.0)]
+
+        daily = db_session.query(DailyPriceRollup).one()
+        assert (daily.make, daily.model, daily.year, daily.observations) == ("BMW", "320d", 2020, 3)
+        assert (daily.price_min, daily.price_max, daily.price_sum) == (18000.0, 30000.0, 68000.0)
+        weekly = db_session.query(WeeklyPriceRollup).one()
+        assert weekly.period_start == period_start(datetime.utcnow(), "week")
+        assert weekly.period_start.weekday() == 0
+
+    def test_days_on_market(self, db_session):
+        ingest(db_session, [vehicle(1, 20000.0)])
+        listing = db_session.query(VehicleListing).one()
+        first = db_session.query(PriceHistory).one()
+        first.recorded_at = datetime.utcnow() - timedelta(days=10)
+        db_session.commit()
+
+        listing.price = 19000.0
+        PriceRollupService(db_session).record_prices([(listing, 20000.0)])
+        db_session.commit()
+
+        assert db_session.query(PriceHistory.days_on_market).order_by(PriceHistory.id.desc()).first() == (10,)
+        assert db_session.query(DailyPriceRollup.days_on_market_sum).scalar() == 10
+
+
+class TestPriceSeries:
+    """Test reading and rebuilding rollups"""
+
+    def add_points(self, db_session):
+        monday = datetime(2026, 3, 2, 12)
+        service = PriceRollupService(db_session)
+        service.add([
+            PricePoint("BMW", "320d", 2020, 20000.0, monday, 0),
+            PricePoint("BMW", "320d", 2020, 22000.0, monday + timedelta(days=1), 4),
+            PricePoint("BMW", "118i", 2019, 15000.0, monday + timedelta(days=2), 2),
+            PricePoint("BMW", "320d", 2020, 21000.0, monday + timedelta(days=7), 6),
+        ])
+        db_session.commit()
+        return service
+
+    def test_weekly_series_merges_models(self, db_session):
+        service = self.add_points(db_session)
+
+        series = service.series("BMW", period="week")
+
+        assert series[0]["median"] == pytest.approx(20000.0, rel=0.005)
+        assert {**series[0], "median": None} == {
+            "period_start": "2026-03-02", "count": 3, "min": 15000.0, "median": None,
+            "max": 22000.0, "mean": 19000.0, "mean_days_on_market": 2.0}
+        assert series[1]["period_start"] == "2026-03-09"
+        assert [p["count"] for p in service.series("BMW", model="320d", period="day")] == [1, 1, 1]
+        assert service.series("BMW", year=2019, period="week")[0]["median"] == 15000.0  # clamped to min/max
+        assert service.series("BMW", period="week", start=date(2026, 3, 4)) == series  # whole first week
+
+    def test_rollups_store_bins_not_prices(self, db_session):
+        monday = datetime(2026, 3, 2, 12)
+        prices = [10000.0 + 5.0 * i for i in range(2000)]
+        service = PriceRollupService(db_session)
+        service.add([PricePoint("BMW", "320d", 2020, price, monday) for price in prices])
+        db_session.commit()
+
+        row = db_session.query(DailyPriceRollup).one()
+        assert row.observations == 2000
+        assert len(json.loads(row.price_bins)) < 100
+        median = service.series("BMW", period="day")[0]["median"]
+        assert median == pytest.approx(statistics.median(prices), rel=PRICE_BIN_RATIO - 1)
+
+    def test_rebuild_matches_incremental_rollups(self, db_session):
+        ingest(db_session, [vehicle(1, 20000.0), vehicle(2, 24000.0, model="118i")])
+        ingest(db_session, [vehicle(1, 19000.0)])
+        service = PriceRollupService(db_session)
+        incremental = service.series("BMW", period="day")
+
+        assert service.rebuild(batch_size=2) == 3
+        assert service.series("BMW", period="day") == incremental
+
+
+class TestPriceEndpoints:
+    """Test the price history and price analytics endpoints"""
+
+    def test_vehicle_price_history(self, client, db_session):
+        ingest(db_session, [vehicle(1, 20000.0)])
+        ingest(db_session, [vehicle(1, 18500.0)])
+        vehicle_id = db_session.query(VehicleListing.id).scalar()
+
+        response = client.get(f"/api/v1/automotive/vehicles/{vehicle_id}/price-history")
+
+        assert response.status_code == 200
+        assert [point["price"] for point in response.json()] == [20000.0, 18500.0]
+        assert client.get("/api/v1/automotive/vehicles/999/price-history").status_code == 404
+
+    def test_price_analytics(self, client, db_session):
+        ingest(db_session, [vehicle(1, 20000.0), vehicle(2, 30000.0)])
+
+        response = client.get("/api/v1/automotive/analytics/prices", params={"make": "BMW", "interval": "day"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["make"], data["interval"]) == ("BMW", "day")
+        assert [p["count"] for p in data["series"]] == [2]
+        assert data["series"][0]["median"] == pytest.approx(25000.0, rel=0.005)
+        assert client.get("/api/v1/automotive/analytics/prices",
+                          params={"make": "BMW", "interval": "month"}).status_code == 422
@@ -0,0 +1,224 @@
+"""
+Push Delivery Engine Tests
+
+This module tests batching, concurrency and token pruning of the push
+delivery engine against a fake messaging backend.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.notifications import Notification, NotificationStatus, NotificationType
+from app.services.push_delivery import (
+    FCM_MAX_BATCH_SIZE, FirebaseMessagingBackend, PushDeliveryEngine, PushPayload, TokenStore,
+    is_stale_token_error
+)
+
+
+class UnregisteredError(Exception):
+    """Mimics firebase_admin.messaging.UnregisteredError"""
+
+
+class QuotaExceededError(Exception):
+    """Mimics a transient FCM error"""
+
+
+class InvalidArgumentError(Exception):
+    """Mimics firebase_admin.exceptions.InvalidArgumentError"""
+
+
+class FakeMessagingBackend:
+    """Records batches and fails tokens listed in `errors`"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.multicasts = []
+        self.send_each_batches = []
+        self.lock = threading.Lock()
+
+    def send_multicast(self, payload, tokens):
+        with self.lock:
+            self.multicasts.append((payload, list(tokens)))
+        return [self.errors.get(token) for token in tokens]
+
+    def send_each(self, messages):
+        with self.lock:
+            self.send_each_batches.append(list(messages))
+        return [self.errors.get(token) for _, token in messages]
+
+
+class FakeTokenStore(TokenStore):
+    def __init__(self, tokens_by_user):
+        self.tokens_by_user = tokens_by_user
+        self.removed = []
+        self.failed = []
+        self.delivered = []
+
+    def tokens_for_users(self, user_ids):
+        return {uid: list(self.tokens_by_user.get(uid, [])) for uid in user_ids}
+
+    def remove_tokens(self, tokens):
+        self.removed.extend(tokens)
+        return len(tokens)
+
+    def record_failures(self, tokens):
+        self.failed.extend(tokens)
+
+    def record_successes(self, tokens):
+        self.delivered.extend(tokens)
+
+
+def make_notification(notification_id, user_id, title="New BMW 320d Match!", listing_id=1):
+    return Notification(
+        id=notification_id,
+        user_id=user_id,
+        listing_id=listing_id,
+        notification_type=NotificationType.PUSH,
+        title=title,
+        message="Found a 2020 BMW 320d for 25000 EUR",
+        status=NotificationStatus.PENDING
+    )
+
+
+class TestPushDeliveryEngine:
+    """Test push delivery engine functionality"""
+
+    def test_multicast_chunks_respect_fcm_limit(self):
+        backend = FakeMessagingBackend()
+        engine = PushDeliveryEngine(backend, max_workers=4)
+        payload = PushPayload(title="Hello", body="World")
+        tokens = [f"token-{i}" for i in range(1234)]
+
+        results = engine.send({payload: tokens})
+
+        assert len(results) == 1234
+        assert all(error is None for error in results.values())
+        assert [len(tokens) for _, tokens in backend.multicasts] == [500, 500, 234]
+        assert all(len(tokens) <= FCM_MAX_BATCH_SIZE for _, tokens in backend.multicasts)
+
+    def test_single_token_payloads_use_send_each(self):
+        backend = FakeMessagingBackend()
+        engine = PushDeliveryEngine(backend)
+        targets = {PushPayload(title=f"Title {i}", body="Body"): [f"token-{i}"] for i in range(3)}
+
+        engine.send(targets)
+
+        assert backend.multicasts == []
+        assert len(backend.send_each_batches) == 1
+        assert len(backend.send_each_batches[0]) == 3
+
+    def test_notifications_grouped_by_payload(self):
+        backend = FakeMessagingBackend()
+        store = FakeTokenStore({1: ["a1", "a2"], 2: ["b1"], 3: ["c1"]})
+        engine = PushDeliveryEngine(backend, token_store=store)
+        notifications = [make_notification(i, user_id=i) for i in (1, 2, 3)]
+
+        report = engine.deliver_notifications(notifications)
+
+        # Same payload for all three users -> a single multicast
+        assert len(backend.multicasts) == 1
+        assert sorted(backend.multicasts[0][1]) == ["a1", "a2", "b1", "c1"]
+        assert report.results == {1: True, 2: True, 3: True}
+        assert all(n.status == NotificationStatus.SENT for n in notifications)
+
+    def test_stale_tokens_are_pruned(self):
+        backend = FakeMessagingBackend(errors={
+            "a2": UnregisteredError("gone"),
+            "b1": QuotaExceededError("slow down")
+        })
+        store = FakeTokenStore({1: ["a1", "a2"], 2: ["b1"]})
+        engine = PushDeliveryEngine(backend, token_store=store)
+        notifications = [make_notification(1, 1), make_notification(2, 2)]
+
+        report = engine.deliver_notifications(notifications)
+
+        assert store.removed == ["a2"]
+        assert store.failed == ["b1"]
+        assert store.delivered == ["a1"]
+        assert report.pruned_tokens == ["a2"]
+        assert report.success_count == 1
+        assert report.failure_count == 2
+        assert report.results == {1: True, 2: False}
+        assert notifications[1].status == NotificationStatus.FAILED
+
+    def test_user_without_tokens_fails(self):
+        backend = FakeMessagingBackend()
+        engine = PushDeliveryEngine(backend, token_store=FakeTokenStore({}))
+        notification = make_notification(1, 1)
+
+        report = engine.deliver_notifications([notification])
+
+        assert report.results == {1: False}
+        assert notification.status == NotificationStatus.FAILED
+        assert backend.multicasts == [] and backend.send_each_batches == []
+
+    def test_batch_exception_does_not_prune(self):
+        class BrokenBackend(FakeMessagingBackend):
+            def send_multicast(self, payload, tokens):
+                raise ConnectionError("network down")
+
+        store = FakeTokenStore({1: ["a1", "a2"]})
+        engine = PushDeliveryEngine(BrokenBackend(), token_store=store)
+
+        report = engine.deliver_notifications([make_notification(1, 1)])
+
+        assert report.results == {1: False}
+        assert report.failure_count == 2
+        assert store.removed == []
+        # Outages do not count against the tokens
+        assert store.failed == []
+
+    @pytest.mark.parametrize("error,expected", [
+        (None, False),
+        (UnregisteredError("x"), True),
+        (QuotaExceededError("x"), False),
+        (InvalidArgumentError("The registration token is not a valid FCM registration token"), True),
+        (InvalidArgumentError("Android message is too big"), False),
+    ])
+    def test_is_stale_token_error(self, error, expected):
+        assert is_stale_token_error(error) is expected
+
+
+class FakeMessagingModule:
+    """Stands in for firebase_admin.messaging, building plain namespaces"""
+
+    def __init__(self):
+        self.sent = []
+        for name in ("AndroidConfig", "AndroidNotification", "APNSConfig", "APNSPayload",
+                     "Aps", "Notification", "Message", "MulticastMessage"):
+            setattr(self, name, lambda **kwargs: SimpleNamespace(**kwargs))
+
+    def send_each_for_multicast(self, message):
+        self.sent.append(message)
+        return SimpleNamespace(responses=[SimpleNamespace(success=True, exception=None)
+                                          for _ in message.tokens])
+
+    def send_each(self, messages):
+        self.sent.extend(messages)
+        return SimpleNamespace(responses=[SimpleNamespace(success=True, exception=None)
+                                          for _ in messages])
+
+
+class TestFirebaseMessagingBackend:
+    """Platform options set on batched messages"""
+
+    def test_batched_messages_match_per_device_config(self):
+        module = FakeMessagingModule()
+        backend = FirebaseMessagingBackend(messaging_module=module)
+        payload = PushPayload(title="t", body="b")
+
+        backend.send_multicast(payload, ["a", "b"])
+        backend.send_each([(payload, "c")])
+
+        assert len(module.sent) == 2
+        for message in module.sent:
+            assert message.android.priority == 'high'
+            assert message.android.notification.click_action == 'FLUTTER_NOTIFICATION_CLICK'
+            assert message.apns.payload.aps.sound == 'default'
+            assert message.apns.payload.aps.badge == 1
+
+    def test_token_store_is_abstract(self):
+        with pytest.raises(TypeError):
+            TokenStore()
@@ -0,0 +1,113 @@
+"""
+Rate Limiter Tests
+
+This module contains tests for the per-domain GCRA rate limiter.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.scraper.compliance import ComplianceManager
+from app.scraper.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FailingBackend:
+    def reserve(self, key, rates, now, take=True):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestRateLimiter:
+    """Test GCRA rate limiting"""
+
+    def test_burst_then_spacing(self, clock):
+        limiter = RateLimiter(requests_per_minute=3, requests_per_hour=0, clock=clock)
+
+        # Up to the per-minute count goes through at once
+        assert [limiter.reserve("a.com") for _ in range(3)] == [0, 0, 0]
+        # Then one slot every 20 seconds
+        assert limiter.reserve("a.com") == pytest.approx(20)
+        assert limiter.reserve("a.com") == pytest.approx(40)
+
+        clock.now += 60
+        assert limiter.reserve("a.com") == pytest.approx(0)
+
+    def test_domains_are_independent(self, clock):
+        limiter = RateLimiter(requests_per_minute=1, requests_per_hour=0, clock=clock)
+
+        assert limiter.reserve("a.com") == 0
+        assert limiter.reserve("b.com") == 0
+        assert limiter.delay_for("a.com") == pytest.approx(60)
+        assert limiter.delay_for("b.com") == pytest.approx(60)
+
+    def test_hourly_limit_applies(self, clock):
+        limiter = RateLimiter(requests_per_minute=60, requests_per_hour=2, clock=clock)
+
+        limiter.reserve("a.com")
+        limiter.reserve("a.com")
+
+        assert limiter.delay_for("a.com") == pytest.approx(1800)
+
+    def test_delay_for_does_not_reserve(self, clock):
+        limiter = RateLimiter(requests_per_minute=1, requests_per_hour=0, clock=clock)
+
+        assert limiter.delay_for("a.com") == 0
+        assert limiter.delay_for("a.com") == 0
+        assert limiter.reserve("a.com") == 0
+        assert limiter.acquired == 1
+
+    def test_thread_safe_reservations(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=10, requests_per_hour=0, clock=clock)
+        waits = []
+
+        def worker():
+            for _ in range(10):
+                waits.append(limiter.reserve("a.com"))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 40 reservations: 10 immediate, then one every 6 seconds
+        assert sorted(waits) == pytest.approx([0] * 10 + [6 * i for i in range(1, 31)])
+
+    def test_async_acquire(self):
+        limiter = RateLimiter(requests_per_minute=2, requests_per_hour=0)
+
+        async def run():
+            return [await limiter.acquire("a.com") for _ in range(2)]
+
+        assert asyncio.run(run()) == [0, 0]
+
+    def test_backend_failure_falls_back_to_local_limits(self, clock):
+        limiter = RateLimiter(requests_per_minute=1, requests_per_hour=0,
+                              backend=FailingBackend(), clock=clock)
+
+        assert limiter.reserve("a.com") == 0
+        assert limiter.reserve("a.com") == pytest.approx(60)
+
+    def test_compliance_manager_shares_limiter(self, clock):
+        limiter = RateLimiter(requests_per_minute=1, requests_per_hour=0, clock=clock)
+        compliance = ComplianceManager(rate_limiter=limiter)
+
+        assert compliance.check_rate_limit("a.com", min_delay=0) is True
+        limiter.reserve("a.com")  # e.g. a scraper fetched a page
+        assert compliance.check_rate_limit("a.com", min_delay=0) is False
+        assert compliance.get_rate_limit_status("a.com")["seconds_until_allowed"] == pytest.approx(60)
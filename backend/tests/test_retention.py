@@ -0,0 +1,135 @@
+"""
+Retention Tests
+
+This module contains tests for the chunked retention engine: bounded
+chunks with pauses, child rows handled before their parents and archiving
+rows before they are deleted.
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from app.models.automotive import PriceHistory, ScrapingLog, VehicleImage, VehicleListing
+from app.models.notifications import Notification, NotificationQueue
+from app.services import retention
+from app.services.retention import (
+    MATCH_LOG_POLICY, NOTIFICATION_POLICY, RetentionEngine, RetentionPolicy, data_policies
+)
+
+OLD = datetime.utcnow() - timedelta(days=400)
+
+
+def engine(db_session, **kwargs):
+    pauses = []
+    kwargs.setdefault("chunk_size", 3)
+    return RetentionEngine(db_session, pause_seconds=0.5, sleep=pauses.append, archive_dir="", **kwargs), pauses
+
+
+def listing(n, **extra):
+    return VehicleListing(external_id=f"ayvens_{n}", listing_url=f"https://carmarket.ayvens.com/lots/{n}",
+                          make="BMW", model="320d", price=20000.0, source_website="carmarket.ayvens.com", **extra)
+
+
+class TestChunkedPurge:
+    """Test deleting in bounded chunks"""
+
+    def test_deletes_old_rows_in_paused_chunks(self, db_session):
+        db_session.add_all([ScrapingLog(session_id=f"s{i}", source_url="https://example.com", status="success",
+                                        started_at=OLD if i < 7 else datetime.utcnow()) for i in range(9)])
+        db_session.commit()
+        retention_engine, pauses = engine(db_session)
+
+        result = retention_engine.purge(RetentionPolicy("scraping_logs", ScrapingLog, "started_at", 365))
+
+        assert (result.rows, result.chunks, pauses) == (7, 3, [0.5, 0.5])
+        assert db_session.query(ScrapingLog).count() == 2
+        assert result.to_dict()["rows_per_second"] > 0
+
+    def test_listing_children_before_parent(self, db_session):
+        old, kept = listing(1, is_active=False, scraped_at=OLD), listing(2, is_active=False)
+        db_session.add_all([old, kept])
+        db_session.flush()
+        duplicate = listing(3, duplicate_of=old.id, is_duplicate=True)
+        db_session.add_all([
+            duplicate,
+            VehicleImage(vehicle_id=old.id, image_url="https://example.com/1.jpg"),
+            PriceHistory(vehicle_id=old.id, price=20000.0, recorded_at=datetime.utcnow()),
+            PriceHistory(vehicle_id=kept.id, price=20000.0, recorded_at=datetime.utcnow()),
+            ScrapingLog(session_id="s", source_url="https://example.com", status="success", vehicle_id=old.id),
+            Notification(user_id=1, listing_id=old.id, notification_type="in_app", title="t", message="m"),
+        ])
+        db_session.commit()
+        old_id = old.id
+
+        results = {r.name: r for r in engine(db_session)[0].run(data_policies(365))}
+
+        assert results["vehicle_listings"].rows == 1
+        assert results["vehicle_listings"].children == {"vehicle_images": 1, "price_history": 1,
+                                                        "vehicle_comparison_items": 0}
+        assert db_session.query(VehicleListing.id).filter(VehicleListing.id == old_id).first() is None
+        assert db_session.query(PriceHistory).count() == 1
+        assert db_session.query(ScrapingLog.vehicle_id).scalar() is None
+        assert db_session.query(Notification.listing_id).scalar() is None
+        assert db_session.query(VehicleListing.duplicate_of).filter(VehicleListing.id == duplicate.id).scalar() is None
+
+    def test_notification_queue_entries_first(self, db_session):
+        notifications = [Notification(user_id=1, notification_type="in_app", title="t", message="m",
+                                       created_at=OLD if i else datetime.utcnow()) for i in range(4)]
+        db_session.add_all(notifications)
+        db_session.flush()
+        db_session.add_all([NotificationQueue(notification_id=n.id) for n in notifications])
+        db_session.commit()
+
+        result = engine(db_session)[0].purge(NOTIFICATION_POLICY)
+
+        assert (result.rows, dict(result.children)) == (3, {"notification_queue": 3})
+        assert db_session.query(NotificationQueue).count() == 1
+        assert engine(db_session)[0].purge(MATCH_LOG_POLICY).rows == 0
+
+    def test_chunked_update(self, db_session):
+        db_session.add_all([listing(n, last_updated=OLD) for n in range(5)] + [listing(9)])
+        db_session.commit()
+
+        result = engine(db_session, chunk_size=2)[0].update(
+            "deactivate", VehicleListing,
+            [VehicleListing.last_updated < datetime.utcnow() - timedelta(days=30), VehicleListing.is_active == True],
+            {"is_active": False})
+
+        assert (result.rows, result.chunks) == (5, 3)
+        assert db_session.query(VehicleListing).filter(VehicleListing.is_active == True).count() == 1
+
+
+class TestArchive:
+    """Test archiving rows before deleting them"""
+
+    def test_jsonl_archive(self, db_session, tmp_path):
+        db_session.add_all([listing(n, is_active=False, scraped_at=OLD) for n in range(4)])
+        db_session.flush()
+        ids = [row[0] for row in db_session.query(VehicleListing.id).order_by(VehicleListing.id)]
+        db_session.add(PriceHistory(vehicle_id=ids[0], price=19000.0, recorded_at=OLD))
+        db_session.commit()
+        retention_engine, _ = engine(db_session, archive_format="jsonl")
+        retention_engine.archive_dir = str(tmp_path)
+
+        result = retention_engine.purge(data_policies(365)[2])
+
+        assert (result.rows, result.archived) == (4, 5)  # listings and their price history
+        by_table = {path.rsplit("-", 1)[-1]: path for path in result.archive_files}
+        assert sorted(by_table) == ["price_history.jsonl.gz", "vehicle_listings.jsonl.gz"]
+        with gzip.open(by_table["vehicle_listings.jsonl.gz"], "rt") as archive:
+            rows = [json.loads(line) for line in archive]
+        assert [row["id"] for row in rows] == ids
+        assert rows[0]["scraped_at"].startswith(OLD.date().isoformat())
+
+    def test_parquet_falls_back_without_pyarrow(self, db_session, tmp_path, monkeypatch):
+        monkeypatch.setattr(retention, "PYARROW_AVAILABLE", False)
+        db_session.add(ScrapingLog(session_id="s", source_url="https://example.com", status="success",
+                                   started_at=OLD))
+        db_session.commit()
+
+        result = RetentionEngine(db_session, archive_dir=str(tmp_path), archive_format="parquet",
+                                 pause_seconds=0).purge(data_policies(365)[0])
+
+        assert result.archived == 1
+        assert result.archive_files[0].endswith("scraping_logs.jsonl.gz")
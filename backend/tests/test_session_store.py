@@ -0,0 +1,138 @@
+"""
+Session Store Tests
+
+This module contains tests for persisting and sharing authenticated scraper
+sessions between SessionManager instances (i.e. worker processes).
+"""
+
+import os
+import stat
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.scraper.ayvens_auth import AyvensAuthenticator
+from app.scraper.session_manager import SessionManager
+from app.scraper.session_store import FileSessionStore, serialize_cookies, restore_cookies
+
+
+class FakeAuthenticator(AyvensAuthenticator):
+    """Authenticator with the network calls replaced"""
+
+    def __init__(self, probe_ok=True):
+        super().__init__()
+        self.probe_ok = probe_ok
+        self.logins = 0
+        self.probes = 0
+
+    def authenticate(self):
+        self.logins += 1
+        self.session.cookies.set("sessionid", f"login-{self.logins}", domain="carmarket.ayvens.com")
+        self.tokens = {"csrf_token": "abc"}
+        self.is_authenticated = True
+        self.auth_expires_at = datetime.utcnow() + timedelta(hours=2)
+        self.last_auth_check = datetime.utcnow()
+        return {"success": True, "authenticated": True, "session_expires_at": self.auth_expires_at.isoformat()}
+
+    def _verify_session(self):
+        self.probes += 1
+        self.last_auth_check = datetime.utcnow()
+        if not self.probe_ok:
+            self.is_authenticated = False
+        return self.probe_ok
+
+    def logout(self):
+        self.session.cookies.clear()
+        self.is_authenticated = False
+        self.auth_expires_at = None
+        self.last_auth_check = None
+        self.tokens = {}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileSessionStore(tmp_path / "ayvens_session.json")
+
+
+class TestSessionStore:
+    """Test cookie serialization and the file store"""
+
+    def test_cookie_round_trip_skips_expired(self):
+        source = FakeAuthenticator().session.cookies
+        source.set("sessionid", "s1", domain="carmarket.ayvens.com", path="/")
+        source.set("old", "x", domain="carmarket.ayvens.com", expires=int(time.time()) - 10)
+        source.set("remember", "r", domain=".ayvens.com", expires=int(time.time()) + 3600, secure=True)
+
+        target = FakeAuthenticator().session.cookies
+        restored = restore_cookies(target, serialize_cookies(source))
+
+        assert restored == 2
+        assert target.get("sessionid", domain="carmarket.ayvens.com") == "s1"
+        assert target.get("remember", domain=".ayvens.com") == "r"
+
+    def test_file_is_private(self, store):
+        store.save({"cookies": []})
+
+        assert store.load() == {"cookies": []}
+        assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+
+class TestSessionManagerPersistence:
+    """Test login reuse across session managers"""
+
+    def test_second_worker_reuses_login(self, store):
+        first = SessionManager(store=store, authenticator=FakeAuthenticator())
+        assert first.ensure_authenticated()["success"]
+        assert first.authenticator.logins == 1
+
+        stored = store.load()
+        assert stored["tokens"] == {"csrf_token": "abc"}
+        assert stored["cookies"][0]["value"] == "login-1"
+
+        second = SessionManager(store=store, authenticator=FakeAuthenticator())
+        result = second.ensure_authenticated()
+
+        assert result["success"]
+        assert second.authenticator.logins == 0
+        assert second.authenticator.probes == 1
+        assert second.authenticator.tokens == {"csrf_token": "abc"}
+        assert second.authenticator.session.cookies.get("sessionid") == "login-1"
+
+        # Already probed, no further requests
+        second.ensure_authenticated()
+        assert second.authenticator.probes == 1
+
+    def test_rejected_session_triggers_login(self, store):
+        SessionManager(store=store, authenticator=FakeAuthenticator()).ensure_authenticated()
+
+        worker = SessionManager(store=store, authenticator=FakeAuthenticator(probe_ok=False))
+        result = worker.ensure_authenticated()
+
+        assert result["success"]
+        assert worker.authenticator.probes == 1
+        assert worker.authenticator.logins == 1
+        assert store.load()["cookies"][0]["value"] == "login-1"
+        assert store.load()["authenticated_at"] == worker.session_data["authenticated_at"]
+
+    def test_expired_session_is_not_restored(self, store):
+        store.save({
+            "authenticated_at": "2024-01-01T00:00:00",
+            "expires_at": "2024-01-01T02:00:00",
+            "cookies": [{"name": "sessionid", "value": "old", "domain": "carmarket.ayvens.com",
+                         "path": "/", "secure": False, "expires": None, "rest": {}}],
+        })
+
+        worker = SessionManager(store=store, authenticator=FakeAuthenticator())
+
+        assert worker.restored_count == 0
+        assert worker.ensure_authenticated()["success"]
+        assert worker.authenticator.logins == 1
+
+    def test_clear_session_removes_store(self, store):
+        manager = SessionManager(store=store, authenticator=FakeAuthenticator())
+        manager.ensure_authenticated()
+
+        manager.clear_session()
+
+        assert store.load() is None
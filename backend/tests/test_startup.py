@@ -0,0 +1,76 @@
+"""
+Startup Tests
+
+This module contains tests for keeping the API import fast: no database
+work and no scraper or Firebase imports until they are needed.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+from sqlalchemy import create_engine, inspect
+
+from app import init_db
+from app.models import base
+from app.services import firebase_service
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestImport:
+    """Test what importing the API does"""
+
+    def test_import_skips_database_and_lazy_modules(self, tmp_path):
+        code = ("import json, sys, app.main; "
+                "print(json.dumps(sorted(m for m in ('bs4', 'lxml', 'firebase_admin', 'app.background_scraper') "
+                "if m in sys.modules)))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                                env={"PYTHONPATH": str(BACKEND_DIR), "PATH": "", "LOG_TO_FILE": "false"})
+
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout.splitlines()[-1]) == []
+        # No SQLite fallback database was opened or created
+        assert not (tmp_path / "auto_scouter.db").exists()
+
+
+class TestInitDatabase:
+    """Test the startup database step"""
+
+    def test_creates_tables(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'init.db'}")
+        monkeypatch.setattr(base, "engine", engine)
+
+        base.init_database()
+
+        assert base.get_engine() is engine
+        assert {"vehicle_listings", "notifications", "scheduled_jobs"} <= set(inspect(engine).get_table_names())
+
+    def test_falls_back_without_creating_tables(self, tmp_path, monkeypatch):
+        unreachable = Mock()
+        unreachable.dialect.name = "postgresql"
+        unreachable.connect.side_effect = OSError("connection refused")
+        fallback = create_engine(f"sqlite:///{tmp_path / 'fallback.db'}")
+        monkeypatch.setattr(base, "engine", unreachable)
+        monkeypatch.setattr(base, "_create_sqlite_engine", lambda: fallback)
+        monkeypatch.setattr(base.SessionLocal, "kw", dict(base.SessionLocal.kw))
+
+        init_db.init_db(create_tables=False)
+
+        assert base.get_engine() is fallback
+        assert base.SessionLocal.kw["bind"] is fallback
+        assert inspect(fallback).get_table_names() == []
+
+
+class TestFirebaseService:
+    """Test that Firebase is initialized on first use"""
+
+    def test_service_created_once_on_first_use(self, monkeypatch):
+        monkeypatch.setattr(firebase_service, "_firebase_service", None)
+
+        service = firebase_service.get_firebase_service()
+
+        assert firebase_service.get_firebase_service() is service
+        assert service.get_service_status()["firebase_available"] == firebase_service.FIREBASE_AVAILABLE
@@ -0,0 +1,143 @@
+"""
+Tracing Tests
+
+This module contains tests for tracing spans, their OTLP/JSON file export
+and the on-demand profiler armed through the maintenance endpoints.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+
+import pytest
+
+from app.core import profiling, tracing
+from app.core.profiling import OnDemandProfiler
+from app.core.tracing import OTLPFileExporter, Tracer, current_span, span, traced
+
+
+@pytest.fixture
+def exported(tmp_path, monkeypatch):
+    """Trace everything into a temporary file; returns a reader of the exported traces"""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.tracer, "enabled", True)
+    monkeypatch.setattr(tracing.tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(tracing.tracer, "exporter", OTLPFileExporter(str(path)))
+
+    def read():
+        if not path.exists():
+            return []
+        return [[s for rs in json.loads(line)["resourceSpans"] for ss in rs["scopeSpans"] for s in ss["spans"]]
+                for line in path.read_text().splitlines()]
+    return read
+
+
+class TestSpans:
+    """Test span nesting and export"""
+
+    def test_nested_spans_export_one_trace(self, exported):
+        with span("scrape.cycle", root=True, mode="incremental"):
+            with span("scrape.fetch"):
+                pass
+            with pytest.raises(ValueError):
+                with span("scrape.parse", page=2):
+                    raise ValueError("bad page")
+
+        (trace,) = exported()
+        by_name = {s["name"]: s for s in trace}
+        root = by_name["scrape.cycle"]
+        assert "parentSpanId" not in root
+        assert {s["traceId"] for s in trace} == {root["traceId"]}
+        assert by_name["scrape.fetch"]["parentSpanId"] == root["spanId"]
+        assert by_name["scrape.parse"]["status"] == {"code": 2, "message": "ValueError: bad page"}
+        assert by_name["scrape.parse"]["attributes"] == [{"key": "page", "value": {"intValue": "2"}}]
+        assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+
+    def test_child_spans_outside_a_trace_are_noops(self, exported):
+        with span("scrape.fetch") as fetch:
+            fetch.set("url", "https://example.com")
+            assert current_span() is tracing.NOOP_SPAN
+
+        assert exported() == []
+
+    def test_disabled_or_unsampled_tracer_records_nothing(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        for tracer in (Tracer(enabled=False, exporter=OTLPFileExporter(str(path))),
+                       Tracer(enabled=True, sample_rate=0.0, exporter=OTLPFileExporter(str(path)))):
+            with tracer.span("scrape.cycle", root=True) as root:
+                assert root is tracing.NOOP_SPAN
+
+        assert not path.exists()
+
+    def test_decorator_follows_threads_and_tasks(self, exported):
+        @traced("match")
+        def match():
+            return current_span().name
+
+        @traced("scrape.cycle", root=True)
+        async def cycle():
+            names = [await asyncio.to_thread(match)]
+            # Pipeline stages run in copies of the cycle's context
+            stage = threading.Thread(target=contextvars.copy_context().run,
+                                     args=(lambda: names.append(match()),))
+            stage.start()
+            stage.join()
+            return names
+
+        assert asyncio.run(cycle()) == ["match", "match"]
+        (trace,) = exported()
+        assert sorted(s["name"] for s in trace) == ["match", "match", "scrape.cycle"]
+
+
+class TestProfiler:
+    """Test one-shot profiling of armed runs"""
+
+    def test_profiles_only_the_armed_run(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling, "PYINSTRUMENT_AVAILABLE", False)
+        monkeypatch.setattr(tracing, "profiler", OnDemandProfiler(str(tmp_path)))
+        tracing.profiler.arm("scrape.cycle")
+
+        with span("match.listing", root=True):
+            pass
+        assert tracing.profiler.armed
+        with span("scrape.cycle", root=True):
+            sum(i * i for i in range(200000))
+
+        (report,) = tracing.profiler.status()["reports"]
+        assert not tracing.profiler.armed
+        assert report["target"] == "scrape.cycle"
+        assert sorted(name.rsplit(".", 1)[-1] for name in report["files"]) == ["folded", "txt"]
+        assert "samples every" in (tmp_path / report["files"][1].rsplit("/", 1)[-1]).read_text()
+
+    def test_request_path_prefix(self, tmp_path):
+        profiler = OnDemandProfiler(str(tmp_path))
+        profiler.arm("request", "/api/v1/automotive/vehicles")
+
+        assert profiler.take("request", "/api/v1/alerts") is None
+        assert profiler.take("request", "/api/v1/automotive/vehicles/1").path_prefix == "/api/v1/automotive/vehicles"
+        assert profiler.take("request", "/api/v1/automotive/vehicles/1") is None
+
+
+class TestProfileEndpoints:
+    """Test arming the profiler for a request through the API"""
+
+    def test_profile_next_request(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling, "PYINSTRUMENT_AVAILABLE", False)
+        monkeypatch.setattr(profiling.profiler, "output_dir", str(tmp_path))
+        monkeypatch.setattr(profiling.profiler, "reports", type(profiling.profiler.reports)(maxlen=5))
+
+        assert client.post("/api/v1/automotive/maintenance/profile", params={"target": "nope"}).status_code == 400
+        armed = client.post("/api/v1/automotive/maintenance/profile",
+                            params={"target": "request", "path": "/api/v1/automotive/makes"}).json()
+        assert armed["armed"]["path_prefix"] == "/api/v1/automotive/makes"
+
+        client.get("/api/v1/automotive/makes")
+
+        status = client.get("/api/v1/automotive/maintenance/profile").json()
+        assert status["armed"] is None
+        (report,) = status["reports"]
+        assert report["label"] == "/api/v1/automotive/makes"
+        name = report["files"][0].rsplit("/", 1)[-1]
+        assert client.get(f"/api/v1/automotive/maintenance/profile/{name}").status_code == 200
+        assert client.get("/api/v1/automotive/maintenance/profile/other.txt").status_code == 404
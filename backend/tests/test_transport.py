@@ -0,0 +1,121 @@
+"""
+HTTP Transport Tests
+
+This module contains tests for the shared scraper HTTP transport: pool
+sharing between sessions, default timeouts and the DNS cache.
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.util.request import ACCEPT_ENCODING
+
+from app.scraper.transport import HttpTransport, DNSCache
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestHttpTransport:
+    """Test shared transport behaviour"""
+
+    def test_sessions_share_connections(self, server):
+        transport = HttpTransport(dns_cache_ttl=0)
+        scraper_session = transport.create_session({"User-Agent": "scraper"})
+        image_session = transport.create_session()
+
+        for session in (scraper_session, image_session, scraper_session):
+            assert session.get(f"{server}/page").status_code == 200
+
+        stats = transport.get_stats()
+        assert stats["sessions_created"] == 2
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+        assert stats["reused_connections"] == 2
+        assert stats["tls_handshakes"] == 0
+
+    def test_sessions_keep_own_headers_and_cookies(self):
+        transport = HttpTransport(dns_cache_ttl=0)
+        first = transport.create_session({"User-Agent": "a", "Accept-Encoding": "gzip, deflate, br, zstd"})
+        second = transport.create_session({"User-Agent": "b"})
+        first.cookies.set("session", "1")
+
+        assert first.headers["User-Agent"] == "a"
+        assert second.headers["User-Agent"] == "b"
+        assert "session" not in second.cookies
+        assert first.adapters["https://"] is second.adapters["https://"]
+        # Only encodings urllib3 can decode are advertised
+        assert first.headers["Accept-Encoding"] == ACCEPT_ENCODING
+
+    def test_default_timeout(self):
+        transport = HttpTransport(connect_timeout=3, read_timeout=7, dns_cache_ttl=0)
+        assert transport.adapter.default_timeout == (3, 7)
+
+
+class TestDNSCache:
+    """Test the getaddrinfo TTL cache"""
+
+    def test_lookups_are_cached(self):
+        calls = []
+        cache = DNSCache(ttl_seconds=60, resolver=lambda *args: calls.append(args) or [("resolved",)])
+
+        assert cache.getaddrinfo("example.com", 443) == [("resolved",)]
+        assert cache.getaddrinfo("example.com", 443) == [("resolved",)]
+        cache.getaddrinfo("example.org", 443)
+
+        assert len(calls) == 2
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 2
+
+    def test_failures_are_not_cached(self):
+        def fail(*args):
+            raise OSError("no such host")
+
+        cache = DNSCache(ttl_seconds=60, resolver=fail)
+        with pytest.raises(OSError):
+            cache.getaddrinfo("missing.invalid", 443)
+        assert cache.get_stats()["entries"] == 0
+
+    def test_transport_connections_use_the_cache(self, server):
+        lookups = []
+
+        def resolve(host, *args):
+            lookups.append(host)
+            return socket.getaddrinfo("127.0.0.1", *args)
+
+        transport = HttpTransport(dns_cache_ttl=60)
+        transport.dns_cache._resolver = resolve
+        port = server.rsplit(":", 1)[1]
+        first, second = transport.create_session(), transport.create_session()
+        first.headers["Connection"] = second.headers["Connection"] = "close"
+
+        for session in (first, second):
+            assert session.get(f"http://scraper.test:{port}/page").status_code == 200
+
+        assert lookups == ["scraper.test"]
+        assert transport.get_stats()["dns_cache"]["hits"] == 1
+        # The process-wide resolver is untouched
+        assert socket.getaddrinfo is not transport.dns_cache.getaddrinfo